@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+访问与交互日志的增量汇总
+/api/visit/province-stats 与 /api/interaction/summary 每次请求都要遍历整份
+data/visit-logs.json / data/interaction-events.json 重新聚合。本脚本流式读取这两份日志，
+把按天、按省份的访问数，HyperLogLog 独立 IP 估计，以及按 eventType / target 的点击漏斗
+写成一份紧凑的汇总文件（data/analytics-rollup.json）；服务端读取汇总后只需补算检查点之后的新记录。
+
+每份日志各有一个检查点（已处理条数、最后一条的 id、字节偏移）：服务端总是整份重写 JSON 数组，
+只要检查点之前的内容没变，下次从字节偏移处续读，只解析新追加的记录；
+偏移校验失败时从头流式扫描，前缀与检查点一致则跳过已处理部分，否则（日志被清空或改写）重建。
+
+子命令:
+    update    处理新记录并写回汇总文件（可放进 crontab 定时运行）
+    show      打印汇总内容
+    bench     用合成日志对比全量聚合、首次汇总与增量汇总的耗时，以及独立 IP 估计误差
+
+使用方法:
+    python scripts/analytics_rollup.py update
+    python scripts/analytics_rollup.py update --rebuild
+    python scripts/analytics_rollup.py show --days 7
+    python scripts/analytics_rollup.py bench --records 200000
+"""
+
+import argparse
+import base64
+import codecs
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / 'data'
+VISIT_LOGS_FILE = DATA_DIR / 'visit-logs.json'
+INTERACTION_EVENTS_FILE = DATA_DIR / 'interaction-events.json'
+ROLLUP_FILE = DATA_DIR / 'analytics-rollup.json'
+
+ROLLUP_VERSION = 1
+# 2^12 个寄存器，标准误差约 1.04 / √4096 ≈ 1.6%；须与 server/services/analytics-rollup.js 一致
+HLL_PRECISION = 12
+CHUNK_SIZE = 1 << 20
+# 检查点记录偏移前这么多字节的 CRC，用来确认续读位置之前的内容没有被改写
+TAIL_CHECK_BYTES = 64
+UNKNOWN = '未知'
+
+_SEPARATORS = frozenset(' \t\r\n,[')
+
+
+# =====================================================
+# HyperLogLog
+# =====================================================
+
+class HyperLogLog:
+    """
+    独立 IP 计数的 HyperLogLog：取 MD5 的前 64 位，高 precision 位选寄存器，
+    其余位的前导零个数 + 1 写入寄存器。寄存器按 zlib + base64 存储，访问量小时几乎全是 0，压缩后只有几十字节。
+
+    估计值与编码结果在寄存器变化前一直缓存：增量汇总时没有新记录的日期不必重新计算与压缩。
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytearray] = None,
+                 encoded: Optional[str] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        self._encoded = encoded
+        self._count: Optional[int] = None
+
+    def add(self, value: str):
+        h = int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._encoded = self._count = None
+
+    def merge(self, other: 'HyperLogLog'):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._encoded = self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            m = self.size
+            histogram = Counter(self.registers)
+            estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(n * 2.0 ** -r for r, n in histogram.items())
+            # 小基数时用线性计数修正
+            if estimate <= 2.5 * m and histogram[0]:
+                estimate = m * math.log(m / histogram[0])
+            self._count = int(round(estimate))
+        return self._count
+
+    def dumps(self) -> str:
+        if self._encoded is None:
+            self._encoded = base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii')
+        return self._encoded
+
+    @classmethod
+    def loads(cls, data: str, precision: int = HLL_PRECISION) -> 'HyperLogLog':
+        registers = bytearray(zlib.decompress(base64.b64decode(data)))
+        if len(registers) != 1 << precision:
+            raise ValueError('HyperLogLog 寄存器长度与精度不符')
+        return cls(precision, registers, encoded=data)
+
+
+# =====================================================
+# 流式读取
+# =====================================================
+
+class LogStream:
+    """
+    流式读取服务端写出的 JSON 数组日志（JSON.stringify(logs, null, 2)），逐条产出记录，内存只占一个读块
+
+    文件在构造时打开，stat 与校验、读取都基于同一个文件句柄，服务端中途替换文件也不会读到两个版本。
+    """
+
+    def __init__(self, path: Path, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.file = open(self.path, 'rb')
+        self.stat = os.fstat(self.file.fileno())
+        self.chunk_size = chunk_size
+        self.end_offset = 0
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tail_crc(self, offset: int) -> int:
+        """offset 之前 TAIL_CHECK_BYTES 字节的 CRC32"""
+        start = max(0, offset - TAIL_CHECK_BYTES)
+        self.file.seek(start)
+        return zlib.crc32(self.file.read(offset - start))
+
+    def records(self, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        从字节偏移 offset 处开始产出记录；遍历结束后 end_offset 为最后一条记录结束处的字节偏移，
+        即下次续读的位置（其后只剩 "\\n]"）
+        """
+        raw_decode = json.JSONDecoder().raw_decode
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        self.file.seek(offset)
+        # base：buf[0] 在文件中的字节偏移；last_end：buf 中最后一条记录的结束位置
+        buf, pos, last_end, base, eof = '', 0, 0, offset, False
+        while True:
+            while pos < len(buf) and buf[pos] in _SEPARATORS:
+                pos += 1
+            if pos < len(buf):
+                if buf[pos] == ']':
+                    break
+                try:
+                    record, end = raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise ValueError(f'{self.path.name} 不是完整的 JSON 数组（偏移 {base} 附近）')
+                else:
+                    pos = last_end = end
+                    yield record
+                    continue
+            elif eof:
+                break
+            chunk = self.file.read(self.chunk_size)
+            eof = not chunk
+            if last_end:
+                base += len(buf[:last_end].encode('utf-8'))
+                buf, pos, last_end = buf[last_end:], pos - last_end, 0
+            buf += decoder.decode(chunk, final=eof)
+        self.end_offset = base + len(buf[:last_end].encode('utf-8'))
+
+
+class LogRewritten(Exception):
+    """日志在检查点之前的内容已变化（被清空、截断或改写）"""
+
+
+# =====================================================
+# 汇总
+# =====================================================
+
+def _date_order(date: str):
+    """按日期排序，没有日期的记录（UNKNOWN）排在所有日期之前"""
+    return (date != UNKNOWN, date)
+
+
+def _empty_checkpoint() -> Dict[str, Any]:
+    return {'processed': 0, 'lastId': None, 'offset': 0, 'tailCrc': 0, 'size': 0, 'mtimeMs': 0}
+
+
+class LogRollup:
+    """单份日志的汇总与检查点；子类实现 reset / add / to_dict / from_dict"""
+
+    name = ''
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.checkpoint = _empty_checkpoint()
+        self.reset()
+
+    def reset(self):
+        raise NotImplementedError
+
+    def add(self, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def hll(self, data: Optional[str] = None) -> HyperLogLog:
+        return HyperLogLog.loads(data, self.precision) if data else HyperLogLog(self.precision)
+
+    def _consume(self, stream: LogStream, offset: int, skip: int) -> int:
+        """从 offset 读取，前 skip 条只校验不计入；返回新处理的条数"""
+        processed, index, last_id = 0, -1, self.checkpoint['lastId']
+        for index, record in enumerate(stream.records(offset)):
+            if index < skip:
+                if index == skip - 1 and record.get('id') != last_id:
+                    raise LogRewritten()
+                continue
+            self.add(record)
+            processed += 1
+            last_id = record.get('id')
+        if index + 1 < skip:
+            raise LogRewritten()
+        self.checkpoint['lastId'] = last_id
+        return processed
+
+    def update(self, path: Path, rebuild: bool = False) -> Dict[str, Any]:
+        """处理日志中检查点之后的记录，返回 {mode, processed, total}"""
+        if rebuild:
+            self.reset()
+            self.checkpoint = _empty_checkpoint()
+        if not Path(path).exists():
+            return {'mode': 'missing', 'processed': 0, 'total': self.checkpoint['processed']}
+
+        with LogStream(path) as stream:
+            checkpoint = self.checkpoint
+            offset = checkpoint['offset']
+            if (checkpoint['processed'] and offset and stream.stat.st_size >= offset
+                    and stream.tail_crc(offset) == checkpoint['tailCrc']):
+                mode, processed = 'resume', self._consume(stream, offset, 0)
+            else:
+                try:
+                    mode, processed = ('scan' if checkpoint['processed'] else 'full'), \
+                        self._consume(stream, 0, checkpoint['processed'])
+                except LogRewritten:
+                    self.reset()
+                    self.checkpoint = _empty_checkpoint()
+                    mode, processed = 'rebuild', self._consume(stream, 0, 0)
+
+            self.checkpoint.update({
+                'processed': self.checkpoint['processed'] + processed,
+                'offset': stream.end_offset,
+                'tailCrc': stream.tail_crc(stream.end_offset),
+                'size': stream.stat.st_size,
+                'mtimeMs': round(stream.stat.st_mtime_ns / 1e6, 3)
+            })
+        return {'mode': mode, 'processed': processed, 'total': self.checkpoint['processed']}
+
+
+class VisitRollup(LogRollup):
+    """访问日志：总数、各省份访问数、按天（UTC，与 /api/visit/track 的去重口径一致）的访问数与独立 IP"""
+
+    name = 'visits'
+
+    def reset(self):
+        self.total = 0
+        self.provinces: Dict[str, int] = {}
+        self.unique_ips = HyperLogLog(self.precision)
+        self.days: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, log: Dict[str, Any]):
+        province = log.get('province') or UNKNOWN
+        ip = str(log.get('ip') or 'unknown')
+        date = str(log.get('date') or '')[:10] or UNKNOWN
+        day = self.days.get(date)
+        if day is None:
+            day = self.days[date] = {'visits': 0, 'provinces': {}, 'hll': HyperLogLog(self.precision)}
+        self.total += 1
+        self.provinces[province] = self.provinces.get(province, 0) + 1
+        self.unique_ips.add(ip)
+        day['visits'] += 1
+        day['provinces'][province] = day['provinces'].get(province, 0) + 1
+        day['hll'].add(ip)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'checkpoint': self.checkpoint,
+            'total': self.total,
+            'provinces': dict(sorted(self.provinces.items(), key=lambda item: -item[1])),
+            'uniqueIps': self.unique_ips.count(),
+            'hll': self.unique_ips.dumps(),
+            'days': {
+                date: {'visits': day['visits'], 'provinces': day['provinces'],
+                       'uniqueIps': day['hll'].count(), 'hll': day['hll'].dumps()}
+                for date, day in sorted(self.days.items(), key=lambda item: _date_order(item[0]))
+            }
+        }
+
+    def from_dict(self, data: Dict[str, Any]):
+        self.checkpoint = {**_empty_checkpoint(), **data.get('checkpoint', {})}
+        self.total = data.get('total', 0)
+        self.provinces = dict(data.get('provinces', {}))
+        self.unique_ips = self.hll(data.get('hll'))
+        self.days = {date: {'visits': day['visits'], 'provinces': dict(day['provinces']), 'hll': self.hll(day['hll'])}
+                     for date, day in data.get('days', {}).items()}
+
+
+class InteractionRollup(LogRollup):
+    """
+    交互事件：按 日期 + eventType + eventLabel 分组的点击数与独立访客（与 /api/interaction/summary 同口径），
+    以及每个 eventType 下各 target 的点击漏斗（点击数、独立访客、来源页面 pagePath 分布）
+    """
+
+    name = 'interactions'
+
+    def reset(self):
+        self.total = 0
+        self.days: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.funnels: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def add(self, event: Dict[str, Any]):
+        event_type = event.get('eventType') or ''
+        label = event.get('eventLabel') or ''
+        target = event.get('target') or ''
+        ip = str(event.get('ip') or 'unknown')
+        created_at = event.get('createdAt') or ''
+        self.total += 1
+
+        groups = self.days.setdefault(event.get('date') or UNKNOWN, {})
+        group = groups.get(f'{event_type}\u0000{label}')
+        if group is None:
+            group = groups[f'{event_type}\u0000{label}'] = {
+                'eventType': event_type, 'eventLabel': label, 'target': target,
+                'clicks': 0, 'lastOccurredAt': created_at, 'hll': HyperLogLog(self.precision)}
+        group['clicks'] += 1
+        group['hll'].add(ip)
+        if created_at > group['lastOccurredAt']:
+            group['lastOccurredAt'] = created_at
+
+        step = self.funnels.setdefault(event_type, {}).get(target)
+        if step is None:
+            step = self.funnels[event_type][target] = {'clicks': 0, 'hll': HyperLogLog(self.precision), 'from': {}}
+        page = event.get('pagePath') or ''
+        step['clicks'] += 1
+        step['hll'].add(ip)
+        step['from'][page] = step['from'].get(page, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'checkpoint': self.checkpoint,
+            'total': self.total,
+            'days': {
+                date: [{**{k: v for k, v in group.items() if k != 'hll'},
+                        'uniqueVisitors': group['hll'].count(), 'hll': group['hll'].dumps()}
+                       for group in sorted(groups.values(), key=lambda group: -group['clicks'])]
+                for date, groups in sorted(self.days.items(), key=lambda item: _date_order(item[0]))
+            },
+            'funnels': {
+                event_type: {
+                    target: {'clicks': step['clicks'], 'uniqueVisitors': step['hll'].count(),
+                             'hll': step['hll'].dumps(),
+                             'from': dict(sorted(step['from'].items(), key=lambda item: -item[1]))}
+                    for target, step in sorted(steps.items(), key=lambda item: -item[1]['clicks'])
+                }
+                for event_type, steps in sorted(self.funnels.items())
+            }
+        }
+
+    def from_dict(self, data: Dict[str, Any]):
+        self.checkpoint = {**_empty_checkpoint(), **data.get('checkpoint', {})}
+        self.total = data.get('total', 0)
+        self.days = {
+            date: {f'{group["eventType"]}\u0000{group["eventLabel"]}': {
+                'eventType': group['eventType'], 'eventLabel': group['eventLabel'], 'target': group['target'],
+                'clicks': group['clicks'], 'lastOccurredAt': group['lastOccurredAt'], 'hll': self.hll(group['hll'])}
+                for group in groups}
+            for date, groups in data.get('days', {}).items()
+        }
+        self.funnels = {
+            event_type: {target: {'clicks': step['clicks'], 'hll': self.hll(step['hll']), 'from': dict(step['from'])}
+                         for target, step in steps.items()}
+            for event_type, steps in data.get('funnels', {}).items()
+        }
+
+
+class AnalyticsRollup:
+    """汇总文件：visits 与 interactions 两部分，各自带检查点"""
+
+    def __init__(self, path: Path = ROLLUP_FILE):
+        self.path = Path(path)
+        self.visits = VisitRollup()
+        self.interactions = InteractionRollup()
+        self.generated_at: Optional[str] = None
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # 版本或精度变化时旧汇总不可复用，保持为空，下次 update 全量重建
+            if data.get('version') == ROLLUP_VERSION and data.get('hllPrecision') == HLL_PRECISION:
+                self.visits.from_dict(data.get('visits', {}))
+                self.interactions.from_dict(data.get('interactions', {}))
+                self.generated_at = data.get('generatedAt')
+
+    def update(self, visit_logs: Path = VISIT_LOGS_FILE, interaction_events: Path = INTERACTION_EVENTS_FILE,
+               rebuild: bool = False) -> Dict[str, Dict[str, Any]]:
+        return {
+            'visits': self.visits.update(visit_logs, rebuild),
+            'interactions': self.interactions.update(interaction_events, rebuild)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': ROLLUP_VERSION,
+            'hllPrecision': HLL_PRECISION,
+            'generatedAt': self.generated_at,
+            'visits': self.visits.to_dict(),
+            'interactions': self.interactions.to_dict()
+        }
+
+    def save(self):
+        """原子写入：先写同目录临时文件再替换，服务端不会读到半个文件"""
+        self.generated_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self.path)
+
+
+# =====================================================
+# 命令行
+# =====================================================
+
+MODE_LABELS = {
+    'resume': '按偏移续读', 'scan': '从头扫描（跳过已处理部分）', 'full': '首次全量',
+    'rebuild': '日志已改写，重建', 'missing': '文件不存在，跳过'
+}
+
+
+def cmd_update(args) -> int:
+    rollup = AnalyticsRollup(args.output)
+    started = time.perf_counter()
+    result = rollup.update(Path(args.visit_logs), Path(args.interaction_events), rebuild=args.rebuild)
+    rollup.save()
+    elapsed = (time.perf_counter() - started) * 1000
+    for name, label in (('visits', '访问日志'), ('interactions', '交互事件')):
+        item = result[name]
+        print(f'  {label}：{MODE_LABELS[item["mode"]]}，新增 {item["processed"]} 条，累计 {item["total"]} 条')
+    print(f'✅ 已写入 {rollup.path}（{rollup.path.stat().st_size / 1024:.1f} KB，{elapsed:.1f} ms）')
+    return 0
+
+
+def cmd_show(args) -> int:
+    with open(args.output, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    visits, interactions = data['visits'], data['interactions']
+    print(f'📊 访问与交互汇总（生成于 {data.get("generatedAt")}）')
+    print(f'  访问记录 {visits["total"]} 条，独立 IP 约 {visits["uniqueIps"]} 个')
+    for province, count in list(visits['provinces'].items())[:args.top]:
+        print(f'    {province:<10} {count:>8}')
+
+    print(f'\n  最近 {args.days} 天：')
+    dates = sorted(date for date in visits['days'] if date != UNKNOWN)[-args.days:]
+    # 没有日期的记录单独列在最后，不占用最近天数
+    if UNKNOWN in visits['days']:
+        dates.append(UNKNOWN)
+    for date in dates:
+        day = visits['days'][date]
+        clicks = sum(group['clicks'] for group in interactions['days'].get(date, []))
+        # 日期固定 10 列；「未知」两个汉字占 4 列，补齐后与日期对齐
+        label = date if date != UNKNOWN else UNKNOWN + ' ' * 6
+        print(f'    {label}  访问 {day["visits"]:>6}  独立 IP {day["uniqueIps"]:>6}  交互点击 {clicks:>6}')
+
+    print(f'\n  交互事件 {interactions["total"]} 条，点击漏斗：')
+    for event_type, steps in interactions['funnels'].items():
+        print(f'    [{event_type}]')
+        for target, step in list(steps.items())[:args.top]:
+            sources = '，'.join(f'{page or "（直接）"} {count}' for page, count in list(step['from'].items())[:3])
+            print(f'      → {target or "（空）":<24} 点击 {step["clicks"]:>6}  独立访客 {step["uniqueVisitors"]:>6}  来源 {sources}')
+    return 0
+
+
+def _synthetic_visits(count: int, rng: random.Random, start_id: int) -> List[Dict[str, Any]]:
+    provinces = ['广东省', '北京市', '上海市', '浙江省', '江苏省', '四川省', '湖北省', UNKNOWN]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    logs = []
+    for i in range(count):
+        created = start + timedelta(seconds=(start_id + i) * 37)
+        logs.append({
+            'id': int(created.timestamp() * 1000),
+            'ip': f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+            'province': rng.choice(provinces),
+            'country': '中国',
+            'date': created.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'userAgent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/147.0.0.0'
+        })
+    return logs
+
+
+def _write_logs(path: Path, logs: List[Dict[str, Any]]):
+    # 与服务端 writeJsonAtomic 的 JSON.stringify(data, null, 2) 格式一致
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(logs, f, ensure_ascii=False, indent=2)
+
+
+def cmd_bench(args) -> int:
+    rng = random.Random(args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix='analytics-rollup-'))
+    try:
+        logs_file, events_file = workdir / 'visit-logs.json', workdir / 'interaction-events.json'
+        logs = _synthetic_visits(args.records, rng, 0)
+        _write_logs(logs_file, logs)
+        _write_logs(events_file, [])
+        size_mb = logs_file.stat().st_size / 1e6
+        print(f'📊 增量汇总基准（合成访问日志 {args.records} 条，{size_mb:.1f} MB）')
+
+        # 现状：每次请求整份解析 + 聚合
+        started = time.perf_counter()
+        with open(logs_file, 'r', encoding='utf-8') as f:
+            provinces: Dict[str, int] = {}
+            for log in json.load(f):
+                provinces[log.get('province') or UNKNOWN] = provinces.get(log.get('province') or UNKNOWN, 0) + 1
+        full_ms = (time.perf_counter() - started) * 1000
+        print(f'  全量解析 + 聚合        {full_ms:>9.1f} ms')
+
+        rollup = AnalyticsRollup(workdir / 'analytics-rollup.json')
+        started = time.perf_counter()
+        rollup.update(logs_file, events_file)
+        rollup.save()
+        print(f'  首次汇总（流式）       {(time.perf_counter() - started) * 1000:>9.1f} ms')
+
+        appended = max(1, args.records * args.append_percent // 100)
+        logs += _synthetic_visits(appended, rng, args.records)
+        _write_logs(logs_file, logs)
+        started = time.perf_counter()
+        rollup = AnalyticsRollup(workdir / 'analytics-rollup.json')
+        result = rollup.update(logs_file, events_file)
+        rollup.save()
+        incremental_ms = (time.perf_counter() - started) * 1000
+        print(f'  增量汇总（+{appended} 条）  {incremental_ms:>9.1f} ms  '
+              f'{MODE_LABELS[result["visits"]["mode"]]}，约为全量的 1/{full_ms / max(incremental_ms, 1e-9):.0f}')
+
+        started = time.perf_counter()
+        with open(rollup.path, 'r', encoding='utf-8') as f:
+            stats = json.load(f)['visits']['provinces']
+        read_ms = (time.perf_counter() - started) * 1000
+        assert sum(stats.values()) == len(logs)
+        print(f'  读取汇总文件           {read_ms:>9.1f} ms（{rollup.path.stat().st_size / 1024:.1f} KB）')
+
+        exact = len({log['ip'] for log in logs})
+        estimate = rollup.visits.unique_ips.count()
+        print(f'  独立 IP：精确 {exact}，HyperLogLog 估计 {estimate}，误差 {abs(estimate - exact) / exact:.2%}')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='访问与交互日志的增量汇总')
+    parser.add_argument('-o', '--output', default=os.getenv('ANALYTICS_ROLLUP_FILE') or str(ROLLUP_FILE),
+                        help='汇总文件路径（默认 $ANALYTICS_ROLLUP_FILE 或 data/analytics-rollup.json）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update = subparsers.add_parser('update', help='处理新记录并写回汇总文件')
+    update.add_argument('--visit-logs', default=str(VISIT_LOGS_FILE), help='访问日志（默认 data/visit-logs.json）')
+    update.add_argument('--interaction-events', default=str(INTERACTION_EVENTS_FILE),
+                        help='交互事件日志（默认 data/interaction-events.json）')
+    update.add_argument('--rebuild', action='store_true', help='丢弃检查点，全量重建')
+
+    show = subparsers.add_parser('show', help='打印汇总内容')
+    show.add_argument('--days', type=int, default=7, help='列出最近几天（默认 7）')
+    show.add_argument('--top', type=int, default=10, help='省份与漏斗各列前几项（默认 10）')
+
+    bench = subparsers.add_parser('bench', help='合成日志上的全量 / 增量汇总耗时对比')
+    bench.add_argument('--records', type=int, default=200000, help='合成访问日志条数（默认 200000）')
+    bench.add_argument('--append-percent', type=int, default=1, help='增量部分占比（默认 1%%）')
+    bench.add_argument('--seed', type=int, default=0)
+
+    return parser.parse_args(argv)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    commands = {'update': cmd_update, 'show': cmd_show, 'bench': cmd_bench}
+    try:
+        sys.exit(commands[args.command](args))
+    except FileNotFoundError as e:
+        print(f'❌ 文件不存在: {e.filename}（先运行 update 生成汇总文件）')
+        sys.exit(1)
+    except ValueError as e:
+        print(f'❌ {e}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
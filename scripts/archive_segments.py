@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+归档分段存储
+把逐日的 JSON 归档（data/archive/daily/news-*.json、data/news-*.json、data/YYYY-MM-DD.json）
+与周报（data/weekly-news.json、data/archive/legacy/weekly-news.json）压缩成按月分段的 JSON Lines，
+并生成「分区 → 段文件 / 字节偏移 / 长度」的索引：
+- 每个分区（某一天或某一周）单独压缩成一个 gzip member / zstd frame，读取一天只需 seek + 解压这一段
+- 同一段文件内的分区首尾相接，整个文件仍是合法的 .gz / .zst，可以直接 zcat 查看
+- 同一日期出现在多个来源时按服务端 /api/news/date/:date 的优先级取一份
+
+使用方法:
+    python scripts/archive_segments.py compact                  # 生成 data/archive/segments/
+    python scripts/archive_segments.py compact --codec zstd     # 需安装 zstandard
+    python scripts/archive_segments.py dates                    # 列出所有日期与条数（只读索引）
+    python scripts/archive_segments.py read 2026-02-25
+    python scripts/archive_segments.py read 2026-02-18 2026-02-24 --count
+    python scripts/archive_segments.py verify                   # 与原始文件逐条比对
+    python scripts/archive_segments.py bench                    # 占用空间、冷读单日、全量扫描对比
+
+索引 data/archive/segments/index.json:
+    {"version": 1, "codec": "gzip", "partitions": {"2026-02-25": {"segment": "news-2026-02.jsonl.gz",
+     "offset": 0, "length": 8123, "count": 30, "raw_bytes": 41234, "source": "news-2026-02-25.json"}, ...}}
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bench_stats import percentile
+
+# 可选依赖：zstandard 提供 zstd 压缩
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / 'data'
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+CODECS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 9
+WEEKLY_PREFIX = 'weekly:'
+
+DAILY_ARCHIVE_PATTERN = re.compile(r'^news-(\d{4}-\d{2}-\d{2})\.json$')
+DATA_FILE_PATTERNS = (re.compile(r'^news-(\d{4}-\d{2}-\d{2})\.json$'), re.compile(r'^(\d{4}-\d{2}-\d{2})\.json$'))
+
+
+def segments_dir_for(data_dir: Path) -> Path:
+    return data_dir / 'archive' / 'segments'
+
+
+def _require_codec(codec: str):
+    if codec not in CODECS:
+        raise ValueError(f'不支持的压缩方式: {codec}（可用: {", ".join(CODECS)}）')
+    if codec == 'zstd' and zstandard is None:
+        raise ValueError('zstd 需要安装 zstandard（pip install zstandard）')
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    # mtime=0 让相同内容得到相同字节，重复压缩时段文件不变
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+# =====================================================
+# 读取原始归档
+# =====================================================
+
+def _articles_of(payload: Any) -> List[Dict[str, Any]]:
+    """归档文件是文章数组；data/YYYY-MM-DD.json 是带 articles 的日报对象"""
+    if isinstance(payload, dict):
+        payload = payload.get('articles') or []
+    return [item for item in payload if isinstance(item, dict)] if isinstance(payload, list) else []
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def source_files(data_dir: Path) -> Dict[str, Path]:
+    """
+    每个日期的原始文件：优先级与 /api/news/date/:date 一致，
+    archive/daily/news-D.json > data/news-D.json > data/D.json
+    """
+    sources: Dict[str, Path] = {}
+    daily_dir = data_dir / 'archive' / 'daily'
+    if daily_dir.is_dir():
+        for path in sorted(daily_dir.iterdir()):
+            match = DAILY_ARCHIVE_PATTERN.match(path.name)
+            if match:
+                sources[match.group(1)] = path
+    for pattern in DATA_FILE_PATTERNS:
+        for path in sorted(data_dir.iterdir()):
+            match = pattern.match(path.name)
+            if match:
+                sources.setdefault(match.group(1), path)
+    return dict(sorted(sources.items()))
+
+
+def weekly_files(data_dir: Path) -> List[Path]:
+    """周报文件：当前文件在前，同一 id 以当前文件为准"""
+    return [path for path in (data_dir / 'weekly-news.json', data_dir / 'archive' / 'legacy' / 'weekly-news.json')
+            if path.exists()]
+
+
+def load_weekly(paths: List[Path]) -> Dict[str, List[Dict[str, Any]]]:
+    """按 week_number 分组的周报文章"""
+    weeks: Dict[str, List[Dict[str, Any]]] = {}
+    seen = set()
+    for path in paths:
+        for article in _articles_of(_read_json(path)):
+            key = article.get('id', json.dumps(article, sort_keys=True, ensure_ascii=False))
+            if key in seen:
+                continue
+            seen.add(key)
+            weeks.setdefault(article.get('week_number') or 'unknown', []).append(article)
+    return dict(sorted(weeks.items()))
+
+
+# =====================================================
+# 压缩
+# =====================================================
+
+def _segment_name(partition: str, codec: str) -> str:
+    if partition.startswith(WEEKLY_PREFIX):
+        week = partition[len(WEEKLY_PREFIX):]
+        return f'weekly-{week[:4] if week[:4].isdigit() else "unknown"}{CODECS[codec]}'
+    return f'news-{partition[:7]}{CODECS[codec]}'
+
+
+def _encode_lines(articles: List[Dict[str, Any]]) -> bytes:
+    return ''.join(json.dumps(article, ensure_ascii=False, separators=(',', ':')) + '\n'
+                   for article in articles).encode('utf-8')
+
+
+def compact(data_dir: Path = DATA_DIR, output_dir: Optional[Path] = None, codec: str = 'gzip') -> Dict[str, Any]:
+    """
+    把全部归档压缩成分段文件并写入索引，返回索引
+
+    先在临时目录生成全部段文件与索引，再整体替换 output_dir，读取方不会看到写了一半的段。
+    """
+    _require_codec(codec)
+    output_dir = output_dir or segments_dir_for(data_dir)
+    partitions: Dict[str, Tuple[List[Dict[str, Any]], str]] = {}
+    for date, path in source_files(data_dir).items():
+        partitions[date] = (_articles_of(_read_json(path)), path.name)
+    for week, articles in load_weekly(weekly_files(data_dir)).items():
+        partitions[f'{WEEKLY_PREFIX}{week}'] = (articles, 'weekly-news.json')
+
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=output_dir.parent, prefix='.segments-'))
+    staging.chmod(0o755)
+    index: Dict[str, Any] = {'version': INDEX_VERSION, 'codec': codec,
+                             'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'partitions': {}}
+    handles: Dict[str, Any] = {}
+    try:
+        for partition, (articles, source) in partitions.items():
+            segment = _segment_name(partition, codec)
+            if segment not in handles:
+                handles[segment] = open(staging / segment, 'wb')
+            handle = handles[segment]
+            raw = _encode_lines(articles)
+            block = compress(raw, codec)
+            index['partitions'][partition] = {
+                'segment': segment,
+                'offset': handle.tell(),
+                'length': len(block),
+                'count': len(articles),
+                'raw_bytes': len(raw),
+                'source': source
+            }
+            handle.write(block)
+        for handle in handles.values():
+            handle.close()
+        with open(staging / INDEX_NAME, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+        if output_dir.exists():
+            retired = output_dir.with_name(f'.{output_dir.name}-old')
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(output_dir, retired)
+            os.replace(staging, output_dir)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, output_dir)
+    except BaseException:
+        for handle in handles.values():
+            handle.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return index
+
+
+# =====================================================
+# 读取分段
+# =====================================================
+
+class ArchiveStore:
+    """
+    分段归档的读取端：只加载索引，按偏移读取并解压需要的分区
+
+    Args:
+        segments_dir: 段文件与 index.json 所在目录
+    """
+
+    def __init__(self, segments_dir: Path = segments_dir_for(DATA_DIR)):
+        self.segments_dir = Path(segments_dir)
+        index = _read_json(self.segments_dir / INDEX_NAME)
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f'不支持的索引版本: {index.get("version")}')
+        self.codec = index['codec']
+        _require_codec(self.codec)
+        self.partitions: Dict[str, Dict[str, Any]] = index['partitions']
+
+    def dates(self) -> List[Dict[str, Any]]:
+        """所有日期与条数（新到旧），只读索引，不打开段文件"""
+        return [{'date': date, 'count': entry['count']}
+                for date, entry in sorted(self.partitions.items(), reverse=True)
+                if not date.startswith(WEEKLY_PREFIX)]
+
+    def weeks(self) -> List[str]:
+        return sorted(key[len(WEEKLY_PREFIX):] for key in self.partitions if key.startswith(WEEKLY_PREFIX))
+
+    def _decode(self, block: bytes) -> List[Dict[str, Any]]:
+        # 每行一个紧凑 JSON（行内不含换行），拼成一个数组一次解析，比逐行 json.loads 快
+        lines = decompress(block, self.codec).rstrip(b'\n')
+        return json.loads(b'[' + lines.replace(b'\n', b',') + b']') if lines else []
+
+    def read_partition(self, partition: str) -> List[Dict[str, Any]]:
+        entry = self.partitions.get(partition)
+        if not entry:
+            return []
+        with open(self.segments_dir / entry['segment'], 'rb') as f:
+            f.seek(entry['offset'])
+            return self._decode(f.read(entry['length']))
+
+    def read_day(self, date: str) -> List[Dict[str, Any]]:
+        """某一天的文章，没有该日期时返回空列表"""
+        return self.read_partition(date)
+
+    def read_week(self, week: str) -> List[Dict[str, Any]]:
+        return self.read_partition(f'{WEEKLY_PREFIX}{week}')
+
+    def iter_range(self, start: str, end: str) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """按日期升序产出 [start, end] 内每天的 (日期, 文章)；同一段文件只打开一次"""
+        wanted = [(date, entry) for date, entry in sorted(self.partitions.items())
+                  if not date.startswith(WEEKLY_PREFIX) and start <= date <= end]
+        handles: Dict[str, Any] = {}
+        try:
+            for date, entry in wanted:
+                if entry['segment'] not in handles:
+                    handles[entry['segment']] = open(self.segments_dir / entry['segment'], 'rb')
+                handle = handles[entry['segment']]
+                handle.seek(entry['offset'])
+                yield date, self._decode(handle.read(entry['length']))
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def scan(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """顺序读取全部分区（每个段文件整体读入一次）"""
+        by_segment: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for partition, entry in self.partitions.items():
+            by_segment.setdefault(entry['segment'], []).append((partition, entry))
+        for segment, entries in sorted(by_segment.items()):
+            with open(self.segments_dir / segment, 'rb') as f:
+                data = f.read()
+            for partition, entry in entries:
+                yield partition, self._decode(data[entry['offset']:entry['offset'] + entry['length']])
+
+    def files(self) -> List[Path]:
+        return [self.segments_dir / INDEX_NAME] + sorted(
+            {self.segments_dir / entry['segment'] for entry in self.partitions.values()})
+
+
+# =====================================================
+# 校验与基准
+# =====================================================
+
+def verify(data_dir: Path, store: ArchiveStore) -> List[str]:
+    """逐个分区与原始文件比对，返回不一致的分区"""
+    expected = {date: _articles_of(_read_json(path)) for date, path in source_files(data_dir).items()}
+    expected.update({f'{WEEKLY_PREFIX}{week}': articles
+                     for week, articles in load_weekly(weekly_files(data_dir)).items()})
+    mismatched = [partition for partition, articles in expected.items()
+                  if store.read_partition(partition) != articles]
+    mismatched += [partition for partition in store.partitions if partition not in expected]
+    return sorted(mismatched)
+
+
+def _drop_cache(paths: List[Path]):
+    """让内核丢弃这些文件的页缓存，模拟冷读（不支持时忽略）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def legacy_files(data_dir: Path) -> List[Path]:
+    return list(source_files(data_dir).values()) + weekly_files(data_dir)
+
+
+def legacy_read_day(data_dir: Path, date: str) -> List[Dict[str, Any]]:
+    """现有布局下读取一天：与服务端一致，列目录找到文件后整体解析"""
+    return _articles_of(_read_json(source_files(data_dir)[date]))
+
+
+def legacy_scan(data_dir: Path) -> int:
+    count = sum(len(_articles_of(_read_json(path))) for path in source_files(data_dir).values())
+    return count + sum(len(articles) for articles in load_weekly(weekly_files(data_dir)).values())
+
+
+def build_synthetic_archive(data_dir: Path, target_dir: Path, days: int) -> int:
+    """用现有的逐日归档轮流填充 days 天（日期从 2020-01-01 起），评估归档增长后的表现"""
+    from datetime import date as Date, timedelta
+
+    samples = [_articles_of(_read_json(path)) for path in source_files(data_dir).values()]
+    samples = [articles for articles in samples if articles]
+    if not samples:
+        raise ValueError(f'{data_dir} 中没有可用的逐日归档')
+    daily_dir = target_dir / 'archive' / 'daily'
+    daily_dir.mkdir(parents=True, exist_ok=True)
+    start = Date(2020, 1, 1)
+    for offset in range(days):
+        date = (start + timedelta(days=offset)).isoformat()
+        # 与服务端写归档相同的缩进格式
+        with open(daily_dir / f'news-{date}.json', 'w', encoding='utf-8') as f:
+            json.dump(samples[offset % len(samples)], f, ensure_ascii=False, indent=2)
+    for path in weekly_files(data_dir):
+        relative = path.relative_to(data_dir)
+        (target_dir / relative).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(path, target_dir / relative)
+    return days
+
+
+def bench(data_dir: Path, store: ArchiveStore, repeat: int = 50, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    legacy = legacy_files(data_dir)
+    segment_files = store.files()
+    dates = [entry['date'] for entry in store.dates()]
+    picks = [rng.choice(dates) for _ in range(repeat)]
+
+    def cold(read, files):
+        timings = []
+        for date in picks:
+            _drop_cache(files)
+            timings.append(_timed(lambda: read(date)))
+        return timings
+
+    def cold_store_read(date):
+        # 冷启动：每次重新加载索引
+        ArchiveStore(store.segments_dir).read_day(date)
+
+    legacy_day = cold(lambda date: legacy_read_day(data_dir, date), legacy)
+    segment_day = cold(cold_store_read, segment_files)
+    _drop_cache(legacy)
+    legacy_full = _timed(lambda: legacy_scan(data_dir))
+    _drop_cache(segment_files)
+    segment_full = _timed(lambda: sum(len(articles) for _, articles in ArchiveStore(store.segments_dir).scan()))
+
+    def footprint(files):
+        return {'files': len(files), 'bytes': sum(path.stat().st_size for path in files),
+                'blocks_bytes': sum(path.stat().st_blocks * 512 for path in files)}
+
+    return {
+        'partitions': len(store.partitions),
+        'articles': sum(entry['count'] for entry in store.partitions.values()),
+        'legacy': {**footprint(legacy), 'day_p50_ms': percentile(legacy_day, 50),
+                   'day_p99_ms': percentile(legacy_day, 99), 'scan_ms': legacy_full},
+        'segments': {**footprint(segment_files), 'day_p50_ms': percentile(segment_day, 50),
+                     'day_p99_ms': percentile(segment_day, 99), 'scan_ms': segment_full}
+    }
+
+
+def print_bench(result: Dict[str, Any], codec: str):
+    print(f'📊 归档存储对比（{result["partitions"]} 个分区，{result["articles"]} 篇，分段压缩: {codec}）')
+    print(f'  {"":<10}{"文件数":>8}{"大小":>12}{"占用块":>12}{"冷读单日 p50":>16}{"p99":>10}{"全量扫描":>12}')
+    for label, key in (('现有布局', 'legacy'), ('分段存储', 'segments')):
+        row = result[key]
+        print(f'  {label:<10}{row["files"]:>8}{row["bytes"] / 1024:>10.1f}KB{row["blocks_bytes"] / 1024:>10.1f}KB'
+              f'{row["day_p50_ms"]:>14.3f}ms{row["day_p99_ms"]:>8.3f}ms{row["scan_ms"]:>10.1f}ms')
+    legacy, segments = result['legacy'], result['segments']
+    print(f'  占用块缩小到 {segments["blocks_bytes"] / max(legacy["blocks_bytes"], 1):.0%}，'
+          f'冷读单日 {legacy["day_p50_ms"] / max(segments["day_p50_ms"], 1e-9):.1f}×，'
+          f'全量扫描 {legacy["scan_ms"] / max(segments["scan_ms"], 1e-9):.1f}×')
+
+
+# =====================================================
+# 命令行
+# =====================================================
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='归档分段存储：压缩、按日期读取、校验与基准测试')
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help='数据目录（默认仓库 data/）')
+    parser.add_argument('--segments-dir', default=None, help='段文件目录（默认 <data-dir>/archive/segments）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help='压缩全部归档并生成索引')
+    compact_parser.add_argument('--codec', choices=list(CODECS), default='gzip', help='压缩方式（默认 gzip）')
+
+    subparsers.add_parser('dates', help='列出日期与条数')
+
+    read_parser = subparsers.add_parser('read', help='读取某一天或日期范围')
+    read_parser.add_argument('start', help='日期 YYYY-MM-DD，或周报 weekly:YYYY-Www')
+    read_parser.add_argument('end', nargs='?', help='结束日期（含）')
+    read_parser.add_argument('--count', action='store_true', help='只输出每天的条数')
+
+    subparsers.add_parser('verify', help='与原始文件逐条比对')
+
+    bench_parser = subparsers.add_parser('bench', help='与现有布局对比占用空间与读取耗时')
+    bench_parser.add_argument('--repeat', type=int, default=50, help='冷读单日的次数（默认 50）')
+    bench_parser.add_argument('--synthetic-days', type=int, default=0, metavar='N',
+                              help='在临时目录用现有归档生成 N 天的模拟归档再对比（评估归档增长后的表现）')
+    bench_parser.add_argument('--codec', choices=list(CODECS), default='gzip', help='模拟归档的压缩方式')
+    bench_parser.add_argument('--output', help='把结果写入 JSON 文件')
+
+    args = parser.parse_args(argv)
+    args.data_dir = Path(args.data_dir)
+    args.segments_dir = Path(args.segments_dir) if args.segments_dir else segments_dir_for(args.data_dir)
+    return args
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    try:
+        if args.command == 'compact':
+            started = time.perf_counter()
+            index = compact(args.data_dir, args.segments_dir, args.codec)
+            partitions = index['partitions'].values()
+            raw = sum(entry['raw_bytes'] for entry in partitions)
+            packed = sum(entry['length'] for entry in partitions)
+            print(f'✅ 已生成 {args.segments_dir}：{len(index["partitions"])} 个分区，'
+                  f'{len({entry["segment"] for entry in partitions})} 个段文件，'
+                  f'{raw / 1024:.1f} KB → {packed / 1024:.1f} KB，耗时 {time.perf_counter() - started:.2f} 秒')
+            return
+
+        if args.command == 'bench' and args.synthetic_days:
+            with tempfile.TemporaryDirectory(prefix='archive-bench-') as tmp:
+                data_dir = Path(tmp) / 'data'
+                build_synthetic_archive(args.data_dir, data_dir, args.synthetic_days)
+                compact(data_dir, codec=args.codec)
+                store = ArchiveStore(segments_dir_for(data_dir))
+                result = bench(data_dir, store, repeat=args.repeat)
+            print_bench(result, args.codec)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+            return
+
+        store = ArchiveStore(args.segments_dir)
+        if args.command == 'dates':
+            for row in store.dates():
+                print(f'{row["date"]}  {row["count"]:>4} 篇')
+            for week in store.weeks():
+                print(f'{WEEKLY_PREFIX}{week}  {len(store.read_week(week)):>4} 篇')
+        elif args.command == 'read':
+            if args.end:
+                days = store.iter_range(args.start, args.end)
+            else:
+                days = [(args.start, store.read_partition(args.start))]
+            for date, articles in days:
+                if args.count:
+                    print(f'{date}  {len(articles):>4} 篇')
+                else:
+                    for article in articles:
+                        print(json.dumps(article, ensure_ascii=False))
+        elif args.command == 'verify':
+            mismatched = verify(args.data_dir, store)
+            if mismatched:
+                print(f'❌ {len(mismatched)} 个分区与原始文件不一致: {", ".join(mismatched)}')
+                sys.exit(1)
+            print(f'✅ {len(store.partitions)} 个分区与原始文件一致')
+        elif args.command == 'bench':
+            result = bench(args.data_dir, store, repeat=args.repeat)
+            print_bench(result, store.codec)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+    except FileNotFoundError as e:
+        print(f'❌ 文件不存在: {e.filename}（先运行 compact 生成分段）')
+        sys.exit(1)
+    except ValueError as e:
+        print(f'❌ {e}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,16 +5,72 @@
 """
 
 import requests
+import argparse
+import glob
+import gzip
+import hashlib
 import json
+import math
 import os
+import re
 import sys
-from datetime import datetime
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from news_dedup import (DEDUP_MODES, DEFAULT_DAYS, DEFAULT_THRESHOLD, DEFAULT_TITLE_THRESHOLD, NewsDeduplicator,
+                        load_references, recent_news_files)
+from news_schema import format_issue, format_issues, iter_article_issues, validate_articles
+from trace_spans import add_trace_arguments, span, start_tracing, traced
+
+# 可选依赖：orjson 加速序列化，zstandard 提供 zstd 压缩
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # 配置
 API_BASE = os.getenv('API_URL', 'http://localhost:3000')
 JWT_TOKEN = os.getenv('JWT_TOKEN')
 
+# 流式读取时每次从磁盘读入的字符数
+STREAM_READ_SIZE = 64 * 1024
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+
+# 分块上传：默认每块文章数（解压后的请求体需小于服务端 UPLOAD_BODY_LIMIT，默认 10mb）与连接池大小
+DEFAULT_CHUNK_SIZE = 20
+HTTP_POOL_SIZE = 4
+UPLOAD_STATE_SUFFIX = '.upload-state.json'
+
+# 增量上传：本地记录服务端已有文章的内容哈希（按服务器地址与日期分组）
+UPLOAD_INDEX_FILE = os.getenv('UPLOAD_INDEX_FILE', str(Path(__file__).parent / '.upload-index.json'))
+UPLOAD_INDEX_KEEP_DAYS = 7
+
+# 请求体压缩方式：gzip（默认）、zstd（需安装 zstandard，服务端需 Node 22.15+）或 none
+UPLOAD_COMPRESSION = os.getenv('UPLOAD_COMPRESSION', 'gzip')
+COMPRESSION_CHOICES = ('gzip', 'zstd', 'none')
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 严格校验：模板中标注「必填」的字段都必须存在（默认只要求 title、summary）
+STRICT_VALIDATION = False
+
+# 多日期补录：从文件名中提取日期，默认并发数
+DATE_FILE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})\.json$')
+DEFAULT_BACKFILL_WORKERS = 4
+
+# 近似去重：参照的本地新闻数据目录（服务器上为站点 data/ 目录）
+NEWS_DATA_DIR = os.getenv('NEWS_DATA_DIR', str(Path(__file__).parent.parent / 'data'))
+
 class Colors:
     reset = '\x1b[0m'
     green = '\x1b[32m'
@@ -25,6 +81,7 @@ class Colors:
 def log(message, color=Colors.reset):
     print(f"{color}{message}{Colors.reset}")
 
+@traced('login')
 def login(username, password):
     """登录获取Token"""
     try:
@@ -44,64 +101,750 @@ def login(username, password):
         log(f'登录失败: {e}', Colors.red)
         raise
 
-def upload_news(news_data, token):
-    """批量上传新闻"""
+def dumps_json(payload):
+    """序列化为紧凑的 UTF-8 JSON 字节串，已安装 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _content_encoding(compression):
+    if compression not in COMPRESSION_CHOICES:
+        raise ValueError(f'不支持的压缩方式: {compression}')
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError('zstd 压缩需要安装 zstandard: pip install zstandard')
+    return None if compression == 'none' else compression
+
+@traced('encode body')
+def encode_body(payload, compression=None):
+    """序列化并压缩请求体，返回 (body, headers)"""
+    compression = compression or UPLOAD_COMPRESSION
+    encoding = _content_encoding(compression)
+    body = dumps_json(payload)
+    headers = {'Content-Type': 'application/json'}
+
+    if encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    elif encoding == 'zstd':
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return body, headers
+
+def _compress_stream(chunks, compression=None):
+    """对流式请求体逐块压缩，返回 (生成器, headers)"""
+    compression = compression or UPLOAD_COMPRESSION
+    encoding = _content_encoding(compression)
+    headers = {'Content-Type': 'application/json'}
+    if not encoding:
+        return chunks, headers
+
+    headers['Content-Encoding'] = encoding
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    else:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def generate():
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    return generate(), headers
+
+def _iter_batch_body(articles, stats, date=None):
+    """把文章流编码为 {"articles": [...]} 请求体，逐条产出字节块"""
+    yield b'{"date":' + dumps_json(date) + b',"articles":['
+    for index, article in enumerate(articles):
+        if index:
+            yield b','
+        yield dumps_json(article)
+        stats['count'] += 1
+    yield b']}'
+
+@traced('upload')
+def upload_news(news_data, token, date=None):
+    """批量上传新闻
+
+    news_data 为列表时一次性序列化；为生成器等可迭代对象时以分块传输编码
+    边读边发，客户端内存占用不随文章数量增长。
+    """
     try:
-        log(f'准备上传 {len(news_data)} 条新闻...', Colors.blue)
+        auth_headers = {'Authorization': f'Bearer {token}'}
 
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
+        if isinstance(news_data, list):
+            log(f'准备上传 {len(news_data)} 条新闻...', Colors.blue)
+            body, headers = encode_body({'articles': news_data, 'date': date})
+            response = requests.post(
+                f'{API_BASE}/api/news/batch',
+                data=body,
+                headers={**auth_headers, **headers}
+            )
+            log(f'请求体 {len(body) / 1024:.1f} KB ({headers.get("Content-Encoding", "未压缩")})', Colors.blue)
+        else:
+            log('以流式模式上传新闻...', Colors.blue)
+            stats = {'count': 0}
+            body, headers = _compress_stream(_iter_batch_body(news_data, stats, date))
+            response = requests.post(
+                f'{API_BASE}/api/news/batch',
+                data=body,
+                headers={**auth_headers, **headers}
+            )
+            log(f'已发送 {stats["count"]} 条新闻', Colors.blue)
 
-        response = requests.post(
-            f'{API_BASE}/api/news/batch',
-            json={'articles': news_data},
-            headers=headers
-        )
+        response.raise_for_status()
+        result = response.json()
+
+        log(f'✅ 上传成功！', Colors.green)
+        log(f'   - 新增新闻: {result.get("todayCount", 0)} 篇', Colors.green)
+        log(f'   - 归档旧闻: {result.get("archived", 0)} 天', Colors.green)
+
+        return result
+    except requests.exceptions.RequestException as e:
+        log(f'❌ 上传失败: {_describe_request_error(e)}', Colors.red)
+        raise
+
+def _describe_request_error(e):
+    """提取服务端返回的错误信息"""
+    error_msg = str(e)
+    if hasattr(e, 'response') and e.response is not None:
+        try:
+            error_data = e.response.json()
+            error_msg = error_data.get('error', error_msg)
+        except:
+            pass
+
+        if e.response.status_code == 401:
+            log('Token可能已过期，请重新登录', Colors.yellow)
+
+    return error_msg
+
+def create_http_session(token, pool_size=HTTP_POOL_SIZE):
+    """创建复用连接的 HTTP 会话；幂等请求（GET/PUT）在网关错误时自动重试"""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'PUT'])
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Authorization': f'Bearer {token}'})
+    return session
+
+def _iter_chunks(articles, chunk_size):
+    """按固定条数切分文章流"""
+    chunk = []
+    for article in articles:
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
+def file_fingerprint(file_path):
+    """文件指纹：路径 + 大小 + 修改时间，用于判断断点续传状态是否仍然有效"""
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    return {'path': str(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _load_upload_state(state_file, expected):
+    if not state_file or not Path(state_file).exists():
+        return None
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(state.get(key) != value for key, value in expected.items()):
+        return None
+    return state
+
+def _save_upload_state(state_file, state):
+    if state_file:
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+def _clear_upload_state(state_file):
+    if state_file and Path(state_file).exists():
+        Path(state_file).unlink()
+
+@traced('upload chunked')
+def upload_news_chunked(articles, token, chunk_size=DEFAULT_CHUNK_SIZE, date=None,
+                        state_file=None, fingerprint=None, session=None, podcast=True):
+    """分块上传新闻：创建会话 -> 逐块上传 -> 一次性提交
+
+    每个分块被服务端确认后才继续下一块；若存在匹配的 state_file，则从服务端
+    记录的下一个缺失分块继续上传，已确认的分块不会重复发送。
+    """
+    http = session or create_http_session(token)
+    base_url = f'{API_BASE}/api/news/batch/sessions'
+    expected_state = {'fingerprint': fingerprint, 'chunk_size': chunk_size, 'date': date}
+    total_chunks = math.ceil(len(articles) / chunk_size) if isinstance(articles, list) else None
+
+    try:
+        session_id = None
+        next_chunk = 0
+
+        state = _load_upload_state(state_file, expected_state)
+        if state:
+            response = http.get(f'{base_url}/{state["session_id"]}', timeout=30)
+            if response.status_code == 404:
+                log('上次的上传会话已过期，重新开始', Colors.yellow)
+            else:
+                response.raise_for_status()
+                session_id = state['session_id']
+                next_chunk = response.json()['nextChunk']
+                log(f'🔁 断点续传：会话 {session_id}，从第 {next_chunk + 1} 块继续', Colors.yellow)
+
+        if not session_id:
+            response = http.post(base_url, json={'date': date}, timeout=30)
+            response.raise_for_status()
+            session_id = response.json()['sessionId']
+            _save_upload_state(state_file, {**expected_state, 'session_id': session_id})
+            log(f'已创建上传会话: {session_id}', Colors.blue)
+
+        started = time.perf_counter()
+        sent_articles = 0
+        sent_bytes = 0
+        chunk_count = 0
+
+        for index, chunk in enumerate(_iter_chunks(articles, chunk_size)):
+            chunk_count = index + 1
+            if index < next_chunk:
+                continue
+
+            body, headers = encode_body({'articles': chunk})
+            response = http.put(
+                f'{base_url}/{session_id}/chunks/{index}',
+                data=body,
+                headers=headers,
+                timeout=60
+            )
+            response.raise_for_status()
+
+            sent_articles += len(chunk)
+            sent_bytes += len(body)
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            progress = f'{chunk_count}/{total_chunks}' if total_chunks else f'{chunk_count}'
+            log(f'   [{progress}] 已确认 {sent_articles} 条 | '
+                f'{sent_articles / elapsed:.1f} 条/秒 | {sent_bytes / elapsed / 1024:.1f} KB/秒', Colors.blue)
+
+        if chunk_count < next_chunk:
+            raise ValueError(f'文件只有 {chunk_count} 块，少于服务端已确认的 {next_chunk} 块')
+
+        response = http.post(
+            f'{base_url}/{session_id}/commit',
+            json={'totalChunks': chunk_count, 'date': date, 'podcast': podcast},
+            timeout=120
+        )
         response.raise_for_status()
         result = response.json()
+        _clear_upload_state(state_file)
 
+        elapsed = time.perf_counter() - started
         log(f'✅ 上传成功！', Colors.green)
+        log(f'   - 分块: {chunk_count} 块（本次发送 {chunk_count - next_chunk} 块）', Colors.green)
         log(f'   - 新增新闻: {result.get("todayCount", 0)} 篇', Colors.green)
         log(f'   - 归档旧闻: {result.get("archived", 0)} 天', Colors.green)
+        log(f'   - 耗时: {elapsed:.2f} 秒 | 发送 {sent_bytes / 1024:.1f} KB', Colors.green)
 
         return result
     except requests.exceptions.RequestException as e:
-        error_msg = str(e)
-        if hasattr(e, 'response') and e.response is not None:
-            try:
-                error_data = e.response.json()
-                error_msg = error_data.get('error', error_msg)
-            except:
-                pass
-
-            if e.response.status_code == 401:
-                log('Token可能已过期，请重新登录', Colors.yellow)
-
-        log(f'❌ 上传失败: {error_msg}', Colors.red)
+        log(f'❌ 上传失败: {_describe_request_error(e)}', Colors.red)
+        if state_file and Path(state_file).exists():
+            log('已保存上传进度，重新运行同一命令即可断点续传', Colors.yellow)
         raise
 
-def load_news_from_file(file_path):
-    """从JSON文件读取新闻数据"""
+def article_key(article):
+    """文章标识：优先 source_url，缺失时退回标题（与服务端 news-delta.js 一致）"""
+    source_url = article.get('source_url') or article.get('url') or '#'
+    return source_url if source_url != '#' else f'title:{article.get("title") or "无标题"}'
+
+def article_content_hash(article):
+    """内容哈希：source_url + title + summary"""
+    content = '\0'.join([
+        article.get('source_url') or article.get('url') or '#',
+        article.get('title') or '无标题',
+        article.get('summary') or '无摘要'
+    ])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def index_digest(hashes):
+    """哈希索引摘要，与文章顺序无关"""
+    digest = hashlib.sha256()
+    for key in sorted(hashes):
+        digest.update(f'{key}\0{hashes[key]}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def compute_news_delta(articles, known_hashes):
+    """对比本地索引，返回 (需新增或更新的文章, 需删除的 key, 本批完整哈希索引)
+
+    只保留有变化的文章，未变化的文章读过即丢弃。
+    """
+    changed = {}
+    hashes = {}
+    for article in articles:
+        key = article_key(article)
+        content_hash = article_content_hash(article)
+        hashes[key] = content_hash
+        # 同一批次内 key 重复时以最后一条为准
+        if known_hashes.get(key) != content_hash:
+            changed[key] = article
+        else:
+            changed.pop(key, None)
+
+    upsert = list(changed.values())
+    remove = sorted(key for key in known_hashes if key not in hashes)
+    return upsert, remove, hashes
+
+def _upload_index_key(date):
+    return f'{API_BASE}|{date}'
+
+def load_upload_index(index_file, date):
+    """读取本地哈希索引，不存在时返回 None"""
     try:
-        log(f'读取文件: {file_path}', Colors.blue)
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get(_upload_index_key(date))
+    except (OSError, ValueError):
+        return None
+
+def save_upload_index(index_file, date, hashes):
+    """写入本地哈希索引，同时清理过旧的日期"""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=UPLOAD_INDEX_KEEP_DAYS)).strftime('%Y-%m-%d')
+    index = {key: value for key, value in index.items() if key.rsplit('|', 1)[-1] >= cutoff}
+    index[_upload_index_key(date)] = {'digest': index_digest(hashes), 'hashes': hashes}
+
+    temporary_file = f'{index_file}.tmp'
+    with open(temporary_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(temporary_file, index_file)
+
+def fetch_server_hashes(http, date=None):
+    """从服务端拉取今日（或指定日期）新闻的哈希索引"""
+    response = http.get(f'{API_BASE}/api/news/hashes', params={'date': date} if date else None, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+@traced('upload delta')
+def upload_news_delta(articles, token, date=None, index_file=UPLOAD_INDEX_FILE,
+                      chunk_size=DEFAULT_CHUNK_SIZE, session=None):
+    """增量上传：只发送新增、变更、删除的文章
+
+    articles 可以是列表，也可以是每次调用都返回新迭代器的函数（用于流式读取）；
+    本地索引与服务端不一致（409）时会拉取服务端索引并重新计算一次增量。
+    """
+    http = session or create_http_session(token)
+    iterate = articles if callable(articles) else (lambda: articles)
+    index_date = date or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    try:
+        local_index = load_upload_index(index_file, index_date)
+        if local_index is None:
+            log('本地无哈希索引，从服务端同步...', Colors.yellow)
+            server_index = fetch_server_hashes(http, date)
+            index_date = server_index['date']
+            local_index = {'digest': server_index['digest'], 'hashes': server_index['hashes']}
+
+        for attempt in range(2):
+            upsert, remove, hashes = compute_news_delta(iterate(), local_index['hashes'])
+            log(f'增量: 新增/变更 {len(upsert)} 条, 删除 {len(remove)} 条, '
+                f'未变化 {len(hashes) - len(upsert)} 条', Colors.blue)
+
+            pieces = [upsert[i:i + chunk_size] for i in range(0, len(upsert), chunk_size)] or [[]]
+            base_digest = local_index['digest']
+            totals = {'added': 0, 'updated': 0, 'removed': 0}
+            sent_bytes = 0
+            result = None
+            stale = False
+
+            for number, piece in enumerate(pieces, 1):
+                body, headers = encode_body({
+                    'baseDigest': base_digest,
+                    'upsert': piece,
+                    'remove': remove if number == 1 else [],
+                    'date': date,
+                    'final': number == len(pieces)
+                })
+                response = http.post(
+                    f'{API_BASE}/api/news/delta',
+                    data=body,
+                    headers=headers,
+                    timeout=60
+                )
+                if response.status_code == 409 and number == 1 and attempt == 0:
+                    stale = True
+                    break
+                response.raise_for_status()
+                result = response.json()
+                base_digest = result['digest']
+                sent_bytes += len(body)
+                for key in totals:
+                    totals[key] += result.get(key, 0)
 
-        path = Path(file_path)
-        if not path.exists():
-            raise FileNotFoundError(f'文件不存在: {path.absolute()}')
+            if not stale:
+                break
 
-        with open(path, 'r', encoding='utf-8') as f:
-            news_data = json.load(f)
+            log('本地索引已过期，重新从服务端同步后计算增量', Colors.yellow)
+            server_index = fetch_server_hashes(http, date)
+            index_date = server_index['date']
+            local_index = {'digest': server_index['digest'], 'hashes': server_index['hashes']}
 
-        if not isinstance(news_data, list):
-            raise ValueError('数据格式错误：应该是数组格式')
+        if result['digest'] != index_digest(hashes):
+            log('⚠️  服务端索引与本地计算不一致，已改用服务端索引', Colors.yellow)
+            server_index = fetch_server_hashes(http, date)
+            index_date = server_index['date']
+            hashes = server_index['hashes']
+        save_upload_index(index_file, index_date, hashes)
 
-        # 验证数据格式
-        for i, item in enumerate(news_data):
-            if not item.get('title') or not item.get('summary'):
-                raise ValueError(f'第 {i + 1} 条数据缺少必要字段 (title, summary)')
+        if not upsert and not remove:
+            log('✅ 内容无变化，未写入服务端', Colors.green)
+        else:
+            log(f'✅ 增量上传成功！', Colors.green)
+            log(f'   - 新增: {totals["added"]} 篇 | 更新: {totals["updated"]} 篇 | 删除: {totals["removed"]} 篇', Colors.green)
+            log(f'   - {index_date} 新闻: {result.get("dateCount", result.get("todayCount", 0))} 篇 | '
+                f'发送 {sent_bytes / 1024:.1f} KB', Colors.green)
+
+        return {**result, **totals}
+    except requests.exceptions.RequestException as e:
+        log(f'❌ 上传失败: {_describe_request_error(e)}', Colors.red)
+        raise
+
+def expand_input_paths(inputs):
+    """展开目录（只取文件名包含日期的文件）与通配符，返回文件路径列表"""
+    candidates = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            # 与服务端读取顺序一致：news-YYYY-MM-DD.json 优先于 YYYY-MM-DD.json
+            dated = [p for p in path.glob('*.json') if DATE_FILE_PATTERN.search(p.name)]
+            candidates.extend(sorted(dated, key=lambda p: (not p.name.startswith('news-'), p.name)))
+        elif glob.has_magic(item):
+            candidates.extend(Path(match) for match in sorted(glob.glob(item)))
+        else:
+            candidates.append(path)
+    return candidates
+
+def expand_backfill_inputs(inputs):
+    """展开目录与通配符，返回按日期排序的 [(date, path)]；同一日期只保留第一个文件"""
+    dated_files = {}
+    for path in expand_input_paths(inputs):
+        match = DATE_FILE_PATTERN.search(path.name)
+        if not match:
+            continue
+        date = match.group(1)
+        if date in dated_files:
+            log(f'⚠️  {date} 已有文件 {dated_files[date]}，跳过 {path}', Colors.yellow)
+            continue
+        dated_files[date] = path
+
+    return sorted(dated_files.items())
+
+def _backfill_one(http, date, path, chunk_size):
+    """补录单个日期文件，返回统计信息（不抛异常）"""
+    started = time.perf_counter()
+    try:
+        # 文件已在上传前由进程池完整校验
+        articles = list(_iter_raw_news(path))
+        if chunk_size:
+            upload_news_chunked(articles, None, chunk_size=chunk_size, date=date,
+                                podcast=False, session=http)
+        else:
+            body, headers = encode_body({'articles': articles, 'date': date, 'podcast': False})
+            response = http.post(f'{API_BASE}/api/news/batch', data=body, headers=headers, timeout=120)
+            response.raise_for_status()
+        return {'date': date, 'path': path, 'count': len(articles), 'ok': True,
+                'latency': time.perf_counter() - started, 'error': ''}
+    except requests.exceptions.RequestException as e:
+        error = _describe_request_error(e)
+    except Exception as e:
+        error = str(e)
+    return {'date': date, 'path': path, 'count': 0, 'ok': False,
+            'latency': time.perf_counter() - started, 'error': error}
+
+@traced('backfill')
+def backfill_news(inputs, token, workers=DEFAULT_BACKFILL_WORKERS, chunk_size=None):
+    """多日期补录：线程池并发上传，共享同一个 HTTP 会话与 Token
+
+    每个文件按文件名中的日期写入对应的历史归档，不触发播客生成。
+    """
+    files = expand_backfill_inputs(inputs)
+    if not files:
+        raise ValueError('没有找到文件名包含日期（YYYY-MM-DD.json）的文件')
+
+    started = time.perf_counter()
+    results = []
+
+    # 先并行校验所有文件，有错误的文件不上传
+    log(f'校验 {len(files)} 个文件...', Colors.blue)
+    valid_files = []
+    for (date, path), checked in zip(files, validate_news_files([path for _, path in files], workers)):
+        if checked['error'] or checked['issues']:
+            report_validation([checked])
+            error = checked['error'] or f'数据校验失败，共 {len(checked["issues"])} 个错误'
+            results.append({'date': date, 'path': path, 'count': 0, 'ok': False,
+                            'latency': checked['latency'], 'error': error})
+        else:
+            valid_files.append((date, path))
+
+    log(f'准备补录 {len(valid_files)} 个日期，并发数 {workers}', Colors.blue)
+    http = create_http_session(token, pool_size=workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_backfill_one, http, date, path, chunk_size) for date, path in valid_files]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['ok']:
+                log(f'   ✅ {result["date"]}: {result["count"]} 条 | {result["latency"] * 1000:.0f}ms', Colors.green)
+            else:
+                log(f'   ❌ {result["date"]}: {result["error"]}', Colors.red)
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda item: item['date'])
+    succeeded = [item for item in results if item['ok']]
+    total_articles = sum(item['count'] for item in succeeded)
+
+    log('\n补录汇总', Colors.blue)
+    log(f'{"日期":<12} | {"条数":>6} | {"耗时":>8} | 文件', Colors.blue)
+    log('-' * 60, Colors.blue)
+    for item in results:
+        color = Colors.green if item['ok'] else Colors.red
+        status = f'{item["count"]:>6}' if item['ok'] else f'{"失败":>5}'
+        log(f'{item["date"]:<12} | {status} | {item["latency"] * 1000:>6.0f}ms | {item["path"]}', color)
+    log('-' * 60, Colors.blue)
+    log(f'成功 {len(succeeded)}/{len(results)} 个文件，共 {total_articles} 条，'
+        f'耗时 {elapsed:.2f} 秒，{total_articles / max(elapsed, 1e-6):.1f} 条/秒', Colors.green)
+
+    return results
+
+class NewsValidationError(ValueError):
+    """整份数据校验失败，issues 中保存所有错误"""
+
+    def __init__(self, issues):
+        self.issues = issues
+        super().__init__(f'数据校验失败，共 {len(issues)} 个错误:\n{format_issues(issues)}')
+
+def _validate_article(item, index):
+    """校验单条新闻（流式模式遇到第一个错误即停止），返回原对象"""
+    for issue in iter_article_issues(item, index, strict=STRICT_VALIDATION):
+        raise ValueError(format_issue(issue))
+    return item
+
+def _detect_file_format(path):
+    """判断文件格式：'array'（JSON 数组）、'lines'（JSON Lines）或 'report'（{"articles": [...]} 日报文件）"""
+    if path.suffix.lower() in JSON_LINES_SUFFIXES:
+        return 'lines'
+
+    # 只看开头一块：单行压缩的大数组也不会在选格式时被整行读入并解析
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(STREAM_READ_SIZE)
+            if not chunk:
+                return 'array'
+            head = chunk.lstrip()
+            if head:
+                break
+        if len(head) < STREAM_READ_SIZE:
+            head += f.read(STREAM_READ_SIZE)
+        at_eof = len(head) < STREAM_READ_SIZE
+    if head.startswith('['):
+        return 'array'
+    if not head.startswith('{'):
+        return 'lines'
+
+    # 以 { 开头：首行在这一块内且是完整的 JSON 对象时为 JSON Lines，
+    # 否则（多行排版的日报、或首行超过一块）为日报文件；不依赖 articles 字段的位置
+    newline = head.find('\n')
+    if newline < 0 and not at_eof:
+        return 'report'
+    try:
+        first = json.loads(head if newline < 0 else head[:newline])
+    except json.JSONDecodeError:
+        return 'report'
+    # 单行压缩的日报文件：首行本身就是带 articles 数组的对象
+    return 'report' if isinstance(first.get('articles'), list) else 'lines'
+
+def _iter_report_articles(f):
+    """日报文件（小文件）整体解析后取 articles 字段，与服务端 normalizeNewsPayload 一致"""
+    data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('articles'), list):
+        raise ValueError('数据格式错误：应该是数组格式')
+    yield from data['articles']
+
+def _iter_json_lines(f):
+    """逐行解析 JSON Lines，空行跳过"""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'第 {line_no} 行 JSON 解析失败: {e}') from e
+
+def _iter_json_array(f):
+    """增量解析顶层 JSON 数组，逐个产出元素
+
+    只在缓冲区中保留尚未解析完的部分，峰值内存约等于单条数据大小。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    # start: 等待 '['；first: 等待首个元素或 ']'；value: 等待元素；next: 等待 ',' 或 ']'；done: 数组已结束
+    state = 'start'
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                break
+            chunk = f.read(STREAM_READ_SIZE)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        char = buffer[pos]
+
+        if state == 'start':
+            if char != '[':
+                raise ValueError('数据格式错误：应该是数组格式')
+            pos += 1
+            state = 'first'
+            continue
+
+        if state == 'done':
+            raise ValueError('数据格式错误：数组结束后存在多余内容')
+
+        if char == ']' and state in ('first', 'next'):
+            pos += 1
+            state = 'done'
+            continue
+
+        if state == 'next':
+            if char != ',':
+                raise ValueError(f'数据格式错误：数组元素之间缺少逗号 (字符 {char!r})')
+            pos += 1
+            state = 'value'
+            continue
+
+        if char in ',]':
+            raise ValueError('数据格式错误：数组中存在空元素')
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # 当前元素未读完整：按缓冲区大小倍增读取，避免超大元素反复重试
+            chunk = f.read(max(STREAM_READ_SIZE, len(buffer) - pos))
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        pos = end
+        state = 'next'
+        yield item
+
+    if state != 'done':
+        raise ValueError('数据格式错误：JSON 数组不完整')
+
+def iter_news_from_file(file_path):
+    """流式读取新闻数据（JSON 数组、JSON Lines 或 {"articles": [...]} 日报文件）
+
+    逐条解析、逐条校验并以生成器形式交给下游，内存占用与文件大小无关。
+    """
+    for index, item in enumerate(_iter_raw_news(file_path)):
+        yield _validate_article(item, index)
+
+def _iter_raw_news(file_path):
+    """按文件格式逐条读取新闻，不做校验"""
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f'文件不存在: {path.absolute()}')
+
+    readers = {
+        'array': _iter_json_array,
+        'lines': _iter_json_lines,
+        'report': _iter_report_articles
+    }
+    file_format = _detect_file_format(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from readers[file_format](f)
+
+def read_news_file(file_path, strict=None):
+    """读取整个文件并完整校验，有错误时抛出 NewsValidationError（包含所有错误）"""
+    strict = STRICT_VALIDATION if strict is None else strict
+    with span('read file', path=str(file_path)):
+        articles = list(_iter_raw_news(file_path))
+    with span('validate', articles=len(articles)):
+        issues = validate_articles(articles, strict=strict)
+    if issues:
+        raise NewsValidationError(issues)
+    return articles
+
+def _validate_file_task(file_path, strict):
+    """进程池任务：校验单个文件，返回可序列化的结果"""
+    started = time.perf_counter()
+    try:
+        articles = list(_iter_raw_news(file_path))
+        issues = validate_articles(articles, strict=strict)
+        error = ''
+    except Exception as e:
+        articles, issues, error = [], [], str(e)
+    return {'path': str(file_path), 'count': len(articles), 'issues': issues, 'error': error,
+            'latency': time.perf_counter() - started}
+
+@traced('validate files')
+def validate_news_files(paths, workers=DEFAULT_BACKFILL_WORKERS, strict=None):
+    """校验多个文件；多于一个文件时使用进程池并行，结果顺序与 paths 一致"""
+    strict = STRICT_VALIDATION if strict is None else strict
+    paths = [str(path) for path in paths]
+    if len(paths) <= 1 or workers <= 1:
+        return [_validate_file_task(path, strict) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        return list(executor.map(_validate_file_task, paths, [strict] * len(paths)))
+
+def report_validation(results):
+    """打印校验结果，返回是否全部通过"""
+    ok = True
+    for item in results:
+        if item['error']:
+            ok = False
+            log(f'   ❌ {item["path"]}: {item["error"]}', Colors.red)
+        elif item['issues']:
+            ok = False
+            log(f'   ❌ {item["path"]}: {item["count"]} 条，{len(item["issues"])} 个错误', Colors.red)
+            log(format_issues(item['issues']), Colors.yellow)
+        else:
+            log(f'   ✅ {item["path"]}: {item["count"]} 条', Colors.green)
+    return ok
+
+def load_news_from_file(file_path):
+    """从JSON文件读取新闻数据，完整校验后返回"""
+    try:
+        log(f'读取文件: {file_path}', Colors.blue)
+
+        news_data = read_news_file(file_path)
 
         log(f'✅ 成功读取 {len(news_data)} 条新闻', Colors.green)
         return news_data
@@ -109,19 +852,163 @@ def load_news_from_file(file_path):
         log(f'文件读取失败: {e}', Colors.red)
         raise
 
+def stream_news_from_file(file_path):
+    """流式读取新闻数据，出错时记录日志后抛出"""
+    log(f'流式读取文件: {file_path}', Colors.blue)
+    try:
+        yield from iter_news_from_file(file_path)
+    except Exception as e:
+        log(f'文件读取失败: {e}', Colors.red)
+        raise
+
+@traced('load dedup references')
+def build_deduplicator(date=None, days=DEFAULT_DAYS, threshold=DEFAULT_THRESHOLD,
+                       title_threshold=DEFAULT_TITLE_THRESHOLD, mode='drop', data_dir=NEWS_DATA_DIR):
+    """创建去重索引并载入目标日期之前 days 天已入库的新闻"""
+    dedup = NewsDeduplicator(threshold=threshold, title_threshold=title_threshold, mode=mode)
+    files = recent_news_files(Path(data_dir), days, date)
+    started = time.perf_counter()
+    loaded = load_references(dedup, files)
+    log(f'去重参照: {data_dir} 中最近 {days} 天 {len(files)} 个文件，{loaded} 篇'
+        f'（{time.perf_counter() - started:.2f} 秒）', Colors.blue)
+    return dedup
+
+def report_dedup(dedup, total, report_file=None):
+    """打印去重结果，指定 report_file 时同时写出 JSON 报告"""
+    for item in dedup.duplicates:
+        action = '合并到' if item['action'] == 'merge' else '丢弃，重复于'
+        log(f'   - [{item["source_name"] or "未知来源"}] {item["title"]} → {action}「{item["matched_title"]}」'
+            f'（{item["matched_in"]}，{"标题" if item["matched_on"] == "title" else "全文"}相似度 '
+            f'{item["similarity"]:.2f}）', Colors.yellow)
+    log(f'去重: {total} 条中 {len(dedup.duplicates)} 条近似重复，保留 {total - len(dedup.duplicates)} 条',
+        Colors.green)
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'threshold': dedup.threshold,
+                'title_threshold': dedup.title_threshold,
+                'mode': dedup.mode,
+                'references': dedup.references,
+                'total': total,
+                'duplicates': dedup.duplicates
+            }, f, ensure_ascii=False, indent=2)
+        log(f'去重报告已保存: {report_file}', Colors.blue)
+
+def _iter_dedup(articles, report_file=None, **options):
+    dedup = build_deduplicator(**options)
+    counter = {'total': 0}
+
+    def counted():
+        for article in articles:
+            counter['total'] += 1
+            yield article
+
+    yield from dedup.iter_filter(counted())
+    report_dedup(dedup, counter['total'], report_file)
+
+def dedup_news(articles, report_file=None, **options):
+    """上传前的近似去重阶段
+
+    articles 为列表时返回去重后的列表；为迭代器时返回惰性过滤的生成器（只支持 drop），
+    读完后打印报告。options 见 build_deduplicator。
+    """
+    if not isinstance(articles, list):
+        return _iter_dedup(articles, report_file=report_file, **options)
+    dedup = build_deduplicator(**options)
+    with span('dedup', articles=len(articles)):
+        kept = dedup.filter(articles)
+    report_dedup(dedup, len(articles), report_file)
+    return kept
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='AI新闻自动上传工具',
+        epilog='示例: python auto_upload_news.py ../data/news-upload.json'
+    )
+    parser.add_argument('files', nargs='+', metavar='file',
+                        help='新闻数据文件（JSON 数组或 JSON Lines）；传入多个文件、目录或通配符时进入多日期补录模式')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式读取并上传，适合数百MB的大文件')
+    parser.add_argument('--chunk-size', type=int, default=None, metavar='N',
+                        help=f'分块上传，每块 N 条（建议 {DEFAULT_CHUNK_SIZE}），支持断点续传')
+    parser.add_argument('--workers', type=int, default=DEFAULT_BACKFILL_WORKERS, metavar='N',
+                        help=f'补录模式的并发上传数（默认 {DEFAULT_BACKFILL_WORKERS}）')
+    parser.add_argument('--compression', choices=COMPRESSION_CHOICES, default=UPLOAD_COMPRESSION,
+                        help=f'请求体压缩方式（默认 {UPLOAD_COMPRESSION}）')
+    parser.add_argument('--delta', action='store_true',
+                        help='增量上传：只发送相对服务端有变化的文章')
+    parser.add_argument('--date', default=None, metavar='YYYY-MM-DD',
+                        help='导入到指定日期（用于播客触发）')
+    parser.add_argument('--check', action='store_true',
+                        help='只校验文件并列出所有错误，不上传（多个文件时使用进程池并行）')
+    parser.add_argument('--strict', action='store_true',
+                        help='严格校验：模板中标注必填的字段都必须存在')
+    parser.add_argument('--dedup', action='store_true',
+                        help='上传前做近似去重（MinHash + LSH），参照本批次与最近已入库的新闻')
+    parser.add_argument('--dedup-days', type=int, default=DEFAULT_DAYS, metavar='N',
+                        help=f'参照目标日期之前 N 天的已入库新闻（默认 {DEFAULT_DAYS}）')
+    parser.add_argument('--dedup-threshold', type=float, default=DEFAULT_THRESHOLD, metavar='0-1',
+                        help=f'标题+要点+摘要的估算 Jaccard 相似度达到该值视为重复（默认 {DEFAULT_THRESHOLD}）')
+    parser.add_argument('--dedup-title-threshold', type=float, default=DEFAULT_TITLE_THRESHOLD, metavar='0-1',
+                        help=f'标题的估算 Jaccard 相似度达到该值视为重复（默认 {DEFAULT_TITLE_THRESHOLD}）')
+    parser.add_argument('--dedup-mode', choices=DEDUP_MODES, default='drop',
+                        help='批次内重复的处理：drop 丢弃后出现的（默认）/ merge 合并字段；与已入库新闻重复的一律丢弃')
+    parser.add_argument('--dedup-data-dir', default=NEWS_DATA_DIR, metavar='DIR',
+                        help='已入库新闻所在的 data 目录（默认 $NEWS_DATA_DIR 或仓库 data/）')
+    parser.add_argument('--dedup-report', default=None, metavar='FILE',
+                        help='把去重结果写入 JSON 报告')
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        parser.error('--chunk-size 必须为正整数')
+    if args.workers <= 0:
+        parser.error('--workers 必须为正整数')
+    args.backfill = len(args.files) > 1 or any(
+        Path(item).is_dir() or glob.has_magic(item) for item in args.files
+    )
+    if args.backfill and (args.delta or args.date):
+        parser.error('补录模式按文件名确定日期，不能与 --delta / --date 同时使用')
+    if args.dedup and args.backfill:
+        parser.error('--dedup 只用于单个文件的上传')
+    if args.dedup and args.stream and args.dedup_mode == 'merge':
+        parser.error('流式上传只支持 --dedup-mode drop')
+    if args.dedup_days <= 0:
+        parser.error('--dedup-days 必须为正整数')
+    if not (0 < args.dedup_threshold <= 1 and 0 < args.dedup_title_threshold <= 1):
+        parser.error('--dedup-threshold / --dedup-title-threshold 必须在 0 到 1 之间')
+    return args
+
 def main():
     try:
         log('=' * 40, Colors.blue)
         log('   AI新闻自动上传工具', Colors.blue)
         log('=' * 40 + '\n', Colors.blue)
 
-        # 检查参数
-        if len(sys.argv) < 2:
-            log('用法: python auto_upload_news.py <news-data.json>', Colors.yellow)
-            log('示例: python auto_upload_news.py ../data/news-upload.json', Colors.yellow)
-            sys.exit(1)
+        args = parse_args()
+        # --stream 时读取、校验与去重在上传请求体的生成器中进行，耗时计入 send request 阶段
+        start_tracing(args.trace, args.profile, name='auto_upload_news')
+        file_path = args.files[0]
+        global UPLOAD_COMPRESSION
+        UPLOAD_COMPRESSION = args.compression
+        _content_encoding(UPLOAD_COMPRESSION)
+        global STRICT_VALIDATION
+        STRICT_VALIDATION = args.strict
 
-        file_path = sys.argv[1]
+        # 只校验不上传
+        if args.check:
+            paths = expand_input_paths(args.files)
+            if not paths:
+                raise ValueError('没有找到需要校验的文件')
+            started = time.perf_counter()
+            results = validate_news_files(paths, workers=args.workers)
+            ok = report_validation(results)
+            total = sum(item['count'] for item in results)
+            log(f'\n校验 {len(results)} 个文件，共 {total} 条，耗时 {time.perf_counter() - started:.3f} 秒',
+                Colors.green if ok else Colors.red)
+            if not ok:
+                sys.exit(1)
+            return
 
         # 检查Token
         token = JWT_TOKEN
@@ -137,11 +1024,51 @@ def main():
             token = login(username, password)
             log(f'\n请设置环境变量以便下次使用:', Colors.yellow)
             log(f'export JWT_TOKEN={token}\n', Colors.blue)
+            if not args.backfill:
+                return
+
+        # 多日期补录：一次登录，所有文件共享会话
+        if args.backfill:
+            results = backfill_news(args.files, token, workers=args.workers, chunk_size=args.chunk_size)
+            if not all(item['ok'] for item in results):
+                sys.exit(1)
             return
 
-        # 读取并上传新闻
-        news_data = load_news_from_file(file_path)
-        upload_news(news_data, token)
+        # 读取、去重并上传新闻
+        dedup_options = {
+            'date': args.date,
+            'days': args.dedup_days,
+            'threshold': args.dedup_threshold,
+            'title_threshold': args.dedup_title_threshold,
+            'mode': args.dedup_mode,
+            'data_dir': args.dedup_data_dir,
+            'report_file': args.dedup_report
+        }
+
+        def read_news():
+            articles = stream_news_from_file(file_path) if args.stream else load_news_from_file(file_path)
+            return dedup_news(articles, **dedup_options) if args.dedup else articles
+
+        news_data = read_news()
+
+        if args.delta:
+            upload_news_delta(
+                read_news if args.stream else news_data,
+                token,
+                date=args.date,
+                chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE
+            )
+        elif args.chunk_size:
+            upload_news_chunked(
+                news_data,
+                token,
+                chunk_size=args.chunk_size,
+                date=args.date,
+                state_file=f'{file_path}{UPLOAD_STATE_SUFFIX}',
+                fingerprint=file_fingerprint(file_path)
+            )
+        else:
+            upload_news(news_data, token, date=args.date)
 
         log('\n' + '=' * 40, Colors.green)
         log('   完成！', Colors.green)
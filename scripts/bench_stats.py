@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试统计工具
+分位数、标准差与 bootstrap 置信区间，供对比测试脚本的基准模式使用。
+"""
+
+import math
+import random
+import statistics
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BOOTSTRAP_SAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """线性插值分位数（与 numpy 默认方式一致），pct 取 0-100"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def bootstrap_ci(values: Sequence[float], stat: Callable[[Sequence[float]], float] = statistics.mean,
+                 samples: int = DEFAULT_BOOTSTRAP_SAMPLES, confidence: float = DEFAULT_CONFIDENCE,
+                 seed: Optional[int] = 0) -> Tuple[float, float]:
+    """
+    百分位 bootstrap 置信区间
+
+    Args:
+        values: 样本
+        stat: 统计量函数（默认均值）
+        samples: 重采样次数
+        confidence: 置信水平
+        seed: 随机种子，固定后结果可复现
+
+    Returns:
+        (下界, 上界)；样本少于 2 个时上下界均为统计量本身
+    """
+    if not values:
+        return 0.0, 0.0
+    if len(values) < 2:
+        value = stat(values)
+        return value, value
+
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = sorted(stat([values[rng.randrange(n)] for _ in range(n)]) for _ in range(samples))
+    alpha = (1 - confidence) / 2
+    return percentile(estimates, alpha * 100), percentile(estimates, (1 - alpha) * 100)
+
+
+def describe(values: Sequence[float], **bootstrap_kwargs) -> Dict[str, float]:
+    """样本描述统计：n、均值、标准差、p50/p90/p99、均值的置信区间"""
+    values = list(values)
+    if not values:
+        return {'n': 0, 'mean': 0.0, 'stddev': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0,
+                'ci_low': 0.0, 'ci_high': 0.0}
+
+    ci_low, ci_high = bootstrap_ci(values, **bootstrap_kwargs)
+    return {
+        'n': len(values),
+        'mean': statistics.mean(values),
+        'stddev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'ci_low': ci_low,
+        'ci_high': ci_high
+    }
+
+
+def intervals_overlap(a: Dict[str, float], b: Dict[str, float]) -> bool:
+    """两个置信区间是否重叠"""
+    return a['ci_low'] <= b['ci_high'] and b['ci_low'] <= a['ci_high']
+
+
+def compare(baseline: Dict[str, float], candidate: Dict[str, float]) -> Dict[str, float]:
+    """
+    比较两组样本的均值
+
+    Returns:
+        {'change_pct': 相对基线的变化百分比, 'significant': 置信区间是否不重叠}
+    """
+    change = (candidate['mean'] - baseline['mean']) / baseline['mean'] * 100 if baseline['mean'] else 0.0
+    return {'change_pct': change, 'significant': not intervals_overlap(baseline, candidate)}
+
+
+def values_of(results: List[Dict], field: str) -> List[float]:
+    """取出结果列表中某个数值字段（忽略缺失值）"""
+    return [r[field] for r in results if r.get(field) is not None]
+
+
+def linear_fit(xs: Sequence[float], ys: Sequence[float]) -> Dict[str, float]:
+    """
+    最小二乘直线拟合 y = slope * x + intercept
+
+    Returns:
+        {'slope', 'intercept', 'r2', 'n'}；x 没有变化时 slope 为 0
+    """
+    n = len(xs)
+    if n == 0:
+        return {'slope': 0.0, 'intercept': 0.0, 'r2': 0.0, 'n': 0}
+    mean_x = statistics.mean(xs)
+    mean_y = statistics.mean(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return {'slope': 0.0, 'intercept': mean_y, 'r2': 0.0, 'n': n}
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    ss_tot = sum((y - mean_y) ** 2 for y in ys)
+    ss_res = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(xs, ys))
+    return {'slope': slope, 'intercept': intercept, 'r2': 1 - ss_res / ss_tot if ss_tot else 1.0, 'n': n}
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+上传请求体编码基准测试
+对比不同 JSON 编码器与压缩方式在真实 data/news-*.json 上的体积与耗时
+
+使用方法:
+    python scripts/benchmark_upload_encoding.py
+    python scripts/benchmark_upload_encoding.py --uplink-kbps 512
+    API_URL=http://localhost:3000 JWT_TOKEN=... python scripts/benchmark_upload_encoding.py --upload
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import auto_upload_news as uploader  # noqa: E402
+
+DEFAULT_PATTERN = str(Path(__file__).parent.parent / 'data' / 'news-*.json')
+
+
+def encode_stdlib(payload):
+    """原有方式：标准库 json，默认 ensure_ascii"""
+    return json.dumps(payload).encode('utf-8')
+
+
+def build_variants():
+    """返回 [(名称, 编码函数, Content-Encoding)]"""
+    variants = [
+        ('json (原方式)', encode_stdlib, None),
+        ('json 紧凑 UTF-8', lambda p: json.dumps(p, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), None),
+    ]
+    if uploader.orjson is not None:
+        variants.append(('orjson', uploader.orjson.dumps, None))
+
+    fast = uploader.dumps_json
+    variants.append(('gzip', lambda p: gzip.compress(fast(p), compresslevel=uploader.GZIP_LEVEL), 'gzip'))
+    if uploader.zstandard is not None:
+        compressor = uploader.zstandard.ZstdCompressor(level=uploader.ZSTD_LEVEL)
+        variants.append(('zstd', lambda p: compressor.compress(fast(p)), 'zstd'))
+    return variants
+
+
+def measure(encode, payload, repeat):
+    """返回 (字节数, 编码耗时中位数 ms)"""
+    timings = []
+    body = b''
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return len(body), statistics.median(timings), body
+
+
+def upload_once(http, body, encoding):
+    headers = {'Content-Type': 'application/json'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    started = time.perf_counter()
+    response = http.post(f'{uploader.API_BASE}/api/news/batch', data=body, headers=headers, timeout=120)
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='上传请求体编码基准测试')
+    parser.add_argument('pattern', nargs='?', default=DEFAULT_PATTERN, help='新闻文件通配符')
+    parser.add_argument('--repeat', type=int, default=20, help='每种编码重复次数')
+    parser.add_argument('--uplink-kbps', type=float, default=1024, help='估算传输时间用的上行带宽 (KB/s)')
+    parser.add_argument('--upload', action='store_true',
+                        help='实际上传到 API_URL（会覆盖今日新闻，仅用于本地测试服务器）')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.pattern))
+    articles = []
+    for file_path in files:
+        try:
+            articles.extend(uploader.iter_news_from_file(file_path))
+        except ValueError as e:
+            print(f'⚠️  跳过 {file_path}: {e}')
+
+    if not articles:
+        print(f'❌ 没有读取到新闻: {args.pattern}')
+        sys.exit(1)
+
+    payload = {'articles': articles}
+    print(f'📂 {len(files)} 个文件，{len(articles)} 条新闻\n')
+    print(f'{"编码":<18} | {"体积":>10} | {"压缩比":>7} | {"编码耗时":>9} | {"估算传输":>9} | {"实际上传":>9}')
+    print('-' * 80)
+
+    http = uploader.create_http_session(uploader.JWT_TOKEN) if args.upload else None
+    baseline = None
+    for name, encode, encoding in build_variants():
+        size, encode_ms, body = measure(encode, payload, args.repeat)
+        baseline = baseline or size
+        transfer_ms = size / 1024 / args.uplink_kbps * 1000
+        upload_ms = f'{upload_once(http, body, encoding):>7.0f}ms' if http else f'{"-":>9}'
+        print(f'{name:<18} | {size / 1024:>8.1f}KB | {baseline / size:>6.2f}x | '
+              f'{encode_ms:>7.2f}ms | {transfer_ms:>7.0f}ms | {upload_ms}')
+
+    print(f'\n估算传输按上行 {args.uplink_kbps:.0f} KB/s 计算')
+
+
+if __name__ == '__main__':
+    main()
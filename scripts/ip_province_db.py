@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线 IP → 省份库
+把「IP 段 → 国家/省份」数据编译成按起始地址排序的定长二进制表（data/ip-province.db），
+服务端 server/services/ip-locator.js 加载后二分查找，访问统计不再为每次访问请求 ip.taobao.com。
+
+子命令:
+    build     由 IP 段数据生成库文件（CSV：起始IP,结束IP,国家,省份；或 ip2region 源格式 起始|结束|国家|区域|省份|城市|ISP）
+    lookup    查询若干 IP
+    bench     对比本地库（冷查询 / LRU 命中）与在线接口的单次查询延迟
+    backfill  重新解析 data/visit-logs.json 中省份为「未知」的记录
+
+使用方法:
+    python scripts/ip_province_db.py build ip-ranges.csv
+    python scripts/ip_province_db.py build ip2region.txt --format ip2region -o data/ip-province.db
+    python scripts/ip_province_db.py lookup 58.248.223.6 114.114.114.114
+    python scripts/ip_province_db.py bench --remote 20
+    python scripts/ip_province_db.py backfill --dry-run
+
+库文件格式（大端序）:
+    头部 16 字节：'IPPV' | u16 版本 | u16 保留 | u32 记录数 | u32 地区表偏移
+    记录区：每条 10 字节 u32 起始 IP | u32 结束 IP | u16 地区下标，按起始地址升序、互不重叠
+    地区表：UTF-8 JSON 数组 [[国家, 省份], ...]
+"""
+
+import argparse
+import csv
+import ipaddress
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bench_stats import percentile
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_DB = ROOT_DIR / 'data' / 'ip-province.db'
+VISIT_LOGS_FILE = ROOT_DIR / 'data' / 'visit-logs.json'
+REMOTE_URL = 'http://ip.taobao.com/outGetIpInfo?ip={ip}&accessKey=alibaba-inc'
+
+MAGIC = b'IPPV'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>4sHHII')
+RECORD = struct.Struct('>IIH')
+DEFAULT_CACHE_SIZE = 10000
+UNKNOWN = '未知'
+
+# 与 server/routes/visit.js 的 PROVINCE_MAP 保持一致
+PROVINCE_MAP = {
+    '北京': '北京市', '天津': '天津市', '上海': '上海市', '重庆': '重庆市',
+    '河北': '河北省', '山西': '山西省', '辽宁': '辽宁省', '吉林': '吉林省',
+    '黑龙江': '黑龙江省', '江苏': '江苏省', '浙江': '浙江省', '安徽': '安徽省',
+    '福建': '福建省', '江西': '江西省', '山东': '山东省', '河南': '河南省',
+    '湖北': '湖北省', '湖南': '湖南省', '广东': '广东省', '海南': '海南省',
+    '四川': '四川省', '贵州': '贵州省', '云南': '云南省', '陕西': '陕西省',
+    '甘肃': '甘肃省', '青海': '青海省', '台湾': '台湾省',
+    '内蒙古': '内蒙古自治区', '广西': '广西壮族自治区', '西藏': '西藏自治区',
+    '宁夏': '宁夏回族自治区', '新疆': '新疆维吾尔自治区',
+    '香港': '香港特别行政区', '澳门': '澳门特别行政区'
+}
+
+
+def normalize_province(region: str) -> str:
+    region = (region or '').strip()
+    if region in ('', '0', 'XX'):
+        return UNKNOWN
+    return PROVINCE_MAP.get(region, region)
+
+
+def ip_to_int(value: str) -> int:
+    """点分十进制或整数形式的 IPv4 地址转为整数"""
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        if number > 0xFFFFFFFF:
+            raise ValueError(f'超出 IPv4 范围: {value}')
+        return number
+    return int(ipaddress.IPv4Address(value))
+
+
+def is_local_ip(ip: str) -> bool:
+    """与 visit.js 的 isLocalIP 一致：本机与内网地址不解析"""
+    return ip in ('127.0.0.1', '::1') or ip.startswith('192.168.') or ip.startswith('10.')
+
+
+# =====================================================
+# 构建
+# =====================================================
+
+def read_ranges(path: Path, fmt: str) -> Iterable[Tuple[int, int, str, str]]:
+    """读取源数据，逐行产出 (起始, 结束, 国家, 省份)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'ip2region':
+            rows = (line.rstrip('\n').split('|') for line in f)
+        else:
+            rows = csv.reader(f)
+        for line_no, row in enumerate(rows, 1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            try:
+                start, end = ip_to_int(row[0]), ip_to_int(row[1])
+            except (IndexError, ValueError):
+                # CSV 表头或 IPv6 段
+                continue
+            if fmt == 'ip2region':
+                country, province = row[2], row[4] if len(row) > 4 else ''
+            else:
+                country, province = row[2] if len(row) > 2 else '', row[3] if len(row) > 3 else ''
+            if start > end:
+                raise ValueError(f'{path}:{line_no} 起始地址大于结束地址')
+            country = country.strip()
+            yield start, end, UNKNOWN if country in ('', '0') else country, normalize_province(province)
+
+
+def compile_ranges(ranges: Iterable[Tuple[int, int, str, str]]) -> Tuple[List[Tuple[int, int, int]], List[List[str]]]:
+    """排序、检查重叠，并把相邻且地区相同的段合并"""
+    locations: Dict[Tuple[str, str], int] = {}
+    records: List[Tuple[int, int, int]] = []
+    for start, end, country, province in sorted(ranges):
+        if country == UNKNOWN and province == UNKNOWN:
+            # 未知地区不入库，查询未命中同样返回未知
+            continue
+        index = locations.setdefault((country, province), len(locations))
+        if index > 0xFFFF:
+            raise ValueError('地区种类超过 65535 个')
+        if records and start <= records[-1][1]:
+            raise ValueError(f'IP 段重叠: {ipaddress.IPv4Address(start)} 落在上一段内')
+        if records and records[-1][2] == index and records[-1][1] + 1 == start:
+            records[-1] = (records[-1][0], end, index)
+        else:
+            records.append((start, end, index))
+    return records, [list(location) for location in locations]
+
+
+def write_database(records: List[Tuple[int, int, int]], locations: List[List[str]], output: Path):
+    """原子写入库文件"""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    locations_offset = HEADER.size + len(records) * RECORD.size
+    fd, tmp = tempfile.mkstemp(dir=output.parent, prefix='.ip-province-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(records), locations_offset))
+            for record in records:
+                f.write(RECORD.pack(*record))
+            f.write(json.dumps(locations, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# =====================================================
+# 查询
+# =====================================================
+
+class IpProvinceDB:
+    """
+    以 mmap 打开库文件，在定长记录上二分查找，前面加一层 LRU 缓存
+
+    Args:
+        path: 库文件路径
+        cache_size: LRU 缓存条数，0 表示不缓存
+    """
+
+    def __init__(self, path: Path = DEFAULT_DB, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, locations_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'不是 IP 省份库文件: {self.path}')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'不支持的 IP 省份库版本: {version}')
+        if locations_offset != HEADER.size + self.count * RECORD.size:
+            raise ValueError(f'IP 省份库文件已损坏: {self.path}')
+        self.locations = json.loads(self._map[locations_offset:].decode('utf-8'))
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, Optional[Dict[str, str]]]' = OrderedDict()
+
+    def close(self):
+        self._map.close()
+
+    def find(self, value: int) -> int:
+        """返回包含 value 的地址段的地区下标，未命中返回 -1"""
+        low, high = 0, self.count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            start, end, index = RECORD.unpack_from(self._map, HEADER.size + mid * RECORD.size)
+            if value < start:
+                high = mid - 1
+            elif value > end:
+                low = mid + 1
+            else:
+                return index
+        return -1
+
+    def lookup(self, ip: str) -> Optional[Dict[str, str]]:
+        """查询 IP，返回 {'country', 'province'}；无法解析或未命中返回 None"""
+        if ip in self._cache:
+            self._cache.move_to_end(ip)
+            return self._cache[ip]
+        try:
+            index = self.find(int(ipaddress.IPv4Address(ip.removeprefix('::ffff:'))))
+        except ValueError:
+            index = -1
+        result = None if index < 0 else {'country': self.locations[index][0], 'province': self.locations[index][1]}
+        if self.cache_size:
+            self._cache[ip] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def sample_ips(self, n: int, rng: random.Random) -> List[str]:
+        """从库中随机抽取 n 个落在已知地址段内的 IP（基准测试用）"""
+        ips = []
+        for _ in range(n):
+            start, end, _ = RECORD.unpack_from(self._map, HEADER.size + rng.randrange(self.count) * RECORD.size)
+            ips.append(str(ipaddress.IPv4Address(rng.randint(start, end))))
+        return ips
+
+
+def lookup_remote(ip: str, timeout: float = 3.0) -> str:
+    """在线接口查询（与 visit.js 原有逻辑一致），失败返回未知"""
+    import requests
+
+    try:
+        data = requests.get(REMOTE_URL.format(ip=ip), timeout=timeout).json()
+        if data.get('code') == 0 and data.get('data'):
+            return normalize_province(data['data'].get('region'))
+    except (requests.RequestException, ValueError):
+        pass
+    return UNKNOWN
+
+
+# =====================================================
+# 子命令
+# =====================================================
+
+def cmd_build(args) -> int:
+    started = time.perf_counter()
+    records, locations = compile_ranges(read_ranges(Path(args.source), args.format))
+    if not records:
+        print(f'❌ {args.source} 中没有可用的 IPv4 地址段')
+        return 1
+    output = Path(args.output)
+    write_database(records, locations, output)
+    print(f'✅ 已生成 {output}：{len(records)} 个地址段，{len(locations)} 个地区，'
+          f'{output.stat().st_size / 1024:.1f} KB，耗时 {time.perf_counter() - started:.2f} 秒')
+    return 0
+
+
+def cmd_lookup(args) -> int:
+    db = IpProvinceDB(args.db)
+    for ip in args.ips:
+        location = db.lookup(ip)
+        print(f'{ip:<16} {location["country"] + " " + location["province"] if location else UNKNOWN}')
+    return 0
+
+
+def _print_latency(label: str, values: List[float]):
+    print(f'  {label:<14} 次数 {len(values):>7}  p50 {percentile(values, 50):>10.2f}µs  '
+          f'p99 {percentile(values, 99):>10.2f}µs  最大 {max(values):>10.2f}µs')
+
+
+def cmd_bench(args) -> int:
+    rng = random.Random(args.seed)
+    db = IpProvinceDB(args.db, cache_size=0)
+    ips = db.sample_ips(args.count, rng)
+    print(f'📊 IP 省份库查询基准（{db.count} 个地址段，{args.count} 个随机 IP）')
+
+    cold = []
+    for ip in ips:
+        started = time.perf_counter()
+        db.lookup(ip)
+        cold.append((time.perf_counter() - started) * 1e6)
+    _print_latency('本地二分查找', cold)
+
+    # 访问日志中同一 IP 会反复出现：用少量热点 IP 模拟 LRU 命中
+    cached_db = IpProvinceDB(args.db, cache_size=DEFAULT_CACHE_SIZE)
+    hot = [rng.choice(ips[:100]) for _ in range(args.count)]
+    warm = []
+    for ip in hot:
+        started = time.perf_counter()
+        cached_db.lookup(ip)
+        warm.append((time.perf_counter() - started) * 1e6)
+    _print_latency('LRU 缓存命中', warm)
+
+    if args.remote:
+        remote, resolved = [], 0
+        for ip in ips[:args.remote]:
+            started = time.perf_counter()
+            province = lookup_remote(ip, timeout=args.timeout)
+            remote.append((time.perf_counter() - started) * 1e6)
+            resolved += province != UNKNOWN
+        _print_latency('在线接口', remote)
+        print(f'  在线接口解析成功 {resolved}/{len(remote)}，'
+              f'p50 约为本地查询的 {percentile(remote, 50) / max(percentile(cold, 50), 1e-9):,.0f} 倍')
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    logs_file = Path(args.logs)
+    with open(logs_file, 'r', encoding='utf-8') as f:
+        logs = json.load(f)
+    db = IpProvinceDB(args.db)
+
+    pending = [log for log in logs if (log.get('province') or UNKNOWN) in (UNKNOWN, 'XX')]
+    updated = 0
+    skipped_local = 0
+    for log in pending:
+        ip = log.get('ip') or ''
+        if is_local_ip(ip):
+            skipped_local += 1
+            continue
+        location = db.lookup(ip)
+        if location and location['province'] != UNKNOWN:
+            log['province'] = location['province']
+            log['country'] = location['country']
+            updated += 1
+            if args.verbose:
+                print(f'  {ip:<16} → {location["province"]}')
+
+    print(f'📋 {logs_file.name}：共 {len(logs)} 条，未知 {len(pending)} 条，'
+          f'本机/内网 {skipped_local} 条，可补全 {updated} 条')
+    if args.dry_run or not updated:
+        return 0
+
+    # 与服务端 writeJsonAtomic 一样先写临时文件再替换；服务运行时会用内存缓存覆盖，需先停服务
+    fd, tmp = tempfile.mkstemp(dir=logs_file.parent, prefix=f'.{logs_file.name}.')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(logs, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, logs_file)
+    print(f'✅ 已写回 {logs_file}')
+    return 0
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='离线 IP → 省份库：构建、查询、基准测试与访问日志补全')
+    parser.add_argument('--db', default=os.getenv('IP_PROVINCE_DB') or str(DEFAULT_DB),
+                        help='库文件路径（默认 $IP_PROVINCE_DB 或 data/ip-province.db）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='由 IP 段数据生成库文件')
+    build.add_argument('source', help='源数据文件')
+    build.add_argument('--format', choices=['csv', 'ip2region'], default='csv',
+                       help='csv：起始IP,结束IP,国家,省份（默认）；ip2region：起始|结束|国家|区域|省份|城市|ISP')
+    build.add_argument('-o', '--output', help='输出路径（默认同 --db）')
+
+    lookup = subparsers.add_parser('lookup', help='查询 IP')
+    lookup.add_argument('ips', nargs='+')
+
+    bench = subparsers.add_parser('bench', help='本地库与在线接口的查询延迟对比')
+    bench.add_argument('--count', type=int, default=100000, help='本地查询次数（默认 100000）')
+    bench.add_argument('--remote', type=int, default=0, help='同时请求在线接口的次数（默认 0，不请求）')
+    bench.add_argument('--timeout', type=float, default=3.0, help='在线接口超时秒数')
+    bench.add_argument('--seed', type=int, default=0)
+
+    backfill = subparsers.add_parser('backfill', help='补全访问日志中省份为「未知」的记录（需先停止服务）')
+    backfill.add_argument('--logs', default=str(VISIT_LOGS_FILE), help='访问日志文件（默认 data/visit-logs.json）')
+    backfill.add_argument('--dry-run', action='store_true', help='只统计，不写回')
+    backfill.add_argument('-v', '--verbose', action='store_true', help='逐条打印补全结果')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build' and not args.output:
+        args.output = args.db
+    return args
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    commands = {'build': cmd_build, 'lookup': cmd_lookup, 'bench': cmd_bench, 'backfill': cmd_backfill}
+    try:
+        sys.exit(commands[args.command](args))
+    except FileNotFoundError as e:
+        print(f'❌ 文件不存在: {e.filename}（先运行 build 生成库文件）')
+        sys.exit(1)
+    except ValueError as e:
+        print(f'❌ {e}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模型响应磁盘缓存
+按完整请求体（地址、模型、消息、采样参数）的 SHA-256 寻址，
+支持 TTL 过期与按总大小的 LRU 淘汰，供对比测试脚本复用未变化的调用结果。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / '.cache' / 'llm-responses'
+
+
+def request_key(url: str, payload: Dict[str, Any]) -> str:
+    """请求体的内容哈希：键排序后的紧凑 JSON"""
+    canonical = json.dumps({'url': url, 'payload': payload}, ensure_ascii=False,
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    内容寻址的响应缓存
+
+    - 文件布局：<cache_dir>/<key[:2]>/<key>.json
+    - 命中时更新文件 mtime，淘汰时按 mtime 从旧到新删除（LRU）
+    - 超过 ttl_seconds 的条目视为未命中并删除
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes: int = 200 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, enabled: bool = True) -> 'ResponseCache':
+        """从环境变量读取配置：LLM_CACHE_DIR / LLM_CACHE_MAX_MB / LLM_CACHE_TTL_HOURS"""
+        return cls(
+            cache_dir=os.getenv('LLM_CACHE_DIR', str(DEFAULT_CACHE_DIR)),
+            max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB', '200')) * 1024 * 1024),
+            ttl_seconds=float(os.getenv('LLM_CACHE_TTL_HOURS', '168')) * 3600,
+            enabled=enabled
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, url: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取缓存，未命中或已过期返回 None"""
+        if not self.enabled:
+            return None
+
+        path = self._path(request_key(url, payload))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry['response']
+
+    def set(self, url: str, payload: Dict[str, Any], response: Dict[str, Any]):
+        """写入缓存（原子替换），随后按总大小淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+
+        path = self._path(request_key(url, payload))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({'created_at': time.time(), 'response': response}, ensure_ascii=False).encode('utf-8')
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - previous
+            self._evict()
+
+    def _remove(self, path: Path):
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _entries(self):
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        """调用方需持有锁"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(self._entries()):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        if not self.enabled:
+            return '缓存已关闭'
+        return f'缓存命中 {self.hits}/{total}，实际调用 {self.misses} 次'
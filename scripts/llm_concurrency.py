@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模型调用并发控制
+- TokenBucket: 每个模型独立的令牌桶限速
+- AdaptiveLimiter: 自适应并发（AIMD），遇到 429/5xx 减半，连续成功后逐步放开
+- hedged_call: 对冲请求，主请求超过截止时间仍未返回时发出备用请求，取先成功的结果
+
+供 test_model_comparison.py 等对比测试脚本的并发与对冲模式使用。
+"""
+
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, Dict, Optional
+
+# 需要降速重试的 HTTP 状态码
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_throttled(status_code: Optional[int]) -> bool:
+    """是否为限流/服务端繁忙类错误"""
+    return status_code in THROTTLE_STATUS_CODES
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数），无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为允许的突发请求数"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（收到 Retry-After 时使用）"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """取一个令牌，不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """
+    自适应并发上限（加性增、乘性减）
+
+    - 限流或 5xx：上限减半（不低于 minimum）
+    - 连续成功次数达到当前上限：上限 +1（不超过 maximum）
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.in_flight = 0
+        self.success_streak = 0
+        self.peak = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+        return False
+
+    async def on_success(self):
+        async with self._condition:
+            self.success_streak += 1
+            if self.success_streak >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.success_streak = 0
+                self._condition.notify_all()
+
+    async def on_throttle(self):
+        async with self._condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.success_streak = 0
+
+
+def _succeeded(result: Dict[str, Any]) -> bool:
+    return 'error' not in result
+
+
+def hedged_call(primary: Callable[[], Dict[str, Any]], backup: Callable[[], Dict[str, Any]],
+                deadline: float, executor: Executor,
+                is_success: Callable[[Dict[str, Any]], bool] = _succeeded) -> Dict[str, Any]:
+    """
+    对冲请求：先发主请求，deadline 秒内未返回（或提前失败）时再发备用请求，取先成功的结果
+
+    未胜出的请求不会被取消（阻塞 HTTP 调用无法中断），调用方可等待 futures 中的请求完成以统计额外消耗。
+
+    Args:
+        primary: 主请求
+        backup: 备用请求
+        deadline: 发出备用请求前等待主请求的秒数
+        executor: 执行请求的线程池（至少 2 个线程）
+        is_success: 判断结果是否成功
+
+    Returns:
+        {'result', 'winner': 'primary'|'backup', 'backup_fired', 'latency_ms', 'futures': {名称: Future}}
+        两个请求都失败时返回主请求的结果
+    """
+    start = time.perf_counter()
+    futures = {'primary': executor.submit(primary)}
+    done, _ = wait([futures['primary']], timeout=deadline)
+    if not done or not is_success(futures['primary'].result()):
+        futures['backup'] = executor.submit(backup)
+
+    names = {future: name for name, future in futures.items()}
+    pending = set(futures.values())
+    winner = None
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if winner is None and is_success(future.result()):
+                winner = names[future]
+    latency_ms = int((time.perf_counter() - start) * 1000)
+
+    if winner is None:
+        winner = 'primary'
+    return {
+        'result': futures[winner].result(),
+        'winner': winner,
+        'backup_fired': 'backup' in futures,
+        'latency_ms': latency_ms,
+        'futures': futures
+    }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API Key 池
+同一供应商持有多个 key 时，把请求分摊到各个 key 上，吞吐随 key 数近似线性增长：
+- 每个 key 在 60 秒滑动窗口内统计请求数与 Token 数，不超过 rpm / tpm 预算
+- 发请求前按「输入估算 + max_tokens」预占 Token 预算，完成后改为实际用量
+- 返回 429 的 key 按 Retry-After 停用，其余 key 继续工作
+- 分配策略：least-loaded（进行中请求最少、窗口用量最低）或 round-robin（轮询）
+
+环境变量（以 Qwen 为例）:
+    QWEN_API_KEYS=sk-aaa,sk-bbb,sk-ccc   # 未设置时只使用 QWEN_API_KEY
+    QWEN_KEY_RPM=60                      # 每个 key 每分钟请求数上限（0 表示不限）
+    QWEN_KEY_TPM=100000                  # 每个 key 每分钟 Token 上限（0 表示不限）
+    QWEN_KEY_STRATEGY=least-loaded
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+WINDOW_SECONDS = 60.0
+# 429 响应没有 Retry-After 时的停用秒数
+DEFAULT_PARK_SECONDS = 1.0
+STRATEGIES = ('least-loaded', 'round-robin')
+
+_CJK_PATTERN = re.compile(r'[㐀-鿿]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 Token 数：汉字按 1 个，其他字符按 4 个字符 1 个（与 mock-llm-server.js 一致）"""
+    text = text or ''
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + -(-(len(text) - cjk) // 4)
+
+
+def estimate_request_tokens(payload: Dict[str, Any]) -> int:
+    """请求预占的 Token 数：输入估算 + max_tokens（供应商按同样方式在请求时计入 TPM）"""
+    prompt = sum(estimate_tokens(message.get('content', '')) + 4 for message in payload.get('messages', []))
+    return prompt + int(payload.get('max_tokens') or 0)
+
+
+def mask_key(key: str) -> str:
+    """报告中显示的 key（只保留首尾）"""
+    if len(key) <= 10:
+        return key[:2] + '…'
+    return f'{key[:5]}…{key[-4:]}'
+
+
+class ApiKey:
+    """单个 key 的滑动窗口预算与用量统计"""
+
+    def __init__(self, key: str, rpm: int = 0, tpm: int = 0):
+        self.key = key
+        self.label = mask_key(key)
+        self.rpm = rpm
+        self.tpm = tpm
+        # 窗口内每个请求一项 [发出时间, Token 数]，列表可变以便完成后改为实际用量
+        self.window = deque()
+        self.parked_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.tokens = 0
+        self.throttled = 0
+        self.errors = 0
+        self.parked_seconds = 0.0
+
+    def _trim(self, now: float):
+        while self.window and self.window[0][0] <= now - WINDOW_SECONDS:
+            self.window.popleft()
+
+    def window_tokens(self) -> int:
+        return sum(entry[1] for entry in self.window)
+
+    def ready_at(self, now: float, tokens: int) -> float:
+        """最早可以再发一个请求（预占 tokens）的时间"""
+        self._trim(now)
+        ready = max(now, self.parked_until)
+        if self.rpm and len(self.window) >= self.rpm:
+            ready = max(ready, self.window[len(self.window) - self.rpm][0] + WINDOW_SECONDS)
+        if self.tpm and self.window:
+            # 单个请求超过整个预算时，等窗口清空后放行，避免永远等待
+            excess = self.window_tokens() + min(tokens, self.tpm) - self.tpm
+            for started, used in self.window:
+                if excess <= 0:
+                    break
+                excess -= used
+                ready = max(ready, started + WINDOW_SECONDS)
+        return ready
+
+    def load(self) -> float:
+        """窗口用量占预算的比例（未设预算时按请求数）"""
+        shares = [len(self.window) / self.rpm if self.rpm else 0.0,
+                  self.window_tokens() / self.tpm if self.tpm else 0.0]
+        return max(shares) if self.rpm or self.tpm else float(len(self.window))
+
+
+class KeyLease:
+    """一次请求占用的 key，交还时用 KeyPool.release"""
+
+    def __init__(self, api_key: ApiKey, entry: list):
+        self.api_key = api_key
+        self.entry = entry
+
+    @property
+    def key(self) -> str:
+        return self.api_key.key
+
+
+class KeyPool:
+    """
+    多 key 调度（线程安全，供顺序调用与线程池并发调用共用）
+
+    Args:
+        keys: API key 列表（自动去重、去空）
+        rpm: 每个 key 每分钟请求数上限，0 表示不限
+        tpm: 每个 key 每分钟 Token 上限，0 表示不限
+        strategy: least-loaded 或 round-robin
+    """
+
+    def __init__(self, keys: List[str], rpm: int = 0, tpm: int = 0, strategy: str = 'least-loaded'):
+        keys = list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+        if not keys:
+            raise ValueError('API key 池为空')
+        if strategy not in STRATEGIES:
+            raise ValueError(f'未知的 key 分配策略: {strategy}（可用: {", ".join(STRATEGIES)}）')
+        self.keys = [ApiKey(key, rpm, tpm) for key in keys]
+        self.strategy = strategy
+        self.wait_seconds = 0.0
+        self._next = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls, default_key: str, prefix: str = 'QWEN', env: Mapping[str, str] = os.environ) -> 'KeyPool':
+        """从环境变量读取：<prefix>_API_KEYS / <prefix>_KEY_RPM / <prefix>_KEY_TPM / <prefix>_KEY_STRATEGY"""
+        keys = (env.get(f'{prefix}_API_KEYS') or '').split(',')
+        if not any(key.strip() for key in keys):
+            keys = [default_key]
+        return cls(
+            keys,
+            rpm=int(env.get(f'{prefix}_KEY_RPM') or 0),
+            tpm=int(env.get(f'{prefix}_KEY_TPM') or 0),
+            strategy=env.get(f'{prefix}_KEY_STRATEGY') or 'least-loaded'
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.keys)
+
+    @property
+    def paced(self) -> bool:
+        """是否设置了预算（设置后由 key 池控制速率，不再需要固定的调用间隔）"""
+        return any(api_key.rpm or api_key.tpm for api_key in self.keys)
+
+    def configure(self, rpm: Optional[int] = None, tpm: Optional[int] = None, strategy: Optional[str] = None):
+        """命令行参数覆盖环境变量中的预算与策略"""
+        if strategy is not None:
+            if strategy not in STRATEGIES:
+                raise ValueError(f'未知的 key 分配策略: {strategy}')
+            self.strategy = strategy
+        for api_key in self.keys:
+            api_key.rpm = api_key.rpm if rpm is None else rpm
+            api_key.tpm = api_key.tpm if tpm is None else tpm
+
+    def _pick(self, ready: List[ApiKey]) -> ApiKey:
+        if self.strategy == 'round-robin':
+            for offset in range(self.size):
+                candidate = self.keys[(self._next + offset) % self.size]
+                if candidate in ready:
+                    self._next = (self.keys.index(candidate) + 1) % self.size
+                    return candidate
+        return min(ready, key=lambda api_key: (api_key.in_flight, api_key.load(), api_key.requests))
+
+    def acquire(self, tokens: int = 0) -> KeyLease:
+        """取一个有预算的 key 并预占 tokens，所有 key 都不可用时等待"""
+        waited_from = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                ready_times = {api_key: api_key.ready_at(now, tokens) for api_key in self.keys}
+                ready = [api_key for api_key, at in ready_times.items() if at <= now]
+                if ready:
+                    api_key = self._pick(ready)
+                    entry = [now, tokens]
+                    api_key.window.append(entry)
+                    api_key.in_flight += 1
+                    self.wait_seconds += now - waited_from
+                    return KeyLease(api_key, entry)
+                # 其他请求完成（交还预算）时会提前唤醒
+                self._condition.wait(min(ready_times.values()) - now)
+
+    def release(self, lease: KeyLease, tokens: int = 0, status_code: Optional[int] = None,
+                retry_after: Optional[float] = None):
+        """交还 key：预占 Token 改为实际用量；429 时按 Retry-After 停用该 key"""
+        with self._condition:
+            api_key = lease.api_key
+            api_key.in_flight -= 1
+            api_key.requests += 1
+            api_key.tokens += tokens
+            lease.entry[1] = tokens
+            if status_code == 429:
+                api_key.throttled += 1
+                now = time.monotonic()
+                park = retry_after if retry_after is not None else DEFAULT_PARK_SECONDS
+                api_key.parked_seconds += max(0.0, now + park - max(now, api_key.parked_until))
+                api_key.parked_until = max(api_key.parked_until, now + park)
+            elif status_code is not None:
+                api_key.errors += 1
+            self._condition.notify_all()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """各 key 的用量"""
+        return [{
+            'key': api_key.label,
+            'requests': api_key.requests,
+            'tokens': api_key.tokens,
+            'throttled': api_key.throttled,
+            'errors': api_key.errors,
+            'parked_seconds': round(api_key.parked_seconds, 1)
+        } for api_key in self.keys]
+
+    def print_report(self):
+        budget = []
+        if self.keys[0].rpm:
+            budget.append(f'{self.keys[0].rpm} 请求/分钟')
+        if self.keys[0].tpm:
+            budget.append(f'{self.keys[0].tpm} Token/分钟')
+        print(f'🔑 API Key 用量（{self.size} 个 key，{self.strategy}'
+              + (f'，每个 key {"、".join(budget)}' if budget else '') + '）')
+        for row in self.report():
+            print(f'  {row["key"]:<14} 请求 {row["requests"]:>5}  Token {row["tokens"]:>9}  '
+                  f'429 {row["throttled"]:>3}  其他错误 {row["errors"]:>3}  停用 {row["parked_seconds"]:>6.1f}秒')
+        if self.wait_seconds >= 0.1:
+            print(f'  等待可用 key 合计 {self.wait_seconds:.1f} 秒（预算不足时增加 key 可提高吞吐）')
+
+
+def _result_tokens(result: Dict[str, Any]) -> int:
+    return (result.get('tokens') or {}).get('total', 0)
+
+
+def call_with_key(pool: KeyPool, send: Callable[[str], Dict[str, Any]], tokens: int = 0) -> Dict[str, Any]:
+    """
+    从池中取 key 调用 send(api_key)，429 时停用该 key 并换一个 key 重试（最多尝试 key 数次）
+
+    send 返回的结果字典中：tokens.total 为实际 Token 数，失败时 status_code / retry_after 为响应状态与 Retry-After。
+    只有一个 key 时不在这里重试，交给调用方原有的退避逻辑。
+    """
+    for _ in range(pool.size):
+        lease = pool.acquire(tokens)
+        try:
+            result = send(lease.key)
+        except BaseException:
+            pool.release(lease)
+            raise
+        pool.release(lease, _result_tokens(result), result.get('status_code'), result.get('retry_after'))
+        if result.get('status_code') != 429:
+            break
+    return result
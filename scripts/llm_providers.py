@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模型供应商注册表
+任何 OpenAI 兼容的 chat/completions 接口都可以作为供应商：
+- 内置 qwen / deepseek，读取与后端代理（server/services/ai-proxy.js）相同的环境变量
+- LLM_PROVIDERS_FILE（默认 config/llm-providers.json）中可以追加或覆盖供应商
+
+模型用「供应商:模型ID」指定，例如 qwen:qwen-plus、deepseek:deepseek-v4-flash；
+省略供应商时使用 qwen。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+DEFAULT_PROVIDER = 'qwen'
+DEFAULT_PROVIDERS_FILE = Path(__file__).parent.parent / 'config' / 'llm-providers.json'
+
+
+def normalize_chat_completions_url(base_or_full_url: Optional[str], fallback_url: str) -> str:
+    """基础地址补全为 .../chat/completions（与 ai-proxy.js 的 normalizeChatCompletionsUrl 一致）"""
+    raw = (base_or_full_url or '').strip()
+    if not raw:
+        return fallback_url
+    if raw.rstrip('/').endswith('/chat/completions'):
+        return raw
+    return raw.rstrip('/') + '/chat/completions'
+
+
+def builtin_providers(env: Mapping[str, str] = os.environ) -> Dict[str, Dict[str, Any]]:
+    """内置供应商，环境变量与后端代理保持一致"""
+    return {
+        'qwen': {
+            'api_url': env.get('QWEN_API_URL') or env.get('DASHSCOPE_API_URL')
+            or 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions',
+            'api_key': env.get('QWEN_API_KEY') or env.get('DASHSCOPE_API_KEY', ''),
+            'default_model': env.get('QWEN_MODEL') or env.get('DASHSCOPE_MODEL') or 'qwen-plus'
+        },
+        'deepseek': {
+            'api_url': normalize_chat_completions_url(
+                env.get('DEEPSEEK_API_URL') or env.get('DEEPSEEK_BASE_URL'),
+                'https://api.deepseek.com/chat/completions'
+            ),
+            'api_key': env.get('DEEPSEEK_API_KEY', ''),
+            'default_model': env.get('DEEPSEEK_MODEL') or 'deepseek-v4-flash'
+        }
+    }
+
+
+def load_providers(path=None, env: Mapping[str, str] = os.environ) -> Dict[str, Dict[str, Any]]:
+    """
+    内置供应商 + 配置文件中的供应商
+
+    配置文件格式（api_key_env 指定从哪个环境变量读取密钥，避免把密钥写进文件）:
+        {
+          "siliconflow": {"api_url": "https://api.siliconflow.cn/v1", "api_key_env": "SILICONFLOW_API_KEY",
+                          "default_model": "Qwen/Qwen3-8B"}
+        }
+    """
+    providers = builtin_providers(env)
+    providers_file = Path(path or env.get('LLM_PROVIDERS_FILE') or DEFAULT_PROVIDERS_FILE)
+    if not providers_file.exists():
+        if path:
+            raise FileNotFoundError(f'供应商配置文件不存在: {providers_file}')
+        return providers
+
+    with open(providers_file, 'r', encoding='utf-8') as f:
+        custom = json.load(f)
+    for name, spec in custom.items():
+        base = providers.get(name, {})
+        api_key = spec.get('api_key') or env.get(spec.get('api_key_env', ''), '') or base.get('api_key', '')
+        providers[name] = {
+            'api_url': normalize_chat_completions_url(spec.get('api_url'), base.get('api_url', '')),
+            'api_key': api_key,
+            'default_model': spec.get('default_model') or base.get('default_model', '')
+        }
+        if not providers[name]['api_url']:
+            raise ValueError(f'供应商 {name} 缺少 api_url')
+    return providers
+
+
+def resolve_model(spec: str, providers: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    「供应商:模型ID」→ 模型配置字典（与 Config.MODELS 的结构相同，另含接口地址与密钥）
+
+    只写供应商名加冒号（如 deepseek:）时使用该供应商的默认模型。
+    """
+    provider, separator, model_id = spec.partition(':')
+    if not separator:
+        provider, model_id = DEFAULT_PROVIDER, spec
+    elif provider not in providers:
+        raise ValueError(f'未知供应商: {provider}（可用: {", ".join(providers)}）')
+    entry = providers[provider]
+    model_id = model_id or entry['default_model']
+    return {
+        'model_id': model_id,
+        'name': model_id if provider == DEFAULT_PROVIDER else f'{provider}:{model_id}',
+        'description': f'{provider} · {entry["api_url"]}',
+        'provider': provider,
+        'api_url': entry['api_url'],
+        'api_key': entry['api_key']
+    }
+
+
+def resolve_models(specs: List[str], path=None) -> List[Dict[str, Any]]:
+    """批量解析模型列表"""
+    providers = load_providers(path)
+    return [resolve_model(spec, providers) for spec in specs]
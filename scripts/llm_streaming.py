@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+OpenAI 兼容接口的流式（SSE）调用
+记录首 Token 时间（TTFT）、Token 间隔与输出速度，供对比测试脚本使用。
+"""
+
+import json
+import statistics
+import time
+from typing import Dict, Any, List, Optional
+
+import requests
+
+from bench_stats import percentile
+from trace_spans import instant
+
+
+def iter_sse_data(response: requests.Response):
+    """逐个产出 SSE 事件中的 data 字段（已去掉前缀），遇到 [DONE] 结束"""
+    for line in response.iter_lines(decode_unicode=False):
+        if not line or not line.startswith(b'data:'):
+            continue
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            return
+        yield data
+
+
+def stream_chat_completion(url: str, headers: Dict[str, str], payload: Dict[str, Any],
+                           timeout: int = 120) -> Dict[str, Any]:
+    """
+    以 stream=True 调用 chat/completions，边读边计时
+
+    Args:
+        url: chat/completions 地址
+        headers: 请求头（含 Authorization）
+        payload: 请求体，会自动加上 stream 与 stream_options
+        timeout: 超时时间（秒）
+
+    Returns:
+        {
+            'content', 'duration'(ms), 'ttft'(ms), 'inter_token_ms', 'inter_token_p90_ms',
+            'tokens_per_second', 'chunks', 'usage', 'finish_reason'
+        }
+        失败时抛出 requests.exceptions.RequestException 或 ValueError
+    """
+    body = {**payload, 'stream': True, 'stream_options': {'include_usage': True}}
+    start = time.perf_counter()
+    first_token_at: Optional[float] = None
+    last_token_at: Optional[float] = None
+    gaps: List[float] = []
+    parts: List[str] = []
+    usage: Dict[str, int] = {}
+    finish_reason = None
+    chunks = 0
+
+    with requests.post(url, headers=headers, json=body, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for data in iter_sse_data(response):
+            event = json.loads(data)
+            if event.get('usage'):
+                usage = event['usage']
+            for choice in event.get('choices') or []:
+                delta = (choice.get('delta') or {}).get('content')
+                finish_reason = choice.get('finish_reason') or finish_reason
+                if not delta:
+                    continue
+                now = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = now
+                    instant('first token', ttft_ms=round((now - start) * 1000, 1))
+                else:
+                    gaps.append((now - last_token_at) * 1000)
+                last_token_at = now
+                parts.append(delta)
+                chunks += 1
+
+    end = time.perf_counter()
+    if first_token_at is None:
+        raise ValueError('流式响应中没有任何内容')
+
+    completion_tokens = usage.get('completion_tokens') or chunks
+    decode_seconds = end - first_token_at
+    # 首个 Token 之后的生成速度（不含排队与预填充时间）
+    tokens_per_second = (completion_tokens - 1) / decode_seconds if decode_seconds > 0 and completion_tokens > 1 else 0.0
+
+    return {
+        'content': ''.join(parts),
+        'duration': int((end - start) * 1000),
+        'ttft': int((first_token_at - start) * 1000),
+        'inter_token_ms': round(statistics.mean(gaps), 2) if gaps else 0.0,
+        'inter_token_p90_ms': round(percentile(gaps, 90), 2) if gaps else 0.0,
+        'tokens_per_second': round(tokens_per_second, 2),
+        'chunks': chunks,
+        'usage': {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0),
+            'total_tokens': usage.get('total_tokens', 0),
+            # 命中供应商前缀缓存的输入 token 数（OpenAI 兼容接口的 prompt_tokens_details.cached_tokens）
+            'cached_tokens': (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        },
+        'finish_reason': finish_reason
+    }
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+公共读接口压测工具（开环负载）
+按固定到达率发送请求，不等上一个请求返回（开环），避免服务变慢时压测端同步降速而低估延迟；
+延迟从「计划发送时间」算起（协调遗漏修正），同时给出从实际发送算起的服务时间作对比。
+
+场景文件见 config/load-scenarios/*.json，基线保存在 results/load-baselines/<场景名>.json，
+与基线相比超过阈值时标记为回归并以退出码 1 结束。
+
+使用方法:
+    python scripts/load_test.py --start-server                      # 启动本地 server-json.js，运行全部场景
+    python scripts/load_test.py config/load-scenarios/news-list.json --base-url http://127.0.0.1:3000
+    python scripts/load_test.py --start-server --rate 100 --duration 60 --save-baseline
+    python scripts/load_test.py --start-server --threshold 0.3      # 与基线相比变慢 30% 以上算回归
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from bench_stats import percentile
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+ROOT_DIR = Path(__file__).parent.parent
+SCENARIO_DIR = ROOT_DIR / 'config' / 'load-scenarios'
+BASELINE_DIR = ROOT_DIR / 'results' / 'load-baselines'
+RESULTS_DIR = ROOT_DIR / 'results'
+
+DEFAULT_RATE = 20.0
+DEFAULT_DURATION = 30.0
+DEFAULT_WARMUP = 5.0
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_INFLIGHT = 256
+# 回归判定：延迟比基线高出该比例且绝对差超过 MIN_DELTA_MS 时算回归；错误率高出 ERROR_RATE_DELTA 算回归
+DEFAULT_THRESHOLD = 0.2
+MIN_DELTA_MS = 5.0
+ERROR_RATE_DELTA = 0.01
+# 参与回归判定的延迟指标
+REGRESSION_METRICS = ('p50_ms', 'p90_ms', 'p99_ms')
+# 直方图每个数量级的桶数（相邻桶边界相差约 26%）
+BUCKETS_PER_DECADE = 10
+
+SERVER_START_TIMEOUT = 30
+
+
+# =====================================================
+# 场景
+# =====================================================
+
+def load_scenario(path) -> Dict[str, Any]:
+    """
+    读取场景文件
+
+    格式:
+        {
+          "name": "news-by-date",
+          "description": "...",
+          "rate": 20, "duration": 30, "warmup": 5,
+          "params": {"date": {"source": "/api/news/dates", "field": "date", "limit": 30, "fallback": ["2026-02-26"]}},
+          "requests": [{"name": "by-date", "path": "/api/news/date/{date}", "weight": 3}]
+        }
+    path 中的 {参数} 按请求序号轮流取 params 中的值
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+    if not scenario.get('requests'):
+        raise ValueError(f'场景 {path} 没有 requests')
+    scenario.setdefault('name', Path(path).stem)
+    for request in scenario['requests']:
+        request.setdefault('name', request['path'])
+        request.setdefault('method', 'GET')
+        request.setdefault('weight', 1)
+    return scenario
+
+
+def scenario_paths(paths: List[str]) -> List[Path]:
+    """未指定时运行 config/load-scenarios 下的全部场景"""
+    if paths:
+        return [Path(path) for path in paths]
+    return sorted(SCENARIO_DIR.glob('*.json'))
+
+
+def resolve_params(base_url: str, scenario: Dict[str, Any], timeout: float) -> Dict[str, List[str]]:
+    """从接口取参数值（如 /api/news/dates 返回的日期），取不到时使用 fallback"""
+    resolved = {}
+    for name, spec in (scenario.get('params') or {}).items():
+        values = []
+        if spec.get('source'):
+            try:
+                response = requests.get(base_url + spec['source'], timeout=timeout)
+                response.raise_for_status()
+                values = [str(item[spec['field']]) for item in response.json() if item.get(spec['field'])]
+            except (requests.exceptions.RequestException, ValueError, TypeError, KeyError) as e:
+                print(f'⚠️  参数 {name} 取值失败（{e}），使用 fallback')
+        values = values[:spec.get('limit') or len(values)] or list(spec.get('fallback') or [])
+        if not values:
+            raise ValueError(f'场景 {scenario["name"]} 的参数 {name} 没有可用的值')
+        resolved[name] = values
+    return resolved
+
+
+def build_targets(scenario: Dict[str, Any], params: Dict[str, List[str]], count: int,
+                  rng: random.Random) -> List[Dict[str, Any]]:
+    """
+    按权重预先生成 count 个请求，压测过程中不再做随机与格式化
+
+    Returns:
+        [{'name', 'method', 'path', 'json'(可选请求体), 'headers'(可选)}, ...]
+    """
+    requests_spec = scenario['requests']
+    weights = [request['weight'] for request in requests_spec]
+    targets = []
+    for index, request in enumerate(rng.choices(requests_spec, weights=weights, k=count)):
+        values = {name: quote(values[index % len(values)], safe='') for name, values in params.items()}
+        targets.append({'name': request['name'], 'method': request['method'],
+                        'path': request['path'].format(**values), 'json': request.get('json'),
+                        'headers': request.get('headers')})
+    return targets
+
+
+def build_schedule(rate: float, seconds: float, arrival: str, rng: random.Random) -> List[float]:
+    """计划发送时间（相对开始的秒数）：constant 为等间隔，poisson 为指数分布间隔（平均速率相同）"""
+    offsets = []
+    if arrival == 'poisson':
+        at = rng.expovariate(rate)
+        while at < seconds:
+            offsets.append(at)
+            at += rng.expovariate(rate)
+    else:
+        offsets = [index / rate for index in range(int(seconds * rate))]
+    return offsets
+
+
+# =====================================================
+# 开环负载
+# =====================================================
+
+_session_local = threading.local()
+
+
+def _session() -> requests.Session:
+    # 每个线程一个 Session，复用 keep-alive 连接
+    if not hasattr(_session_local, 'session'):
+        _session_local.session = requests.Session()
+    return _session_local.session
+
+
+def _send(base_url: str, target: Dict[str, Any], intended: float, timeout: float) -> Dict[str, Any]:
+    started = time.perf_counter()
+    sample = {'name': target['name'], 'status': None, 'error': ''}
+    try:
+        response = _session().request(target['method'], base_url + target['path'], json=target.get('json'),
+                                      headers=target.get('headers'), timeout=timeout)
+        response.content
+        sample['status'] = response.status_code
+        if response.status_code >= 400:
+            sample['error'] = f'HTTP {response.status_code}'
+    except requests.exceptions.RequestException as e:
+        sample['error'] = type(e).__name__
+    finished = time.perf_counter()
+    sample['latency_ms'] = (finished - intended) * 1000
+    sample['service_ms'] = (finished - started) * 1000
+    sample['queued_ms'] = (started - intended) * 1000
+    sample['intended_at'] = intended
+    return sample
+
+
+def run_open_loop(base_url: str, targets: List[Dict[str, Any]], schedule: List[float],
+                  timeout: float, max_inflight: int) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    按计划时间发送请求，不等待响应
+
+    并发请求数超过 max_inflight 时，新请求在压测端排队；排队时间计入延迟（协调遗漏修正），
+    否则服务变慢时压测端也会同步变慢，p99 会被严重低估。
+
+    Returns:
+        (样本列表, 压测端自身指标 {'dispatch_lag_p99_ms', 'dispatch_lag_max_ms'})
+    """
+    futures = []
+    lags = []
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        start = time.perf_counter() + 0.05
+        for offset, target in zip(schedule, targets):
+            intended = start + offset
+            now = time.perf_counter()
+            if now < intended:
+                time.sleep(intended - now)
+                now = time.perf_counter()
+            lags.append((now - intended) * 1000)
+            future = executor.submit(_send, base_url, target, intended, timeout)
+            futures.append((offset, future))
+    samples = []
+    for offset, future in futures:
+        sample = future.result()
+        sample['offset'] = offset
+        samples.append(sample)
+    generator = {
+        'dispatch_lag_p99_ms': round(percentile(lags, 99), 2),
+        'dispatch_lag_max_ms': round(max(lags), 2) if lags else 0.0
+    }
+    return samples, generator
+
+
+# =====================================================
+# 统计与直方图
+# =====================================================
+
+def histogram(values: List[float]) -> List[List[float]]:
+    """对数分桶直方图：[[桶上界 ms, 数量], ...]，只包含最小值到最大值之间的桶"""
+    if not values:
+        return []
+    counts = {}
+    for value in values:
+        index = math.ceil(math.log10(max(value, 0.01)) * BUCKETS_PER_DECADE)
+        counts[index] = counts.get(index, 0) + 1
+    return [[round(10 ** (index / BUCKETS_PER_DECADE), 2), counts.get(index, 0)]
+            for index in range(min(counts), max(counts) + 1)]
+
+
+def summarize(samples: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """延迟（从计划发送时间算起）、服务时间、错误率与实际吞吐"""
+    latencies = [s['latency_ms'] for s in samples]
+    service = [s['service_ms'] for s in samples]
+    errors = [s for s in samples if s['error']]
+    error_kinds = {}
+    for sample in errors:
+        error_kinds[sample['error']] = error_kinds.get(sample['error'], 0) + 1
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+        'error_kinds': error_kinds,
+        'throughput_rps': round((len(samples) - len(errors)) / seconds, 2) if seconds else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p90_ms': round(percentile(latencies, 90), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'p999_ms': round(percentile(latencies, 99.9), 2),
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+        'service_p50_ms': round(percentile(service, 50), 2),
+        'service_p99_ms': round(percentile(service, 99), 2),
+        'histogram': histogram(latencies)
+    }
+
+
+def summarize_run(samples: List[Dict[str, Any]], warmup: float, duration: float) -> Dict[str, Any]:
+    """去掉预热阶段的样本，按全部请求与各请求名分别统计"""
+    measured = [s for s in samples if s['offset'] >= warmup]
+    by_name = {}
+    for sample in measured:
+        by_name.setdefault(sample['name'], []).append(sample)
+    return {
+        'overall': summarize(measured, duration),
+        'by_request': {name: summarize(group, duration) for name, group in sorted(by_name.items())}
+    }
+
+
+def print_histogram(buckets: List[List[float]], width: int = 40):
+    """打印直方图（数量为 0 的连续桶合并显示）"""
+    if not buckets:
+        return
+    peak = max(count for _, count in buckets)
+    lower = 0.0
+    for upper, count in buckets:
+        if count:
+            bar = '█' * max(1, round(count / peak * width))
+            print(f'  {lower:>9.1f} - {upper:>9.1f} ms | {bar} {count}')
+        lower = upper
+
+
+def print_summary(scenario: Dict[str, Any], summary: Dict[str, Any], rate: float, generator: Dict[str, float]):
+    print(f'\n📊 {scenario["name"]}：目标 {rate:g} 请求/秒')
+    print('-' * 100)
+    print(f'{"请求":<16} | {"数量":>6} | {"错误率":>7} | {"吞吐/s":>7} | {"p50":>8} | {"p90":>8} | '
+          f'{"p99":>8} | {"p99.9":>8} | {"服务p99":>8}')
+    print('-' * 100)
+    rows = [('全部', summary['overall'])] + list(summary['by_request'].items())
+    for name, stats in rows:
+        print(f'{name[:16]:<16} | {stats["requests"]:>6} | {stats["error_rate"] * 100:>6.2f}% | '
+              f'{stats["throughput_rps"]:>7.1f} | {stats["p50_ms"]:>8.1f} | {stats["p90_ms"]:>8.1f} | '
+              f'{stats["p99_ms"]:>8.1f} | {stats["p999_ms"]:>8.1f} | {stats["service_p99_ms"]:>8.1f}')
+    overall = summary['overall']
+    if overall['error_kinds']:
+        print('❌ 错误: ' + '，'.join(f'{kind} × {count}' for kind, count in overall['error_kinds'].items()))
+    print('\n延迟分布（从计划发送时间算起，ms）:')
+    print_histogram(overall['histogram'])
+    if overall['p99_ms'] > overall['service_p99_ms'] * 1.5 and overall['p99_ms'] - overall['service_p99_ms'] > MIN_DELTA_MS:
+        print('⏳ p99 明显高于服务时间 p99：请求在服务或压测端排队（已按计划发送时间计入延迟）')
+    if generator['dispatch_lag_p99_ms'] > 10:
+        print(f'⚠️  压测端发送滞后 p99 {generator["dispatch_lag_p99_ms"]:.1f}ms，目标速率可能超出本机发送能力')
+
+
+# =====================================================
+# 基线与回归
+# =====================================================
+
+def baseline_path(scenario: Dict[str, Any]) -> Path:
+    return BASELINE_DIR / f'{scenario["name"]}.json'
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def compare_to_baseline(summary: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float) -> List[Dict[str, Any]]:
+    """
+    与基线逐项比较，返回回归列表
+
+    延迟指标：比基线高出 threshold 比例且绝对差超过 MIN_DELTA_MS；错误率：高出 ERROR_RATE_DELTA
+    """
+    regressions = []
+    current_rows = {'全部': summary['overall'], **summary['by_request']}
+    base_rows = {'全部': baseline['summary']['overall'], **baseline['summary']['by_request']}
+    for name, current in current_rows.items():
+        base = base_rows.get(name)
+        if base is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            before, after = base[metric], current[metric]
+            if after > before * (1 + threshold) and after - before > MIN_DELTA_MS:
+                regressions.append({'request': name, 'metric': metric, 'baseline': before, 'current': after,
+                                    'change_pct': round((after - before) / before * 100, 1) if before else None})
+        if current['error_rate'] > base['error_rate'] + ERROR_RATE_DELTA:
+            regressions.append({'request': name, 'metric': 'error_rate', 'baseline': base['error_rate'],
+                                'current': current['error_rate'], 'change_pct': None})
+    return regressions
+
+
+def print_comparison(summary: Dict[str, Any], baseline: Dict[str, Any], regressions: List[Dict[str, Any]],
+                     threshold: float):
+    base = baseline['summary']['overall']
+    current = summary['overall']
+    print(f'\n📏 对比基线（{baseline.get("saved_at", "")}，提交 {baseline.get("commit") or "未知"}）')
+    for metric in REGRESSION_METRICS:
+        change = (current[metric] - base[metric]) / base[metric] * 100 if base[metric] else 0.0
+        print(f'  {metric:<7} {base[metric]:>9.1f} → {current[metric]:>9.1f} ms ({change:+.1f}%)')
+    if regressions:
+        print(f'🔴 发现 {len(regressions)} 项回归（阈值 +{threshold * 100:.0f}%）:')
+        for item in regressions:
+            if item['metric'] == 'error_rate':
+                print(f'  {item["request"]}: 错误率 {item["baseline"] * 100:.2f}% → {item["current"] * 100:.2f}%')
+            else:
+                print(f'  {item["request"]}: {item["metric"]} {item["baseline"]:.1f} → {item["current"]:.1f} ms '
+                      f'({item["change_pct"]:+.1f}%)')
+    else:
+        print(f'🟢 未发现回归（阈值 +{threshold * 100:.0f}%）')
+
+
+def save_baseline(scenario: Dict[str, Any], report: Dict[str, Any]) -> Path:
+    path = baseline_path(scenario)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+# =====================================================
+# 本地服务
+# =====================================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(port: int, root_dir: Optional[Path] = None,
+                       log_path: Path = RESULTS_DIR / 'load-test-server.log') -> subprocess.Popen:
+    """
+    启动本地 JSON 运行时（与 scripts/smoke-json.js 相同的方式），等待 /api/stats 可用
+
+    root_dir 指定时以该目录为运行根目录（读写其中的 data/），用于回放等会写入数据的压测
+    """
+    log_file = open(log_path, 'w', encoding='utf-8')
+    if root_dir is None:
+        command = ['node', 'server-json.js']
+    else:
+        command = ['node', '-e', "require('dotenv').config(); require('./server/runtime')"
+                   f".startJsonRuntime({{ rootDir: {json.dumps(str(root_dir))}, env: process.env }});"]
+    process = subprocess.Popen(
+        command, cwd=ROOT_DIR, stdout=log_file, stderr=subprocess.STDOUT,
+        env={**os.environ, 'HOST': '127.0.0.1', 'PORT': str(port)}
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'本地服务启动失败，见 {log_file.name}')
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/stats', timeout=2).status_code == 200:
+                return process
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'本地服务 {SERVER_START_TIMEOUT} 秒内未就绪，见 {log_file.name}')
+
+
+# =====================================================
+# 主流程
+# =====================================================
+
+def run_scenario(scenario: Dict[str, Any], args) -> Dict[str, Any]:
+    """运行一个场景：预热 + 正式阶段，返回报告（含汇总、压测端指标与回归结果）"""
+    rate = args.rate or scenario.get('rate', DEFAULT_RATE)
+    duration = args.duration or scenario.get('duration', DEFAULT_DURATION)
+    warmup = scenario.get('warmup', DEFAULT_WARMUP) if args.warmup is None else args.warmup
+    rng = random.Random(args.seed)
+
+    params = resolve_params(args.base_url, scenario, args.timeout)
+    schedule = build_schedule(rate, warmup + duration, args.arrival, rng)
+    targets = build_targets(scenario, params, len(schedule), rng)
+
+    print(f'\n🚀 场景 {scenario["name"]}: {scenario.get("description", "")}')
+    print(f'   {rate:g} 请求/秒（{args.arrival}），预热 {warmup:g} 秒 + 正式 {duration:g} 秒，共 {len(schedule)} 个请求')
+    samples, generator = run_open_loop(args.base_url, targets, schedule, args.timeout, args.max_inflight)
+    summary = summarize_run(samples, warmup, duration)
+    print_summary(scenario, summary, rate, generator)
+
+    report = {
+        'scenario': scenario['name'],
+        'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': git_commit(),
+        'base_url': args.base_url,
+        'rate': rate,
+        'duration': duration,
+        'warmup': warmup,
+        'arrival': args.arrival,
+        'generator': generator,
+        'summary': summary,
+        'regressions': []
+    }
+
+    baseline_file = baseline_path(scenario)
+    if not args.no_compare and baseline_file.exists():
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('rate') != rate or baseline.get('arrival') != args.arrival:
+            print(f'⚠️  基线的速率/到达方式为 {baseline.get("rate")} / {baseline.get("arrival")}，与本次不同，结果仅供参考')
+        report['regressions'] = compare_to_baseline(summary, baseline, args.threshold)
+        print_comparison(summary, baseline, report['regressions'], args.threshold)
+    elif not args.save_baseline:
+        print('💡 还没有基线，可用 --save-baseline 保存本次结果为基线')
+
+    if args.save_baseline:
+        print(f'💾 已保存基线: {save_baseline(scenario, report)}')
+    return report
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='公共读接口开环压测（固定到达率，协调遗漏修正）')
+    parser.add_argument('scenarios', nargs='*', help='场景文件（默认 config/load-scenarios/*.json）')
+    parser.add_argument('--base-url', default=os.getenv('LOAD_TEST_BASE_URL', 'http://127.0.0.1:3000'),
+                        help='被测服务地址（默认 $LOAD_TEST_BASE_URL 或 http://127.0.0.1:3000）')
+    parser.add_argument('--start-server', action='store_true',
+                        help='在空闲端口启动本地 server-json.js 并对其压测，结束后关闭')
+    parser.add_argument('--rate', type=float, help='每秒请求数（覆盖场景文件）')
+    parser.add_argument('--duration', type=float, help='正式阶段秒数（覆盖场景文件）')
+    parser.add_argument('--warmup', type=float, help='预热秒数，结果不计入统计（覆盖场景文件）')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant',
+                        help='到达方式：constant 等间隔（默认）/ poisson 指数间隔')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='单个请求超时秒数')
+    parser.add_argument('--max-inflight', type=int, default=DEFAULT_MAX_INFLIGHT,
+                        help=f'压测端最大并发连接数（默认 {DEFAULT_MAX_INFLIGHT}），超出的请求排队且排队时间计入延迟')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（请求混合与 poisson 间隔）')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--no-compare', action='store_true', help='不与基线比较')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'回归阈值，延迟比基线高出该比例算回归（默认 {DEFAULT_THRESHOLD}）')
+    return parser.parse_args(argv)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    paths = scenario_paths(args.scenarios)
+    if not paths:
+        print(f'❌ 没有找到场景文件（{SCENARIO_DIR}）')
+        sys.exit(1)
+    scenarios = [load_scenario(path) for path in paths]
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    server = None
+    if args.start_server:
+        port = free_port()
+        print(f'🟡 启动本地服务 127.0.0.1:{port} ...')
+        server = start_local_server(port)
+        args.base_url = f'http://127.0.0.1:{port}'
+    args.base_url = args.base_url.rstrip('/')
+
+    reports = []
+    try:
+        for scenario in scenarios:
+            reports.append(run_scenario(scenario, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    output_file = RESULTS_DIR / f'load-test-{int(time.time() * 1000)}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    print(f'\n📄 压测结果已保存: {output_file}')
+
+    regressed = [report['scenario'] for report in reports if report['regressions']]
+    if regressed:
+        print(f'🔴 以下场景存在回归: {", ".join(regressed)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('\n\n⚠️  压测被用户中断')
+        sys.exit(130)
+    except Exception as e:
+        print(f'\n❌ 压测失败: {e}')
+        sys.exit(1)
@@ -0,0 +1,465 @@
+#!/usr/bin/env node
+
+/**
+ * 本地 OpenAI 兼容模型服务（离线性能测试用）
+ *
+ * - POST .../chat/completions：流式（SSE）与非流式，返回真实结构的 usage
+ * - 按模型名选择延迟画像：首 Token 时间、每 Token 间隔均可配置分布
+ * - 预填充时间随输入 token 数线性增长；模拟前缀缓存（命中部分按更低的单价计时，usage 中返回 cached_tokens）
+ * - 可注入 5xx 错误与 429 限流（带 Retry-After）；可按 API key 限制每分钟请求数（keyRpm）
+ * - GET /mock/stats 查看请求统计
+ *
+ * 用法:
+ *   node scripts/mock-llm-server.js --port 4010 --profile qwen-plus --rate-limit-rate 0.1
+ *   node scripts/mock-llm-server.js --key-rpm 30   # 每个 API key 每分钟最多 30 个请求
+ *   QWEN_API_URL=http://127.0.0.1:4010/v1/chat/completions python3 test_model_comparison.py --concurrent
+ */
+
+const http = require('http');
+
+// 延迟分布：fixed / uniform / normal / lognormal（单位毫秒）
+// prefillMsPerKToken / cachedPrefillMsPerKToken：每千个输入 token（未命中 / 命中前缀缓存）额外增加的首 Token 时间
+const LATENCY_PROFILES = {
+    fast: {
+        ttftMs: { dist: 'fixed', value: 20 },
+        tokenMs: { dist: 'fixed', value: 2 },
+        completionTokens: 64,
+        prefillMsPerKToken: 0,
+        cachedPrefillMsPerKToken: 0
+    },
+    'qwen-plus': {
+        ttftMs: { dist: 'lognormal', median: 450, sigma: 0.35 },
+        tokenMs: { dist: 'normal', mean: 18, stddev: 4 },
+        completionTokens: 400,
+        prefillMsPerKToken: 60,
+        cachedPrefillMsPerKToken: 6
+    },
+    'qwen-max-latest': {
+        ttftMs: { dist: 'lognormal', median: 900, sigma: 0.4 },
+        tokenMs: { dist: 'normal', mean: 32, stddev: 6 },
+        completionTokens: 500,
+        prefillMsPerKToken: 120,
+        cachedPrefillMsPerKToken: 12
+    },
+    'qwen3-max-preview': {
+        ttftMs: { dist: 'lognormal', median: 1200, sigma: 0.5 },
+        tokenMs: { dist: 'normal', mean: 28, stddev: 8 },
+        completionTokens: 600,
+        prefillMsPerKToken: 150,
+        cachedPrefillMsPerKToken: 15
+    },
+    'deepseek-v4-flash': {
+        ttftMs: { dist: 'lognormal', median: 350, sigma: 0.3 },
+        tokenMs: { dist: 'normal', mean: 12, stddev: 3 },
+        completionTokens: 400,
+        prefillMsPerKToken: 50,
+        cachedPrefillMsPerKToken: 5
+    },
+    // 长尾：大多数请求很快，少数请求首 Token 等待数秒
+    'heavy-tail': {
+        ttftMs: { dist: 'lognormal', median: 300, sigma: 1.2 },
+        tokenMs: { dist: 'uniform', min: 5, max: 60 },
+        completionTokens: 300,
+        prefillMsPerKToken: 40,
+        cachedPrefillMsPerKToken: 4
+    }
+};
+
+const DEFAULT_PROFILE = 'qwen-plus';
+const FILLER_TOKENS = ['模拟', '回答', '：', '人工', '智能', '正在', '改变', '产业', '格局', '，', '这是', '离线', '测试', '内容', '。'];
+
+// 可复现的伪随机数（mulberry32）
+function createRandom(seed) {
+    let state = seed >>> 0;
+    return function random() {
+        state = (state + 0x6D2B79F5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function sampleLatency(spec, random) {
+    if (!spec) return 0;
+    if (typeof spec === 'number') return spec;
+
+    // Box-Muller 生成标准正态分布
+    const gaussian = () => Math.sqrt(-2 * Math.log(1 - random())) * Math.cos(2 * Math.PI * random());
+    let value;
+    switch (spec.dist) {
+        case 'uniform':
+            value = spec.min + (spec.max - spec.min) * random();
+            break;
+        case 'normal':
+            value = spec.mean + spec.stddev * gaussian();
+            break;
+        case 'lognormal':
+            value = spec.median * Math.exp(spec.sigma * gaussian());
+            break;
+        default:
+            value = spec.value;
+    }
+    return Math.max(0, value || 0);
+}
+
+// 粗略估算 token 数：中文约 1 字 1 token，其余约 4 字符 1 token
+function estimateTokens(text) {
+    const value = String(text || '');
+    const cjk = (value.match(/[㐀-鿿]/g) || []).length;
+    return cjk + Math.ceil((value.length - cjk) / 4);
+}
+
+function promptTokensOf(messages) {
+    if (!Array.isArray(messages)) return 0;
+    // 每条消息另有约 4 个 token 的格式开销
+    return messages.reduce((sum, message) => sum + estimateTokens(message && message.content) + 4, 0);
+}
+
+// 系统提示词文本
+function systemPromptOf(messages) {
+    if (!Array.isArray(messages)) return '';
+    const system = messages.find((message) => message && message.role === 'system');
+    return system ? String(system.content || '') : '';
+}
+
+/**
+ * 前缀缓存：记录最近的系统提示词，新请求的系统提示词以某条记录开头时视为命中
+ * （与供应商的隐式缓存一致，短于 minTokens 的前缀不缓存）
+ */
+function createPrefixCache({ minTokens = 256, capacity = 256 } = {}) {
+    const entries = [];
+
+    return {
+        lookup(text) {
+            let best = -1;
+            for (let index = 0; index < entries.length; index += 1) {
+                if (text.startsWith(entries[index].text) && (best < 0 || entries[index].tokens > entries[best].tokens)) {
+                    best = index;
+                }
+            }
+            if (best < 0) return 0;
+            const [entry] = entries.splice(best, 1);
+            entries.push(entry);
+            return entry.tokens;
+        },
+        remember(text) {
+            const tokens = estimateTokens(text);
+            if (tokens < minTokens || entries.some((entry) => entry.text === text)) return;
+            entries.push({ text, tokens });
+            if (entries.length > capacity) entries.shift();
+        }
+    };
+}
+
+function delay(ms) {
+    return ms > 0 ? new Promise((resolve) => setTimeout(resolve, ms)) : Promise.resolve();
+}
+
+function sendJson(res, statusCode, body, headers = {}) {
+    const payload = JSON.stringify(body);
+    res.writeHead(statusCode, {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Content-Length': Buffer.byteLength(payload),
+        ...headers
+    });
+    res.end(payload);
+}
+
+function readJsonBody(req) {
+    return new Promise((resolve, reject) => {
+        const chunks = [];
+        req.on('data', (chunk) => chunks.push(chunk));
+        req.on('end', () => {
+            try {
+                resolve(chunks.length ? JSON.parse(Buffer.concat(chunks).toString('utf8')) : {});
+            } catch (error) {
+                reject(error);
+            }
+        });
+        req.on('error', reject);
+    });
+}
+
+/**
+ * 创建模拟模型服务（未监听端口，调用 server.listen 启动）
+ *
+ * @param {object} options
+ * @param {string} options.profile - 默认延迟画像（模型名匹配画像时优先使用模型对应画像）
+ * @param {object} options.profiles - 额外/覆盖的画像
+ * @param {number} options.errorRate - 返回 500 的概率
+ * @param {number} options.rateLimitRate - 返回 429 的概率
+ * @param {number} options.retryAfterSeconds - 429 响应的 Retry-After
+ * @param {number} options.seed - 随机种子，相同种子得到相同的延迟与错误序列
+ * @param {number} options.latencyScale - 所有延迟乘以该系数（单元测试中可设为 0）
+ * @param {boolean} options.prefixCache - 是否模拟前缀缓存
+ * @param {number} options.prefixCacheMinTokens - 可缓存前缀的最小 token 数
+ * @param {number} options.keyRpm - 每个 API key（Authorization 头）60 秒内的请求数上限，0 表示不限
+ */
+function createMockLlmServer({
+    profile = DEFAULT_PROFILE,
+    profiles = {},
+    errorRate = 0,
+    rateLimitRate = 0,
+    retryAfterSeconds = 1,
+    seed = 42,
+    latencyScale = 1,
+    prefixCache = true,
+    prefixCacheMinTokens = 256,
+    keyRpm = 0
+} = {}) {
+    const allProfiles = { ...LATENCY_PROFILES, ...profiles };
+    if (!allProfiles[profile]) {
+        throw new Error(`Unknown mock LLM profile: ${profile}`);
+    }
+
+    const random = createRandom(seed);
+    const stats = {
+        requests: 0,
+        streamed: 0,
+        completed: 0,
+        rateLimited: 0,
+        errors: 0,
+        completionTokens: 0,
+        cachedPromptTokens: 0,
+        requestsByKey: {}
+    };
+    const keyWindows = new Map();
+    const cache = prefixCache ? createPrefixCache({ minTokens: prefixCacheMinTokens }) : null;
+    let responseCounter = 0;
+
+    // 按 key 的 60 秒滑动窗口限流，超出时返回需要等待的秒数
+    function keyRetryAfter(apiKey) {
+        if (!keyRpm) return 0;
+        const now = Date.now();
+        const window = (keyWindows.get(apiKey) || []).filter((at) => at > now - 60000);
+        keyWindows.set(apiKey, window);
+        if (window.length >= keyRpm) {
+            return Math.max(1, Math.ceil((window[window.length - keyRpm] + 60000 - now) / 1000));
+        }
+        window.push(now);
+        return 0;
+    }
+
+    function resolveProfile(req, body) {
+        const requested = req.headers['x-mock-profile'];
+        if (requested && allProfiles[requested]) return allProfiles[requested];
+        if (body.model && allProfiles[body.model]) return allProfiles[body.model];
+        return allProfiles[profile];
+    }
+
+    async function handleChatCompletion(req, res) {
+        let body;
+        try {
+            body = await readJsonBody(req);
+        } catch (error) {
+            sendJson(res, 400, { error: { message: 'Invalid JSON body', type: 'invalid_request_error' } });
+            return;
+        }
+
+        stats.requests += 1;
+        const apiKey = String(req.headers.authorization || '').replace(/^Bearer\s+/i, '');
+        stats.requestsByKey[apiKey] = (stats.requestsByKey[apiKey] || 0) + 1;
+        const keyWait = keyRetryAfter(apiKey);
+        if (keyWait) {
+            stats.rateLimited += 1;
+            sendJson(res, 429, {
+                error: { message: 'Per-key rate limit exceeded (mock)', type: 'rate_limit_error', code: 'rate_limit_exceeded' }
+            }, { 'Retry-After': String(keyWait) });
+            return;
+        }
+        if (random() < rateLimitRate) {
+            stats.rateLimited += 1;
+            sendJson(res, 429, {
+                error: { message: 'Rate limit exceeded (mock)', type: 'rate_limit_error', code: 'rate_limit_exceeded' }
+            }, { 'Retry-After': String(retryAfterSeconds) });
+            return;
+        }
+        if (random() < errorRate) {
+            stats.errors += 1;
+            sendJson(res, 500, { error: { message: 'Internal server error (mock)', type: 'server_error' } });
+            return;
+        }
+
+        const selected = resolveProfile(req, body);
+        const maxTokens = Number(body.max_tokens) || selected.completionTokens;
+        const completionTokens = Math.max(1, Math.min(maxTokens, selected.completionTokens));
+        const promptTokens = promptTokensOf(body.messages);
+        const id = `chatcmpl-mock-${++responseCounter}`;
+        const created = Math.floor(Date.now() / 1000);
+        const model = body.model || profile;
+        const finishReason = completionTokens >= maxTokens ? 'length' : 'stop';
+        const systemPrompt = systemPromptOf(body.messages);
+        const cachedTokens = cache ? cache.lookup(systemPrompt) : 0;
+        if (cache) cache.remember(systemPrompt);
+        stats.cachedPromptTokens += cachedTokens;
+        const usage = {
+            prompt_tokens: promptTokens,
+            completion_tokens: completionTokens,
+            total_tokens: promptTokens + completionTokens,
+            prompt_tokens_details: { cached_tokens: cachedTokens }
+        };
+        const tokenAt = (index) => FILLER_TOKENS[index % FILLER_TOKENS.length];
+        const prefillMs = ((promptTokens - cachedTokens) * (selected.prefillMsPerKToken || 0)
+            + cachedTokens * (selected.cachedPrefillMsPerKToken || 0)) / 1000;
+
+        await delay((sampleLatency(selected.ttftMs, random) + prefillMs) * latencyScale);
+
+        if (!body.stream) {
+            let totalDecodeMs = 0;
+            for (let index = 1; index < completionTokens; index += 1) {
+                totalDecodeMs += sampleLatency(selected.tokenMs, random);
+            }
+            await delay(totalDecodeMs * latencyScale);
+
+            stats.completed += 1;
+            stats.completionTokens += completionTokens;
+            sendJson(res, 200, {
+                id,
+                object: 'chat.completion',
+                created,
+                model,
+                choices: [{
+                    index: 0,
+                    message: { role: 'assistant', content: Array.from({ length: completionTokens }, (_, i) => tokenAt(i)).join('') },
+                    finish_reason: finishReason
+                }],
+                usage
+            });
+            return;
+        }
+
+        stats.streamed += 1;
+        res.writeHead(200, {
+            'Content-Type': 'text/event-stream; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            Connection: 'keep-alive'
+        });
+
+        const writeEvent = (payload) => res.write(`data: ${JSON.stringify(payload)}\n\n`);
+        const chunk = (delta, finish = null) => ({
+            id,
+            object: 'chat.completion.chunk',
+            created,
+            model,
+            choices: [{ index: 0, delta, finish_reason: finish }]
+        });
+
+        let closed = false;
+        res.on('close', () => { closed = true; });
+
+        writeEvent(chunk({ role: 'assistant', content: '' }));
+        for (let index = 0; index < completionTokens && !closed; index += 1) {
+            if (index > 0) {
+                await delay(sampleLatency(selected.tokenMs, random) * latencyScale);
+            }
+            writeEvent(chunk({ content: tokenAt(index) }));
+        }
+        if (closed) return;
+
+        writeEvent(chunk({}, finishReason));
+        if (body.stream_options && body.stream_options.include_usage) {
+            writeEvent({ id, object: 'chat.completion.chunk', created, model, choices: [], usage });
+        }
+        res.end('data: [DONE]\n\n');
+        stats.completed += 1;
+        stats.completionTokens += completionTokens;
+    }
+
+    const server = http.createServer((req, res) => {
+        const pathname = (req.url || '/').split('?')[0];
+
+        if (req.method === 'POST' && /\/chat\/completions\/?$/.test(pathname)) {
+            handleChatCompletion(req, res).catch((error) => {
+                if (!res.headersSent) {
+                    sendJson(res, 500, { error: { message: error.message, type: 'server_error' } });
+                } else {
+                    res.destroy(error);
+                }
+            });
+            return;
+        }
+        if (req.method === 'GET' && /\/models\/?$/.test(pathname)) {
+            sendJson(res, 200, {
+                object: 'list',
+                data: Object.keys(allProfiles).map((name) => ({ id: name, object: 'model', owned_by: 'mock' }))
+            });
+            return;
+        }
+        if (req.method === 'GET' && pathname === '/mock/stats') {
+            sendJson(res, 200, stats);
+            return;
+        }
+
+        sendJson(res, 404, { error: { message: `Not found: ${req.method} ${pathname}`, type: 'invalid_request_error' } });
+    });
+
+    server.stats = stats;
+    return server;
+}
+
+function parseCliArgs(argv) {
+    const options = {
+        port: Number(process.env.MOCK_LLM_PORT || 4010),
+        host: process.env.MOCK_LLM_HOST || '127.0.0.1',
+        profile: process.env.MOCK_LLM_PROFILE || DEFAULT_PROFILE
+    };
+    const numeric = {
+        '--port': 'port',
+        '--error-rate': 'errorRate',
+        '--rate-limit-rate': 'rateLimitRate',
+        '--retry-after': 'retryAfterSeconds',
+        '--seed': 'seed',
+        '--latency-scale': 'latencyScale',
+        '--key-rpm': 'keyRpm'
+    };
+
+    for (let index = 0; index < argv.length; index += 1) {
+        const flag = argv[index];
+        const value = argv[index + 1];
+        if (numeric[flag]) {
+            options[numeric[flag]] = Number(value);
+            index += 1;
+        } else if (flag === '--host') {
+            options.host = value;
+            index += 1;
+        } else if (flag === '--profile') {
+            options.profile = value;
+            index += 1;
+        } else if (flag === '--no-prefix-cache') {
+            options.prefixCache = false;
+        } else if (flag === '--prefix-cache-min-tokens') {
+            options.prefixCacheMinTokens = Number(value);
+            index += 1;
+        } else if (flag === '--list-profiles') {
+            options.listProfiles = true;
+        } else {
+            throw new Error(`Unknown option: ${flag}`);
+        }
+    }
+    return options;
+}
+
+if (require.main === module) {
+    const { port, host, listProfiles, ...options } = parseCliArgs(process.argv.slice(2));
+    if (listProfiles) {
+        for (const [name, spec] of Object.entries(LATENCY_PROFILES)) {
+            console.log(`${name.padEnd(20)} ttft=${JSON.stringify(spec.ttftMs)} token=${JSON.stringify(spec.tokenMs)}`);
+        }
+        process.exit(0);
+    }
+
+    const server = createMockLlmServer(options);
+    server.listen(port, host, () => {
+        console.log(`🧪 Mock LLM server listening on http://${host}:${port}/v1/chat/completions`);
+        console.log(`   profile=${options.profile} errorRate=${options.errorRate || 0} rateLimitRate=${options.rateLimitRate || 0}`);
+    });
+}
+
+module.exports = {
+    LATENCY_PROFILES,
+    createMockLlmServer,
+    estimateTokens,
+    sampleLatency,
+    createRandom
+};
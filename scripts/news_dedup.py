@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+新闻近似去重（MinHash + LSH）
+同一条新闻常被量子位、机器之心等多个来源转载，标题略有不同；上传前把
+title + key_point + summary（以及单独的 title）切成字符 n-gram，计算 MinHash 签名，在 LSH 索引中
+查找本批次与最近 N 天已入库新闻里的近似重复，重复的文章丢弃或合并到保留的那一篇。
+
+LSH 把签名分成若干段，每段哈希到一个桶：加入一篇文章只需写入固定数量的桶，
+查询只比较同桶的候选，不随历史文章数线性增长。
+"""
+
+import json
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from datetime import date as Date, timedelta
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 字符 n-gram 长度：中文按字切分，3-gram 兼顾短标题与长摘要
+SHINGLE_SIZE = 3
+# 签名长度 = 分段数 × 每段行数；32 × 4 时 LSH 的候选阈值约为 (1/32)^(1/4) ≈ 0.42
+NUM_PERM = 128
+LSH_BANDS = 32
+# 估算的 Jaccard 相似度达到阈值视为重复：全文与标题分别判断（依据见 NewsDeduplicator）
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_TITLE_THRESHOLD = 0.6
+DEFAULT_DAYS = 7
+DEDUP_MODES = ('drop', 'merge')
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+NEWS_FILE_PATTERN = re.compile(r'^news-(\d{4}-\d{2}-\d{2})\.json$')
+
+# MinHash 签名；文本归一化后为空时为 None
+Signature = Optional[Tuple[int, ...]]
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """参与比较的文本：标题 + 要点 + 摘要"""
+    return ' '.join(str(article.get(field) or '') for field in ('title', 'key_point', 'summary'))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """归一化（全角转半角、小写、去掉空白与标点）后切成字符 n-gram，返回哈希值集合"""
+    text = _NON_WORD.sub('', unicodedata.normalize('NFKC', text).lower())
+    if len(text) <= size:
+        return {zlib.crc32(text.encode('utf-8'))} if text else set()
+    return {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """
+    计算 n-gram 集合的 MinHash 签名：第 i 个哈希函数取 hash((种子_i, n-gram 哈希))
+
+    整数元组的 hash 不受 PYTHONHASHSEED 影响，同一平台上各次运行结果一致；
+    map + zip 在 C 层完成循环，比逐个计算 (a·x + b) mod p 快约 3 倍。
+    签名只在一次运行内比较，不落盘。
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.seeds = [rng.getrandbits(61) for _ in range(num_perm)]
+
+    def signature(self, values: set) -> Signature:
+        """空集合（如只有标点或表情的标题）没有签名，返回 None，不参与索引与比较"""
+        if not values:
+            return None
+        return tuple(min(map(hash, zip(repeat(seed), values))) for seed in self.seeds)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """两个签名相同位置相等的比例，即 Jaccard 相似度的估计"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class LSHIndex:
+    """
+    MinHash 签名的 LSH 索引：签名按 bands 段切分，每段一个哈希桶表
+
+    Args:
+        num_perm: 签名长度，需能被 bands 整除
+        bands: 分段数，越多越容易召回（候选也越多）
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS):
+        if num_perm % bands:
+            raise ValueError(f'签名长度 {num_perm} 不能被分段数 {bands} 整除')
+        self.rows = num_perm // bands
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.signatures: List[Signature] = []
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterator[Tuple[Dict[bytes, List[int]], bytes]]:
+        for band, table in enumerate(self.buckets):
+            part = signature[band * self.rows:(band + 1) * self.rows]
+            yield table, struct.pack(f'>{self.rows}q', *part)
+
+    def add(self, signature: Signature) -> int:
+        """加入签名，返回编号；签名为 None 时只占用编号（与另一索引的编号保持一致），不进入哈希桶"""
+        item_id = len(self.signatures)
+        self.signatures.append(signature)
+        if signature is None:
+            return item_id
+        for table, key in self._band_keys(signature):
+            table.setdefault(key, []).append(item_id)
+        return item_id
+
+    def query(self, signature: Signature, threshold: float) -> List[Tuple[int, float]]:
+        """返回估算相似度不低于 threshold 的 (编号, 相似度)，按相似度降序"""
+        if signature is None:
+            return []
+        candidates = set()
+        for table, key in self._band_keys(signature):
+            candidates.update(table.get(key, ()))
+        matches = [(item_id, similarity(signature, self.signatures[item_id])) for item_id in candidates]
+        return sorted((match for match in matches if match[1] >= threshold), key=lambda match: -match[1])
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def merge_articles(kept: Dict[str, Any], duplicate: Dict[str, Any]) -> Dict[str, Any]:
+    """合并重复文章：保留重要度更高的一篇，空字段用另一篇补齐，重要度取较大值"""
+    score = lambda article: article.get('importance_score') or 0
+    primary, secondary = (duplicate, kept) if score(duplicate) > score(kept) else (kept, duplicate)
+    merged = dict(primary)
+    for field, value in secondary.items():
+        if value not in (None, '', [], '#') and merged.get(field) in (None, '', [], '#'):
+            merged[field] = value
+    if score(secondary) > score(merged):
+        merged['importance_score'] = secondary['importance_score']
+    return merged
+
+
+class NewsDeduplicator:
+    """
+    上传前的近似去重阶段
+
+    每篇文章建两个签名：全文（标题 + 要点 + 摘要）与标题。转载的同一条新闻摘要常被重新生成，
+    全文相似度只有 0.1~0.3，但标题高度相似；不同新闻之间全文相似度很少超过 0.35。
+    两者任一达到阈值即视为重复。
+
+    先用 add_reference 载入最近已入库的新闻，再用 filter 处理本批文章：
+    与已入库新闻重复的直接丢弃（服务端已有一份）；批次内部重复的按 mode 丢弃或合并。
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, title_threshold: float = DEFAULT_TITLE_THRESHOLD,
+                 mode: str = 'drop', num_perm: int = NUM_PERM, bands: int = LSH_BANDS,
+                 shingle_size: int = SHINGLE_SIZE):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f'未知的去重方式: {mode}')
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self.mode = mode
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.text_index = LSHIndex(num_perm, bands)
+        self.title_index = LSHIndex(num_perm, bands)
+        # 索引编号 → (来源文件名或 'batch', {标题, 批次内位置})
+        self.entries: List[Tuple[str, Dict[str, Any]]] = []
+        self.references = 0
+        self.duplicates: List[Dict[str, Any]] = []
+
+    def signatures(self, article: Dict[str, Any]) -> Tuple[Signature, Signature]:
+        """(全文签名, 标题签名)"""
+        return (self.hasher.signature(shingles(article_text(article), self.shingle_size)),
+                self.hasher.signature(shingles(str(article.get('title') or ''), self.shingle_size)))
+
+    def _add(self, signatures: Tuple[Signature, Signature], origin: str, entry: Dict[str, Any]):
+        self.text_index.add(signatures[0])
+        self.title_index.add(signatures[1])
+        self.entries.append((origin, entry))
+
+    def add_reference(self, article: Dict[str, Any], origin: str):
+        """载入一篇已入库的新闻（origin 为来源文件名，用于报告）"""
+        self._add(self.signatures(article), origin, {'title': article.get('title')})
+        self.references += 1
+
+    def _match(self, signatures: Tuple[Signature, Signature]) -> Optional[Tuple[int, float, str]]:
+        """最相似的已索引文章：(编号, 相似度, 'text' 或 'title')"""
+        matches = [(item_id, score, 'text') for item_id, score in self.text_index.query(signatures[0], self.threshold)]
+        matches += [(item_id, score, 'title')
+                    for item_id, score in self.title_index.query(signatures[1], self.title_threshold)]
+        return max(matches, key=lambda match: match[1]) if matches else None
+
+    def _record(self, article: Dict[str, Any], match: Tuple[int, float, str], kept_title: str, action: str):
+        item_id, score, matched_on = match
+        origin, _ = self.entries[item_id]
+        self.duplicates.append({
+            'title': article.get('title'),
+            'source_name': article.get('source_name'),
+            'source_url': article.get('source_url'),
+            'matched_title': kept_title,
+            'matched_in': '本批次' if origin == 'batch' else origin,
+            'matched_on': matched_on,
+            'similarity': round(score, 3),
+            'action': action
+        })
+
+    def iter_filter(self, articles: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """流式过滤（只支持 drop）：重复文章直接跳过，其余原样产出"""
+        for article in articles:
+            signatures = self.signatures(article)
+            match = self._match(signatures)
+            if match:
+                self._record(article, match, self.entries[match[0]][1]['title'], 'drop')
+                continue
+            self._add(signatures, 'batch', {'title': article.get('title')})
+            yield article
+
+    def filter(self, articles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤整批文章，merge 模式下批次内重复合并到先出现的那一篇的位置"""
+        if self.mode == 'drop':
+            return list(self.iter_filter(articles))
+
+        kept: List[Dict[str, Any]] = []
+        for article in articles:
+            signatures = self.signatures(article)
+            match = self._match(signatures)
+            if match:
+                origin, entry = self.entries[match[0]]
+                if origin == 'batch':
+                    position = entry['position']
+                    self._record(article, match, kept[position].get('title'), 'merge')
+                    kept[position] = merge_articles(kept[position], article)
+                else:
+                    self._record(article, match, entry['title'], 'drop')
+                continue
+            self._add(signatures, 'batch', {'title': article.get('title'), 'position': len(kept)})
+            kept.append(article)
+        return kept
+
+
+def recent_news_files(data_dir: Path, days: int, target_date: Optional[str] = None) -> List[Path]:
+    """
+    目标日期之前 days 天的 data/news-<日期>.json 与 data/archive/daily/news-<日期>.json
+
+    /api/news/batch 会整体替换目标日期的新闻，所以目标日期当天（含 news.json）不作为参照。
+    """
+    target = Date.fromisoformat(target_date) if target_date else Date.today()
+    start, end = target - timedelta(days=days), target - timedelta(days=1)
+    files = []
+    for directory in (data_dir, data_dir / 'archive' / 'daily'):
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.iterdir()):
+            match = NEWS_FILE_PATTERN.match(path.name)
+            if match and start <= Date.fromisoformat(match.group(1)) <= end:
+                files.append(path)
+    return files
+
+
+def load_references(dedup: NewsDeduplicator, paths: Iterable[Path]) -> int:
+    """把已入库新闻载入去重索引，返回载入篇数；损坏的文件跳过"""
+    loaded = 0
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                articles = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for article in articles if isinstance(articles, list) else []:
+            if isinstance(article, dict):
+                dedup.add_reference(article, path.name)
+                loaded += 1
+    return loaded
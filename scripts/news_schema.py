@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+新闻数据结构校验
+与服务端 normalizeImportedArticle 的字段保持一致，字段规则在模块加载时编译为检查函数，
+校验整份数据时收集所有错误（带条目序号），而不是遇到第一条就停止。
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+
+# 主分类：前端 categoryMap 中的分类 + 历史数据中已出现的分类
+CATEGORY_CHOICES = frozenset({
+    '技术', '商业', '政策', '产品', '人物', '研究', '观点', '医疗', '金融', '产业',
+    '汽车', '云计算', '硬件', '安全', '教育', '工具', '国际', '文化',
+    '国产AI大事', '政策法规', '市场动态', '融资', '投融资', 'AI', '其他', '未分类'
+})
+
+# 地区：模板中的 china / global，以及历史数据中使用的地区代码
+COUNTRY_CHOICES = frozenset({
+    'global', 'cn', 'china', 'us', 'eu', 'uk', 'japan', 'korea', 'hongkong',
+    'taiwan', 'india', 'sea', 'mea', 'africa', 'latam'
+})
+
+SCORE_RANGE = (1, 10)
+
+URL_PATTERN = re.compile(r'^https?://[^\s/?#]+\.[^\s/?#]+(?:[/?#]\S*)?$', re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(
+    r'^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:?\d{2})?)?$'
+)
+
+# 字段规则：required 为 True 时缺失或为空即报错；strict 模式下模板标注「必填」的字段都视为必填
+ARTICLE_SCHEMA = {
+    'title': {'type': str, 'required': True},
+    'summary': {'type': str, 'required': True},
+    'key_point': {'type': str, 'template_required': True},
+    'source_url': {'type': str, 'format': 'url', 'template_required': True},
+    'source_name': {'type': str, 'template_required': True},
+    'category': {'type': str, 'enum': CATEGORY_CHOICES, 'template_required': True},
+    'sub_category': {'type': str},
+    'country': {'type': str, 'enum': COUNTRY_CHOICES, 'template_required': True},
+    'importance_score': {'type': int, 'range': SCORE_RANGE, 'template_required': True},
+    'published_at': {'type': str, 'format': 'iso-date', 'template_required': True},
+}
+
+ValidationIssue = namedtuple('ValidationIssue', ['index', 'field', 'message'])
+
+TYPE_NAMES = {str: '字符串', int: '整数'}
+
+
+def _is_iso_date(value):
+    if not ISO_DATE_PATTERN.match(value):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00').replace(' ', 'T'))
+    except ValueError:
+        return False
+    return True
+
+
+def _compile_field(field, spec, strict):
+    """把单个字段规则编译为 check(value) -> 错误信息或 None"""
+    expected_type = spec['type']
+    type_name = TYPE_NAMES[expected_type]
+    checks = []
+
+    if 'enum' in spec:
+        choices = spec['enum']
+        checks.append(lambda value: None if value in choices else f'取值 {value!r} 不在允许范围内')
+    if 'range' in spec:
+        low, high = spec['range']
+        checks.append(lambda value: None if low <= value <= high else f'应在 {low}-{high} 之间，实际为 {value}')
+    if spec.get('format') == 'url':
+        checks.append(lambda value: None if URL_PATTERN.match(value) else f'不是有效的 http(s) 链接: {value[:80]!r}')
+    if spec.get('format') == 'iso-date':
+        checks.append(lambda value: None if _is_iso_date(value) else f'不是 ISO 8601 日期: {value[:40]!r}')
+
+    def check(value):
+        # bool 是 int 的子类，需单独排除
+        if not isinstance(value, expected_type) or isinstance(value, bool):
+            return f'应为{type_name}，实际为 {type(value).__name__}'
+        for rule in checks:
+            message = rule(value)
+            if message:
+                return message
+        return None
+
+    required = spec.get('required', False) or (strict and spec.get('template_required', False))
+    return field, required, check
+
+
+def compile_schema(schema=None, strict=False):
+    """编译字段规则，返回 [(字段, 是否必填, 检查函数)]"""
+    schema = schema or ARTICLE_SCHEMA
+    return [_compile_field(field, spec, strict) for field, spec in schema.items()]
+
+
+_COMPILED = {False: compile_schema(strict=False), True: compile_schema(strict=True)}
+
+
+def iter_article_issues(item, index, strict=False):
+    """逐个产出单条新闻的所有错误"""
+    if not isinstance(item, dict):
+        yield ValidationIssue(index, None, '数据格式错误：应该是对象')
+        return
+
+    for field, required, check in _COMPILED[strict]:
+        value = item.get(field)
+        if value is None or value == '':
+            if required:
+                yield ValidationIssue(index, field, '缺少必要字段')
+            continue
+        message = check(value)
+        if message:
+            yield ValidationIssue(index, field, message)
+
+
+def validate_articles(articles, strict=False):
+    """校验整份新闻数据，返回所有错误的列表（为空表示通过）"""
+    issues = []
+    for index, item in enumerate(articles):
+        issues.extend(iter_article_issues(item, index, strict))
+    return issues
+
+
+def format_issue(issue):
+    field = f' {issue.field}' if issue.field else ''
+    return f'第 {issue.index + 1} 条{field}: {issue.message}'
+
+
+def format_issues(issues, limit=20):
+    """格式化错误列表，超出 limit 条时省略剩余部分"""
+    lines = [format_issue(issue) for issue in issues[:limit]]
+    if len(issues) > limit:
+        lines.append(f'... 另有 {len(issues) - limit} 个错误')
+    return '\n'.join(lines)
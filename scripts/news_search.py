@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+新闻归档全文检索（离线倒排索引）
+对 title / key_point / summary 分词：中文按相邻两字切成 bigram，英文与数字按整词，
+写成可 mmap 的倒排索引（词典定长、按词排序可二分，倒排表为 doc id 差值 + 词频的 varint 编码），
+查询按 BM25 排序，可按分类、地区、日期过滤。
+
+增量更新：索引由若干段组成，manifest.json 记录每个日期归哪个段以及原始文件的指纹。
+每次 build 只把新增或有变化的日期写成一个新段，旧段里这些日期的文章随之失效；
+段数超过 MAX_SEGMENTS 时自动合并为一个段。
+
+使用方法:
+    python scripts/news_search.py build                      # 增量更新 data/search-index/
+    python scripts/news_search.py build --rebuild            # 全量重建
+    python scripts/news_search.py search 具身智能 --since 2026-02-01
+    python scripts/news_search.py search "OpenAI Codex" --category 技术 --limit 5
+    python scripts/news_search.py search 千问 --country cn --any --json
+    python scripts/news_search.py bench 具身智能 千问 英伟达
+
+段文件格式（小端序）:
+    头部 32 字节：'NSIX' | u16 版本 | u16 保留 | u32 文章数 | u32 词数 | u32 文档表偏移 | u32 词典偏移
+                 | u32 词串偏移 | u32 倒排表偏移
+    文档表：每篇 16 字节 u32 日期(YYYYMMDD) | u16 分类 | u16 地区 | u16 词数 | u16 保留 | u32 展示字段偏移
+    词典：每个词 20 字节 u32 词串偏移 | u16 词串长度 | u16 保留 | u32 文档频率 | u32 倒排偏移 | u32 倒排长度
+    词串区、倒排区；文件末尾为 JSON：{"categories": [...], "countries": [...]} 与每篇文章的展示字段（JSON Lines）
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+import unicodedata
+from collections import Counter
+from heapq import nlargest
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from archive_segments import DATA_DIR, _articles_of, _read_json, source_files
+from bench_stats import percentile
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+INDEX_DIR = DATA_DIR / 'search-index'
+MANIFEST_NAME = 'manifest.json'
+MAGIC = b'NSIX'
+FORMAT_VERSION = 1
+# 段数超过该值时 build 自动合并为一个段
+MAX_SEGMENTS = 8
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_LIMIT = 10
+INDEXED_FIELDS = ('title', 'key_point', 'summary')
+STORED_FIELDS = ('title', 'source_name', 'source_url', 'category', 'country', 'importance_score')
+
+HEADER = struct.Struct('<4sHHIIIIII')
+DOC = struct.Struct('<IHHHHI')
+TERM = struct.Struct('<IHHIII')
+
+_TOKEN_PATTERN = re.compile(r'[㐀-鿿豈-﫿]+|[a-z0-9]+(?:[.\-][a-z0-9]+)*')
+
+
+# =====================================================
+# 分词与编码
+# =====================================================
+
+def tokenize(text: str) -> List[str]:
+    """中文连续片段切成相邻两字的 bigram（单字片段保留单字），英文与数字按整词（如 gpt-5.3）"""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text or '').lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(data: bytes) -> Tuple[List[int], List[int]]:
+    """解码倒排表（依次为 doc id 差值与词频的 varint），返回 (doc id 列表, 词频列表)"""
+    if not data or max(data) < 0x80:
+        # 常见词的文档间隔与词频都小于 128，每个值恰好一个字节，整段交给 C 层处理
+        values = list(data)
+    else:
+        values = []
+        value = shift = 0
+        for byte in data:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                continue
+            values.append(value)
+            value = shift = 0
+    return list(accumulate(values[0::2])), values[1::2]
+
+
+def _date_int(date: str) -> int:
+    return int(date.replace('-', ''))
+
+
+def fingerprint(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# =====================================================
+# 写段
+# =====================================================
+
+def write_segment(path: Path, documents: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, List[int]]:
+    """把 (日期, 文章) 列表写成一个段文件，返回每个日期的 [文章数, 词数]"""
+    categories: Dict[str, int] = {}
+    countries: Dict[str, int] = {}
+    postings: Dict[str, bytearray] = {}
+    last_doc: Dict[str, int] = {}
+    frequencies: Dict[str, int] = Counter()
+    doc_rows = []
+    stored = bytearray()
+    day_stats: Dict[str, List[int]] = {}
+
+    for doc_id, (date, article) in enumerate(documents):
+        counts = Counter(tokenize(' '.join(str(article.get(field) or '') for field in INDEXED_FIELDS)))
+        for term, tf in counts.items():
+            out = postings.setdefault(term, bytearray())
+            encode_varint(doc_id - last_doc.get(term, 0), out)
+            encode_varint(tf, out)
+            last_doc[term] = doc_id
+            frequencies[term] += 1
+        category = categories.setdefault(str(article.get('category') or ''), len(categories))
+        country = countries.setdefault(str(article.get('country') or ''), len(countries))
+        length = min(sum(counts.values()), 0xFFFF)
+        doc_rows.append((_date_int(date), category, country, length, 0, len(stored)))
+        stats = day_stats.setdefault(date, [0, 0])
+        stats[0] += 1
+        stats[1] += length
+        fields = {field: article.get(field) for field in STORED_FIELDS if article.get(field) is not None}
+        stored += json.dumps({'date': date, **fields}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        stored += b'\n'
+
+    terms = sorted(postings, key=lambda term: term.encode('utf-8'))
+    term_blob = bytearray()
+    posting_blob = bytearray()
+    term_rows = []
+    for term in terms:
+        encoded = term.encode('utf-8')
+        term_rows.append((len(term_blob), len(encoded), 0, frequencies[term], len(posting_blob), len(postings[term])))
+        term_blob += encoded
+        posting_blob += postings[term]
+
+    docs_offset = HEADER.size
+    terms_offset = docs_offset + DOC.size * len(doc_rows)
+    strings_offset = terms_offset + TERM.size * len(term_rows)
+    postings_offset = strings_offset + len(term_blob)
+    vocab = json.dumps({'categories': list(categories), 'countries': list(countries)},
+                       ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(doc_rows), len(term_rows),
+                            docs_offset, terms_offset, strings_offset, postings_offset))
+        for row in doc_rows:
+            f.write(DOC.pack(*row))
+        for row in term_rows:
+            f.write(TERM.pack(*row))
+        f.write(term_blob)
+        f.write(posting_blob)
+        f.write(vocab)
+        f.write(stored)
+    return day_stats
+
+
+# =====================================================
+# 读段
+# =====================================================
+
+class Segment:
+    """mmap 打开的一个段：词典二分查找，文档表与展示字段按需读取"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.doc_count, self.term_count, self.docs_offset, self.terms_offset,
+         self.strings_offset, self.postings_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'不是可识别的索引段: {path}')
+        last_term = self.term_count - 1
+        tail = self.postings_offset
+        if self.term_count:
+            _, _, _, _, offset, length = TERM.unpack_from(self._map, self.terms_offset + last_term * TERM.size)
+            tail += offset + length
+        vocab_end = self._map.find(b'\n', tail)
+        vocab = json.loads(self._map[tail:vocab_end])
+        self.categories: List[str] = vocab['categories']
+        self.countries: List[str] = vocab['countries']
+        self.stored_offset = vocab_end + 1
+        self._columns = None
+
+    def close(self):
+        self._map.close()
+
+    def _term_at(self, index: int) -> Tuple[bytes, int, int, int]:
+        offset, length, _, df, post_offset, post_length = TERM.unpack_from(
+            self._map, self.terms_offset + index * TERM.size)
+        start = self.strings_offset + offset
+        return self._map[start:start + length], df, post_offset, post_length
+
+    def lookup(self, term: str) -> Optional[Tuple[int, int, int]]:
+        """词典二分查找，返回 (文档频率, 倒排偏移, 倒排长度)"""
+        target = term.encode('utf-8')
+        low, high = 0, self.term_count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            value, df, post_offset, post_length = self._term_at(mid)
+            if value < target:
+                low = mid + 1
+            elif value > target:
+                high = mid - 1
+            else:
+                return df, post_offset, post_length
+        return None
+
+    def postings(self, entry: Tuple[int, int, int]) -> Tuple[List[int], List[int]]:
+        _, post_offset, post_length = entry
+        start = self.postings_offset + post_offset
+        return decode_postings(self._map[start:start + post_length])
+
+    def doc(self, doc_id: int) -> Tuple[int, int, int, int, int, int]:
+        return DOC.unpack_from(self._map, self.docs_offset + doc_id * DOC.size)
+
+    def columns(self) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """文档表按列（日期、分类、地区、词数）读入内存，首次查询时加载一次"""
+        if self._columns is None:
+            rows = list(DOC.iter_unpack(self._map[self.docs_offset:self.terms_offset]))
+            self._columns = tuple(list(column) for column in zip(*rows))[:4] if rows else ([], [], [], [])
+        return self._columns
+
+    def stored(self, doc_id: int) -> Dict[str, Any]:
+        start = self.stored_offset + self.doc(doc_id)[5]
+        return json.loads(self._map[start:self._map.find(b'\n', start)])
+
+
+# =====================================================
+# 索引（多段 + manifest）
+# =====================================================
+
+class SearchIndex:
+    """
+    多段索引：manifest 记录每个日期由哪个段负责，旧段中已被新段接管的日期在查询时跳过
+
+    Args:
+        index_dir: 索引目录
+    """
+
+    def __init__(self, index_dir: Path = INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        manifest_path = self.index_dir / MANIFEST_NAME
+        self.manifest = _read_json(manifest_path) if manifest_path.exists() else {
+            'version': FORMAT_VERSION, 'next_segment': 1, 'segments': [], 'days': {}}
+        self._segments: Dict[str, Segment] = {}
+
+    # ---------- 构建 ----------
+
+    def _save_manifest(self):
+        fd, tmp = tempfile.mkstemp(dir=self.index_dir, prefix='.manifest-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self.index_dir / MANIFEST_NAME)
+
+    def update(self, data_dir: Path = DATA_DIR, rebuild: bool = False) -> Dict[str, int]:
+        """把新增或有变化的日期写成新段；rebuild 或段数过多时全部重写为一个段"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        sources = source_files(data_dir)
+        days = self.manifest['days']
+        changed = [date for date, path in sources.items()
+                   if days.get(date, {}).get('fingerprint') != fingerprint(path)
+                   or days[date].get('source') != path.name]
+        removed = [date for date in days if date not in sources]
+        live_segments = {entry['segment'] for date, entry in days.items() if date not in removed}
+        merge = rebuild or len(live_segments | ({'new'} if changed else set())) > MAX_SEGMENTS
+        if merge:
+            changed = list(sources)
+
+        for date in removed:
+            del days[date]
+        if changed:
+            documents = [(date, article) for date in sorted(changed)
+                         for article in _articles_of(_read_json(sources[date]))]
+            name = f'seg-{self.manifest["next_segment"]:06d}.idx'
+            self.manifest['next_segment'] += 1
+            day_stats = write_segment(self.index_dir / name, documents)
+            self.manifest['segments'].append(name)
+            for date in changed:
+                docs, tokens = day_stats.get(date, [0, 0])
+                days[date] = {'segment': name, 'source': sources[date].name, 'fingerprint': fingerprint(sources[date]),
+                              'docs': docs, 'tokens': tokens}
+
+        # 不再负责任何日期的段直接删除
+        used = {entry['segment'] for entry in days.values()}
+        stale = [name for name in self.manifest['segments'] if name not in used]
+        self.manifest['segments'] = [name for name in self.manifest['segments'] if name in used]
+        self._save_manifest()
+        for name in stale:
+            (self.index_dir / name).unlink(missing_ok=True)
+        self.close()
+        return {'changed': len(changed), 'removed': len(removed), 'segments': len(self.manifest['segments']),
+                'merged': int(merge and bool(changed))}
+
+    # ---------- 查询 ----------
+
+    def segment(self, name: str) -> Segment:
+        if name not in self._segments:
+            self._segments[name] = Segment(self.index_dir / name)
+        return self._segments[name]
+
+    def close(self):
+        for segment in self._segments.values():
+            segment.close()
+        self._segments = {}
+
+    def _owned_dates(self) -> Dict[str, set]:
+        owned: Dict[str, set] = {}
+        for date, entry in self.manifest['days'].items():
+            owned.setdefault(entry['segment'], set()).add(_date_int(date))
+        return owned
+
+    def _stats(self) -> Tuple[int, float]:
+        """BM25 的全局统计：有效文章数与平均词数（build 时按日期记录在 manifest 中）"""
+        docs = sum(entry['docs'] for entry in self.manifest['days'].values())
+        tokens = sum(entry['tokens'] for entry in self.manifest['days'].values())
+        return docs, tokens / docs if docs else 0.0
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, category: Optional[str] = None,
+               country: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+               match_all: bool = True) -> Dict[str, Any]:
+        """
+        BM25 检索
+
+        match_all 为 True 时要求命中查询的全部词（中文查询的 bigram 全部出现，近似短语匹配），
+        否则任一词命中即可。
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {'total': 0, 'results': []}
+        owned = self._owned_dates()
+        doc_count, avg_length = self._stats()
+        since_int = _date_int(since) if since else 0
+        until_int = _date_int(until) if until else 99999999
+
+        # 文档频率按所有段累加（含已失效文章，与 Lucene 删除标记的做法相同，段合并后恢复精确）
+        entries = {name: {term: self.segment(name).lookup(term) for term in terms} for name in owned}
+        df = {term: sum(entry[term][0] for entry in entries.values() if entry[term]) for term in terms}
+        if match_all and not all(df.values()):
+            return {'total': 0, 'results': []}
+        idf = {term: math.log(1 + (doc_count - df[term] + 0.5) / (df[term] + 0.5)) for term in terms if df[term]}
+
+        scored = []
+        for name, dates in owned.items():
+            segment = self.segment(name)
+            term_entries = {term: entry for term, entry in entries[name].items() if entry}
+            if not term_entries or (match_all and len(term_entries) < len(terms)):
+                continue
+            category_id = segment.categories.index(category) if category in segment.categories else -1
+            country_id = segment.countries.index(country) if country in segment.countries else -1
+            if (category and category_id < 0) or (country and country_id < 0):
+                continue
+
+            # 候选文档用集合求交（全部命中）或并集，再按文档表过滤，只对剩下的文档算分
+            postings = {term: segment.postings(entry) for term, entry in term_entries.items()}
+            ordered = sorted(postings.values(), key=lambda item: len(item[0]))
+            candidates = set(ordered[0][0])
+            for doc_ids, _ in ordered[1:]:
+                if match_all:
+                    candidates.intersection_update(doc_ids)
+                else:
+                    candidates.update(doc_ids)
+            doc_dates, doc_categories, doc_countries, lengths = segment.columns()
+            candidates = [doc_id for doc_id in candidates
+                          if doc_dates[doc_id] in dates and since_int <= doc_dates[doc_id] <= until_int
+                          and (not category or doc_categories[doc_id] == category_id)
+                          and (not country or doc_countries[doc_id] == country_id)]
+            if not candidates:
+                continue
+
+            norm_base = BM25_K1 * (1 - BM25_B)
+            norm_scale = BM25_K1 * BM25_B / (avg_length or 1)
+            scores = dict.fromkeys(candidates, 0.0)
+            for term, (doc_ids, tfs) in postings.items():
+                weight = idf[term] * (BM25_K1 + 1)
+                frequencies = dict(zip(doc_ids, tfs))
+                for doc_id in candidates:
+                    tf = frequencies.get(doc_id)
+                    if tf:
+                        scores[doc_id] += weight * tf / (tf + norm_base + norm_scale * lengths[doc_id])
+            scored.extend((score, name, doc_id) for doc_id, score in scores.items())
+
+        top = nlargest(limit, scored, key=lambda item: item[0])
+        results = [{**self.segment(name).stored(doc_id), 'score': round(score, 4)}
+                   for score, name, doc_id in top]
+        return {'total': len(scored), 'results': results}
+
+
+# =====================================================
+# 命令行
+# =====================================================
+
+def print_results(query: str, result: Dict[str, Any], elapsed_ms: float):
+    print(f'🔍 「{query}」共 {result["total"]} 篇，耗时 {elapsed_ms:.2f} ms')
+    for rank, item in enumerate(result['results'], 1):
+        print(f'{rank:>3}. [{item["date"]}] {item.get("title", "")}  '
+              f'（{item.get("source_name") or "未知来源"} / {item.get("category") or "未分类"}，{item["score"]:.2f}）')
+        if item.get('source_url'):
+            print(f'     {item["source_url"]}')
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='新闻归档全文检索：bigram 倒排索引 + BM25')
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help='数据目录（默认仓库 data/）')
+    parser.add_argument('--index-dir', default=None, help='索引目录（默认 <data-dir>/search-index）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='增量更新索引')
+    build.add_argument('--rebuild', action='store_true', help='全量重建为一个段')
+
+    search = subparsers.add_parser('search', help='检索')
+    search.add_argument('query')
+    search.add_argument('--category', help='只看该分类')
+    search.add_argument('--country', help='只看该地区（如 cn / global）')
+    search.add_argument('--since', metavar='YYYY-MM-DD', help='起始日期（含）')
+    search.add_argument('--until', metavar='YYYY-MM-DD', help='结束日期（含）')
+    search.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help=f'返回条数（默认 {DEFAULT_LIMIT}）')
+    search.add_argument('--any', action='store_true', help='任一词命中即返回（默认要求全部命中）')
+    search.add_argument('--json', action='store_true', help='输出 JSON')
+
+    bench = subparsers.add_parser('bench', help='查询延迟')
+    bench.add_argument('queries', nargs='+')
+    bench.add_argument('--repeat', type=int, default=200, help='每个查询的次数（默认 200）')
+
+    args = parser.parse_args(argv)
+    args.data_dir = Path(args.data_dir)
+    args.index_dir = Path(args.index_dir) if args.index_dir else args.data_dir / 'search-index'
+    return args
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    index = SearchIndex(args.index_dir)
+    try:
+        if args.command == 'build':
+            started = time.perf_counter()
+            result = index.update(args.data_dir, rebuild=args.rebuild)
+            print(f'✅ 索引已更新：重新索引 {result["changed"]} 天，移除 {result["removed"]} 天，'
+                  f'当前 {result["segments"]} 个段{"（已合并）" if result["merged"] else ""}，'
+                  f'耗时 {time.perf_counter() - started:.2f} 秒')
+            return
+        if not index.manifest['segments']:
+            raise FileNotFoundError(0, '索引为空', str(args.index_dir / MANIFEST_NAME))
+
+        if args.command == 'search':
+            started = time.perf_counter()
+            result = index.search(args.query, limit=args.limit, category=args.category, country=args.country,
+                                  since=args.since, until=args.until, match_all=not args.any)
+            elapsed = (time.perf_counter() - started) * 1000
+            if args.json:
+                print(json.dumps({**result, 'elapsed_ms': round(elapsed, 3)}, ensure_ascii=False, indent=2))
+            else:
+                print_results(args.query, result, elapsed)
+        elif args.command == 'bench':
+            index.search(args.queries[0])
+            print(f'📊 查询延迟（每个查询 {args.repeat} 次）')
+            for query in args.queries:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    result = index.search(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(f'  {query:<16} 命中 {result["total"]:>5}  p50 {percentile(timings, 50):>7.3f}ms  '
+                      f'p99 {percentile(timings, 99):>7.3f}ms')
+    except FileNotFoundError as e:
+        print(f'❌ 文件不存在: {e.filename}（先运行 build 生成索引）')
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,12 @@
 
 使用方法:
     python scripts/prompt_comparison_test.py
+    python scripts/prompt_comparison_test.py --stream   # 流式调用，记录首Token时间与输出速度
+    python scripts/prompt_comparison_test.py --no-cache # 不使用本地响应缓存
+    python scripts/prompt_comparison_test.py --benchmark 10 --warmup 1  # 基准模式：重复测试并给出分位数与置信区间
+    python scripts/prompt_comparison_test.py --resume 1792323734042     # 续跑中断的运行，跳过已有结果
+    QWEN_API_KEYS=sk-a,sk-b python scripts/prompt_comparison_test.py --key-rpm 60  # 多个 key 按预算分摊，不再固定等待
+    python scripts/prompt_comparison_test.py --trace trace.json --profile run.prof  # 各阶段耗时（Chrome trace）与 cProfile
 """
 
 import os
@@ -16,11 +22,21 @@ import sys
 import json
 import time
 import csv
+import argparse
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
 import requests
 from dotenv import load_dotenv
 
+from llm_streaming import stream_chat_completion
+from llm_cache import ResponseCache
+from llm_concurrency import parse_retry_after
+from llm_keypool import KeyPool, call_with_key, estimate_request_tokens
+from bench_stats import compare, describe, values_of
+from results_log import JsonlWriter, completed_keys, iter_latest_results, read_run_header, resolve_run_file, write_json_array
+from results_store import ResultsStore, prompt_hash, rows_from_prompt_comparison
+from trace_spans import add_trace_arguments, span, start_tracing, traced
+
 # =====================================================
 # 配置区域
 # =====================================================
@@ -35,6 +51,12 @@ class Config:
     API_KEY = os.getenv('QWEN_API_KEY', 'sk-d110d2cda10d428a8e0b3551d7fc2105')
     API_URL = os.getenv('QWEN_API_URL', 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions')
     MODEL = os.getenv('QWEN_MODEL', 'qwen-plus')
+    # 多个 key（QWEN_API_KEYS）时按每个 key 的请求/Token 预算分摊请求，见 llm_keypool.py
+    KEY_POOL = KeyPool.from_env(API_KEY)
+
+    # 采样参数
+    TEMPERATURE = 0.7
+    MAX_TOKENS = 2000
 
     # 提示词文件路径
     PROMPT_FILES = {
@@ -74,6 +96,20 @@ class Config:
     # 输出目录
     RESULTS_DIR = 'results'
 
+    # 流式模式（--stream）：记录首Token时间、Token间隔与输出速度
+    STREAM = False
+
+    # 响应缓存：请求体不变时直接复用上次结果（--no-cache 关闭）
+    RESPONSE_CACHE = ResponseCache.from_env()
+
+    # 两次调用之间的间隔（秒），避免API限流；设置了 key 预算（--key-rpm / --key-tpm）时不再等待
+    REQUEST_INTERVAL = 1.5
+
+    # 结果日志：每个结果完成后立即追加到 results/<前缀>-<运行ID>.jsonl
+    RUN_LOG = None
+    # 续跑时已有成功结果的单元（见 result_key）
+    COMPLETED = set()
+
 
 # =====================================================
 # 工具函数
@@ -102,6 +138,7 @@ def ensure_results_dir():
 # 提示词加载
 # =====================================================
 
+@traced('load prompts')
 def load_prompts() -> Dict[str, str]:
     """
     加载两个提示词文件
@@ -132,35 +169,75 @@ def load_prompts() -> Dict[str, str]:
 # API 调用
 # =====================================================
 
-def call_qwen_api(system_prompt: str, user_message: str) -> Dict[str, Any]:
+def call_qwen_api(system_prompt: str, user_message: str, model: str = None,
+                  temperature: float = None, max_tokens: int = None) -> Dict[str, Any]:
     """
     调用 Qwen API
 
     Args:
         system_prompt: 系统提示词
         user_message: 用户消息
+        model: 模型，默认 Config.MODEL
+        temperature: 采样温度，默认 Config.TEMPERATURE
+        max_tokens: 最大输出 Token 数，默认 Config.MAX_TOKENS
 
     Returns:
-        包含响应结果的字典
+        包含响应结果的字典，cached 字段标记是否来自缓存
     """
+    payload = {
+        'model': model or Config.MODEL,
+        'messages': [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_message}
+        ],
+        'temperature': Config.TEMPERATURE if temperature is None else temperature,
+        'max_tokens': max_tokens or Config.MAX_TOKENS
+    }
+
+    # 流式与非流式结果字段不同，分开缓存
+    cache_payload = {**payload, 'stream': Config.STREAM}
+    with span('cache lookup'):
+        cached = Config.RESPONSE_CACHE.get(Config.API_URL, cache_payload)
+    if cached is not None:
+        return {**cached, 'cached': True}
+
+    with span(f'call {payload["model"]}', cat='model', stream=Config.STREAM):
+        result = call_with_key(
+            Config.KEY_POOL,
+            lambda api_key: _request_qwen_api({'Content-Type': 'application/json',
+                                               'Authorization': f'Bearer {api_key}'}, payload),
+            estimate_request_tokens(payload)
+        )
+    if result['success']:
+        Config.RESPONSE_CACHE.set(Config.API_URL, cache_payload, result)
+    return {**result, 'cached': False}
+
+
+def _request_qwen_api(headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """实际发送请求（不经过缓存）"""
     start_time = time.time()
 
     try:
+        if Config.STREAM:
+            data = stream_chat_completion(Config.API_URL, headers, payload, timeout=120)
+            return {
+                'success': True,
+                'content': data['content'],
+                'duration': data['duration'],
+                'ttft': data['ttft'],
+                'inter_token_ms': data['inter_token_ms'],
+                'tokens_per_second': data['tokens_per_second'],
+                'tokens': {
+                    'prompt': data['usage']['prompt_tokens'],
+                    'completion': data['usage']['completion_tokens'],
+                    'total': data['usage']['total_tokens']
+                }
+            }
+
         response = requests.post(
             Config.API_URL,
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {Config.API_KEY}'
-            },
-            json={
-                'model': Config.MODEL,
-                'messages': [
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': user_message}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
+            headers=headers,
+            json=payload,
             timeout=120
         )
 
@@ -182,12 +259,19 @@ def call_qwen_api(system_prompt: str, user_message: str) -> Dict[str, Any]:
         }
 
     except requests.exceptions.RequestException as e:
-        return {
+        result = {
             'success': False,
             'error': str(e),
             'duration': 0,
             'tokens': {'prompt': 0, 'completion': 0, 'total': 0}
         }
+        # 429 时 key 池按 Retry-After 停用该 key 并换 key 重试
+        if e.response is not None:
+            result['status_code'] = e.response.status_code
+            retry_after = parse_retry_after(e.response.headers.get('Retry-After'))
+            if retry_after is not None:
+                result['retry_after'] = retry_after
+        return result
     except Exception as e:
         return {
             'success': False,
@@ -201,13 +285,15 @@ def call_qwen_api(system_prompt: str, user_message: str) -> Dict[str, Any]:
 # CSV 保存
 # =====================================================
 
-def save_to_csv(results: List[Dict[str, Any]], output_file: str):
+@traced('save csv')
+def save_to_csv(results: Iterable[Dict[str, Any]], output_file: str, benchmark: bool = False):
     """
-    保存测试结果到CSV文件
+    保存测试结果到CSV文件（逐条写入，可直接传入运行日志的迭代器）
 
     Args:
-        results: 测试结果列表
+        results: 测试结果列表或迭代器
         output_file: 输出文件路径
+        benchmark: 是否为基准模式（增加轮次/预热列）
     """
     fieldnames = [
         '测试用例ID',
@@ -218,15 +304,20 @@ def save_to_csv(results: List[Dict[str, Any]], output_file: str):
         '输入Token数',
         '输出Token数',
         '输出长度',
+        '缓存命中',
         '完整生成内容'
     ]
+    if Config.STREAM:
+        fieldnames[4:4] = ['首Token时间(ms)', 'Token间隔(ms)', '输出速度(tokens/s)']
+    if benchmark:
+        fieldnames[3:3] = ['轮次', '预热']
 
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
 
         for result in results:
-            writer.writerow({
+            row = {
                 '测试用例ID': result['test_case_id'],
                 '测试名称': result['test_name'],
                 '提示词版本': result['prompt_version'],
@@ -235,20 +326,79 @@ def save_to_csv(results: List[Dict[str, Any]], output_file: str):
                 '输入Token数': result['prompt_tokens'],
                 '输出Token数': result['completion_tokens'],
                 '输出长度': result['content_length'],
+                '缓存命中': '是' if result.get('cached') else '否',
                 '完整生成内容': result['content']
-            })
+            }
+            if benchmark:
+                row['轮次'] = result['round']
+                row['预热'] = '是' if result['warmup'] else '否'
+            if Config.STREAM:
+                row['首Token时间(ms)'] = result.get('ttft_ms', '')
+                row['Token间隔(ms)'] = result.get('inter_token_ms', '')
+                row['输出速度(tokens/s)'] = result.get('tokens_per_second', '')
+            writer.writerow(row)
+
+
+@traced('save json')
+def save_to_json(results: Iterable[Dict[str, Any]], output_file: str, summary: Dict[str, Any] = None):
+    """
+    保存测试结果到JSON文件（原始数据），逐条写入
+
+    Args:
+        results: 测试结果列表或迭代器
+        output_file: 输出文件路径
+        summary: 基准模式的统计结果，提供时输出 {'summary': ..., 'results': [...]}
+    """
+    if summary is None:
+        write_json_array(results, output_file)
+        return
+    summary_json = json.dumps(summary, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+    write_json_array(results, output_file, prefix=f'{{\n  "summary": {summary_json},\n  "results": ',
+                     suffix='\n}', level=1)
+
 
+@traced('save results store')
+def save_to_store(results: Iterable[Dict[str, Any]], run_id: str, benchmark: bool = False) -> int:
+    """
+    写入跨运行结果库（scripts/results_store.py），用于查询趋势
+
+    Returns:
+        写入的结果行数
+    """
+    tool = 'prompt_benchmark' if benchmark else 'prompt_comparison'
+    with ResultsStore() as store:
+        return store.add_run(run_id, tool, rows_from_prompt_comparison(results, run_id, Config.MODEL),
+                             meta={'model': Config.MODEL, 'stream': Config.STREAM})
+
+
+# =====================================================
+# 结果日志（JSONL）
+# =====================================================
+
+def result_key(result: Dict[str, Any]):
+    """测试单元：(轮次, 测试用例ID, 提示词版本)，普通模式轮次为 None"""
+    return result.get('round'), result['test_case_id'], result['prompt_version']
+
+
+def record_result(result: Dict[str, Any]):
+    """结果完成后立即追加到运行日志"""
+    if Config.RUN_LOG is not None:
+        Config.RUN_LOG.write({'type': 'result', **result})
 
-def save_to_json(results: List[Dict[str, Any]], output_file: str):
+
+def iter_run_results(run_file, keep_content: bool = True) -> Iterator[Dict[str, Any]]:
     """
-    保存测试结果到JSON文件（原始数据）
+    流式读取运行日志中的结果，同一单元只保留最后一条（续跑重试成功会覆盖失败）
 
     Args:
-        results: 测试结果列表
-        output_file: 输出文件路径
+        run_file: JSONL 运行日志
+        keep_content: False 时去掉完整生成内容，供统计摘要使用
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    for record in iter_latest_results(run_file, result_key):
+        record.pop('type', None)
+        if not keep_content:
+            record.pop('content', None)
+        yield record
 
 
 # =====================================================
@@ -275,11 +425,15 @@ def run_single_test(test_case: Dict, system_prompt: str, prompt_version: str) ->
 
     if result['success']:
         print(f'   ✅ 响应成功 | 时长: {format_duration(result["duration"])} | '
-              f'Token: {result["tokens"]["total"]}')
+              f'Token: {result["tokens"]["total"]}' + (' | 缓存' if result['cached'] else ''))
+        if 'ttft' in result:
+            print(f'   ⚡ 首Token: {format_duration(result["ttft"])} | '
+                  f'Token间隔: {result["inter_token_ms"]:.1f}ms | '
+                  f'输出速度: {result["tokens_per_second"]:.1f} tokens/s')
     else:
         print(f'   ❌ 响应失败: {result["error"]}')
 
-    return {
+    test_result = {
         'test_case_id': test_case['id'],
         'test_name': test_case['name'],
         'prompt_version': prompt_version,
@@ -290,21 +444,38 @@ def run_single_test(test_case: Dict, system_prompt: str, prompt_version: str) ->
         'content_length': len(result.get('content', '')),
         'content': result.get('content', ''),
         'success': result['success'],
-        'error': result.get('error', '')
+        'cached': result['cached'],
+        'error': result.get('error', ''),
+        'prompt_hash': prompt_hash(system_prompt),
+        'timestamp': time.time()
     }
+    if 'ttft' in result:
+        test_result['ttft_ms'] = result['ttft']
+        test_result['inter_token_ms'] = result['inter_token_ms']
+        test_result['tokens_per_second'] = result['tokens_per_second']
+    return test_result
+
+
+def is_completed(key) -> bool:
+    """该单元在续跑前是否已有成功结果（key 见 result_key）"""
+    return key in Config.COMPLETED
+
+
+def wait_between_calls():
+    """两次调用之间等待，避免API限流（key 池设置了预算时由 key 池控制速率）"""
+    if Config.REQUEST_INTERVAL > 0 and not Config.KEY_POOL.paced:
+        print(f'⏳ 等待 {Config.REQUEST_INTERVAL:g} 秒...\n')
+        with span('wait between calls'):
+            time.sleep(Config.REQUEST_INTERVAL)
 
 
-def run_all_tests(prompts: Dict[str, str]) -> List[Dict[str, Any]]:
+def run_all_tests(prompts: Dict[str, str]):
     """
-    运行所有测试
+    运行所有测试，每个结果完成即写入运行日志；续跑时跳过已有结果的单元
 
     Args:
         prompts: 提示词字典
-
-    Returns:
-        所有测试结果列表
     """
-    all_results = []
     total_tests = len(Config.TEST_CASES) * 2  # 每个测试用例运行2次（原+新）
     current_test = 0
 
@@ -316,35 +487,84 @@ def run_all_tests(prompts: Dict[str, str]) -> List[Dict[str, Any]]:
         print(f'\n📋 测试进度: {test_case["id"]}/{len(Config.TEST_CASES)} - {test_case["name"]}')
         print_separator('-')
 
-        # 使用原提示词测试
-        current_test += 1
-        print(f'\n[{current_test}/{total_tests}] 原提示词测试...')
-        result = run_single_test(test_case, prompts['original'], '原提示词')
-        all_results.append(result)
+        for prompt_version, system_prompt in (('原提示词', prompts['original']), ('新提示词', prompts['new'])):
+            current_test += 1
+            if is_completed((None, test_case['id'], prompt_version)):
+                print(f'\n[{current_test}/{total_tests}] {prompt_version}已有结果，跳过')
+                continue
 
-        # 延迟避免API限流
-        if current_test < total_tests:
-            print('⏳ 等待 1.5 秒...\n')
-            time.sleep(1.5)
+            print(f'\n[{current_test}/{total_tests}] {prompt_version}测试...')
+            result = run_single_test(test_case, system_prompt, prompt_version)
+            record_result(result)
 
-        # 使用新提示词测试
-        current_test += 1
-        print(f'\n[{current_test}/{total_tests}] 新提示词测试...')
-        result = run_single_test(test_case, prompts['new'], '新提示词')
-        all_results.append(result)
+            # 延迟避免API限流（缓存命中时没有实际调用，无需等待）
+            if current_test < total_tests and not result['cached']:
+                wait_between_calls()
 
-        # 延迟避免API限流
-        if current_test < total_tests:
-            print('⏳ 等待 1.5 秒...\n')
-            time.sleep(1.5)
 
-    return all_results
+def run_benchmark(prompts: Dict[str, str], repetitions: int, warmup: int):
+    """
+    基准模式：每个(测试用例, 提示词版本)重复 warmup + repetitions 轮
+
+    每轮交替两个版本的先后顺序，避免顺序偏差；预热轮的结果标记 warmup=True，不计入统计。
+
+    Args:
+        prompts: 提示词字典
+        repetitions: 计入统计的轮数
+        warmup: 预热轮数
+    结果（含 round / warmup 字段）完成即写入运行日志；续跑时跳过已有结果的单元。
+    """
+    versions = [('原提示词', prompts['original']), ('新提示词', prompts['new'])]
+    rounds = warmup + repetitions
+    total_tests = rounds * len(Config.TEST_CASES) * len(versions)
+    current_test = 0
+
+    print(f'\n🚀 基准模式: {len(Config.TEST_CASES)} 个测试用例 × 2 个提示词版本 × '
+          f'{rounds} 轮（其中预热 {warmup} 轮）')
+    print(f'总计: {total_tests} 次API调用\n')
+
+    for round_index in range(rounds):
+        is_warmup = round_index < warmup
+        print_separator('-')
+        label = '预热' if is_warmup else f'第 {round_index - warmup + 1}/{repetitions} 轮'
+        print(f'\n🔁 {label}')
+        print_separator('-')
+
+        ordered_versions = versions if round_index % 2 == 0 else versions[::-1]
+        for test_case in Config.TEST_CASES:
+            for prompt_version, system_prompt in ordered_versions:
+                current_test += 1
+                if is_completed((round_index + 1, test_case['id'], prompt_version)):
+                    print(f'\n[{current_test}/{total_tests}] {prompt_version}已有结果，跳过')
+                    continue
+
+                print(f'\n[{current_test}/{total_tests}] {prompt_version}测试...')
+                result = run_single_test(test_case, system_prompt, prompt_version)
+                result['round'] = round_index + 1
+                result['warmup'] = is_warmup
+                record_result(result)
+
+                if current_test < total_tests and not result['cached']:
+                    wait_between_calls()
 
 
 # =====================================================
 # 统计与报告
 # =====================================================
 
+def print_stream_stats(results: List[Dict[str, Any]]):
+    """流式模式下打印平均首Token时间、Token间隔与输出速度"""
+    streamed = [r for r in results if 'ttft_ms' in r]
+    if not streamed:
+        return
+    avg_ttft = sum(r['ttft_ms'] for r in streamed) / len(streamed)
+    avg_itl = sum(r['inter_token_ms'] for r in streamed) / len(streamed)
+    avg_tps = sum(r['tokens_per_second'] for r in streamed) / len(streamed)
+    print(f'   平均首Token时间: {format_duration(int(avg_ttft))}')
+    print(f'   平均Token间隔: {avg_itl:.1f}ms')
+    print(f'   平均输出速度: {avg_tps:.1f} tokens/s')
+
+
 def print_summary(results: List[Dict[str, Any]]):
     """打印统计摘要"""
     print('\n' + '=' * 80)
@@ -355,7 +575,8 @@ def print_summary(results: List[Dict[str, Any]]):
     original_results = [r for r in results if r['prompt_version'] == '原提示词' and r['success']]
     new_results = [r for r in results if r['prompt_version'] == '新提示词' and r['success']]
 
-    print(f'✅ 成功测试数: {len([r for r in results if r["success"]])}/{len(results)}\n')
+    print(f'✅ 成功测试数: {len([r for r in results if r["success"]])}/{len(results)}')
+    print(f'💾 {Config.RESPONSE_CACHE.summary()}\n')
 
     # 原提示词统计
     if original_results:
@@ -365,6 +586,7 @@ def print_summary(results: List[Dict[str, Any]]):
 
         print('📊 原提示词统计:')
         print(f'   平均响应时长: {format_duration(int(avg_duration))}')
+        print_stream_stats(original_results)
         print(f'   平均Token数: {avg_tokens:.0f}')
         print(f'   平均输出长度: {avg_length:.0f} 字符\n')
 
@@ -376,6 +598,7 @@ def print_summary(results: List[Dict[str, Any]]):
 
         print('📊 新提示词统计:')
         print(f'   平均响应时长: {format_duration(int(avg_duration))}')
+        print_stream_stats(new_results)
         print(f'   平均Token数: {avg_tokens:.0f}')
         print(f'   平均输出长度: {avg_length:.0f} 字符\n')
 
@@ -391,13 +614,146 @@ def print_summary(results: List[Dict[str, Any]]):
         else:
             print(f'   新提示词响应速度降低: {abs(improvement):.1f}%')
 
+        orig_streamed = [r for r in original_results if 'ttft_ms' in r]
+        new_streamed = [r for r in new_results if 'ttft_ms' in r]
+        if orig_streamed and new_streamed:
+            orig_ttft = sum(r['ttft_ms'] for r in orig_streamed) / len(orig_streamed)
+            new_ttft = sum(r['ttft_ms'] for r in new_streamed) / len(new_streamed)
+            print(f'   首Token时间: 原 {format_duration(int(orig_ttft))} → 新 {format_duration(int(new_ttft))}')
+
 
 # =====================================================
 # 主函数
 # =====================================================
 
+def print_benchmark_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    基准模式统计：各提示词版本的分位数、标准差与 95% bootstrap 置信区间
+
+    只有两个版本的置信区间不重叠时才判定存在差异。
+
+    Returns:
+        统计结果字典（同时写入 JSON 报告）
+    """
+    print('\n' + '=' * 80)
+    print('📊 基准测试完成 - 统计摘要')
+    print('=' * 80 + '\n')
+
+    measured = [r for r in results if not r.get('warmup')]
+    succeeded = [r for r in measured if r['success']]
+    print(f'✅ 成功测试数: {len(succeeded)}/{len(measured)}（不含预热 {len(results) - len(measured)} 次）\n')
+
+    metrics = [('duration_ms', '响应时长(ms)'), ('completion_tokens', '输出Token数')]
+    if any('ttft_ms' in r for r in succeeded):
+        metrics.append(('ttft_ms', '首Token时间(ms)'))
+
+    summary = {}
+    for field, label in metrics:
+        print(f'📈 {label}')
+        print(f'   {"版本":<8} | {"n":>3} | {"均值":>9} | {"标准差":>8} | {"p50":>9} | {"p90":>9} | {"p99":>9} | 95% 置信区间')
+        print('   ' + '-' * 94)
+        summary[field] = {}
+        for version in ('原提示词', '新提示词'):
+            stats = describe(values_of([r for r in succeeded if r['prompt_version'] == version], field))
+            summary[field][version] = stats
+            print(f'   {version:<8} | {stats["n"]:>3} | {stats["mean"]:>9.1f} | {stats["stddev"]:>8.1f} | '
+                  f'{stats["p50"]:>9.1f} | {stats["p90"]:>9.1f} | {stats["p99"]:>9.1f} | '
+                  f'[{stats["ci_low"]:.1f}, {stats["ci_high"]:.1f}]')
+        print()
+
+    print('🔄 对比分析（新提示词相对原提示词）:')
+    for field, label in metrics:
+        baseline = summary[field]['原提示词']
+        candidate = summary[field]['新提示词']
+        if baseline['n'] < 2 or candidate['n'] < 2:
+            print(f'   {label}: 样本不足，无法判断')
+            continue
+        result = compare(baseline, candidate)
+        summary[field]['comparison'] = result
+        direction = '增加' if result['change_pct'] > 0 else '减少' if result['change_pct'] < 0 else '持平'
+        if result['significant']:
+            print(f'   {label}: {direction} {abs(result["change_pct"]):.1f}%（95% 置信区间不重叠，差异显著）')
+        else:
+            print(f'   {label}: 均值{direction} {abs(result["change_pct"]):.1f}%，置信区间重叠，不能判定存在差异')
+    print()
+
+    return summary
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='提示词对比测试工具')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式调用（SSE），记录首Token时间、Token间隔与输出速度')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不读取也不写入本地响应缓存，全部实际调用')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='基准模式：每个(用例, 版本)重复 N 轮，输出 p50/p90/p99、标准差与 bootstrap 置信区间')
+    parser.add_argument('--warmup', type=int, default=1, metavar='W',
+                        help='基准模式的预热轮数，结果不计入统计（默认 1）')
+    parser.add_argument('--interval', type=float, default=Config.REQUEST_INTERVAL, metavar='SEC',
+                        help=f'两次调用之间的间隔秒数（默认 {Config.REQUEST_INTERVAL:g}）')
+    parser.add_argument('--resume', metavar='RUN',
+                        help='续跑中断的运行（运行ID或 results/ 下的 .jsonl 路径），沿用原运行的模式参数并跳过已有结果')
+    parser.add_argument('--key-rpm', type=int, metavar='N',
+                        help='每个 API key 每分钟请求数上限（默认 $QWEN_KEY_RPM，0 不限）')
+    parser.add_argument('--key-tpm', type=int, metavar='N',
+                        help='每个 API key 每分钟 Token 上限（默认 $QWEN_KEY_TPM，0 不限）')
+    parser.add_argument('--key-strategy', choices=['least-loaded', 'round-robin'],
+                        help='多个 key 的分配策略（默认 $QWEN_KEY_STRATEGY 或 least-loaded）')
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.benchmark < 0 or args.warmup < 0:
+        parser.error('--benchmark / --warmup 不能为负数')
+    return args
+
+
+def prepare_run(args) -> Tuple[Path, str]:
+    """
+    确定运行日志：新运行以时间戳为运行ID；--resume 时沿用原运行的模式参数，并读取已完成的单元
+
+    Returns:
+        (日志路径, 运行ID)
+    """
+    if args.resume:
+        run_file = resolve_run_file(args.resume, Config.RESULTS_DIR, 'prompt-comparison', 'prompt-benchmark')
+        header = read_run_header(run_file) or {}
+        args.benchmark = header.get('benchmark', args.benchmark)
+        args.warmup = header.get('warmup', args.warmup)
+        args.stream = header.get('stream', args.stream)
+        Config.COMPLETED = completed_keys(run_file, result_key, lambda r: r['success'])
+        return run_file, header.get('run_id') or run_file.stem.split('-')[-1]
+
+    run_id = str(int(time.time() * 1000))
+    prefix = 'prompt-benchmark' if args.benchmark else 'prompt-comparison'
+    return Path(Config.RESULTS_DIR) / f'{prefix}-{run_id}.jsonl', run_id
+
+
+def open_run_log(args, run_file: Path, run_id: str):
+    """打开运行日志，新运行先写入一条运行信息记录"""
+    Config.RUN_LOG = JsonlWriter(run_file)
+    if args.resume:
+        print(f'🔁 续跑 {run_file}，已有 {len(Config.COMPLETED)} 个结果将跳过')
+        return
+    Config.RUN_LOG.write({
+        'type': 'run', 'run_id': run_id, 'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'model': Config.MODEL, 'benchmark': args.benchmark, 'warmup': args.warmup, 'stream': args.stream
+    })
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    start_tracing(args.trace, args.profile, name='prompt_comparison_test')
+    # 续跑时先恢复原运行的模式参数
+    run_file, run_id = prepare_run(args)
+
+    Config.STREAM = args.stream
+    # 基准模式需要真实耗时，不使用缓存
+    Config.RESPONSE_CACHE.enabled = not args.no_cache and not args.benchmark
+    Config.REQUEST_INTERVAL = args.interval
+    Config.KEY_POOL.configure(args.key_rpm, args.key_tpm, args.key_strategy)
+
     # 打印标题
     print('\n' + '█' * 80)
     print('█' + ' ' * 78 + '█')
@@ -409,8 +765,13 @@ def main():
     # 显示配置信息
     print(f'🤖 测试模型: {Config.MODEL}')
     print(f'📝 API地址: {Config.API_URL}')
+    if Config.KEY_POOL.size > 1:
+        print(f'🔑 API Key: {Config.KEY_POOL.size} 个（{Config.KEY_POOL.strategy}）')
     print(f'📋 测试用例数: {len(Config.TEST_CASES)}')
-    print(f'🔄 每个用例测试次数: 2 (原提示词 + 新提示词)\n')
+    if args.benchmark:
+        print(f'🔄 每个用例测试次数: 2 × {args.benchmark} 轮 (另有预热 {args.warmup} 轮)\n')
+    else:
+        print(f'🔄 每个用例测试次数: 2 (原提示词 + 新提示词)\n')
 
     # 检查API Key
     if not Config.API_KEY:
@@ -425,24 +786,41 @@ def main():
         print('❌ 提示词加载失败，请检查文件是否存在')
         sys.exit(1)
 
-    print()
-
     # 确保结果目录存在
     ensure_results_dir()
+    open_run_log(args, run_file, run_id)
+    print(f'📝 结果实时写入: {run_file}（中断后可用 --resume {run_id} 续跑）\n')
 
     # 运行所有测试
-    results = run_all_tests(prompts)
-
-    # 打印统计摘要
-    print_summary(results)
+    try:
+        if args.benchmark:
+            run_benchmark(prompts, args.benchmark, args.warmup)
+        else:
+            run_all_tests(prompts)
+    finally:
+        Config.RUN_LOG.close()
+
+    # 统计摘要与报告由运行日志流式生成（摘要不读入完整生成内容）
+    results = list(iter_run_results(run_file, keep_content=False))
+    csv_file = str(run_file.with_suffix('.csv'))
+    json_file = str(run_file.with_suffix('.json'))
+    if args.benchmark:
+        summary = print_benchmark_summary(results)
+        save_to_csv(iter_run_results(run_file), csv_file, benchmark=True)
+        save_to_json(iter_run_results(run_file), json_file, summary=summary)
+    else:
+        print_summary(results)
+        save_to_csv(iter_run_results(run_file), csv_file)
+        save_to_json(iter_run_results(run_file), json_file)
 
-    # 保存结果
-    timestamp = int(time.time() * 1000)
-    csv_file = f'{Config.RESULTS_DIR}/prompt-comparison-{timestamp}.csv'
-    json_file = f'{Config.RESULTS_DIR}/prompt-comparison-{timestamp}.json'
+    try:
+        stored = save_to_store(results, run_id, benchmark=bool(args.benchmark))
+        print(f'🗄️  已写入结果库: {stored} 条（python scripts/results_store.py trend --model {Config.MODEL}）')
+    except Exception as e:
+        print(f'⚠️  写入结果库失败: {e}')
 
-    save_to_csv(results, csv_file)
-    save_to_json(results, json_file)
+    if Config.KEY_POOL.size > 1 or Config.KEY_POOL.paced:
+        Config.KEY_POOL.print_report()
 
     print('=' * 80)
     print('✅ 测试完成！')
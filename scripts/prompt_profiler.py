@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+系统提示词长度 / 延迟分析工具（识别前缀缓存）
+
+把系统提示词按行切成逐步增长的前缀（10%、25% ... 100%）以及压缩空白的变体，
+对每个变体流式调用模型，记录输入Token数、首Token时间与总时长：
+- 冷调用：在提示词开头加上唯一标记，保证不会命中供应商的前缀缓存
+- 热调用：紧接着发送完全相同的请求，检查前缀缓存是否生效
+  （usage 中的 cached_tokens > 0 为确认命中；没有该字段时首Token时间明显下降视为疑似命中）
+最后对冷调用做线性拟合，给出系统提示词每增加 1k token 带来的首Token时间与总时长增量。
+
+使用方法:
+    python scripts/prompt_profiler.py
+    python scripts/prompt_profiler.py --prompts config/system-prompt.txt --fractions 0.25,0.5,1 --repeats 5
+    python scripts/prompt_profiler.py --model qwen-max-latest --warm-calls 2
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import uuid
+from typing import Dict, Any, List
+
+import requests
+
+from bench_stats import describe, intervals_overlap, linear_fit, percentile, values_of
+from llm_streaming import stream_chat_completion
+from prompt_comparison_test import Config, ensure_results_dir, format_duration, print_separator
+from prompt_sweep import load_prompt_variants, parse_list
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+DEFAULT_PROMPTS = ['config/system-prompt.txt'] + list(Config.PROMPT_FILES.values())
+DEFAULT_FRACTIONS = [0.1, 0.25, 0.5, 0.75, 1.0]
+DEFAULT_REPEATS = 3
+DEFAULT_WARM_CALLS = 1
+# 只关心预填充耗时，输出尽量短
+DEFAULT_MAX_TOKENS = 32
+# 没有 cached_tokens 字段时，热调用首Token时间比冷调用低这么多（且置信区间不重叠）视为疑似命中
+CACHE_TTFT_DROP = 0.2
+# 置信区间计算的 bootstrap 次数（样本很少，取较小值）
+PROFILE_BOOTSTRAP_SAMPLES = 500
+
+PROFILE_USER_MESSAGE = '你好'
+
+
+# =====================================================
+# 提示词变体
+# =====================================================
+
+def cut_prefix(text: str, fraction: float) -> str:
+    """按行截取约 fraction 比例的前缀（不在行中间截断）"""
+    if fraction >= 1:
+        return text
+    target = int(len(text) * fraction)
+    cut = text.rfind('\n', 0, target)
+    return text[:cut + 1] if cut > 0 else text[:target]
+
+
+def compact(text: str) -> str:
+    """去掉行首缩进与行尾空白，合并连续空行"""
+    lines = [line.strip() for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'
+
+
+def build_variants(prompts: Dict[str, str], fractions: List[float], with_compact: bool = True) -> List[Dict[str, Any]]:
+    """每个提示词文件展开为若干前缀变体，外加一个压缩空白的完整版本"""
+    variants = []
+    for name, text in prompts.items():
+        texts = [(f'前缀 {fraction * 100:.0f}%', fraction, cut_prefix(text, fraction)) for fraction in fractions]
+        if with_compact:
+            texts.append(('压缩空白', 1.0, compact(text)))
+        for label, fraction, body in texts:
+            variants.append({
+                'id': len(variants) + 1,
+                'prompt': name,
+                'variant': label,
+                'fraction': fraction,
+                'chars': len(body),
+                'text': body,
+                'samples': []
+            })
+    return variants
+
+
+# =====================================================
+# 测量
+# =====================================================
+
+def cache_buster() -> str:
+    """唯一标记，放在系统提示词开头，使冷调用不可能命中此前的前缀缓存"""
+    return f'[profile {uuid.uuid4().hex[:12]}]\n'
+
+
+def measure(system_prompt: str, model: str, max_tokens: int) -> Dict[str, Any]:
+    """流式调用一次，返回输入Token数、命中缓存的Token数、首Token时间与总时长"""
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {Config.API_KEY}'
+    }
+    payload = {
+        'model': model,
+        'messages': [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': PROFILE_USER_MESSAGE}
+        ],
+        'temperature': 0,
+        'max_tokens': max_tokens
+    }
+    try:
+        data = stream_chat_completion(Config.API_URL, headers, payload, timeout=120)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return {'success': False, 'error': str(e)}
+
+    return {
+        'success': True,
+        'ttft_ms': data['ttft'],
+        'duration_ms': data['duration'],
+        'prompt_tokens': data['usage']['prompt_tokens'],
+        'cached_tokens': data['usage']['cached_tokens']
+    }
+
+
+def profile_variant(variant: Dict[str, Any], model: str, repeats: int, warm_calls: int, max_tokens: int):
+    """对一个变体做 repeats 组「冷调用 + warm_calls 次热调用」"""
+    for repeat in range(repeats):
+        system_prompt = cache_buster() + variant['text']
+        for call in range(1 + warm_calls):
+            phase = 'cold' if call == 0 else 'warm'
+            sample = measure(system_prompt, model, max_tokens)
+            sample.update({'phase': phase, 'repeat': repeat + 1})
+            variant['samples'].append(sample)
+
+            if sample['success']:
+                cached = f'，缓存 {sample["cached_tokens"]}' if sample['cached_tokens'] else ''
+                print(f'   {"❄️ " if phase == "cold" else "🔥"} {phase:<4} 输入 {sample["prompt_tokens"]:>5} tokens{cached} | '
+                      f'首Token {format_duration(sample["ttft_ms"])} | 总时长 {format_duration(sample["duration_ms"])}')
+            else:
+                print(f'   ❌ {phase} 调用失败: {sample["error"]}')
+
+            if Config.REQUEST_INTERVAL > 0:
+                time.sleep(Config.REQUEST_INTERVAL)
+
+
+def summarize_variant(variant: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    变体统计与缓存判定
+
+    cache 取值：
+        'hit'      热调用 usage 报告了 cached_tokens
+        'inferred' 未报告 cached_tokens，但热调用首Token时间明显低于冷调用
+        'miss'     热调用没有变快
+        'unknown'  样本不足
+    """
+    ok = [s for s in variant['samples'] if s['success']]
+    cold = [s for s in ok if s['phase'] == 'cold']
+    warm = [s for s in ok if s['phase'] == 'warm']
+    kwargs = {'samples': PROFILE_BOOTSTRAP_SAMPLES}
+    cold_ttft = describe(values_of(cold, 'ttft_ms'), **kwargs)
+    warm_ttft = describe(values_of(warm, 'ttft_ms'), **kwargs)
+
+    summary = {
+        'prompt_tokens': percentile(values_of(cold or ok, 'prompt_tokens'), 50),
+        'cold_ttft': cold_ttft,
+        'warm_ttft': warm_ttft,
+        'cold_duration': describe(values_of(cold, 'duration_ms'), **kwargs),
+        'warm_cached_tokens': percentile(values_of(warm, 'cached_tokens'), 50),
+        'cache': 'unknown'
+    }
+    if cold_ttft['n'] and warm_ttft['n']:
+        summary['ttft_drop'] = 1 - warm_ttft['p50'] / cold_ttft['p50'] if cold_ttft['p50'] else 0.0
+        if any(s['cached_tokens'] for s in warm):
+            summary['cache'] = 'hit'
+        elif summary['ttft_drop'] >= CACHE_TTFT_DROP and not intervals_overlap(cold_ttft, warm_ttft):
+            summary['cache'] = 'inferred'
+        else:
+            summary['cache'] = 'miss'
+    variant['summary'] = summary
+    return summary
+
+
+def fit_cost(variants: List[Dict[str, Any]], phase: str, field: str) -> Dict[str, float]:
+    """所有变体的 (输入千Token数, 指标) 线性拟合，slope 即每 1k token 的毫秒增量"""
+    points = [
+        (s['prompt_tokens'] / 1000, s[field])
+        for v in variants for s in v['samples']
+        if s['success'] and s['phase'] == phase
+    ]
+    return linear_fit([x for x, _ in points], [y for _, y in points])
+
+
+# =====================================================
+# 报告
+# =====================================================
+
+def print_report(variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """打印各变体统计、缓存判定与每千Token延迟成本"""
+    cache_labels = {'hit': '✅ 命中', 'inferred': '🟡 疑似命中', 'miss': '❌ 未命中', 'unknown': '-'}
+
+    print('\n' + '=' * 110)
+    print('📊 分析完成 - 各提示词变体')
+    print('=' * 110 + '\n')
+    print(f'{"提示词":<18} | {"变体":<10} | {"字符":>6} | {"输入Token":>9} | {"冷首Token p50":>13} | '
+          f'{"热首Token p50":>13} | {"冷总时长 p50":>12} | {"缓存Token":>9} | 前缀缓存')
+    print('-' * 120)
+    for v in variants:
+        s = v['summary']
+        print(f'{v["prompt"]:<18} | {v["variant"]:<10} | {v["chars"]:>6} | {s["prompt_tokens"]:>9.0f} | '
+              f'{s["cold_ttft"]["p50"]:>11.0f}ms | {s["warm_ttft"]["p50"]:>11.0f}ms | '
+              f'{s["cold_duration"]["p50"]:>10.0f}ms | {s["warm_cached_tokens"]:>9.0f} | {cache_labels[s["cache"]]}')
+
+    cold_ttft = fit_cost(variants, 'cold', 'ttft_ms')
+    cold_duration = fit_cost(variants, 'cold', 'duration_ms')
+    warm_ttft = fit_cost(variants, 'warm', 'ttft_ms')
+
+    print()
+    print('💸 系统提示词每增加 1k token 的延迟成本（冷调用线性拟合）:')
+    print(f'   首Token时间: {cold_ttft["slope"]:+.1f}ms / 1k tokens（截距 {cold_ttft["intercept"]:.0f}ms，'
+          f'R²={cold_ttft["r2"]:.2f}，{cold_ttft["n"]} 个样本）')
+    print(f'   总时长:      {cold_duration["slope"]:+.1f}ms / 1k tokens（截距 {cold_duration["intercept"]:.0f}ms，'
+          f'R²={cold_duration["r2"]:.2f}）')
+    if warm_ttft['n']:
+        print(f'   热调用首Token: {warm_ttft["slope"]:+.1f}ms / 1k tokens（命中前缀缓存时应明显低于冷调用）')
+
+    counts = {key: sum(1 for v in variants if v['summary']['cache'] == key) for key in cache_labels}
+    print()
+    print(f'🗂️  前缀缓存: 命中 {counts["hit"]}，疑似命中 {counts["inferred"]}，未命中 {counts["miss"]}'
+          f'（共 {len(variants)} 个变体）')
+    hits = [v['summary'] for v in variants if v['summary']['cache'] in ('hit', 'inferred')]
+    if hits:
+        saving = sum(s['ttft_drop'] for s in hits) / len(hits)
+        print(f'   命中时首Token时间平均降低 {saving * 100:.1f}%')
+    elif counts['miss']:
+        print('   ⚠️  连续相同请求没有变快，供应商前缀缓存可能未生效（提示词过短、模型不支持或缓存已过期）')
+    print()
+
+    return {
+        'cost_per_1k_tokens': {
+            'cold_ttft': cold_ttft,
+            'cold_duration': cold_duration,
+            'warm_ttft': warm_ttft
+        },
+        'cache_counts': counts
+    }
+
+
+# =====================================================
+# 主函数
+# =====================================================
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='系统提示词长度 / 延迟分析（识别前缀缓存）')
+    parser.add_argument('--prompts', nargs='+', default=DEFAULT_PROMPTS,
+                        help='提示词文件（默认 system-prompt / 原提示词 / 新提示词）')
+    parser.add_argument('--fractions', type=lambda v: parse_list(v, float), default=DEFAULT_FRACTIONS,
+                        help='前缀比例，逗号分隔（默认 0.1,0.25,0.5,0.75,1）')
+    parser.add_argument('--no-compact', action='store_true', help='不测试压缩空白的变体')
+    parser.add_argument('--model', default=Config.MODEL, help=f'模型（默认 {Config.MODEL}）')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f'每个变体的冷/热调用组数（默认 {DEFAULT_REPEATS}）')
+    parser.add_argument('--warm-calls', type=int, default=DEFAULT_WARM_CALLS,
+                        help=f'每次冷调用后紧接的相同请求数（默认 {DEFAULT_WARM_CALLS}）')
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS,
+                        help=f'输出 Token 上限，越小越能突出预填充耗时（默认 {DEFAULT_MAX_TOKENS}）')
+    parser.add_argument('--interval', type=float, default=Config.REQUEST_INTERVAL,
+                        help=f'两次调用之间的间隔秒数（默认 {Config.REQUEST_INTERVAL:g}）')
+    args = parser.parse_args(argv)
+    if args.repeats < 1 or args.warm_calls < 0:
+        parser.error('需要 --repeats >= 1 且 --warm-calls >= 0')
+    if not args.fractions or any(not 0 < f <= 1 for f in args.fractions):
+        parser.error('--fractions 取值范围为 (0, 1]')
+    return args
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    Config.REQUEST_INTERVAL = args.interval
+
+    print('\n' + '█' * 80)
+    print('█' + '  系统提示词长度 / 延迟分析'.center(76) + '  █')
+    print('█' * 80 + '\n')
+
+    if not Config.API_KEY:
+        print('❌ 请在 .env 文件中配置 QWEN_API_KEY')
+        sys.exit(1)
+
+    prompts = load_prompt_variants(args.prompts)
+    variants = build_variants(prompts, args.fractions, with_compact=not args.no_compact)
+    calls = len(variants) * args.repeats * (1 + args.warm_calls)
+
+    print(f'🤖 测试模型: {args.model}')
+    print(f'📝 API地址: {Config.API_URL}')
+    print(f'🧮 {len(prompts)} 个提示词 × {len(variants) // len(prompts)} 个变体 × {args.repeats} 组 × '
+          f'(1 冷 + {args.warm_calls} 热) = {calls} 次调用')
+    print_separator('-')
+
+    for variant in variants:
+        print(f'\n[{variant["id"]}/{len(variants)}] {variant["prompt"]} · {variant["variant"]}（{variant["chars"]} 字符）')
+        profile_variant(variant, args.model, args.repeats, args.warm_calls, args.max_tokens)
+        summarize_variant(variant)
+
+    report = print_report(variants)
+
+    ensure_results_dir()
+    output_file = f'{Config.RESULTS_DIR}/prompt-profile-{int(time.time() * 1000)}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'settings': {
+                'model': args.model,
+                'fractions': args.fractions,
+                'repeats': args.repeats,
+                'warm_calls': args.warm_calls,
+                'max_tokens': args.max_tokens
+            },
+            'report': report,
+            'variants': [{key: value for key, value in v.items() if key != 'text'} for v in variants]
+        }, f, ensure_ascii=False, indent=2)
+    print(f'📄 分析结果已保存: {output_file}\n')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('\n\n⚠️  分析被用户中断')
+        sys.exit(0)
+    except Exception as e:
+        print(f'\n\n❌ 分析失败: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词 / 模型 / 采样参数扫描工具（自适应提前停止）
+
+把提示词版本 × 模型 × temperature × max_tokens 展开为配置矩阵，按轮次对仍在采样的配置各调用一次。
+某个配置的响应时长与输出Token数都已收敛（置信区间半宽小于均值的 tolerance），
+或在两项指标上都被其他配置明显支配（置信区间不重叠）时，停止对它采样。
+最后输出「响应时长 - Token 数」的 Pareto 前沿以及相对完整网格节省的调用次数。
+
+使用方法:
+    python scripts/prompt_sweep.py
+    python scripts/prompt_sweep.py --models qwen-plus,qwen-max --temperatures 0.3,0.7 --max-tokens 1000,2000
+    python scripts/prompt_sweep.py --prompts config/original-prompt.txt config/new-prompt.txt --max-samples 15
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from bench_stats import describe, values_of
+from prompt_comparison_test import Config, call_qwen_api, ensure_results_dir, format_duration, print_separator
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_MAX_SAMPLES = 20
+DEFAULT_TOLERANCE = 0.1
+# 收敛判断时的 bootstrap 重采样次数（每轮每个配置都要计算，取较小值）
+SWEEP_BOOTSTRAP_SAMPLES = 500
+
+METRICS = ('duration_ms', 'completion_tokens')
+
+
+# =====================================================
+# 配置矩阵
+# =====================================================
+
+def parse_list(value: str, cast=str) -> List[Any]:
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def load_prompt_variants(paths: List[str]) -> Dict[str, str]:
+    """读取提示词文件，返回 {文件名: 内容}"""
+    variants = {}
+    for path in paths:
+        prompt_path = Path(path)
+        if not prompt_path.exists():
+            raise FileNotFoundError(f'提示词文件不存在: {path}')
+        variants[prompt_path.stem] = prompt_path.read_text(encoding='utf-8')
+    return variants
+
+
+def build_cells(prompts: Dict[str, str], models: List[str], temperatures: List[float],
+                max_tokens: List[int]) -> List[Dict[str, Any]]:
+    """展开配置矩阵，每个配置一个 cell"""
+    cells = []
+    for prompt_name, model, temperature, tokens in itertools.product(prompts, models, temperatures, max_tokens):
+        cells.append({
+            'id': len(cells) + 1,
+            'prompt': prompt_name,
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': tokens,
+            'samples': [],
+            'status': 'active',
+            'stats': {}
+        })
+    return cells
+
+
+def cell_label(cell: Dict[str, Any]) -> str:
+    return f'{cell["prompt"]} | {cell["model"]} | t={cell["temperature"]:g} | max={cell["max_tokens"]}'
+
+
+# =====================================================
+# 提前停止判断
+# =====================================================
+
+def update_stats(cell: Dict[str, Any]):
+    succeeded = [s for s in cell['samples'] if s['success']]
+    cell['stats'] = {
+        metric: describe(values_of(succeeded, metric), samples=SWEEP_BOOTSTRAP_SAMPLES)
+        for metric in METRICS
+    }
+
+
+def is_converged(cell: Dict[str, Any], tolerance: float) -> bool:
+    """两项指标的置信区间半宽都不超过均值的 tolerance"""
+    for metric in METRICS:
+        stats = cell['stats'][metric]
+        if stats['n'] < 2 or stats['mean'] <= 0:
+            return False
+        if (stats['ci_high'] - stats['ci_low']) / 2 > tolerance * stats['mean']:
+            return False
+    return True
+
+
+def dominated_by(cell: Dict[str, Any], other: Dict[str, Any]) -> bool:
+    """other 在两项指标上都明显更低（cell 的置信区间下界高于 other 的上界）"""
+    return all(
+        cell['stats'][metric]['ci_low'] > other['stats'][metric]['ci_high']
+        for metric in METRICS
+    )
+
+
+def update_status(cells: List[Dict[str, Any]], min_samples: int, max_samples: int, tolerance: float):
+    """更新仍在采样的配置的状态：converged / dominated / exhausted"""
+    ready = [c for c in cells if c['stats'] and c['stats']['duration_ms']['n'] >= min_samples]
+
+    for cell in cells:
+        if cell['status'] != 'active':
+            continue
+        if len(cell['samples']) >= max_samples:
+            cell['status'] = 'exhausted'
+            continue
+        if cell not in ready:
+            continue
+        if is_converged(cell, tolerance):
+            cell['status'] = 'converged'
+            continue
+        dominator = next((other for other in ready if other is not cell and dominated_by(cell, other)), None)
+        if dominator:
+            cell['status'] = 'dominated'
+            cell['dominated_by'] = dominator['id']
+
+
+def pareto_frontier(cells: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按均值计算 Pareto 前沿（响应时长与输出Token数都越低越好）"""
+    candidates = [c for c in cells if c['stats'] and c['stats']['duration_ms']['n'] > 0]
+    frontier = []
+    for cell in candidates:
+        lat = cell['stats']['duration_ms']['mean']
+        tok = cell['stats']['completion_tokens']['mean']
+        beaten = any(
+            other['stats']['duration_ms']['mean'] <= lat
+            and other['stats']['completion_tokens']['mean'] <= tok
+            and (other['stats']['duration_ms']['mean'] < lat or other['stats']['completion_tokens']['mean'] < tok)
+            for other in candidates if other is not cell
+        )
+        if not beaten:
+            frontier.append(cell)
+    return sorted(frontier, key=lambda c: c['stats']['duration_ms']['mean'])
+
+
+# =====================================================
+# 扫描执行
+# =====================================================
+
+def run_sweep(cells: List[Dict[str, Any]], prompts: Dict[str, str], min_samples: int,
+              max_samples: int, tolerance: float) -> int:
+    """
+    按轮次采样：每轮对所有 active 配置各调用一次（测试用例轮换），直到全部停止
+
+    Returns:
+        实际调用次数
+    """
+    calls = 0
+    round_index = 0
+
+    while any(c['status'] == 'active' for c in cells):
+        active = [c for c in cells if c['status'] == 'active']
+        test_case = Config.TEST_CASES[round_index % len(Config.TEST_CASES)]
+        round_index += 1
+        print(f'\n🔁 第 {round_index} 轮 | 采样中 {len(active)}/{len(cells)} 个配置 | 用例: {test_case["name"]}')
+
+        for cell in active:
+            result = call_qwen_api(
+                prompts[cell['prompt']],
+                test_case['prompt'],
+                model=cell['model'],
+                temperature=cell['temperature'],
+                max_tokens=cell['max_tokens']
+            )
+            calls += 1
+            cell['samples'].append({
+                'test_case_id': test_case['id'],
+                'success': result['success'],
+                'duration_ms': result['duration'],
+                'completion_tokens': result['tokens']['completion'],
+                'error': result.get('error', '')
+            })
+            status = f'{format_duration(result["duration"])} / {result["tokens"]["completion"]} tokens' \
+                if result['success'] else f'❌ {result["error"]}'
+            print(f'   [{cell["id"]:>2}] {cell_label(cell):<55} {status}')
+
+            if Config.REQUEST_INTERVAL > 0:
+                time.sleep(Config.REQUEST_INTERVAL)
+
+        for cell in active:
+            update_stats(cell)
+        update_status(cells, min_samples, max_samples, tolerance)
+
+        for cell in active:
+            if cell['status'] != 'active':
+                reason = {'converged': '已收敛', 'dominated': f'被 #{cell.get("dominated_by")} 支配',
+                          'exhausted': '达到最大采样数'}[cell['status']]
+                print(f'   ⏹️  #{cell["id"]} 停止采样: {reason}')
+
+    return calls
+
+
+def print_report(cells: List[Dict[str, Any]], calls: int, max_samples: int) -> Dict[str, Any]:
+    """打印各配置统计、Pareto 前沿与节省的调用次数"""
+    frontier = pareto_frontier(cells)
+    frontier_ids = {c['id'] for c in frontier}
+    full_grid = len(cells) * max_samples
+    status_labels = {'converged': '收敛', 'dominated': '被支配', 'exhausted': '上限', 'active': '采样中'}
+
+    print('\n' + '=' * 100)
+    print('📊 扫描完成 - 配置统计（★ 为 Pareto 前沿）')
+    print('=' * 100 + '\n')
+    print(f'{"#":>3}   {"配置":<55} | {"n":>3} | {"平均时长":>10} | {"p90时长":>10} | {"平均输出Token":>12} | 状态')
+    print('-' * 110)
+
+    for cell in sorted(cells, key=lambda c: c['stats']['duration_ms']['mean'] if c['stats'] else float('inf')):
+        if not cell['stats']:
+            continue
+        lat = cell['stats']['duration_ms']
+        tok = cell['stats']['completion_tokens']
+        mark = '★' if cell['id'] in frontier_ids else ' '
+        print(f'{cell["id"]:>3} {mark} {cell_label(cell):<55} | {lat["n"]:>3} | {lat["mean"]:>8.0f}ms | '
+              f'{lat["p90"]:>8.0f}ms | {tok["mean"]:>12.0f} | {status_labels[cell["status"]]}')
+
+    print()
+    print('⭐ Pareto 前沿（响应时长 vs 输出Token数）:')
+    for cell in frontier:
+        print(f'   #{cell["id"]} {cell_label(cell)}: {format_duration(int(cell["stats"]["duration_ms"]["mean"]))}, '
+              f'{cell["stats"]["completion_tokens"]["mean"]:.0f} tokens')
+
+    saved = full_grid - calls
+    print()
+    print(f'💰 实际调用 {calls} 次，完整网格 {len(cells)} × {max_samples} = {full_grid} 次，'
+          f'节省 {saved} 次 ({saved / full_grid * 100:.1f}%)')
+    print()
+
+    return {
+        'calls': calls,
+        'full_grid_calls': full_grid,
+        'calls_saved': saved,
+        'pareto_frontier': [c['id'] for c in frontier]
+    }
+
+
+# =====================================================
+# 主函数
+# =====================================================
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='提示词 / 模型 / 采样参数自适应扫描')
+    parser.add_argument('--prompts', nargs='+', default=list(Config.PROMPT_FILES.values()),
+                        help='提示词文件（默认原提示词与新提示词）')
+    parser.add_argument('--models', type=lambda v: parse_list(v), default=[Config.MODEL],
+                        help=f'模型列表，逗号分隔（默认 {Config.MODEL}）')
+    parser.add_argument('--temperatures', type=lambda v: parse_list(v, float), default=[Config.TEMPERATURE],
+                        help=f'temperature 列表，逗号分隔（默认 {Config.TEMPERATURE}）')
+    parser.add_argument('--max-tokens', type=lambda v: parse_list(v, int), default=[Config.MAX_TOKENS],
+                        help=f'max_tokens 列表，逗号分隔（默认 {Config.MAX_TOKENS}）')
+    parser.add_argument('--min-samples', type=int, default=DEFAULT_MIN_SAMPLES,
+                        help=f'判断停止前每个配置至少采样次数（默认 {DEFAULT_MIN_SAMPLES}）')
+    parser.add_argument('--max-samples', type=int, default=DEFAULT_MAX_SAMPLES,
+                        help=f'每个配置最多采样次数，即完整网格的采样数（默认 {DEFAULT_MAX_SAMPLES}）')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'收敛阈值：置信区间半宽 / 均值（默认 {DEFAULT_TOLERANCE}）')
+    parser.add_argument('--interval', type=float, default=Config.REQUEST_INTERVAL,
+                        help=f'两次调用之间的间隔秒数（默认 {Config.REQUEST_INTERVAL:g}）')
+    args = parser.parse_args(argv)
+    if args.min_samples < 2 or args.max_samples < args.min_samples:
+        parser.error('需要 2 <= --min-samples <= --max-samples')
+    return args
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    Config.REQUEST_INTERVAL = args.interval
+    # 扫描需要真实耗时样本，不使用缓存
+    Config.RESPONSE_CACHE.enabled = False
+
+    print('\n' + '█' * 80)
+    print('█' + '  提示词 / 模型 / 采样参数扫描'.center(76) + '  █')
+    print('█' * 80 + '\n')
+
+    if not Config.API_KEY:
+        print('❌ 请在 .env 文件中配置 QWEN_API_KEY')
+        sys.exit(1)
+
+    prompts = load_prompt_variants(args.prompts)
+    cells = build_cells(prompts, args.models, args.temperatures, args.max_tokens)
+
+    print(f'📝 API地址: {Config.API_URL}')
+    print(f'🧮 配置矩阵: {len(prompts)} 个提示词 × {len(args.models)} 个模型 × '
+          f'{len(args.temperatures)} 个 temperature × {len(args.max_tokens)} 个 max_tokens = {len(cells)} 个配置')
+    print(f'🎯 每个配置采样 {args.min_samples}-{args.max_samples} 次，收敛阈值 ±{args.tolerance * 100:.0f}%')
+    print_separator('-')
+
+    calls = run_sweep(cells, prompts, args.min_samples, args.max_samples, args.tolerance)
+    report = print_report(cells, calls, args.max_samples)
+
+    ensure_results_dir()
+    output_file = f'{Config.RESULTS_DIR}/prompt-sweep-{int(time.time() * 1000)}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'settings': {
+                'min_samples': args.min_samples,
+                'max_samples': args.max_samples,
+                'tolerance': args.tolerance
+            },
+            'report': report,
+            'cells': cells
+        }, f, ensure_ascii=False, indent=2)
+    print(f'📄 扫描结果已保存: {output_file}\n')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('\n\n⚠️  扫描被用户中断')
+        sys.exit(0)
+    except Exception as e:
+        print(f'\n\n❌ 扫描失败: {str(e)}')
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试结果增量日志（JSONL）
+每个结果完成后立即追加一行并 flush，按条数/时间批量 fsync；
+进程中断后可用 --resume 继续同一次运行，最终报告通过流式读取日志生成。
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+DEFAULT_FSYNC_EVERY = 10
+DEFAULT_FSYNC_INTERVAL = 2.0
+
+
+def _repair_tail(path: Path):
+    """上次写入中断时文件末尾可能是半行，截断到最后一个换行符"""
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            index = f.read(step).rfind(b'\n')
+            if index >= 0:
+                f.truncate(position + index + 1)
+                return
+        f.truncate(0)
+
+
+class JsonlWriter:
+    """
+    追加写 JSONL：每条记录写入后 flush（进程崩溃不丢），
+    每 fsync_every 条或每 fsync_interval 秒 fsync 一次（断电最多丢一个批次）
+    """
+
+    def __init__(self, path, fsync_every: int = DEFAULT_FSYNC_EVERY,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _repair_tail(self.path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = open(self.path, 'ab')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def iter_jsonl(path) -> Iterator[Dict[str, Any]]:
+    """逐行读取 JSONL，跳过损坏的行（例如中断时写了一半的最后一行）"""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_results(path) -> Iterator[Dict[str, Any]]:
+    """只读取结果记录（type == 'result'）"""
+    for record in iter_jsonl(path):
+        if record.get('type') == 'result':
+            yield record
+
+
+def read_run_header(path) -> Optional[Dict[str, Any]]:
+    """读取运行信息记录（type == 'run'）"""
+    for record in iter_jsonl(path):
+        if record.get('type') == 'run':
+            return record
+    return None
+
+
+def iter_latest_results(path, key: Callable[[Dict[str, Any]], Any]) -> Iterator[Dict[str, Any]]:
+    """
+    同一个键有多条结果时（续跑重试了失败的单元）只保留最后一条
+
+    分两遍读取：第一遍只记录每个键最后出现的行号，第二遍按原顺序输出，内存只与键的数量有关
+    """
+    last_seen = {}
+    for position, record in enumerate(iter_results(path)):
+        last_seen[key(record)] = position
+    keep = set(last_seen.values())
+    for position, record in enumerate(iter_results(path)):
+        if position in keep:
+            yield record
+
+
+def completed_keys(path, key: Callable[[Dict[str, Any]], Any],
+                   accept: Callable[[Dict[str, Any]], bool] = lambda record: True) -> Set[Any]:
+    """已完成的结果键集合，accept 返回 False 的记录（如失败结果）不计入，续跑时会重新执行"""
+    return {key(record) for record in iter_results(path) if accept(record)}
+
+
+def resolve_run_file(resume: str, directory, *prefixes: str) -> Path:
+    """--resume 参数既可以是运行 ID（按 <前缀>-<运行ID>.jsonl 查找），也可以是 JSONL 文件路径"""
+    candidate = Path(resume)
+    if candidate.suffix == '.jsonl' or candidate.exists():
+        if not candidate.exists():
+            raise FileNotFoundError(f'找不到运行记录: {candidate}')
+        return candidate
+    for prefix in prefixes:
+        path = Path(directory) / f'{prefix}-{resume}.jsonl'
+        if path.exists():
+            return path
+    raise FileNotFoundError(f'找不到运行记录: {resume}（目录 {directory}）')
+
+
+def write_json_array(records: Iterator[Dict[str, Any]], output_file, prefix: str = '', suffix: str = '',
+                     level: int = 0):
+    """
+    把记录流写成 JSON 数组（缩进格式与 json.dump(indent=2) 一致），不在内存中保留整个列表
+
+    Args:
+        records: 记录迭代器
+        output_file: 输出文件路径
+        prefix / suffix: 数组前后的文本，用于把数组嵌进外层对象
+        level: 数组所在的缩进层级
+    """
+    pad = '  ' * (level + 1)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(prefix + '[')
+        first = True
+        for record in records:
+            f.write('\n' if first else ',\n')
+            body = json.dumps(record, ensure_ascii=False, indent=2)
+            f.write('\n'.join(pad + line for line in body.split('\n')))
+            first = False
+        f.write(']' if first else '\n' + '  ' * level + ']')
+        f.write(suffix)
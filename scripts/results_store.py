@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+跨运行的测试结果库（SQLite）
+对比测试脚本每次运行结束后把结果写入同一个本地数据库，
+按 运行 / 模型 / 提示词哈希 / 测试用例 / 时间 建索引，用于查询耗时与 Token 的变化趋势。
+
+使用方法:
+    python scripts/results_store.py runs                                   # 最近的运行
+    python scripts/results_store.py models                                 # 各模型 / 提示词哈希的样本数
+    python scripts/results_store.py trend --model qwen-plus --since 30d    # 按天的 p50/p95 响应时长
+    python scripts/results_store.py trend --model qwen-plus --prompt 3f2a --metric ttft_ms --bucket run
+    python scripts/results_store.py import results/*.jsonl qwen-comparison-*.json   # 导入历史结果文件
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from bench_stats import percentile
+from results_log import iter_latest_results, read_run_header
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / 'results' / 'results.db'
+
+METRICS = ('duration_ms', 'ttft_ms', 'tokens_per_second', 'prompt_tokens', 'completion_tokens', 'total_tokens')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    tool        TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    meta        TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id            TEXT NOT NULL REFERENCES runs(run_id),
+    model             TEXT NOT NULL,
+    prompt_hash       TEXT NOT NULL,
+    prompt_label      TEXT NOT NULL DEFAULT '',
+    test_case         TEXT NOT NULL,
+    round             INTEGER NOT NULL DEFAULT 0,
+    created_at        REAL NOT NULL,
+    warmup            INTEGER NOT NULL DEFAULT 0,
+    success           INTEGER NOT NULL,
+    cached            INTEGER NOT NULL DEFAULT 0,
+    duration_ms       REAL,
+    ttft_ms           REAL,
+    tokens_per_second REAL,
+    prompt_tokens     INTEGER,
+    completion_tokens INTEGER,
+    total_tokens      INTEGER,
+    PRIMARY KEY (run_id, model, prompt_hash, prompt_label, test_case, round)
+);
+CREATE INDEX IF NOT EXISTS idx_results_model_time ON results(model, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_prompt_time ON results(prompt_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON runs(started_at);
+"""
+
+RESULT_COLUMNS = ('run_id', 'model', 'prompt_hash', 'prompt_label', 'test_case', 'round', 'created_at',
+                  'warmup', 'success', 'cached') + METRICS
+
+
+def prompt_hash(system_prompt: str) -> str:
+    """系统提示词的短哈希，用于跨运行识别同一版本的提示词"""
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:12]
+
+
+def run_started_at(run_id: str) -> float:
+    """运行ID是毫秒时间戳时换算为秒，否则取当前时间"""
+    return int(run_id) / 1000 if str(run_id).isdigit() else time.time()
+
+
+# =====================================================
+# 结果转换
+# =====================================================
+
+def rows_from_prompt_comparison(results: Iterable[Dict[str, Any]], run_id: str, model: str) -> Iterable[Dict]:
+    """prompt_comparison_test.py 的结果 → 结果表行"""
+    started = run_started_at(run_id)
+    for r in results:
+        yield {
+            'run_id': run_id,
+            'model': r.get('model', model),
+            'prompt_hash': r.get('prompt_hash', ''),
+            'prompt_label': r['prompt_version'],
+            'test_case': r['test_name'],
+            'round': r.get('round', 0),
+            'created_at': r.get('timestamp', started),
+            'warmup': int(bool(r.get('warmup'))),
+            'success': int(bool(r['success'])),
+            'cached': int(bool(r.get('cached'))),
+            'duration_ms': r['duration_ms'] if r['success'] else None,
+            'ttft_ms': r.get('ttft_ms'),
+            'tokens_per_second': r.get('tokens_per_second'),
+            'prompt_tokens': r['prompt_tokens'],
+            'completion_tokens': r['completion_tokens'],
+            'total_tokens': r['total_tokens']
+        }
+
+
+def rows_from_model_comparison(all_results: Iterable[Dict[str, Any]], run_id: str,
+                               system_prompt_hash: str = '') -> Iterable[Dict]:
+    """test_model_comparison.py 的结果（[{'query': ..., 'results': [...]}]）→ 结果表行"""
+    started = run_started_at(run_id)
+    for test_data in all_results:
+        for r in test_data['results']:
+            success = 'error' not in r
+            tokens = r.get('tokens', {})
+            yield {
+                'run_id': run_id,
+                'model': r['model_id'],
+                'prompt_hash': r.get('prompt_hash', system_prompt_hash),
+                'prompt_label': '',
+                'test_case': test_data['query'],
+                'round': 0,
+                'created_at': r.get('timestamp', started),
+                'warmup': 0,
+                'success': int(success),
+                'cached': int(bool(r.get('cached'))),
+                'duration_ms': r.get('duration') if success else None,
+                'ttft_ms': r.get('ttft'),
+                'tokens_per_second': r.get('tokens_per_second'),
+                'prompt_tokens': tokens.get('prompt'),
+                'completion_tokens': tokens.get('completion'),
+                'total_tokens': tokens.get('total')
+            }
+
+
+# =====================================================
+# 结果库
+# =====================================================
+
+class ResultsStore:
+    """SQLite 结果库，同一 (运行, 模型, 提示词哈希, 提示词版本, 测试用例, 轮次) 重复写入时覆盖"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.getenv('RESULTS_DB', str(DEFAULT_DB_PATH)))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add_run(self, run_id: str, tool: str, rows: Iterable[Dict[str, Any]],
+                meta: Optional[Dict[str, Any]] = None) -> int:
+        """
+        写入一次运行及其结果（单个事务）
+
+        Returns:
+            写入的结果行数
+        """
+        placeholders = ', '.join('?' for _ in RESULT_COLUMNS)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO runs (run_id, tool, started_at, meta) VALUES (?, ?, ?, ?)',
+                (run_id, tool, run_started_at(run_id), json.dumps(meta or {}, ensure_ascii=False))
+            )
+            cursor = self.conn.executemany(
+                f'INSERT OR REPLACE INTO results ({", ".join(RESULT_COLUMNS)}) VALUES ({placeholders})',
+                ([row.get(column) for column in RESULT_COLUMNS] for row in rows)
+            )
+        return cursor.rowcount
+
+    def runs(self, limit: int = 20) -> List[sqlite3.Row]:
+        """最近的运行及结果数"""
+        return self.conn.execute(
+            'SELECT r.run_id, r.tool, r.started_at, COUNT(x.run_id) AS n, SUM(x.success) AS ok '
+            'FROM runs r LEFT JOIN results x ON x.run_id = r.run_id '
+            'GROUP BY r.run_id ORDER BY r.started_at DESC LIMIT ?', (limit,)
+        ).fetchall()
+
+    def models(self) -> List[sqlite3.Row]:
+        """各 (模型, 提示词哈希) 的运行数、样本数与时间范围"""
+        return self.conn.execute(
+            "SELECT model, prompt_hash, GROUP_CONCAT(DISTINCT NULLIF(prompt_label, '')) AS labels, "
+            'COUNT(DISTINCT run_id) AS runs, COUNT(*) AS n, MIN(created_at) AS first, MAX(created_at) AS last '
+            'FROM results GROUP BY model, prompt_hash ORDER BY model, last DESC'
+        ).fetchall()
+
+    def trend(self, model: str, metric: str = 'duration_ms', prompt: Optional[str] = None,
+              since: Optional[float] = None, bucket: str = 'day',
+              include_cached: bool = False) -> List[Dict[str, Any]]:
+        """
+        某个模型某项指标随时间的变化
+
+        Args:
+            model: 模型ID
+            metric: 指标列（见 METRICS）
+            prompt: 提示词哈希前缀
+            since: 起始时间（Unix 秒）
+            bucket: 分组方式 day / week / run
+            include_cached: 是否包含缓存命中的结果（默认排除，缓存结果的耗时不是真实耗时）
+
+        Returns:
+            每个分组的 {'bucket', 'runs', 'n', 'mean', 'p50', 'p95'}
+        """
+        if metric not in METRICS:
+            raise ValueError(f'未知指标: {metric}')
+        group_expr = {
+            'day': "date(created_at, 'unixepoch', 'localtime')",
+            'week': "strftime('%Y-W%W', created_at, 'unixepoch', 'localtime')",
+            'run': 'run_id'
+        }[bucket]
+
+        sql = (f'SELECT {group_expr} AS bucket, run_id, {metric} AS value FROM results '
+               f'WHERE model = ? AND success = 1 AND warmup = 0 AND {metric} IS NOT NULL')
+        params: List[Any] = [model]
+        if not include_cached:
+            sql += ' AND cached = 0'
+        if prompt:
+            sql += ' AND prompt_hash LIKE ?'
+            params.append(prompt + '%')
+        if since is not None:
+            sql += ' AND created_at >= ?'
+            params.append(since)
+        sql += ' ORDER BY created_at'
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for row in self.conn.execute(sql, params):
+            group = groups.setdefault(row['bucket'], {'runs': set(), 'values': []})
+            group['runs'].add(row['run_id'])
+            group['values'].append(row['value'])
+
+        return [
+            {
+                'bucket': key,
+                'runs': len(group['runs']),
+                'n': len(group['values']),
+                'mean': sum(group['values']) / len(group['values']),
+                'p50': percentile(group['values'], 50),
+                'p95': percentile(group['values'], 95)
+            }
+            for key, group in groups.items()
+        ]
+
+
+# =====================================================
+# 导入历史文件
+# =====================================================
+
+def import_file(store: ResultsStore, path: Path) -> int:
+    """
+    导入一个历史结果文件，按文件名识别格式：
+    - prompt-comparison-*/prompt-benchmark-* 的 .jsonl 运行日志或 .json 报告
+    - qwen-comparison-* 的 .jsonl 运行日志或 .json 报告
+    """
+    match = re.search(r'(prompt-comparison|prompt-benchmark|qwen-comparison)-(\d+)\.(jsonl|json)$', path.name)
+    if not match:
+        raise ValueError(f'无法识别的结果文件: {path}')
+    kind, run_id, suffix = match.groups()
+
+    if suffix == 'jsonl':
+        header = read_run_header(path) or {}
+        if kind == 'qwen-comparison':
+            key = lambda r: (r['query'], r['model_id'])  # noqa: E731
+        else:
+            key = lambda r: (r.get('round'), r['test_case_id'], r['prompt_version'])  # noqa: E731
+        records = list(iter_latest_results(path, key))
+        if kind == 'qwen-comparison':
+            queries = header.get('queries') or list(dict.fromkeys(r['query'] for r in records))
+            data = [{'query': q, 'results': [r for r in records if r['query'] == q]} for q in queries]
+    else:
+        # 报告文件不含模型等运行信息，尽量从同名运行日志读取
+        header = read_run_header(path.with_suffix('.jsonl')) or {}
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        records = data['results'] if isinstance(data, dict) else data
+
+    if kind == 'qwen-comparison':
+        rows = rows_from_model_comparison(data, run_id)
+        tool = 'test_model_comparison'
+    else:
+        rows = rows_from_prompt_comparison(records, run_id, header.get('model') or os.getenv('QWEN_MODEL', 'qwen-plus'))
+        tool = 'prompt_benchmark' if kind == 'prompt-benchmark' else 'prompt_comparison'
+    return store.add_run(run_id, tool, rows, meta={'source': str(path), **header})
+
+
+# =====================================================
+# 命令行
+# =====================================================
+
+def parse_since(value: str) -> float:
+    """'30d' / '12h' / '2026-09-01' → Unix 秒"""
+    match = re.fullmatch(r'(\d+)([dh])', value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        return time.time() - amount * (86400 if unit == 'd' else 3600)
+    return time.mktime(time.strptime(value, '%Y-%m-%d'))
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='跨运行测试结果查询')
+    parser.add_argument('--db', help=f'数据库路径（默认 $RESULTS_DB 或 {DEFAULT_DB_PATH}）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    runs = sub.add_parser('runs', help='列出最近的运行')
+    runs.add_argument('--limit', type=int, default=20)
+
+    sub.add_parser('models', help='各模型 / 提示词哈希的样本数')
+
+    trend = sub.add_parser('trend', help='某个模型的指标趋势')
+    trend.add_argument('--model', required=True, help='模型ID，如 qwen-plus')
+    trend.add_argument('--metric', default='duration_ms', choices=METRICS)
+    trend.add_argument('--prompt', help='提示词哈希前缀')
+    trend.add_argument('--since', help='起始时间：30d / 12h / 2026-09-01')
+    trend.add_argument('--bucket', default='day', choices=('day', 'week', 'run'))
+    trend.add_argument('--include-cached', action='store_true', help='包含缓存命中的结果')
+
+    imp = sub.add_parser('import', help='导入历史结果文件（.jsonl 运行日志或 .json 报告）')
+    imp.add_argument('files', nargs='+')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+
+    with ResultsStore(args.db) as store:
+        if args.command == 'runs':
+            print(f'{"运行ID":<16} {"工具":<22} {"开始时间":<17} {"结果数":>6} {"成功":>6}')
+            for row in store.runs(args.limit):
+                print(f'{row["run_id"]:<16} {row["tool"]:<22} {format_time(row["started_at"]):<17} '
+                      f'{row["n"]:>6} {row["ok"] or 0:>6}')
+
+        elif args.command == 'models':
+            print(f'{"模型":<22} {"提示词哈希":<14} {"运行数":>6} {"样本数":>6}  时间范围')
+            for row in store.models():
+                label = f'  ({row["labels"]})' if row['labels'] else ''
+                print(f'{row["model"]:<22} {row["prompt_hash"] or "-":<14} {row["runs"]:>6} {row["n"]:>6}  '
+                      f'{format_time(row["first"])} ~ {format_time(row["last"])}{label}')
+
+        elif args.command == 'trend':
+            since = parse_since(args.since) if args.since else None
+            rows = store.trend(args.model, args.metric, args.prompt, since, args.bucket, args.include_cached)
+            if not rows:
+                print('⚠️  没有匹配的结果')
+            else:
+                print(f'📈 {args.model} {args.metric}' + (f'（提示词 {args.prompt}*）' if args.prompt else ''))
+                print(f'{"分组":<16} {"运行数":>6} {"样本数":>6} {"均值":>10} {"p50":>10} {"p95":>10}')
+                for row in rows:
+                    print(f'{row["bucket"]:<16} {row["runs"]:>6} {row["n"]:>6} {row["mean"]:>10.1f} '
+                          f'{row["p50"]:>10.1f} {row["p95"]:>10.1f}')
+
+        elif args.command == 'import':
+            total = 0
+            for name in args.files:
+                path = Path(name)
+                try:
+                    count = import_file(store, path)
+                except (ValueError, KeyError, json.JSONDecodeError) as e:
+                    print(f'⚠️  跳过 {path}: {e}')
+                    continue
+                total += count
+                print(f'✅ {path}: {count} 条结果')
+            print(f'📥 共导入 {total} 条结果')
+
+    print(f'\n⏱️  查询耗时: {(time.perf_counter() - started) * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行工具的阶段耗时追踪（--trace）与函数级性能分析（--profile）
+
+--trace FILE 时记录命名阶段（span），写出 Chrome trace-event JSON（chrome://tracing 或 https://ui.perfetto.dev 打开），
+并在结束时打印各阶段耗时汇总。HTTP 请求自动拆成以下阶段，不需要改调用代码：
+    encode request body   requests 序列化请求体（json= 参数的 JSON 编码）
+    connect               建立连接，其下还有 dns（域名解析）、tcp connect、tls handshake
+    send request          发送请求行、请求头与请求体（HTTP 首次请求时包含 connect）
+    wait response (TTFB)  请求发出后等待响应头，主要是服务端处理时间
+    read body             读取响应体（流式响应为整个 SSE 流）
+    parse response        Response.json() 解析
+--profile FILE 时同时用 cProfile 记录主线程，写出 pstats 文件（python -m pstats FILE 或 snakeviz 查看）。
+
+未启用时 span / traced 不做任何记录，不影响正常运行的耗时。
+
+用法（在命令行工具中）:
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_tracing(args.trace, args.profile, name='auto_upload_news')
+
+    with span('read file', path=file_path):
+        ...
+
+    @traced('login')
+    def login(...):
+        ...
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 结束时汇总打印的阶段数
+SUMMARY_LIMIT = 15
+
+
+class Tracer:
+    """收集 Chrome trace-event 格式的完整事件（ph='X'），时间戳为相对追踪开始的微秒数，线程安全"""
+
+    def __init__(self, name: str = 'run'):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[int, Tuple[int, str]] = {}
+        self.lock = threading.Lock()
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        entry = self.threads.get(ident)
+        if entry is None:
+            with self.lock:
+                entry = self.threads.setdefault(ident, (len(self.threads) + 1, threading.current_thread().name))
+        return entry[0]
+
+    def _ts(self, moment: float) -> float:
+        return round((moment - self.origin) * 1e6, 3)
+
+    def record(self, name: str, cat: str, start: float, end: float, args: Optional[Dict[str, Any]] = None):
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': self._ts(start),
+                 'dur': round((end - start) * 1e6, 3), 'pid': self.pid, 'tid': self._tid()}
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+
+    def instant(self, name: str, cat: str = 'app', **args):
+        """瞬时事件（如流式响应的首个 Token）"""
+        event = {'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'ts': self._ts(time.perf_counter()),
+                 'pid': self.pid, 'tid': self._tid()}
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'app', **args):
+        """记录一个阶段；yield 的 args 字典可在阶段内补充字段（如状态码、字节数）"""
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args['error'] = type(e).__name__
+            raise
+        finally:
+            self.record(name, cat, start, time.perf_counter(), args)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': self.name}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': thread_name}}
+                     for tid, thread_name in self.threads.values()]
+        return {'traceEvents': metadata + sorted(self.events, key=lambda event: event['ts']),
+                'displayTimeUnit': 'ms'}
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """按阶段名汇总：次数、合计与最长耗时（毫秒），按合计降序"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for event in self.events:
+            if event['ph'] != 'X':
+                continue
+            item = totals.setdefault(event['name'], {'name': event['name'], 'cat': event['cat'],
+                                                     'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            duration = event['dur'] / 1000
+            item['count'] += 1
+            item['total_ms'] += duration
+            item['max_ms'] = max(item['max_ms'], duration)
+        return sorted(totals.values(), key=lambda item: -item['total_ms'])
+
+
+_tracer: Optional[Tracer] = None
+_profiler: Optional[cProfile.Profile] = None
+_outputs: Dict[str, Optional[str]] = {}
+_restores: List[Tuple[Any, str, Any]] = []
+
+
+def span(name: str, cat: str = 'app', **args):
+    """记录一个阶段（未启用追踪时为空操作）"""
+    tracer = _tracer
+    return tracer.span(name, cat, **args) if tracer else nullcontext({})
+
+
+def instant(name: str, cat: str = 'app', **args):
+    tracer = _tracer
+    if tracer:
+        tracer.instant(name, cat, **args)
+
+
+def traced(name: Optional[str] = None, cat: str = 'app') -> Callable:
+    """装饰器：把整个函数调用记录为一个阶段"""
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(label, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# =====================================================
+# HTTP 阶段
+# =====================================================
+
+def _patch(owner: Any, attr: str, make_wrapper: Callable):
+    original = vars(owner).get(attr)
+    if original is None:
+        return
+    setattr(owner, attr, make_wrapper(original))
+    _restores.append((owner, attr, original))
+
+
+def _wrap_span(name: str, describe: Optional[Callable] = None) -> Callable:
+    def make_wrapper(original):
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return original(*args, **kwargs)
+            with tracer.span(name, 'http', **(describe(*args, **kwargs) if describe else {})):
+                return original(*args, **kwargs)
+        return wrapper
+    return make_wrapper
+
+
+def _instrument_http():
+    """给 requests / urllib3 / socket 的关键方法加上阶段记录；库版本不同找不到的方法直接跳过"""
+    try:
+        import requests
+        import urllib3.connection as connection
+    except ImportError:
+        return
+
+    def session_request(original):
+        @functools.wraps(original)
+        def wrapper(self, method, url, *args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return original(self, method, url, *args, **kwargs)
+            with tracer.span(f'{method.upper()} {urlsplit(url).path or "/"}', 'http', url=url) as info:
+                response = original(self, method, url, *args, **kwargs)
+                info['status'] = response.status_code
+                return response
+        return wrapper
+
+    def prepare_body(original):
+        @functools.wraps(original)
+        def wrapper(self, *args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return original(self, *args, **kwargs)
+            with tracer.span('encode request body', 'http') as info:
+                result = original(self, *args, **kwargs)
+                if isinstance(self.body, (bytes, str)):
+                    info['bytes'] = len(self.body)
+                return result
+        return wrapper
+
+    def iter_content(original):
+        @functools.wraps(original)
+        def wrapper(self, *args, **kwargs):
+            chunks = original(self, *args, **kwargs)
+            tracer = _tracer
+            if tracer is None:
+                return chunks
+
+            def timed():
+                start, size = time.perf_counter(), 0
+                try:
+                    for chunk in chunks:
+                        size += len(chunk)
+                        yield chunk
+                finally:
+                    tracer.record('read body', 'http', start, time.perf_counter(), {'url': self.url, 'bytes': size})
+            return timed()
+        return wrapper
+
+    def endpoint(conn, *args, **kwargs):
+        return {'host': f'{conn.host}:{conn.port}'}
+
+    _patch(requests.Session, 'request', session_request)
+    _patch(requests.models.PreparedRequest, 'prepare_body', prepare_body)
+    _patch(requests.models.Response, 'iter_content', iter_content)
+    _patch(requests.models.Response, 'json', _wrap_span('parse response'))
+    _patch(connection.HTTPConnection, 'connect', _wrap_span('connect', endpoint))
+    _patch(connection.HTTPSConnection, 'connect', _wrap_span('connect', endpoint))
+    _patch(connection.HTTPConnection, '_new_conn', _wrap_span('tcp connect'))
+    _patch(connection, '_ssl_wrap_socket_and_match_hostname', _wrap_span('tls handshake'))
+    _patch(connection.HTTPConnection, 'request', _wrap_span('send request'))
+    _patch(connection.HTTPConnection, 'getresponse', _wrap_span('wait response (TTFB)'))
+    _patch(socket, 'getaddrinfo', _wrap_span('dns', lambda host, *args, **kwargs: {'host': host}))
+
+
+def _restore_http():
+    while _restores:
+        owner, attr, original = _restores.pop()
+        setattr(owner, attr, original)
+
+
+# =====================================================
+# 命令行入口
+# =====================================================
+
+def add_trace_arguments(parser):
+    """给命令行工具加上 --trace / --profile"""
+    group = parser.add_argument_group('性能分析')
+    group.add_argument('--trace', metavar='FILE',
+                       help='记录各阶段耗时（HTTP 请求拆分为 DNS / 建连 / TLS / 首字节 / 读取响应体），'
+                            '写出 Chrome trace-event JSON（chrome://tracing 或 ui.perfetto.dev 打开）')
+    group.add_argument('--profile', metavar='FILE',
+                       help='用 cProfile 记录主线程的函数级耗时，写出 pstats 文件（python -m pstats FILE 查看）')
+
+
+def start_tracing(trace_file: Optional[str] = None, profile_file: Optional[str] = None,
+                  name: str = 'run') -> Optional[Tracer]:
+    """
+    按命令行参数开启追踪与性能分析，进程退出时（包括 sys.exit）自动写出文件并打印汇总
+
+    Returns:
+        开启追踪时返回 Tracer，否则 None
+    """
+    global _tracer, _profiler
+    if not trace_file and not profile_file:
+        return None
+    _outputs.update(trace=trace_file, profile=profile_file, name=name)
+    if trace_file:
+        _tracer = Tracer(name)
+        _instrument_http()
+    if profile_file:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(stop_tracing)
+    return _tracer
+
+
+def print_summary(tracer: Tracer, wall_ms: float, limit: int = SUMMARY_LIMIT):
+    print(f'\n📈 各阶段耗时（墙钟 {wall_ms / 1000:.3f} 秒；嵌套阶段的耗时同时计入上层阶段，多线程时合计可超过墙钟）')
+    print(f'  {"阶段":<32} {"次数":>6} {"合计 ms":>11} {"占墙钟":>7} {"最长 ms":>10}')
+    for item in tracer.summary()[:limit]:
+        print(f'  {item["name"][:32]:<32} {item["count"]:>6} {item["total_ms"]:>11.1f} '
+              f'{item["total_ms"] / max(wall_ms, 1e-9):>7.1%} {item["max_ms"]:>10.1f}')
+
+
+def stop_tracing():
+    """结束追踪与性能分析并写出文件（可重复调用）"""
+    global _tracer, _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_outputs['profile'])
+        print(f'🔬 cProfile 已写入 {_outputs["profile"]}（python -m pstats {_outputs["profile"]}）')
+        _profiler = None
+    if _tracer is not None:
+        tracer, _tracer = _tracer, None
+        end = time.perf_counter()
+        tracer.record(_outputs['name'], 'run', tracer.origin, end)
+        _restore_http()
+        tracer.write(_outputs['trace'])
+        print_summary(tracer, (end - tracer.origin) * 1000)
+        print(f'🧭 trace 已写入 {_outputs["trace"]}（chrome://tracing 或 https://ui.perfetto.dev 打开）')
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+真实流量回放工具
+根据 data/visit-logs.json、data/interaction-events.json、data/api-calls.json 重建请求时间线
+（接口、到达时间、客户端 IP 分布），按 1×/10×/100× 速度回放到本地服务，用于新闻高峰前的容量评估。
+
+- 每条访问记录展开为一次新闻页加载：POST /api/visit/track + GET /api/news + GET /api/news/dates
+- 每条交互事件回放为 POST /api/interaction/track；跳转到新闻页的点击同时加载新闻页接口
+- api-calls（大模型调用）默认不回放，--include-ai 时回放为 POST /api/ai/chat（建议配合模拟模型服务）
+- 客户端 IP 通过 X-Forwarded-For 传递（服务默认信任本机代理）
+- 回放期间以固定间隔探测 /api/health，记录事件循环卡顿，并与服务日志中的刷盘（[Cache] 已刷盘）对齐
+
+使用方法:
+    python scripts/traffic_replay.py --start-server --speed 10
+    python scripts/traffic_replay.py --start-server --speed 100 --busiest 60   # 只回放最繁忙的 60 分钟
+    python scripts/traffic_replay.py --base-url http://127.0.0.1:3000 --speed 1 --from 2026-05-11
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from bench_stats import percentile
+from load_test import RESULTS_DIR, ROOT_DIR, free_port, print_summary, run_open_loop, start_local_server, summarize
+
+# =====================================================
+# 配置区域
+# =====================================================
+
+DATA_DIR = ROOT_DIR / 'data'
+DEFAULT_SPEED = 10.0
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 10.0
+# 记录时间中超过该秒数的空闲间隔压缩为该秒数（按记录时间计，压缩后再按速度缩放）
+DEFAULT_MAX_GAP = 60.0
+# 卡顿探测：探测间隔与判定为卡顿的延迟
+PROBE_INTERVAL = 0.05
+STALL_THRESHOLD_MS = 100.0
+# 请求/卡顿与刷盘时间相差在该秒数内视为同时发生
+FLUSH_WINDOW = 1.0
+
+# 新闻页加载时依次请求的接口（相对页面打开的秒数）
+NEWS_PAGE_REQUESTS = [
+    (0.05, 'news', 'GET', '/api/news'),
+    (0.08, 'dates', 'GET', '/api/news/dates')
+]
+REPLAY_AI_QUERY = '帮我总结今天的 AI 新闻要点'
+
+FLUSH_PATTERN = re.compile(r'\[Cache\] 已刷盘 (\S+): (\d+)')
+
+# 回放服务需要读取的目录（数据目录复制一份，其余只读目录链接到仓库）
+SANDBOX_LINKS = ('config', 'logos', 'reports-archive')
+
+
+# =====================================================
+# 重建请求时间线
+# =====================================================
+
+def _read_list(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else []
+
+
+def _parse_time(value) -> Optional[float]:
+    """ISO 时间字符串或毫秒时间戳 → 秒级时间戳"""
+    if isinstance(value, (int, float)):
+        return value / 1000
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _page_requests(at: float, client: Dict[str, str]) -> List[Tuple[float, Dict[str, Any]]]:
+    return [(at + delay, {'name': name, 'method': method, 'path': path, 'client': client})
+            for delay, name, method, path in NEWS_PAGE_REQUESTS]
+
+
+def load_events(data_dir: Path, include_ai: bool) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    从日志重建请求时间线
+
+    Returns:
+        按时间排序的 [(记录时间戳, 请求), ...]，请求中 client 为 {'ip', 'user_agent'}
+    """
+    events = []
+    for log in _read_list(data_dir / 'visit-logs.json'):
+        at = _parse_time(log.get('date'))
+        if at is None:
+            continue
+        client = {'ip': log.get('ip', ''), 'user_agent': log.get('userAgent', '')}
+        events.append((at, {'name': 'visit/track', 'method': 'POST', 'path': '/api/visit/track', 'client': client,
+                            'json': {'eventType': 'page_view', 'path': '/news.html', 'referrer': ''}}))
+        events.extend(_page_requests(at, client))
+
+    for event in _read_list(data_dir / 'interaction-events.json'):
+        at = _parse_time(event.get('createdAt'))
+        if at is None:
+            continue
+        client = {'ip': event.get('ip', ''), 'user_agent': event.get('userAgent', '')}
+        body = {field: event.get(field, '') for field in ('eventType', 'eventLabel', 'target', 'pagePath', 'referrer')}
+        events.append((at, {'name': 'interaction/track', 'method': 'POST', 'path': '/api/interaction/track',
+                            'client': client, 'json': body}))
+        if str(event.get('target', '')).endswith('news.html'):
+            events.extend(_page_requests(at + 0.3, client))
+
+    if include_ai:
+        for call in _read_list(data_dir / 'api-calls.json'):
+            at = _parse_time(call.get('timestamp'))
+            if at is None:
+                continue
+            events.append((at, {'name': 'ai/chat', 'method': 'POST', 'path': '/api/ai/chat',
+                                'client': {'ip': call.get('ip', ''), 'user_agent': ''},
+                                'json': {'query': REPLAY_AI_QUERY, 'max_tokens': 64}}))
+
+    events.sort(key=lambda item: item[0])
+    return events
+
+
+def select_window(events: List[Tuple[float, Dict[str, Any]]], since: Optional[float], until: Optional[float],
+                  busiest_minutes: Optional[float]) -> List[Tuple[float, Dict[str, Any]]]:
+    """按时间范围筛选；busiest_minutes 指定时取请求最多的一段时间"""
+    events = [item for item in events
+              if (since is None or item[0] >= since) and (until is None or item[0] < until)]
+    if not busiest_minutes or not events:
+        return events
+
+    width = busiest_minutes * 60
+    best_start, best_count, left = 0, 0, 0
+    for right in range(len(events)):
+        while events[right][0] - events[left][0] >= width:
+            left += 1
+        if right - left + 1 > best_count:
+            best_start, best_count = left, right - left + 1
+    return events[best_start:best_start + best_count]
+
+
+def build_replay(events: List[Tuple[float, Dict[str, Any]]], speed: float, max_gap: float,
+                 ip_mode: str) -> Tuple[List[float], List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    记录时间 → 回放计划时间：空闲间隔压缩到 max_gap，再除以 speed
+
+    ip_mode 为 private 时，每个公网 IP 映射为固定的 10.x.x.x 地址：保留客户端数量与分布，
+    但不会触发服务端对真实 IP 的外部归属地查询，也不会封禁真实地址
+
+    Returns:
+        (计划发送时间, 请求列表, 时间线信息)
+    """
+    ip_map = {}
+
+    def replay_ip(ip: str) -> str:
+        if ip_mode == 'original' or not ip or ip in ('127.0.0.1', '::1'):
+            return ip
+        if ip not in ip_map:
+            index = len(ip_map) + 1
+            ip_map[ip] = f'10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}'
+        return ip_map[ip]
+
+    schedule, targets = [], []
+    recorded_span = 0.0
+    previous = None
+    elapsed = 0.0
+    for at, request in events:
+        if previous is not None:
+            gap = at - previous
+            recorded_span += gap
+            elapsed += min(gap, max_gap)
+        previous = at
+        client = request.pop('client')
+        headers = {}
+        ip = replay_ip(client['ip'])
+        if ip:
+            headers['X-Forwarded-For'] = ip
+        if client['user_agent']:
+            headers['User-Agent'] = client['user_agent']
+        schedule.append(elapsed / speed)
+        targets.append({**request, 'headers': headers})
+
+    info = {
+        'requests': len(targets),
+        'clients': len({target['headers'].get('X-Forwarded-For') for target in targets}),
+        'recorded_from': datetime.fromtimestamp(events[0][0], timezone.utc).isoformat() if events else '',
+        'recorded_to': datetime.fromtimestamp(events[-1][0], timezone.utc).isoformat() if events else '',
+        'recorded_seconds': round(recorded_span, 1),
+        'replay_seconds': round(schedule[-1], 1) if schedule else 0.0
+    }
+    return schedule, targets, info
+
+
+# =====================================================
+# 卡顿与刷盘监测
+# =====================================================
+
+class StallMonitor:
+    """
+    回放期间的旁路监测
+
+    - 每 PROBE_INTERVAL 秒请求一次 /api/health，延迟超过阈值记为卡顿（Node 单线程，同步刷盘会阻塞所有请求）
+    - 跟踪服务日志中的「[Cache] 已刷盘」行，记录刷盘时间（服务日志没有时间戳，按读到的时间记）
+    """
+
+    def __init__(self, base_url: str, log_path: Optional[Path] = None, threshold_ms: float = STALL_THRESHOLD_MS):
+        self.base_url = base_url
+        self.log_path = log_path
+        self.threshold_ms = threshold_ms
+        self.probes: List[Tuple[float, float]] = []
+        self.flushes: List[Dict[str, Any]] = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _probe(self):
+        session = requests.Session()
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                session.get(self.base_url + '/api/health', timeout=30).content
+            except requests.exceptions.RequestException:
+                pass
+            finished = time.perf_counter()
+            self.probes.append((started, (finished - started) * 1000))
+            self._stop.wait(max(0.0, PROBE_INTERVAL - (finished - started)))
+
+    def _tail(self):
+        with open(self.log_path, 'r', encoding='utf-8', errors='replace') as f:
+            f.seek(0, 2)
+            while not self._stop.is_set():
+                line = f.readline()
+                if not line:
+                    self._stop.wait(0.02)
+                    continue
+                match = FLUSH_PATTERN.search(line)
+                if match:
+                    self.flushes.append({'at': time.perf_counter(), 'key': match.group(1),
+                                         'records': int(match.group(2))})
+
+    def start(self):
+        targets = [self._probe] + ([self._tail] if self.log_path else [])
+        self._threads = [threading.Thread(target=target, daemon=True) for target in targets]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=35)
+
+    def report(self, started_at: float, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """卡顿列表、刷盘事件，以及刷盘前后 FLUSH_WINDOW 秒内与其余时间的回放延迟对比"""
+        flush_times = [flush['at'] for flush in self.flushes]
+
+        def near_flush(at: float) -> bool:
+            return any(abs(at - flush_at) <= FLUSH_WINDOW for flush_at in flush_times)
+
+        stalls = [{'at_s': round(at - started_at, 2), 'probe_ms': round(latency, 1), 'near_flush': near_flush(at)}
+                  for at, latency in self.probes if latency >= self.threshold_ms]
+        during = [s['latency_ms'] for s in samples if near_flush(s['intended_at'])]
+        other = [s['latency_ms'] for s in samples if not near_flush(s['intended_at'])]
+        probe_latencies = [latency for _, latency in self.probes]
+        return {
+            'probes': len(self.probes),
+            'probe_p50_ms': round(percentile(probe_latencies, 50), 2),
+            'probe_p99_ms': round(percentile(probe_latencies, 99), 2),
+            'probe_max_ms': round(max(probe_latencies), 2) if probe_latencies else 0.0,
+            'stall_threshold_ms': self.threshold_ms,
+            'stalls': stalls,
+            'flushes': [{'at_s': round(flush['at'] - started_at, 2), 'key': flush['key'], 'records': flush['records']}
+                        for flush in self.flushes],
+            'near_flush': {'requests': len(during), 'p99_ms': round(percentile(during, 99), 2)},
+            'elsewhere': {'requests': len(other), 'p99_ms': round(percentile(other, 99), 2)}
+        }
+
+
+def print_stall_report(report: Dict[str, Any]):
+    print(f'\n🩺 事件循环探测（每 {PROBE_INTERVAL * 1000:.0f}ms 请求 /api/health，共 {report["probes"]} 次）: '
+          f'p50 {report["probe_p50_ms"]:.1f}ms / p99 {report["probe_p99_ms"]:.1f}ms / 最大 {report["probe_max_ms"]:.1f}ms')
+    stalls = report['stalls']
+    if stalls:
+        with_flush = sum(1 for stall in stalls if stall['near_flush'])
+        print(f'⏸️  卡顿 {len(stalls)} 次（≥ {report["stall_threshold_ms"]:.0f}ms），其中 {with_flush} 次与刷盘同时发生')
+        for stall in sorted(stalls, key=lambda item: -item['probe_ms'])[:5]:
+            print(f'   {stall["at_s"]:>8.2f}s  {stall["probe_ms"]:>8.1f}ms' + ('  （刷盘）' if stall['near_flush'] else ''))
+    else:
+        print(f'🟢 没有超过 {report["stall_threshold_ms"]:.0f}ms 的卡顿')
+    if report['flushes']:
+        keys = {}
+        for flush in report['flushes']:
+            keys[flush['key']] = max(keys.get(flush['key'], 0), flush['records'])
+        print(f'💾 刷盘 {len(report["flushes"])} 次（' + '，'.join(f'{key} 最多 {count} 条' for key, count in keys.items()) + '）')
+        print(f'   刷盘前后 {FLUSH_WINDOW:g} 秒内的请求 p99 {report["near_flush"]["p99_ms"]:.1f}ms'
+              f'（{report["near_flush"]["requests"]} 个），其余 p99 {report["elsewhere"]["p99_ms"]:.1f}ms')
+
+
+# =====================================================
+# 本地服务沙箱
+# =====================================================
+
+def prepare_sandbox(data_dir: Path) -> Path:
+    """复制数据目录到临时目录，回放写入的访问/交互记录不会污染仓库数据"""
+    sandbox = Path(tempfile.mkdtemp(prefix='traffic-replay-'))
+    shutil.copytree(data_dir, sandbox / 'data', ignore=shutil.ignore_patterns('upload-sessions', 'podcasts'))
+    for name in SANDBOX_LINKS:
+        if (ROOT_DIR / name).exists():
+            (sandbox / name).symlink_to(ROOT_DIR / name)
+    return sandbox
+
+
+# =====================================================
+# 主流程
+# =====================================================
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='按访问/交互/调用日志回放真实流量')
+    parser.add_argument('--base-url', default='http://127.0.0.1:3000', help='被测服务地址')
+    parser.add_argument('--start-server', action='store_true',
+                        help='复制 data/ 到临时目录并在空闲端口启动本地服务，结束后关闭（推荐）')
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help='读取日志的数据目录（默认 data/）')
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED, help='回放速度倍数，如 1 / 10 / 100')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'最大并发请求数（默认 {DEFAULT_CONCURRENCY}），超出的请求排队且排队时间计入延迟')
+    parser.add_argument('--max-gap', type=float, default=DEFAULT_MAX_GAP,
+                        help=f'记录中超过该秒数的空闲间隔压缩为该秒数（默认 {DEFAULT_MAX_GAP:g}）')
+    parser.add_argument('--from', dest='since', help='只回放该时间之后的记录（ISO 日期/时间）')
+    parser.add_argument('--to', dest='until', help='只回放该时间之前的记录（ISO 日期/时间）')
+    parser.add_argument('--busiest', type=float, metavar='MINUTES', help='只回放请求最多的一段时间（分钟）')
+    parser.add_argument('--ip-mode', choices=['private', 'original'], default='private',
+                        help='private（默认）把公网 IP 映射为固定的内网地址；original 使用原始 IP（会触发归属地查询）')
+    parser.add_argument('--include-ai', action='store_true', help='同时回放大模型调用（/api/ai/chat）')
+    parser.add_argument('--llm-url', help='--start-server 时本地服务使用的模型接口（如 mock-llm-server 地址）')
+    parser.add_argument('--stall-ms', type=float, default=STALL_THRESHOLD_MS,
+                        help=f'探测延迟超过该毫秒数记为卡顿（默认 {STALL_THRESHOLD_MS:g}）')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='单个请求超时秒数')
+    return parser.parse_args(argv)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    since = _parse_time(args.since) if args.since else None
+    until = _parse_time(args.until) if args.until else None
+
+    events = select_window(load_events(Path(args.data_dir), args.include_ai), since, until, args.busiest)
+    if not events:
+        print('❌ 所选范围内没有可回放的记录')
+        sys.exit(1)
+    schedule, targets, info = build_replay(events, args.speed, args.max_gap, args.ip_mode)
+
+    print(f'🎬 回放 {info["requests"]} 个请求，{info["clients"]} 个客户端')
+    print(f'   记录时间 {info["recorded_from"]} ~ {info["recorded_to"]}（{info["recorded_seconds"]:g} 秒，'
+          f'空闲间隔压缩到 {args.max_gap:g} 秒）')
+    print(f'   {args.speed:g}× 速度，预计 {info["replay_seconds"]:g} 秒，最大并发 {args.concurrency}')
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    server = None
+    sandbox = None
+    log_path = None
+    if args.start_server:
+        sandbox = prepare_sandbox(Path(args.data_dir))
+        port = free_port()
+        log_path = RESULTS_DIR / 'traffic-replay-server.log'
+        if args.llm_url:
+            os.environ['QWEN_API_URL'] = args.llm_url
+        print(f'🟡 启动本地服务 127.0.0.1:{port}（数据副本: {sandbox / "data"}）...')
+        server = start_local_server(port, root_dir=sandbox, log_path=log_path)
+        args.base_url = f'http://127.0.0.1:{port}'
+    else:
+        print(f'⚠️  回放会向 {args.base_url} 写入访问与交互记录，请勿对生产服务使用')
+    args.base_url = args.base_url.rstrip('/')
+
+    monitor = StallMonitor(args.base_url, log_path, args.stall_ms)
+    try:
+        monitor.start()
+        started_at = time.perf_counter()
+        samples, generator = run_open_loop(args.base_url, targets, schedule, args.timeout, args.concurrency)
+        # 多等一个刷盘周期之外的短暂时间，让回放末尾的写入也有机会刷盘
+        time.sleep(FLUSH_WINDOW)
+    finally:
+        monitor.stop()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if sandbox is not None:
+            shutil.rmtree(sandbox, ignore_errors=True)
+
+    duration = max(schedule[-1], 0.001)
+    by_name = {}
+    for sample in samples:
+        by_name.setdefault(sample['name'], []).append(sample)
+    summary = {
+        'overall': summarize(samples, duration),
+        'by_request': {name: summarize(group, duration) for name, group in sorted(by_name.items())}
+    }
+    print_summary({'name': f'回放 {args.speed:g}×'}, summary, round(len(samples) / duration, 1), generator)
+    stall_report = monitor.report(started_at, samples)
+    print_stall_report(stall_report)
+
+    output_file = RESULTS_DIR / f'traffic-replay-{int(time.time() * 1000)}.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'speed': args.speed, 'concurrency': args.concurrency, 'max_gap': args.max_gap,
+            'ip_mode': args.ip_mode, 'timeline': info, 'generator': generator,
+            'summary': summary, 'stalls': stall_report
+        }, f, ensure_ascii=False, indent=2)
+    print(f'\n📄 回放结果已保存: {output_file}')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('\n\n⚠️  回放被用户中断')
+        sys.exit(130)
+    except Exception as e:
+        print(f'\n❌ 回放失败: {e}')
+        sys.exit(1)
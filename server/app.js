@@ -2,6 +2,14 @@ const express = require('express');
 const cors = require('cors');
 const fs = require('fs');
 const path = require('path');
+const zlib = require('zlib');
+
+// body-parser 只内置 gzip/deflate 解码，其余压缩格式在这里补充（zstd 需要 Node 22.15+）
+const EXTRA_BODY_DECODERS = {
+    br: zlib.brotliDecompress,
+    zstd: typeof zlib.zstdDecompress === 'function' ? zlib.zstdDecompress : null
+};
+const DEFAULT_UPLOAD_ROUTES = ['/api/news/batch', '/api/news/delta', '/api/tools/batch'];
 
 /**
  * Create and configure express app with shared middleware/static hosting.
@@ -35,7 +43,84 @@ function createCorsOptions(allowedOriginsValue) {
     };
 }
 
-function createApp({ rootDir, staticRoot, trustProxy, corsAllowedOrigins, jsonBodyLimit = '64kb' }) {
+function parseByteLimit(value) {
+    if (typeof value === 'number') return value;
+    const match = String(value || '').trim().toLowerCase().match(/^(\d+(?:\.\d+)?)\s*(b|kb|mb|gb)?$/);
+    if (!match) {
+        throw new Error(`Invalid body limit: ${value}`);
+    }
+    const units = { b: 1, kb: 1024, mb: 1024 * 1024, gb: 1024 * 1024 * 1024 };
+    return Math.floor(Number(match[1]) * units[match[2] || 'b']);
+}
+
+/**
+ * Decode JSON bodies sent with Content-Encoding br/zstd.
+ * Parsed bodies set req._body so the regular express.json parser skips them.
+ */
+function createCompressedJsonParser({ limit }) {
+    const maxBytes = parseByteLimit(limit);
+
+    return function compressedJsonParser(req, res, next) {
+        const encoding = String(req.headers['content-encoding'] || '').trim().toLowerCase();
+        if (req._body || !Object.prototype.hasOwnProperty.call(EXTRA_BODY_DECODERS, encoding)) {
+            next();
+            return;
+        }
+
+        const decode = EXTRA_BODY_DECODERS[encoding];
+        if (!decode) {
+            res.status(415).json({ error: `不支持的 Content-Encoding: ${encoding}` });
+            return;
+        }
+
+        const chunks = [];
+        let received = 0;
+        let aborted = false;
+
+        req.on('data', (chunk) => {
+            if (aborted) return;
+            received += chunk.length;
+            if (received > maxBytes) {
+                aborted = true;
+                res.status(413).json({ error: '请求体过大' });
+                return;
+            }
+            chunks.push(chunk);
+        });
+
+        req.on('end', () => {
+            if (aborted) return;
+            decode(Buffer.concat(chunks), { maxOutputLength: maxBytes }, (error, decoded) => {
+                if (error) {
+                    const tooLarge = error.code === 'ERR_BUFFER_TOO_LARGE' || error instanceof RangeError;
+                    res.status(tooLarge ? 413 : 400).json({ error: tooLarge ? '请求体过大' : '请求体解码失败' });
+                    return;
+                }
+
+                try {
+                    req.body = JSON.parse(decoded.toString('utf8'));
+                    req._body = true;
+                } catch (parseError) {
+                    res.status(400).json({ error: '请求体不是有效的JSON' });
+                    return;
+                }
+                next();
+            });
+        });
+
+        req.on('error', next);
+    };
+}
+
+function createApp({
+    rootDir,
+    staticRoot,
+    trustProxy,
+    corsAllowedOrigins,
+    jsonBodyLimit = '64kb',
+    uploadBodyLimit = '10mb',
+    uploadRoutes = DEFAULT_UPLOAD_ROUTES
+}) {
     const app = express();
     const longCacheExtensions = new Set([
         '.png',
@@ -64,6 +149,9 @@ function createApp({ rootDir, staticRoot, trustProxy, corsAllowedOrigins, jsonBo
 
     app.set('trust proxy', normalizeTrustProxy(trustProxy));
     app.use(cors(createCorsOptions(corsAllowedOrigins)));
+    // 批量导入接口允许更大的（可压缩的）请求体，其余接口沿用默认限制
+    app.use(uploadRoutes, createCompressedJsonParser({ limit: uploadBodyLimit }));
+    app.use(uploadRoutes, express.json({ limit: uploadBodyLimit }));
     app.use(express.json({ limit: jsonBodyLimit }));
 
     if (staticRoot) {
@@ -83,7 +171,9 @@ function createApp({ rootDir, staticRoot, trustProxy, corsAllowedOrigins, jsonBo
 }
 
 module.exports = {
+    createCompressedJsonParser,
     createCorsOptions,
+    parseByteLimit,
     normalizeTrustProxy,
     createApp
 };
@@ -44,6 +44,12 @@ function normalizeDateRange(query, today) {
     return { from, to };
 }
 
+function compareSummaryItems(left, right) {
+    if (left.date !== right.date) return right.date.localeCompare(left.date);
+    if (left.clicks !== right.clicks) return right.clicks - left.clicks;
+    return left.eventType.localeCompare(right.eventType);
+}
+
 function summarizeEvents(events, { from, to }) {
     const grouped = new Map();
 
@@ -82,11 +88,7 @@ function summarizeEvents(events, { from, to }) {
             uniqueVisitors: item.visitorSet.size,
             lastOccurredAt: item.lastOccurredAt
         }))
-        .sort((left, right) => {
-            if (left.date !== right.date) return right.date.localeCompare(left.date);
-            if (left.clicks !== right.clicks) return right.clicks - left.clicks;
-            return left.eventType.localeCompare(right.eventType);
-        });
+        .sort(compareSummaryItems);
 }
 
 function createInteractionRouter({
@@ -94,6 +96,7 @@ function createInteractionRouter({
     writeData,
     interactionEventsFile,
     authenticateToken,
+    analyticsRollup = null,
     now = () => new Date(),
     timeZone = 'Asia/Shanghai'
 }) {
@@ -135,10 +138,16 @@ function createInteractionRouter({
         try {
             const today = toDateKey(typeof now === 'function' ? now() : new Date(), timeZone);
             const range = normalizeDateRange(req.query || {}, today);
-            const events = readData(interactionEventsFile, []);
+            let events = null;
+            const loadEvents = () => events || (events = readData(interactionEventsFile, []));
+            // 有汇总文件（scripts/analytics_rollup.py）且事件日志未变化时不再读取整份日志
+            const rolledUp = analyticsRollup?.interactionSummary(range, {
+                sourceFile: interactionEventsFile,
+                loadEvents
+            });
             res.json({
                 ...range,
-                summary: summarizeEvents(events, range)
+                summary: rolledUp ? rolledUp.sort(compareSummaryItems) : summarizeEvents(loadEvents(), range)
             });
         } catch (error) {
             console.error('获取交互统计失败:', error);
@@ -2,6 +2,14 @@ const express = require('express');
 const fs = require('fs');
 const path = require('path');
 const { parseIntParam } = require('../utils/validation');
+const { UploadSessionError } = require('../services/upload-sessions');
+const {
+    buildHashIndex,
+    indexDigest,
+    applyNewsDelta,
+    applyHashDelta,
+    createHashIndexCache
+} = require('../services/news-delta');
 
 function normalizeNewsPayload(rawData) {
     return Array.isArray(rawData) ? rawData : (rawData.articles || []);
@@ -22,11 +30,13 @@ function createNewsRouter({
     settingsFile,
     dataDir,
     dailyArchiveDir,
-    podcastService
+    podcastService,
+    uploadSessions = null
 }) {
     const router = express.Router();
     const NEWS_DATES_CACHE_TTL_MS = 45000;
     let datesCache = { data: null, expiresAt: 0 };
+    const hashIndexCache = createHashIndexCache();
 
     function invalidateDatesCache() {
         datesCache = { data: null, expiresAt: 0 };
@@ -324,73 +334,318 @@ function createNewsRouter({
         }
     });
 
+    function normalizeTargetDate(date) {
+        return typeof date === 'string' && /^\d{4}-\d{2}-\d{2}$/.test(date)
+            ? date
+            : null;
+    }
+
+    function triggerPodcast(podcastDate) {
+        const shouldTriggerPodcast = Boolean(
+            podcastService &&
+            typeof podcastService.generateNewsPodcast === 'function'
+        );
+
+        if (shouldTriggerPodcast) {
+            setImmediate(() => {
+                podcastService.generateNewsPodcast(podcastDate)
+                    .then((metadata) => {
+                        console.log(`[podcast] 日报导入后自动触发 ${podcastDate}: ${metadata.status}`);
+                    })
+                    .catch((error) => {
+                        console.error(`[podcast] 日报导入后自动触发失败 ${podcastDate}:`, error.message);
+                    });
+            });
+        }
+
+        return shouldTriggerPodcast;
+    }
+
+    function normalizeImportedArticle(article, importTime) {
+        return {
+            id: generateId('daily'),
+            title: article.title || '无标题',
+            key_point: article.key_point || '',
+            summary: article.summary || '无摘要',
+            source_url: article.source_url || article.url || '#',
+            source_name: article.source_name || '其他',
+            category: article.category || '未分类',
+            sub_category: article.sub_category || '',
+            country: article.country || 'global',
+            importance_score: article.importance_score || 1,
+            published_at: article.published_at || new Date().toISOString(),
+            is_today: true,
+            created_at: importTime
+        };
+    }
+
+    function readTodayNews() {
+        const today = new Date().toISOString().split('T')[0];
+        return readData(newsFile).filter(article => (article.created_at || '').startsWith(today));
+    }
+
+    function dailyArchiveFile(date) {
+        return path.join(dailyArchiveDir, `news-${date}.json`);
+    }
+
+    // 某日的全部新闻：今日在 news.json，历史日期在归档文件（尚未归档的部分仍在 news.json）
+    function readDayNews(date) {
+        const today = new Date().toISOString().split('T')[0];
+        if (date === today) {
+            return readTodayNews();
+        }
+        const archiveFile = dailyArchiveFile(date);
+        const archived = fs.existsSync(archiveFile) ? readData(archiveFile) : [];
+        return [
+            ...archived,
+            ...readData(newsFile).filter(article => (article.created_at || '').startsWith(date))
+        ];
+    }
+
+    // news.json 中还有往日新闻时先归档，之后历史日期的新闻只存在于归档文件
+    function archiveStaleNews() {
+        const today = new Date().toISOString().split('T')[0];
+        const hasStale = readData(newsFile).some(article => !(article.created_at || '').startsWith(today));
+        return hasStale ? archiveOldNews() : { archived: 0 };
+    }
+
+    // 补录历史日期：整日替换 daily/news-<date>.json，不影响今日新闻。
+    // 先归档 news.json 中的往日新闻，避免之后归档时把原有文章再追加到替换后的文件里
+    function importArchivedArticles(articles, targetDate, { podcast }) {
+        const archiveResult = archiveStaleNews();
+        const importTime = new Date().toISOString();
+        const createdAt = `${targetDate}T${importTime.split('T')[1]}`;
+        const dayNews = articles.map(article => ({
+            ...normalizeImportedArticle(article, createdAt),
+            is_today: false
+        }));
+
+        if (!writeData(dailyArchiveFile(targetDate), dayNews)) {
+            return null;
+        }
+
+        invalidateDatesCache();
+
+        return {
+            message: `成功补录 ${articles.length} 篇新闻到 ${targetDate}`,
+            archived: archiveResult.archived,
+            todayCount: 0,
+            dateCount: dayNews.length,
+            podcast: {
+                date: targetDate,
+                triggered: podcast && triggerPodcast(targetDate)
+            }
+        };
+    }
+
+    // 归档旧闻并用本批文章替换今日新闻；历史日期写入对应归档文件。写入失败时返回 null
+    function importArticles(articles, targetDate, { podcast = true } = {}) {
+        const today = new Date().toISOString().split('T')[0];
+        if (targetDate && targetDate < today) {
+            return importArchivedArticles(articles, targetDate, { podcast });
+        }
+
+        const archiveResult = archiveOldNews();
+        console.log('归档结果:', archiveResult);
+
+        const importTime = new Date().toISOString();
+        const newNews = articles.map(article => normalizeImportedArticle(article, importTime));
+
+        if (!writeData(newsFile, newNews)) {
+            return null;
+        }
+
+        invalidateDatesCache();
+        const podcastDate = targetDate || importTime.split('T')[0];
+
+        return {
+            message: `成功导入 ${articles.length} 篇新闻`,
+            archived: archiveResult.archived,
+            todayCount: newNews.length,
+            podcast: {
+                date: podcastDate,
+                triggered: podcast && triggerPodcast(podcastDate)
+            }
+        };
+    }
+
+    function sendUploadSessionError(res, error, fallbackMessage) {
+        if (error instanceof UploadSessionError) {
+            return res.status(error.statusCode).json({ error: error.message });
+        }
+        console.error(`${fallbackMessage}:`, error);
+        return res.status(500).json({ error: fallbackMessage });
+    }
+
     router.post('/news/batch', authenticateToken, (req, res) => {
-        const { articles, date } = req.body;
+        const { articles, date, podcast } = req.body;
 
         if (!Array.isArray(articles)) {
             return res.status(400).json({ error: '新闻数据格式错误' });
         }
 
-        const targetDate = typeof date === 'string' && /^\d{4}-\d{2}-\d{2}$/.test(date)
-            ? date
-            : null;
+        try {
+            const result = importArticles(articles, normalizeTargetDate(date), { podcast: podcast !== false });
+            if (result) {
+                res.json(result);
+            } else {
+                res.status(500).json({ error: '批量导入新闻失败' });
+            }
+        } catch (error) {
+            console.error('批量导入新闻失败:', error);
+            res.status(500).json({ error: '批量导入新闻失败' });
+        }
+    });
+
+    // 增量同步：返回今日（或 date 指定日期）新闻的内容哈希索引，供客户端计算增量
+    router.get('/news/hashes', authenticateToken, (req, res) => {
+        const today = new Date().toISOString().split('T')[0];
+        const targetDate = normalizeTargetDate(req.query.date) || today;
+
+        try {
+            const hashes = targetDate === today
+                ? hashIndexCache.get(newsFile, today, readTodayNews).hashes
+                : buildHashIndex(readDayNews(targetDate));
+            res.json({
+                date: targetDate,
+                digest: indexDigest(hashes),
+                hashes
+            });
+        } catch (error) {
+            console.error('获取新闻哈希索引失败:', error);
+            res.status(500).json({ error: '获取新闻哈希索引失败' });
+        }
+    });
+
+    // 增量同步：仅应用新增、变更、删除的文章；baseDigest 与服务端不一致时返回 409。
+    // 每篇文章的哈希按文件缓存，校验 baseDigest 不必重新哈希整日新闻；
+    // 新闻按日存成一个 JSON 数组，写入时仍整份重写当日文件（今日为 news.json，历史日期为归档文件）。
+    router.post('/news/delta', authenticateToken, (req, res) => {
+        const { baseDigest, upsert = [], remove = [], date, final = true } = req.body || {};
+
+        if (!Array.isArray(upsert) || !Array.isArray(remove)) {
+            return res.status(400).json({ error: '新闻数据格式错误' });
+        }
 
         try {
-            const archiveResult = archiveOldNews();
-            console.log('归档结果:', archiveResult);
+            const today = new Date().toISOString().split('T')[0];
+            const targetDate = normalizeTargetDate(date) || today;
+            const isPast = targetDate < today;
+            // 历史日期：先把 news.json 中残留的往日新闻归档，再以归档文件为准
+            const archived = isPast ? archiveStaleNews().archived : 0;
+            const dayFile = isPast ? dailyArchiveFile(targetDate) : newsFile;
+            const index = hashIndexCache.get(dayFile, targetDate, () => readDayNews(targetDate));
+
+            if (baseDigest !== index.digest) {
+                return res.status(409).json({ error: '索引已过期，请重新同步', digest: index.digest });
+            }
+            if (upsert.length === 0 && remove.length === 0) {
+                return res.json({ added: 0, updated: 0, removed: 0, digest: index.digest, podcast: { date: targetDate, triggered: false } });
+            }
 
+            const archiveResult = isPast ? { archived } : archiveStaleNews();
             const importTime = new Date().toISOString();
-            const newNews = articles.map(article => ({
-                id: generateId('daily'),
-                title: article.title || '无标题',
-                key_point: article.key_point || '',
-                summary: article.summary || '无摘要',
-                source_url: article.source_url || article.url || '#',
-                source_name: article.source_name || '其他',
-                category: article.category || '未分类',
-                sub_category: article.sub_category || '',
-                country: article.country || 'global',
-                importance_score: article.importance_score || 1,
-                published_at: article.published_at || new Date().toISOString(),
-                is_today: true,
-                created_at: importTime
-            }));
-
-            if (writeData(newsFile, newNews)) {
-                invalidateDatesCache();
-                const podcastDate = targetDate || importTime.split('T')[0];
-                const shouldTriggerPodcast = Boolean(
-                    podcastService &&
-                    typeof podcastService.generateNewsPodcast === 'function'
-                );
-
-                if (shouldTriggerPodcast) {
-                    setImmediate(() => {
-                        podcastService.generateNewsPodcast(podcastDate)
-                            .then((metadata) => {
-                                console.log(`[podcast] 日报导入后自动触发 ${podcastDate}: ${metadata.status}`);
-                            })
-                            .catch((error) => {
-                                console.error(`[podcast] 日报导入后自动触发失败 ${podcastDate}:`, error.message);
-                            });
-                    });
+            const createdAt = isPast ? `${targetDate}T${importTime.split('T')[1]}` : importTime;
+            const dayNews = fs.existsSync(dayFile) ? readData(dayFile) : [];
+            const result = applyNewsDelta(
+                dayNews,
+                { upsert, remove },
+                article => ({ ...normalizeImportedArticle(article, createdAt), is_today: !isPast })
+            );
+
+            if (!writeData(dayFile, result.news)) {
+                return res.status(500).json({ error: '增量导入新闻失败' });
+            }
+
+            invalidateDatesCache();
+            const { digest } = hashIndexCache.set(dayFile, targetDate, applyHashDelta(index.hashes, { upsert, remove }));
+            res.json({
+                added: result.added,
+                updated: result.updated,
+                removed: result.removed,
+                archived: archiveResult.archived,
+                todayCount: isPast ? 0 : result.news.length,
+                dateCount: result.news.length,
+                digest,
+                podcast: {
+                    date: targetDate,
+                    triggered: final !== false && triggerPodcast(targetDate)
                 }
+            });
+        } catch (error) {
+            console.error('增量导入新闻失败:', error);
+            res.status(500).json({ error: '增量导入新闻失败' });
+        }
+    });
 
-                res.json({
-                    message: `成功导入 ${articles.length} 篇新闻`,
-                    archived: archiveResult.archived,
-                    todayCount: newNews.length,
-                    podcast: {
-                        date: podcastDate,
-                        triggered: shouldTriggerPodcast
-                    }
-                });
-            } else {
-                res.status(500).json({ error: '批量导入新闻失败' });
+    // 分块上传：创建会话 -> 逐块上传（可断点续传）-> 一次性提交
+    router.post('/news/batch/sessions', authenticateToken, (req, res) => {
+        if (!uploadSessions) {
+            return res.status(501).json({ error: '未启用分块上传' });
+        }
+
+        try {
+            const session = uploadSessions.createSession({
+                date: normalizeTargetDate(req.body?.date)
+            });
+            res.status(201).json(session);
+        } catch (error) {
+            sendUploadSessionError(res, error, '创建上传会话失败');
+        }
+    });
+
+    router.get('/news/batch/sessions/:sessionId', authenticateToken, (req, res) => {
+        if (!uploadSessions) {
+            return res.status(501).json({ error: '未启用分块上传' });
+        }
+
+        try {
+            res.json(uploadSessions.describe(req.params.sessionId));
+        } catch (error) {
+            sendUploadSessionError(res, error, '获取上传会话失败');
+        }
+    });
+
+    router.put('/news/batch/sessions/:sessionId/chunks/:index', authenticateToken, (req, res) => {
+        if (!uploadSessions) {
+            return res.status(501).json({ error: '未启用分块上传' });
+        }
+
+        const index = /^\d+$/.test(req.params.index) ? Number(req.params.index) : NaN;
+
+        try {
+            const session = uploadSessions.putChunk(req.params.sessionId, index, req.body?.articles);
+            res.json({ ...session, acknowledged: index });
+        } catch (error) {
+            sendUploadSessionError(res, error, '上传分块失败');
+        }
+    });
+
+    router.post('/news/batch/sessions/:sessionId/commit', authenticateToken, (req, res) => {
+        if (!uploadSessions) {
+            return res.status(501).json({ error: '未启用分块上传' });
+        }
+
+        const { sessionId } = req.params;
+
+        try {
+            const session = uploadSessions.describe(sessionId);
+            const totalChunks = Number(req.body?.totalChunks);
+            const articles = uploadSessions.collectArticles(sessionId, totalChunks);
+            const result = importArticles(
+                articles,
+                normalizeTargetDate(req.body?.date) || session.date,
+                { podcast: req.body?.podcast !== false }
+            );
+
+            if (!result) {
+                return res.status(500).json({ error: '批量导入新闻失败' });
             }
+
+            uploadSessions.removeSession(sessionId);
+            res.json({ ...result, sessionId, chunks: totalChunks });
         } catch (error) {
-            console.error('批量导入新闻失败:', error);
-            res.status(500).json({ error: '批量导入新闻失败' });
+            sendUploadSessionError(res, error, '提交上传会话失败');
         }
     });
 
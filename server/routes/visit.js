@@ -1,5 +1,6 @@
 const express = require('express');
 const { parseIntParam } = require('../utils/validation');
+const { ipv4ToInt } = require('../services/ip-locator');
 
 const PROVINCE_MAP = {
     '北京': '北京市', '天津': '天津市', '上海': '上海市', '重庆': '重庆市',
@@ -18,24 +19,20 @@ function isLocalIP(ip) {
     return ip === '127.0.0.1' || ip === '::1' || ip.startsWith('192.168.') || ip.startsWith('10.');
 }
 
-async function getProvinceFromIP(ip) {
-    try {
-        if (isLocalIP(ip)) {
-            return '未知';
-        }
+function normalizeProvince(region) {
+    if (region && PROVINCE_MAP[region]) {
+        return PROVINCE_MAP[region];
+    }
+    return region || '未知';
+}
 
+async function getProvinceFromRemote(ip) {
+    try {
         const response = await fetch(`http://ip.taobao.com/outGetIpInfo?ip=${ip}&accessKey=alibaba-inc`);
         const data = await response.json();
 
         if (data.code === 0 && data.data) {
-            const region = data.data.region;
-
-            if (region && PROVINCE_MAP[region]) {
-                return PROVINCE_MAP[region];
-            }
-            if (region) {
-                return region;
-            }
+            return normalizeProvince(data.data.region);
         }
 
         return '未知';
@@ -45,7 +42,50 @@ async function getProvinceFromIP(ip) {
     }
 }
 
-function createVisitRouter({ readData, writeData, visitLogsFile, authenticateToken, cacheKey = 'visit-logs' }) {
+/**
+ * 解析访客所在省份：有离线 IP 省份库时只查本地库（微秒级，不发网络请求），
+ * 没有库文件、或地址不是库中能表示的 IPv4（如 IPv6）时才回退到 ip.taobao.com 在线查询
+ * （remoteLookup 为 false 时直接记为未知）。
+ */
+async function locateIP(ip, { ipLocator = null, remoteLookup = true } = {}) {
+    if (isLocalIP(ip)) {
+        return { province: '未知', country: '中国' };
+    }
+    if (ipLocator && ipLocator.available) {
+        const location = ipLocator.lookup(ip);
+        if (location) {
+            return { province: normalizeProvince(location.province), country: location.country || '中国' };
+        }
+        if (ipv4ToInt(ip) !== null) {
+            return { province: '未知', country: '中国' };
+        }
+    }
+    const province = remoteLookup ? await getProvinceFromRemote(ip) : '未知';
+    return { province, country: '中国' };
+}
+
+function countProvinces(logs) {
+    const provinceStats = {};
+    logs.forEach(log => {
+        const province = log.province || '未知';
+        if (!provinceStats[province]) {
+            provinceStats[province] = 0;
+        }
+        provinceStats[province]++;
+    });
+    return provinceStats;
+}
+
+function createVisitRouter({
+    readData,
+    writeData,
+    visitLogsFile,
+    authenticateToken,
+    cacheKey = 'visit-logs',
+    ipLocator = null,
+    remoteLookup = true,
+    analyticsRollup = null
+}) {
     const router = express.Router();
 
     // 使用缓存键读写数据
@@ -73,7 +113,7 @@ function createVisitRouter({ readData, writeData, visitLogsFile, authenticateTok
                 return res.status(400).json({ error: '无效的IP地址' });
             }
 
-            const province = await getProvinceFromIP(clientIP);
+            const { province, country } = await locateIP(clientIP, { ipLocator, remoteLookup });
             const logs = readCachedData();
 
             const today = new Date().toISOString().split('T')[0];
@@ -87,7 +127,7 @@ function createVisitRouter({ readData, writeData, visitLogsFile, authenticateTok
                     id: Date.now(),
                     ip: clientIP,
                     province: province,
-                    country: '中国',
+                    country,
                     date: new Date().toISOString(),
                     userAgent: req.headers['user-agent'] || '未知'
                 };
@@ -106,15 +146,8 @@ function createVisitRouter({ readData, writeData, visitLogsFile, authenticateTok
     router.get('/visit/province-stats', authenticateToken, (req, res) => {
         try {
             const logs = readCachedData();
-
-            const provinceStats = {};
-            logs.forEach(log => {
-                const province = log.province || '未知';
-                if (!provinceStats[province]) {
-                    provinceStats[province] = 0;
-                }
-                provinceStats[province]++;
-            });
+            // 有汇总文件（scripts/analytics_rollup.py）时只补算检查点之后的新记录
+            const provinceStats = analyticsRollup?.provinceCounts(logs) || countProvinces(logs);
 
             const statsArray = Object.entries(provinceStats)
                 .map(([province, count]) => ({ province, count }))
@@ -191,5 +224,6 @@ function createVisitRouter({ readData, writeData, visitLogsFile, authenticateTok
 }
 
 module.exports = {
-    createVisitRouter
+    createVisitRouter,
+    locateIP
 };
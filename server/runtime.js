@@ -12,6 +12,9 @@ const { createAiUsageConfigFromEnv, createAiUsageService } = require('./services
 const { createWeeklyKeywordsJob } = require('./services/weekly-keywords');
 const { createNewsPodcastService, createPodcastConfigFromEnv } = require('./services/news-podcast');
 const { createPodcastEmailService } = require('./services/podcast-email');
+const { createUploadSessionStore } = require('./services/upload-sessions');
+const { createIpLocator } = require('./services/ip-locator');
+const { createAnalyticsRollup } = require('./services/analytics-rollup');
 const { createAuthRouter } = require('./routes/auth');
 const { createSettingsRouter } = require('./routes/settings');
 const { createKeywordsRouter } = require('./routes/keywords');
@@ -85,12 +88,15 @@ function createJsonRuntime({ rootDir, env = process.env }) {
     const apiCallsFile = path.join(dataDir, 'api-calls.json');
     const aiUsageLogsFile = path.join(dataDir, 'ai-usage-logs.json');
     const interactionEventsFile = path.join(dataDir, 'interaction-events.json');
+    const ipProvinceDbFile = path.join(dataDir, 'ip-province.db');
+    const analyticsRollupFile = path.join(dataDir, 'analytics-rollup.json');
     const bannedIpsFile = path.join(dataDir, 'banned-ips.json');
     const keywordsWeeklyJobStateFile = path.join(dataDir, 'keywords-weekly-job.json');
     const archiveDir = path.join(dataDir, 'archive');
     const dailyArchiveDir = path.join(archiveDir, 'daily');
     const podcastDir = path.join(dataDir, 'podcasts');
     const podcastNewsDir = path.join(podcastDir, 'news');
+    const uploadSessionsDir = path.join(dataDir, 'upload-sessions');
     const logoDir = path.join(rootDir, 'logos');
 
     const app = createApp({
@@ -98,11 +104,12 @@ function createJsonRuntime({ rootDir, env = process.env }) {
         staticRoot: env.STATIC_ROOT,
         trustProxy: env.TRUST_PROXY,
         corsAllowedOrigins: env.CORS_ALLOWED_ORIGINS,
-        jsonBodyLimit: env.JSON_BODY_LIMIT || '64kb'
+        jsonBodyLimit: env.JSON_BODY_LIMIT || '64kb',
+        uploadBodyLimit: env.UPLOAD_BODY_LIMIT || '10mb'
     });
     const fileStore = createJsonFileStore();
 
-    for (const dir of [dataDir, archiveDir, dailyArchiveDir, podcastDir, podcastNewsDir, logoDir]) {
+    for (const dir of [dataDir, archiveDir, dailyArchiveDir, podcastDir, podcastNewsDir, uploadSessionsDir, logoDir]) {
         ensureDirectory(dir);
     }
 
@@ -286,6 +293,20 @@ function createJsonRuntime({ rootDir, env = process.env }) {
         config: podcastConfig,
         podcastEmailService
     });
+    const uploadSessions = createUploadSessionStore({
+        sessionsDir: uploadSessionsDir,
+        ttlMs: Number(env.UPLOAD_SESSION_TTL_MS || 24 * 60 * 60 * 1000)
+    });
+    const ipLocator = createIpLocator({
+        dbPath: env.IP_PROVINCE_DB ? path.resolve(rootDir, env.IP_PROVINCE_DB) : ipProvinceDbFile,
+        cacheSize: Number(env.IP_LOOKUP_CACHE_SIZE || 10000)
+    });
+    if (ipLocator.available) {
+        console.log(`已加载离线 IP 省份库（${ipLocator.records} 个地址段）`);
+    }
+    const analyticsRollup = createAnalyticsRollup({
+        rollupPath: env.ANALYTICS_ROLLUP_FILE ? path.resolve(rootDir, env.ANALYTICS_ROLLUP_FILE) : analyticsRollupFile
+    });
 
     app.use(securityRuntime.checkIPBan);
     app.use(securityRuntime.monitorAPIRateLimit);
@@ -319,19 +340,24 @@ function createJsonRuntime({ rootDir, env = process.env }) {
         settingsFile,
         dataDir,
         dailyArchiveDir,
-        podcastService
+        podcastService,
+        uploadSessions
     }));
     app.use('/api', createVisitRouter({
         readData,
         writeData,
         visitLogsFile,
-        authenticateToken
+        authenticateToken,
+        ipLocator,
+        remoteLookup: env.IP_REMOTE_LOOKUP !== 'false',
+        analyticsRollup
     }));
     app.use('/api', createInteractionRouter({
         readData,
         writeData,
         interactionEventsFile,
-        authenticateToken
+        authenticateToken,
+        analyticsRollup
     }));
     app.use('/api', createToolsRouter({
         readData,
@@ -393,6 +419,7 @@ function createJsonRuntime({ rootDir, env = process.env }) {
 
         setInterval(() => {
             securityRuntime.cleanupExpiredData();
+            uploadSessions.cleanupExpired();
         }, 3600000);
         weeklyKeywordsJob.startScheduler();
 
@@ -0,0 +1,205 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const zlib = require('zlib');
+
+// 汇总文件由 scripts/analytics_rollup.py update 生成。
+// 每份日志的检查点 { processed, lastId, size, mtimeMs, ... } 表示汇总已覆盖日志的前 processed 条，
+// 读取时只需补算之后的新记录；HyperLogLog 的哈希与寄存器编码须与脚本保持一致。
+const ROLLUP_VERSION = 1;
+const HLL_PRECISION = 12;
+
+/**
+ * HyperLogLog：MD5 前 64 位，高 precision 位选寄存器，其余位的前导零个数 + 1 写入寄存器；
+ * 寄存器以 zlib + base64 编码存储。
+ */
+function createHyperLogLog(encoded = null, precision = HLL_PRECISION) {
+    const size = 1 << precision;
+    const registers = encoded ? zlib.inflateSync(Buffer.from(encoded, 'base64')) : Buffer.alloc(size);
+    if (registers.length !== size) {
+        throw new Error('HyperLogLog 寄存器长度与精度不符');
+    }
+
+    return {
+        registers,
+        add(value) {
+            const digest = crypto.createHash('md5').update(String(value)).digest();
+            const high = digest.readUInt32BE(0);
+            const low = digest.readUInt32BE(4);
+            const index = high >>> (32 - precision);
+            // 高 32 位中去掉寄存器下标后剩下的部分
+            const rest = high & ((1 << (32 - precision)) - 1);
+            let rank = 64 - precision + 1;
+            if (rest) {
+                rank = Math.clz32(rest) - precision + 1;
+            } else if (low) {
+                rank = 32 - precision + Math.clz32(low) + 1;
+            }
+            if (rank > registers[index]) {
+                registers[index] = rank;
+            }
+        },
+        merge(other) {
+            for (let i = 0; i < size; i++) {
+                if (other.registers[i] > registers[i]) {
+                    registers[i] = other.registers[i];
+                }
+            }
+        },
+        count() {
+            let sum = 0;
+            let zeros = 0;
+            for (let i = 0; i < size; i++) {
+                sum += 2 ** -registers[i];
+                if (registers[i] === 0) zeros++;
+            }
+            let estimate = (0.7213 / (1 + 1.079 / size)) * size * size / sum;
+            // 小基数时用线性计数修正
+            if (estimate <= 2.5 * size && zeros) {
+                estimate = size * Math.log(size / zeros);
+            }
+            return Math.round(estimate);
+        },
+        encode() {
+            return zlib.deflateSync(registers).toString('base64');
+        }
+    };
+}
+
+/**
+ * 检查点之后的新记录：日志条数少于已处理条数、或第 processed 条的 id 与检查点不符（日志被清空或改写）时返回 null
+ */
+function pendingRecords(records, checkpoint) {
+    const processed = checkpoint?.processed || 0;
+    if (!Array.isArray(records) || records.length < processed) {
+        return null;
+    }
+    if (processed > 0 && records[processed - 1]?.id !== checkpoint.lastId) {
+        return null;
+    }
+    return records.slice(processed);
+}
+
+function isUnchangedSince(sourceFile, checkpoint) {
+    try {
+        const stat = fs.statSync(sourceFile);
+        return stat.size === checkpoint?.size && Math.abs(stat.mtimeMs - checkpoint.mtimeMs) < 1;
+    } catch {
+        return false;
+    }
+}
+
+function createAnalyticsRollup({ rollupPath }) {
+    let cached = { mtimeMs: null, data: null };
+
+    // 汇总文件按修改时间缓存，脚本写入新版本后下次请求自动重新加载
+    function load() {
+        let stat;
+        try {
+            stat = fs.statSync(rollupPath);
+        } catch {
+            return null;
+        }
+        if (stat.mtimeMs !== cached.mtimeMs) {
+            let data = null;
+            try {
+                data = JSON.parse(fs.readFileSync(rollupPath, 'utf8'));
+                if (data.version !== ROLLUP_VERSION || data.hllPrecision !== HLL_PRECISION) {
+                    data = null;
+                }
+            } catch (error) {
+                console.error('读取访问汇总文件失败:', error);
+            }
+            cached = { mtimeMs: stat.mtimeMs, data };
+        }
+        return cached.data;
+    }
+
+    /**
+     * 各省份访问数 { 省份: 次数 }；汇总不可用或与日志对不上时返回 null，由调用方全量统计
+     */
+    function provinceCounts(logs) {
+        const visits = load()?.visits;
+        const pending = visits ? pendingRecords(logs, visits.checkpoint) : null;
+        if (!pending) {
+            return null;
+        }
+        const counts = { ...visits.provinces };
+        pending.forEach((log) => {
+            const province = log.province || '未知';
+            counts[province] = (counts[province] || 0) + 1;
+        });
+        return counts;
+    }
+
+    /**
+     * 日期范围内按 日期 + eventType + eventLabel 分组的交互统计（未排序），口径与 summarizeEvents 相同。
+     * 交互事件文件自汇总以来没有变化时不读取日志；否则通过 loadEvents 读取并补算新记录。
+     */
+    function interactionSummary({ from, to }, { sourceFile, loadEvents }) {
+        const interactions = load()?.interactions;
+        if (!interactions) {
+            return null;
+        }
+        const pending = sourceFile && isUnchangedSince(sourceFile, interactions.checkpoint)
+            ? []
+            : pendingRecords(loadEvents(), interactions.checkpoint);
+        if (!pending) {
+            return null;
+        }
+
+        const grouped = new Map();
+        Object.entries(interactions.days || {})
+            .filter(([date]) => date >= from && date <= to)
+            .forEach(([date, groups]) => groups.forEach((group) => {
+                grouped.set(`${date}\u0000${group.eventType}\u0000${group.eventLabel}`, { ...group, date, visitors: null });
+            }));
+
+        pending
+            .filter((event) => event.date >= from && event.date <= to)
+            .forEach((event) => {
+                const key = `${event.date}\u0000${event.eventType}\u0000${event.eventLabel || ''}`;
+                if (!grouped.has(key)) {
+                    grouped.set(key, {
+                        date: event.date,
+                        eventType: event.eventType,
+                        eventLabel: event.eventLabel || '',
+                        target: event.target || '',
+                        clicks: 0,
+                        lastOccurredAt: event.createdAt,
+                        hll: null,
+                        visitors: null
+                    });
+                }
+                const item = grouped.get(key);
+                // 只有出现新记录的分组才需要解码寄存器
+                item.visitors = item.visitors || createHyperLogLog(item.hll);
+                item.visitors.add(event.ip || 'unknown');
+                item.clicks += 1;
+                if (new Date(event.createdAt) > new Date(item.lastOccurredAt)) {
+                    item.lastOccurredAt = event.createdAt;
+                }
+            });
+
+        return Array.from(grouped.values()).map((item) => ({
+            date: item.date,
+            eventType: item.eventType,
+            eventLabel: item.eventLabel,
+            target: item.target,
+            clicks: item.clicks,
+            uniqueVisitors: item.visitors ? item.visitors.count() : item.uniqueVisitors,
+            lastOccurredAt: item.lastOccurredAt
+        }));
+    }
+
+    return {
+        load,
+        provinceCounts,
+        interactionSummary
+    };
+}
+
+module.exports = {
+    createAnalyticsRollup,
+    createHyperLogLog,
+    pendingRecords
+};
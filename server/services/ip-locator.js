@@ -0,0 +1,119 @@
+const fs = require('fs');
+
+// 二进制格式（大端序，由 scripts/ip_province_db.py build 生成）：
+//   头部 16 字节：'IPPV' | u16 版本 | u16 保留 | u32 记录数 | u32 地区表偏移
+//   记录区：每条 10 字节，按起始地址升序、互不重叠：u32 起始 IP | u32 结束 IP | u16 地区下标
+//   地区表：UTF-8 JSON 数组 [[国家, 省份], ...]
+const MAGIC = 'IPPV';
+const FORMAT_VERSION = 1;
+const HEADER_SIZE = 16;
+const RECORD_SIZE = 10;
+const DEFAULT_CACHE_SIZE = 10000;
+const IPV4_PATTERN = /^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$/;
+
+function ipv4ToInt(ip) {
+    const match = String(ip || '').replace(/^::ffff:/i, '').match(IPV4_PATTERN);
+    if (!match) {
+        return null;
+    }
+    const octets = match.slice(1).map(Number);
+    if (octets.some((octet) => octet > 255)) {
+        return null;
+    }
+    return ((octets[0] * 256 + octets[1]) * 256 + octets[2]) * 256 + octets[3];
+}
+
+function parseIpDatabase(buffer) {
+    if (buffer.length < HEADER_SIZE || buffer.toString('latin1', 0, 4) !== MAGIC) {
+        throw new Error('不是 IP 省份库文件');
+    }
+    const version = buffer.readUInt16BE(4);
+    if (version !== FORMAT_VERSION) {
+        throw new Error(`不支持的 IP 省份库版本: ${version}`);
+    }
+    const count = buffer.readUInt32BE(8);
+    const locationsOffset = buffer.readUInt32BE(12);
+    if (locationsOffset !== HEADER_SIZE + count * RECORD_SIZE || locationsOffset > buffer.length) {
+        throw new Error('IP 省份库文件已损坏');
+    }
+    const locations = JSON.parse(buffer.toString('utf8', locationsOffset));
+    return { buffer, count, locations };
+}
+
+/**
+ * 在记录区二分查找包含 value 的区间，返回地区下标；未命中返回 -1
+ */
+function findRange({ buffer, count }, value) {
+    let low = 0;
+    let high = count - 1;
+    while (low <= high) {
+        const mid = (low + high) >>> 1;
+        const offset = HEADER_SIZE + mid * RECORD_SIZE;
+        if (value < buffer.readUInt32BE(offset)) {
+            high = mid - 1;
+        } else if (value > buffer.readUInt32BE(offset + 4)) {
+            low = mid + 1;
+        } else {
+            return buffer.readUInt16BE(offset + 8);
+        }
+    }
+    return -1;
+}
+
+/**
+ * 离线 IP → 国家/省份查询：整个库文件读入一块 Buffer（Node 没有 mmap，文件只有几 MB），
+ * 在固定宽度记录上二分查找，前面加一层 LRU 缓存。库文件不存在或无法解析时 available 为 false。
+ */
+function createIpLocator({ dbPath, cacheSize = DEFAULT_CACHE_SIZE, buffer = null }) {
+    let database = null;
+    if (buffer) {
+        database = parseIpDatabase(buffer);
+    } else if (dbPath && fs.existsSync(dbPath)) {
+        // 库文件损坏或版本不符时不影响启动，按没有库文件处理（回退在线查询或记为未知）
+        try {
+            database = parseIpDatabase(fs.readFileSync(dbPath));
+        } catch (error) {
+            console.error(`加载 IP 省份库 ${dbPath} 失败，已停用离线查询:`, error.message);
+        }
+    }
+    const cache = new Map();
+    const stats = { lookups: 0, cacheHits: 0 };
+
+    function lookup(ip) {
+        if (!database) {
+            return null;
+        }
+        stats.lookups += 1;
+        const key = String(ip || '');
+        if (cache.has(key)) {
+            const cached = cache.get(key);
+            // Map 按插入顺序迭代，重新插入即移到最近使用的一端
+            cache.delete(key);
+            cache.set(key, cached);
+            stats.cacheHits += 1;
+            return cached;
+        }
+
+        const value = ipv4ToInt(key);
+        const index = value === null ? -1 : findRange(database, value);
+        const result = index < 0 ? null : { country: database.locations[index][0], province: database.locations[index][1] };
+
+        cache.set(key, result);
+        if (cache.size > cacheSize) {
+            cache.delete(cache.keys().next().value);
+        }
+        return result;
+    }
+
+    return {
+        available: Boolean(database),
+        records: database ? database.count : 0,
+        lookup,
+        stats: () => ({ ...stats, cacheSize: cache.size })
+    };
+}
+
+module.exports = {
+    createIpLocator,
+    ipv4ToInt
+};
@@ -0,0 +1,142 @@
+const crypto = require('crypto');
+const fs = require('fs');
+
+/**
+ * 新闻增量同步：客户端与服务端使用同一套 key / 内容哈希规则，
+ * 只传输新增、变更、删除的文章。
+ */
+function normalizeSourceUrl(article) {
+    return article.source_url || article.url || '#';
+}
+
+function articleKey(article) {
+    const sourceUrl = normalizeSourceUrl(article);
+    return sourceUrl !== '#' ? sourceUrl : `title:${article.title || '无标题'}`;
+}
+
+function articleContentHash(article) {
+    return crypto
+        .createHash('sha256')
+        .update([
+            normalizeSourceUrl(article),
+            article.title || '无标题',
+            article.summary || '无摘要'
+        ].join('\u0000'), 'utf8')
+        .digest('hex');
+}
+
+function buildHashIndex(articles) {
+    const hashes = {};
+    for (const article of articles) {
+        hashes[articleKey(article)] = articleContentHash(article);
+    }
+    return hashes;
+}
+
+function indexDigest(hashes) {
+    const lines = Object.keys(hashes)
+        .sort()
+        .map((key) => `${key}\u0000${hashes[key]}\n`);
+    return crypto.createHash('sha256').update(lines.join(''), 'utf8').digest('hex');
+}
+
+/**
+ * 把增量应用到当天的新闻列表上：按 key 更新或追加，按 key 删除。
+ * 更新时保留原有 id 与 created_at，返回新的列表及统计。
+ */
+function applyNewsDelta(currentNews, { upsert = [], remove = [] }, normalizeArticle) {
+    const removeKeys = new Set(remove);
+    const news = currentNews.filter((article) => !removeKeys.has(articleKey(article)));
+    const positions = new Map(news.map((article, index) => [articleKey(article), index]));
+
+    let added = 0;
+    let updated = 0;
+    for (const article of upsert) {
+        const key = articleKey(article);
+        if (positions.has(key)) {
+            const index = positions.get(key);
+            const existing = news[index];
+            news[index] = {
+                ...normalizeArticle(article),
+                id: existing.id,
+                created_at: existing.created_at,
+                updated_at: new Date().toISOString()
+            };
+            updated += 1;
+        } else {
+            positions.set(key, news.length);
+            news.push(normalizeArticle(article));
+            added += 1;
+        }
+    }
+
+    return {
+        news,
+        added,
+        updated,
+        removed: currentNews.length - (news.length - added)
+    };
+}
+
+/**
+ * 按 applyNewsDelta 相同的规则更新哈希索引，只对本次增量中的文章计算哈希
+ */
+function applyHashDelta(hashes, { upsert = [], remove = [] }) {
+    const next = { ...hashes };
+    for (const key of remove) {
+        delete next[key];
+    }
+    for (const article of upsert) {
+        next[articleKey(article)] = articleContentHash(article);
+    }
+    return next;
+}
+
+function fileVersion(filePath) {
+    try {
+        const stat = fs.statSync(filePath);
+        return `${stat.ino}:${stat.size}:${stat.mtimeMs}`;
+    } catch {
+        return 'missing';
+    }
+}
+
+/**
+ * 按文件缓存每篇文章的内容哈希与索引摘要。文件未被改写（inode、大小、修改时间不变）时直接复用，
+ * 校验 baseDigest 时不必重新读取、哈希整日新闻；scope 不同（如日期变化）时重新计算。
+ */
+function createHashIndexCache() {
+    const entries = new Map();
+
+    function remember(filePath, scope, hashes, version = fileVersion(filePath)) {
+        const entry = { scope, version, hashes, digest: indexDigest(hashes) };
+        entries.set(filePath, entry);
+        return entry;
+    }
+
+    function get(filePath, scope, loadArticles) {
+        const version = fileVersion(filePath);
+        const entry = entries.get(filePath);
+        if (entry && entry.scope === scope && entry.version === version) {
+            return entry;
+        }
+        return remember(filePath, scope, buildHashIndex(loadArticles()), version);
+    }
+
+    return {
+        get,
+        // 写入文件后登记新的索引
+        set: (filePath, scope, hashes) => remember(filePath, scope, hashes),
+        clear: () => entries.clear()
+    };
+}
+
+module.exports = {
+    articleKey,
+    articleContentHash,
+    buildHashIndex,
+    indexDigest,
+    applyNewsDelta,
+    applyHashDelta,
+    createHashIndexCache
+};
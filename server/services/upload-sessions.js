@@ -0,0 +1,163 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { writeJsonAtomic } = require('./file-store');
+
+const DEFAULT_SESSION_TTL_MS = 24 * 60 * 60 * 1000;
+const SESSION_ID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/;
+const CHUNK_FILE_PATTERN = /^chunk-(\d{6})\.json$/;
+const MAX_CHUNK_INDEX = 999999;
+
+class UploadSessionError extends Error {
+    constructor(message, statusCode = 400) {
+        super(message);
+        this.name = 'UploadSessionError';
+        this.statusCode = statusCode;
+    }
+}
+
+function chunkFileName(index) {
+    return `chunk-${String(index).padStart(6, '0')}.json`;
+}
+
+/**
+ * 分块上传会话存储：每个会话一个目录，分块逐个落盘，提交时按序合并。
+ * 分块写入是幂等的，客户端中断后可从 nextChunk 继续上传。
+ */
+function createUploadSessionStore({ sessionsDir, ttlMs = DEFAULT_SESSION_TTL_MS, now = () => Date.now() }) {
+    function sessionDir(sessionId) {
+        if (!SESSION_ID_PATTERN.test(String(sessionId || ''))) {
+            throw new UploadSessionError('无效的上传会话ID');
+        }
+        return path.join(sessionsDir, sessionId);
+    }
+
+    function readMeta(sessionId) {
+        const metaFile = path.join(sessionDir(sessionId), 'meta.json');
+        if (!fs.existsSync(metaFile)) {
+            throw new UploadSessionError('上传会话不存在或已过期', 404);
+        }
+        return JSON.parse(fs.readFileSync(metaFile, 'utf8'));
+    }
+
+    function listReceivedChunks(sessionId) {
+        return fs.readdirSync(sessionDir(sessionId))
+            .map((file) => file.match(CHUNK_FILE_PATTERN))
+            .filter(Boolean)
+            .map((match) => Number(match[1]))
+            .sort((a, b) => a - b);
+    }
+
+    function nextMissingChunk(received) {
+        let next = 0;
+        for (const index of received) {
+            if (index !== next) break;
+            next += 1;
+        }
+        return next;
+    }
+
+    function describe(sessionId) {
+        const meta = readMeta(sessionId);
+        const received = listReceivedChunks(sessionId);
+        return {
+            sessionId,
+            date: meta.date,
+            createdAt: meta.createdAt,
+            expiresAt: meta.expiresAt,
+            receivedChunks: received.length,
+            nextChunk: nextMissingChunk(received)
+        };
+    }
+
+    function createSession({ date = null } = {}) {
+        cleanupExpired();
+
+        const sessionId = crypto.randomUUID();
+        const createdAt = now();
+        const meta = {
+            sessionId,
+            date,
+            createdAt: new Date(createdAt).toISOString(),
+            expiresAt: new Date(createdAt + ttlMs).toISOString()
+        };
+
+        writeJsonAtomic(path.join(sessionDir(sessionId), 'meta.json'), meta);
+        return describe(sessionId);
+    }
+
+    function putChunk(sessionId, index, articles) {
+        readMeta(sessionId);
+
+        if (!Number.isInteger(index) || index < 0 || index > MAX_CHUNK_INDEX) {
+            throw new UploadSessionError('无效的分块序号');
+        }
+        if (!Array.isArray(articles)) {
+            throw new UploadSessionError('新闻数据格式错误');
+        }
+
+        writeJsonAtomic(path.join(sessionDir(sessionId), chunkFileName(index)), articles);
+        return describe(sessionId);
+    }
+
+    function collectArticles(sessionId, totalChunks) {
+        readMeta(sessionId);
+
+        if (!Number.isInteger(totalChunks) || totalChunks < 0) {
+            throw new UploadSessionError('无效的分块总数');
+        }
+
+        const received = listReceivedChunks(sessionId);
+        const next = nextMissingChunk(received);
+        if (next < totalChunks) {
+            throw new UploadSessionError(`分块 ${next} 尚未上传`, 409);
+        }
+
+        const articles = [];
+        for (let index = 0; index < totalChunks; index += 1) {
+            const chunkFile = path.join(sessionDir(sessionId), chunkFileName(index));
+            articles.push(...JSON.parse(fs.readFileSync(chunkFile, 'utf8')));
+        }
+        return articles;
+    }
+
+    function removeSession(sessionId) {
+        fs.rmSync(sessionDir(sessionId), { recursive: true, force: true });
+    }
+
+    function cleanupExpired() {
+        if (!fs.existsSync(sessionsDir)) {
+            return 0;
+        }
+
+        let removed = 0;
+        for (const entry of fs.readdirSync(sessionsDir)) {
+            if (!SESSION_ID_PATTERN.test(entry)) continue;
+
+            try {
+                const meta = readMeta(entry);
+                if (Date.parse(meta.expiresAt) > now()) continue;
+            } catch (error) {
+                // 元数据缺失或损坏的会话同样视为过期
+            }
+
+            removeSession(entry);
+            removed += 1;
+        }
+        return removed;
+    }
+
+    return {
+        createSession,
+        describe,
+        putChunk,
+        collectArticles,
+        removeSession,
+        cleanupExpired
+    };
+}
+
+module.exports = {
+    UploadSessionError,
+    createUploadSessionStore
+};
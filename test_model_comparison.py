@@ -12,16 +12,39 @@ Qwen模型对比测试工具
 
 使用方法：
 python test_model_comparison.py
+python test_model_comparison.py --concurrent   # 所有(模型, 问题)组合并发执行
+python test_model_comparison.py --stream       # 流式调用，记录首Token时间与输出速度
+python test_model_comparison.py --no-cache     # 不使用本地响应缓存
+python test_model_comparison.py --resume 1792323734042   # 续跑中断的运行，跳过已有结果
+python test_model_comparison.py --models qwen:qwen-plus,deepseek:deepseek-v4-flash   # 任意 OpenAI 兼容供应商
+python test_model_comparison.py --hedge --hedge-primary qwen-plus --hedge-backup deepseek:   # 对冲请求评估
+python test_model_comparison.py --trace trace.json --profile run.prof   # 各阶段耗时（Chrome trace）与 cProfile
 """
 
 import os
 import sys
 import json
 import time
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import requests
 
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+
+from llm_concurrency import AdaptiveLimiter, TokenBucket, hedged_call, is_throttled, parse_retry_after  # noqa: E402
+from llm_providers import resolve_models  # noqa: E402
+from llm_keypool import KeyPool, call_with_key, estimate_request_tokens  # noqa: E402
+from bench_stats import describe, percentile  # noqa: E402
+from llm_streaming import stream_chat_completion  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from results_log import (JsonlWriter, completed_keys, iter_results, read_run_header, resolve_run_file,  # noqa: E402
+                         write_json_array)
+from results_store import ResultsStore, prompt_hash, rows_from_model_comparison  # noqa: E402
+from trace_spans import add_trace_arguments, span, start_tracing, traced  # noqa: E402
+
 # =====================================================
 # 配置区域
 # =====================================================
@@ -31,7 +54,10 @@ class Config:
 
     # 阿里云百炼 API 配置
     API_KEY = os.getenv('QWEN_API_KEY', 'sk-d110d2cda10d428a8e0b3551d7fc2105')
-    API_URL = 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions'
+    # 可指向本地模拟服务做离线测试: node scripts/mock-llm-server.js
+    API_URL = os.getenv('QWEN_API_URL', 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions')
+    # 多个 key（QWEN_API_KEYS）时按每个 key 的请求/Token 预算分摊请求，见 scripts/llm_keypool.py
+    KEY_POOL = KeyPool.from_env(API_KEY)
 
     # Qwen 模型列表
     MODELS = [
@@ -59,11 +85,41 @@ class Config:
         "研究智能座舱的发展"
     ]
 
+    # 采样参数
+    TEMPERATURE = 0.7
+    MAX_TOKENS = 4000
+
+    # 并发模式：每个模型的令牌桶速率（请求/秒）、突发容量与并发上限（速率与并发上限按每个 key 计，乘以 key 数）
+    MODEL_RPS = float(os.getenv('QWEN_MODEL_RPS', '2'))
+    MODEL_BURST = int(os.getenv('QWEN_MODEL_BURST', str(len(TEST_QUERIES))))
+    MAX_CONCURRENCY_PER_MODEL = int(os.getenv('QWEN_MAX_CONCURRENCY', '8'))
+    # 遇到 429/5xx 时的最大重试次数与初始退避秒数
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 1.0
+
+    # 流式模式（--stream）：记录首Token时间、Token间隔与输出速度
+    STREAM = False
+
+    # 响应缓存：相同请求体直接复用结果（--no-cache 关闭）
+    RESPONSE_CACHE = ResponseCache.from_env()
+
+    # 结果日志：每个结果完成后立即追加到 qwen-comparison-<运行ID>.jsonl
+    RUN_LOG = None
+    # 续跑时已有成功结果的 (问题, 模型ID)
+    COMPLETED = set()
+    # 系统提示词哈希，写入结果记录与结果库
+    PROMPT_HASH = ''
+
+    # 对冲模式（--hedge）：主请求超过基线延迟的该分位数仍未返回时发出备用请求
+    HEDGE_PERCENTILE = 90
+    HEDGE_TRIALS = 20
+
 
 # =====================================================
 # 工具函数
 # =====================================================
 
+@traced('load system prompt')
 def load_system_prompt() -> str:
     """加载系统提示词"""
     try:
@@ -95,7 +151,47 @@ def format_duration(ms: int) -> str:
 # API 调用函数
 # =====================================================
 
-def call_qwen_model(model_config: Dict, query: str, system_prompt: str) -> Dict[str, Any]:
+def model_endpoint(model_config: Dict) -> tuple:
+    """模型所属供应商的接口地址与密钥（Config.MODELS 中未指定供应商的为 Qwen）"""
+    return model_config.get('api_url') or Config.API_URL, model_config.get('api_key') or Config.API_KEY
+
+
+def uses_key_pool(model_config: Dict) -> bool:
+    """Qwen 模型的请求从 key 池取 key，其他供应商使用各自配置的 key"""
+    return model_config.get('provider', 'qwen') == 'qwen'
+
+
+def build_payload(model_id: str, query: str, system_prompt: str) -> Dict[str, Any]:
+    """构造 chat/completions 请求体"""
+    return {
+        'model': model_id,
+        'messages': [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': query}
+        ],
+        'temperature': Config.TEMPERATURE,
+        'max_tokens': Config.MAX_TOKENS,
+        'stream': False
+    }
+
+
+def _cache_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # 流式与非流式结果字段不同，分开缓存
+    return {**payload, 'stream': Config.STREAM}
+
+
+@traced('cache lookup')
+def lookup_cached_result(model_config: Dict, query: str, system_prompt: str):
+    """查询响应缓存，命中时返回带 cached=True 的结果，否则返回 None"""
+    payload = build_payload(model_config['model_id'], query, system_prompt)
+    cached = Config.RESPONSE_CACHE.get(model_endpoint(model_config)[0], _cache_payload(payload))
+    if cached is None:
+        return None
+    return {**cached, 'cached': True}
+
+
+def call_qwen_model(model_config: Dict, query: str, system_prompt: str,
+                    check_cache: bool = True) -> Dict[str, Any]:
     """
     调用指定的 Qwen 模型
 
@@ -103,32 +199,53 @@ def call_qwen_model(model_config: Dict, query: str, system_prompt: str) -> Dict[
         model_config: 模型配置字典
         query: 用户问题
         system_prompt: 系统提示词
+        check_cache: 是否先查询响应缓存（调用方已查询过时传 False）
 
     Returns:
-        包含响应结果的字典
+        包含响应结果的字典，cached 字段标记是否来自缓存
     """
     model_id = model_config['model_id']
+
+    if check_cache:
+        cached = lookup_cached_result(model_config, query, system_prompt)
+        if cached is not None:
+            return cached
+
+    api_url, api_key = model_endpoint(model_config)
+    payload = build_payload(model_id, query, system_prompt)
+
+    with span(f'call {model_id}', cat='model', stream=Config.STREAM):
+        if uses_key_pool(model_config):
+            return call_with_key(
+                Config.KEY_POOL,
+                lambda pooled_key: _request_model(model_config, query, api_url, pooled_key, payload),
+                estimate_request_tokens(payload)
+            )
+        return _request_model(model_config, query, api_url, api_key, payload)
+
+
+def _request_model(model_config: Dict, query: str, api_url: str, api_key: str,
+                   payload: Dict[str, Any]) -> Dict[str, Any]:
+    """用指定 key 实际发送请求（不经过缓存查询），成功结果写入缓存"""
+    model_id = model_config['model_id']
     model_name = model_config['name']
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f"Bearer {api_key}"
+    }
 
     start_time = time.time()
 
     try:
+        if Config.STREAM:
+            result = call_qwen_model_stream(model_config, query, api_url, headers, payload)
+            Config.RESPONSE_CACHE.set(api_url, _cache_payload(payload), result)
+            return {**result, 'cached': False}
+
         response = requests.post(
-            Config.API_URL,
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f"Bearer {Config.API_KEY}"
-            },
-            json={
-                'model': model_id,
-                'messages': [
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': query}
-                ],
-                'temperature': 0.7,
-                'max_tokens': 4000,
-                'stream': False
-            },
+            api_url,
+            headers=headers,
+            json=payload,
             timeout=120
         )
 
@@ -138,7 +255,7 @@ def call_qwen_model(model_config: Dict, query: str, system_prompt: str) -> Dict[
         response.raise_for_status()
         data = response.json()
 
-        return {
+        result = {
             'model': model_name,
             'model_id': model_id,
             'query': query,
@@ -153,27 +270,77 @@ def call_qwen_model(model_config: Dict, query: str, system_prompt: str) -> Dict[
             },
             'raw': data
         }
+        Config.RESPONSE_CACHE.set(api_url, _cache_payload(payload), result)
+        return {**result, 'cached': False}
 
     except requests.exceptions.RequestException as e:
-        return {'error': str(e), 'model': model_name, 'model_id': model_id}
+        result = {'error': str(e), 'model': model_name, 'model_id': model_id}
+        if e.response is not None:
+            result['status_code'] = e.response.status_code
+            retry_after = parse_retry_after(e.response.headers.get('Retry-After'))
+            if retry_after is not None:
+                result['retry_after'] = retry_after
+        return result
     except Exception as e:
         return {'error': f'未知错误: {str(e)}', 'model': model_name, 'model_id': model_id}
 
 
+def call_qwen_model_stream(model_config: Dict, query: str, api_url: str, headers: Dict[str, str],
+                           payload: Dict[str, Any]) -> Dict[str, Any]:
+    """流式调用模型，结果在普通模式字段之外增加 ttft / inter_token_ms / tokens_per_second"""
+    data = stream_chat_completion(api_url, headers, payload, timeout=120)
+    usage = data['usage']
+
+    return {
+        'model': model_config['name'],
+        'model_id': model_config['model_id'],
+        'query': query,
+        'response': data['content'],
+        'duration': data['duration'],
+        'duration_formatted': format_duration(data['duration']),
+        'ttft': data['ttft'],
+        'inter_token_ms': data['inter_token_ms'],
+        'tokens_per_second': data['tokens_per_second'],
+        'tokens': {
+            'prompt': usage['prompt_tokens'],
+            'completion': usage['completion_tokens'],
+            'total': usage['total_tokens']
+        },
+        'raw': {key: value for key, value in data.items() if key != 'content'}
+    }
+
+
 # =====================================================
 # 对比测试函数
 # =====================================================
 
+def print_call_result(model_name: str, result: Dict[str, Any]):
+    """打印单次调用结果"""
+    if 'error' in result:
+        print(f'  ❌ {model_name} 调用失败: {result["error"]}')
+    else:
+        print(f'  ✅ {model_name} 响应成功' + ('（缓存）' if result.get('cached') else ''))
+        print(f'     生成时间: {result["duration_formatted"]}')
+        if 'ttft' in result:
+            print(f'     首Token: {format_duration(result["ttft"])} | '
+                  f'Token间隔: {result["inter_token_ms"]:.1f}ms | '
+                  f'输出速度: {result["tokens_per_second"]:.1f} tokens/s')
+        print(f'     Tokens: {result["tokens"]["total"]} '
+              f'(输入: {result["tokens"]["prompt"]}, '
+              f'输出: {result["tokens"]["completion"]})')
+    print()
+
+
 def run_comparison(query: str, system_prompt: str) -> List[Dict[str, Any]]:
     """
-    运行单个查询的对比测试
+    运行单个查询的对比测试，续跑时跳过已有结果的模型
 
     Args:
         query: 测试问题
         system_prompt: 系统提示词
 
     Returns:
-        所有模型的结果列表
+        本次实际调用的结果列表
     """
     print_separator()
     print(f'📝 测试问题: {query}')
@@ -185,22 +352,22 @@ def run_comparison(query: str, system_prompt: str) -> List[Dict[str, Any]]:
     # 测试所有模型
     for i, model_config in enumerate(Config.MODELS, 1):
         model_name = model_config['name']
+        if (query, model_config['model_id']) in Config.COMPLETED:
+            print(f'[{i}/{len(Config.MODELS)}] ⏭️  {model_name} 已有结果，跳过\n')
+            continue
         print(f'[{i}/{len(Config.MODELS)}] 🔄 正在调用 {model_name}...')
 
         result = call_qwen_model(model_config, query, system_prompt)
+        record_result(query, model_config, result)
         results.append(result)
+        print_call_result(model_name, result)
 
-        if 'error' in result:
-            print(f'  ❌ {model_name} 调用失败: {result["error"]}')
-        else:
-            print(f'  ✅ {model_name} 响应成功')
-            print(f'     生成时间: {result["duration_formatted"]}')
-            print(f'     Tokens: {result["tokens"]["total"]} '
-                  f'(输入: {result["tokens"]["prompt"]}, '
-                  f'输出: {result["tokens"]["completion"]})')
-        print()
+    print_answers(results)
+    return results
 
-    # 显示所有结果
+
+def print_answers(results: List[Dict[str, Any]]):
+    """显示单个问题下各模型的完整回答"""
     print_separator()
     print('📊 各模型回答对比')
     print_separator()
@@ -214,6 +381,8 @@ def run_comparison(query: str, system_prompt: str) -> List[Dict[str, Any]]:
         print(f'🔹 {result["model"]} ({result["model_id"]})')
         print_separator('-')
         print(f'⏱️  生成时间: {result["duration_formatted"]}')
+        if 'ttft' in result:
+            print(f'⚡ 首Token: {format_duration(result["ttft"])}，输出速度 {result["tokens_per_second"]:.1f} tokens/s')
         print(f'📏 回答长度: {len(result["response"])} 字符')
         print(f'📊 Token数: {result["tokens"]["total"]}')
         print()
@@ -223,15 +392,418 @@ def run_comparison(query: str, system_prompt: str) -> List[Dict[str, Any]]:
         print()
         print()
 
-    return results
+
+# =====================================================
+# 结果日志（JSONL）
+# =====================================================
+
+@traced('record result')
+def record_result(query: str, model_config: Dict, result: Dict[str, Any]):
+    """结果完成后立即追加到运行日志"""
+    if Config.RUN_LOG is not None:
+        Config.RUN_LOG.write({'type': 'result', 'query': query, 'model_id': model_config['model_id'],
+                              'model': model_config['name'], 'prompt_hash': Config.PROMPT_HASH,
+                              'timestamp': time.time(), **result})
+
+
+def is_completed(record: Dict[str, Any]) -> bool:
+    """失败结果不算完成，续跑时会重新调用"""
+    return 'error' not in record
+
+
+def latest_query_results(run_file, query: str, keep_body: bool = True) -> List[Dict[str, Any]]:
+    """
+    流式读取运行日志中某个问题的结果，同一模型多条记录时取最后一条（续跑重试成功会覆盖失败）
+
+    Args:
+        run_file: JSONL 运行日志
+        query: 测试问题
+        keep_body: False 时去掉 response/raw，只保留汇总需要的字段
+    """
+    latest = {}
+    for record in iter_results(run_file):
+        if record['query'] != query:
+            continue
+        record.pop('type', None)
+        if not keep_body:
+            record.pop('response', None)
+            record.pop('raw', None)
+        latest[record['model_id']] = record
+    order = [m['model_id'] for m in Config.MODELS]
+    return sorted(latest.values(), key=lambda r: order.index(r['model_id']) if r['model_id'] in order else len(order))
+
+
+def load_summary_results(run_file, queries: List[str]) -> List[Dict[str, Any]]:
+    """汇总报告用的结果（不含回答正文），结构与保存的 JSON 相同"""
+    return [{'query': query, 'results': latest_query_results(run_file, query, keep_body=False)}
+            for query in queries]
+
+
+@traced('export results')
+def export_results_json(run_file, queries: List[str], output_file: str):
+    """由运行日志逐个问题流式生成 qwen-comparison-<运行ID>.json"""
+    write_json_array(
+        ({'query': query, 'results': latest_query_results(run_file, query)} for query in queries),
+        output_file
+    )
+
+
+# =====================================================
+# 并发对比测试（asyncio）
+# =====================================================
+
+async def call_model_with_limits(model_config: Dict, query: str, system_prompt: str,
+                                 bucket: TokenBucket, limiter: AdaptiveLimiter,
+                                 executor: ThreadPoolExecutor) -> Dict[str, Any]:
+    """
+    在令牌桶与自适应并发限制下调用模型，遇到 429/5xx 时降低并发并重试
+
+    Args:
+        model_config: 模型配置字典
+        query: 用户问题
+        system_prompt: 系统提示词
+        bucket: 该模型的令牌桶
+        limiter: 该模型的并发上限
+        executor: 执行阻塞 HTTP 请求的线程池
+
+    Returns:
+        与 call_qwen_model 相同结构的结果字典
+    """
+    # 缓存命中不占用令牌与并发
+    cached = lookup_cached_result(model_config, query, system_prompt)
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    backoff = Config.RETRY_BACKOFF
+
+    for attempt in range(Config.MAX_RETRIES + 1):
+        async with limiter:
+            await bucket.acquire()
+            result = await loop.run_in_executor(
+                executor, call_qwen_model, model_config, query, system_prompt, False
+            )
+
+        if 'error' not in result:
+            await limiter.on_success()
+            return result
+        if not is_throttled(result.get('status_code')) or attempt == Config.MAX_RETRIES:
+            return result
+
+        await limiter.on_throttle()
+        delay = result.get('retry_after', backoff)
+        bucket.pause(delay)
+        print(f'  ⏳ {model_config["name"]} 返回 {result["status_code"]}，'
+              f'并发降至 {limiter.limit}，{delay:.1f} 秒后重试')
+        backoff *= 2
+
+    return result
+
+
+async def run_all_comparisons_async(queries: List[str], system_prompt: str):
+    """
+    并发运行所有(模型, 问题)组合，每个模型独立限速；续跑时跳过已有结果的组合
+
+    结果完成即写入运行日志，内存中只保留不含回答正文的摘要
+    """
+    # 速率与并发上限随 key 数线性放大（每个 key 的实际预算由 key 池控制）
+    keys = Config.KEY_POOL.size
+    buckets = {
+        m['model_id']: TokenBucket(Config.MODEL_RPS * (keys if uses_key_pool(m) else 1), Config.MODEL_BURST)
+        for m in Config.MODELS
+    }
+    limiters = {
+        m['model_id']: AdaptiveLimiter(
+            len(queries), maximum=Config.MAX_CONCURRENCY_PER_MODEL * (keys if uses_key_pool(m) else 1)
+        )
+        for m in Config.MODELS
+    }
+    pairs = [
+        (model_config, query)
+        for query in queries
+        for model_config in Config.MODELS
+        if (query, model_config['model_id']) not in Config.COMPLETED
+    ]
+    total = len(pairs)
+    done = 0
+
+    async def run_pair(model_config: Dict, query: str):
+        nonlocal done
+        model_id = model_config['model_id']
+        result = await call_model_with_limits(
+            model_config, query, system_prompt, buckets[model_id], limiters[model_id], executor
+        )
+        record_result(query, model_config, result)
+        done += 1
+        print(f'[{done}/{total}] {query[:20]} ← {model_config["name"]}')
+        print_call_result(model_config['name'], result)
+
+    print(f'🚀 并发执行 {total} 个调用（每个模型每个 key {Config.MODEL_RPS:g} 请求/秒，'
+          f'突发 {Config.MODEL_BURST}，并发上限 {Config.MAX_CONCURRENCY_PER_MODEL}，{keys} 个 key）\n')
+
+    max_workers = sum(limiter.maximum for limiter in limiters.values())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        await asyncio.gather(*(run_pair(model_config, query) for model_config, query in pairs))
+
+    peak = ', '.join(f'{m["name"]}={limiters[m["model_id"]].peak}' for m in Config.MODELS)
+    print(f'📶 各模型峰值并发: {peak}\n')
+
+
+# =====================================================
+# 对冲请求评估
+# =====================================================
+
+def _total_tokens(result: Dict[str, Any]) -> int:
+    return result.get('tokens', {}).get('total', 0) if 'error' not in result else 0
+
+
+def run_hedge_evaluation(queries: List[str], system_prompt: str, primary: Dict, backup: Dict,
+                         deadline_ms: int = None) -> Dict[str, Any]:
+    """
+    对冲请求评估：先只调用主模型得到基线延迟分布，再以基线的分位数作为截止时间做对冲调用
+
+    对冲调用中未胜出的请求也会等到完成，其 Token 计为对冲的额外消耗
+    （实际代理中可以中断未胜出的流式请求，这里给出的是上限）。
+
+    Args:
+        queries: 测试问题（轮流使用）
+        system_prompt: 系统提示词
+        primary: 主模型配置
+        backup: 备用模型配置（可以是另一个供应商）
+        deadline_ms: 固定截止时间；None 时取基线延迟的 Config.HEDGE_PERCENTILE 分位数
+
+    Returns:
+        评估报告字典（同时写入 JSON 文件）
+    """
+    trials = Config.HEDGE_TRIALS
+    print(f'📏 基线: 只调用 {primary["name"]}，共 {trials} 次\n')
+    baseline = []
+    for i in range(trials):
+        result = call_qwen_model(primary, queries[i % len(queries)], system_prompt, check_cache=False)
+        baseline.append(result)
+        status = f'{result["duration"]}ms' if 'error' not in result else f'❌ {result["error"][:60]}'
+        print(f'  [{i + 1}/{trials}] {status}')
+
+    baseline_ok = [r['duration'] for r in baseline if 'error' not in r]
+    if deadline_ms is None:
+        if not baseline_ok:
+            raise RuntimeError('基线调用全部失败，无法计算对冲截止时间')
+        deadline_ms = int(percentile(baseline_ok, Config.HEDGE_PERCENTILE))
+    print(f'\n⏰ 对冲截止时间: {deadline_ms}ms（超过后发出 {backup["name"]} 备用请求）\n')
+
+    hedged = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for i in range(trials):
+            query = queries[i % len(queries)]
+            outcome = hedged_call(
+                lambda: call_qwen_model(primary, query, system_prompt, check_cache=False),
+                lambda: call_qwen_model(backup, query, system_prompt, check_cache=False),
+                deadline_ms / 1000, executor
+            )
+            # 等待未胜出的请求完成，统计额外 Token
+            results = {name: future.result() for name, future in outcome['futures'].items()}
+            extra_tokens = sum(_total_tokens(r) for name, r in results.items() if name != outcome['winner'])
+            hedged.append({
+                'latency_ms': outcome['latency_ms'],
+                'winner': outcome['winner'],
+                'backup_fired': outcome['backup_fired'],
+                'success': 'error' not in outcome['result'],
+                'tokens': sum(_total_tokens(r) for r in results.values()),
+                'extra_tokens': extra_tokens
+            })
+            fired = f'→ 备用请求，{outcome["winner"]} 胜出' if outcome['backup_fired'] else ''
+            print(f'  [{i + 1}/{trials}] {outcome["latency_ms"]}ms {fired}')
+
+    return print_hedge_report(primary, backup, deadline_ms, baseline, hedged)
+
+
+def print_hedge_report(primary: Dict, backup: Dict, deadline_ms: int,
+                       baseline: List[Dict[str, Any]], hedged: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """打印对冲前后的延迟分位数与额外 Token 消耗"""
+    base_stats = describe([r['duration'] for r in baseline if 'error' not in r])
+    hedge_stats = describe([r['latency_ms'] for r in hedged if r['success']])
+    base_tokens = sum(_total_tokens(r) for r in baseline)
+    hedge_tokens = sum(r['tokens'] for r in hedged)
+    extra_tokens = sum(r['extra_tokens'] for r in hedged)
+    fired = sum(1 for r in hedged if r['backup_fired'])
+    backup_wins = sum(1 for r in hedged if r['winner'] == 'backup')
+
+    print('\n' + '█' * 80)
+    print('█' + '  对冲请求评估报告'.center(76) + '  █')
+    print('█' * 80 + '\n')
+    print(f'  主模型: {primary["name"]}    备用: {backup["name"]}    截止时间: {deadline_ms}ms\n')
+    print(f'  {"":<10} | {"成功":>6} | {"p50":>9} | {"p90":>9} | {"p99":>9} | {"均值":>9} | {"Token合计":>10}')
+    print('  ' + '-' * 76)
+    for label, stats, total in (('不对冲', base_stats, base_tokens), ('对冲', hedge_stats, hedge_tokens)):
+        print(f'  {label:<10} | {stats["n"]:>6} | {stats["p50"]:>7.0f}ms | {stats["p90"]:>7.0f}ms | '
+              f'{stats["p99"]:>7.0f}ms | {stats["mean"]:>7.0f}ms | {total:>10}')
+    print()
+
+    def change(field):
+        return (hedge_stats[field] - base_stats[field]) / base_stats[field] * 100 if base_stats[field] else 0.0
+
+    print(f'  📉 p99 变化: {change("p99"):+.1f}%    p90 变化: {change("p90"):+.1f}%    p50 变化: {change("p50"):+.1f}%')
+    print(f'  🔀 备用请求触发 {fired}/{len(hedged)} 次（{fired / len(hedged) * 100:.0f}%），其中备用先返回 {backup_wins} 次')
+    extra_pct = extra_tokens / base_tokens * 100 if base_tokens else 0.0
+    print(f'  💰 额外 Token: {extra_tokens}（相对不对冲 +{extra_pct:.1f}%，未胜出的请求按完整生成计算，为上限）')
+    if len(hedged) < 100:
+        print(f'  ⚠️  样本 {len(hedged)} 个，p99 接近最大值，建议 --hedge-trials 100 以上再据此决定是否在代理中启用')
+    print()
+
+    return {
+        'primary': primary['name'],
+        'backup': backup['name'],
+        'deadline_ms': deadline_ms,
+        'baseline': base_stats,
+        'hedged': hedge_stats,
+        'p99_change_pct': change('p99'),
+        'backup_fired': fired,
+        'backup_wins': backup_wins,
+        'baseline_tokens': base_tokens,
+        'hedged_tokens': hedge_tokens,
+        'extra_tokens': extra_tokens,
+        'extra_tokens_pct': extra_pct,
+        'trials': hedged
+    }
 
 
 # =====================================================
 # 主函数
 # =====================================================
 
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Qwen 模型对比测试工具')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='asyncio 并发模式：所有(模型, 问题)组合同时执行，按模型限速并自适应并发')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式调用（SSE），记录首Token时间、Token间隔与输出速度')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不读取也不写入本地响应缓存，全部实际调用')
+    parser.add_argument('--resume', metavar='RUN',
+                        help='续跑中断的运行（运行ID或 qwen-comparison-<运行ID>.jsonl 路径），跳过已有结果')
+    parser.add_argument('--models', type=lambda v: [m.strip() for m in v.split(',') if m.strip()],
+                        help='替换测试模型列表，逗号分隔的「供应商:模型ID」，如 qwen:qwen-plus,deepseek:deepseek-v4-flash')
+    parser.add_argument('--providers', metavar='FILE',
+                        help='供应商配置文件（默认 $LLM_PROVIDERS_FILE 或 config/llm-providers.json）')
+    parser.add_argument('--hedge', action='store_true',
+                        help='对冲请求评估：对比不对冲与对冲时的 p50/p90/p99 与额外 Token')
+    parser.add_argument('--hedge-primary', metavar='MODEL', help='对冲主模型（默认模型列表第 1 个）')
+    parser.add_argument('--hedge-backup', metavar='MODEL', help='对冲备用模型（默认模型列表第 2 个）')
+    parser.add_argument('--hedge-percentile', type=float, default=Config.HEDGE_PERCENTILE,
+                        help=f'截止时间取基线延迟的分位数（默认 p{Config.HEDGE_PERCENTILE}）')
+    parser.add_argument('--hedge-deadline-ms', type=int, help='固定截止时间（毫秒），指定后不再按分位数计算')
+    parser.add_argument('--hedge-trials', type=int, default=Config.HEDGE_TRIALS,
+                        help=f'基线与对冲各调用次数（默认 {Config.HEDGE_TRIALS}）')
+    parser.add_argument('--key-rpm', type=int, metavar='N',
+                        help='每个 API key 每分钟请求数上限（默认 $QWEN_KEY_RPM，0 不限）')
+    parser.add_argument('--key-tpm', type=int, metavar='N',
+                        help='每个 API key 每分钟 Token 上限（默认 $QWEN_KEY_TPM，0 不限）')
+    parser.add_argument('--key-strategy', choices=['least-loaded', 'round-robin'],
+                        help='多个 key 的分配策略（默认 $QWEN_KEY_STRATEGY 或 least-loaded）')
+    add_trace_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def run_all_comparisons(queries: List[str], system_prompt: str):
+    """顺序运行所有问题，结果完成即写入运行日志"""
+    for i, query in enumerate(queries, 1):
+        print(f'\n{"="*80}')
+        print(f'测试进度: {i}/{len(queries)}')
+        print(f'{"="*80}\n')
+
+        results = run_comparison(query, system_prompt)
+
+        # 如果不是最后一个问题，延迟一下避免API限流（整题跳过时无需等待；设置了 key 预算时由 key 池控制速率）
+        if i < len(queries) and results and not Config.KEY_POOL.paced:
+            print('⏳ 等待 2 秒后继续下一个测试...\n')
+            with span('wait between queries'):
+                time.sleep(2)
+
+
+def print_key_usage():
+    """多个 key 或设置了 key 预算时打印各 key 用量"""
+    if Config.KEY_POOL.size > 1 or Config.KEY_POOL.paced:
+        Config.KEY_POOL.print_report()
+        print()
+
+
+def run_hedge_mode(args, system_prompt: str):
+    """--hedge：解析主/备用模型，运行对冲评估并保存报告"""
+    def pick(spec, index):
+        if spec:
+            return resolve_models([spec], args.providers)[0]
+        if len(Config.MODELS) <= index:
+            raise ValueError('对冲评估需要两个模型，请用 --hedge-primary / --hedge-backup 指定')
+        return Config.MODELS[index]
+
+    primary = pick(args.hedge_primary, 0)
+    backup = pick(args.hedge_backup, 1)
+    Config.HEDGE_PERCENTILE = args.hedge_percentile
+    Config.HEDGE_TRIALS = args.hedge_trials
+
+    report = run_hedge_evaluation(Config.TEST_QUERIES, system_prompt, primary, backup, args.hedge_deadline_ms)
+
+    output_file = f'qwen-hedge-{int(time.time() * 1000)}.json'
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'📄 对冲评估结果已保存到: {output_file}')
+        print()
+    except Exception as e:
+        print(f'⚠️  保存对冲评估结果失败: {e}')
+        print()
+
+
+def prepare_run(args) -> Tuple[Path, str]:
+    """
+    确定运行日志：新运行以时间戳为运行ID；--resume 时沿用原运行的流式参数，并读取已完成的结果。
+    模型列表与原运行不一致时拒绝续跑，避免同一份日志混入不同配置的结果
+
+    Returns:
+        (日志路径, 运行ID)
+    """
+    if not args.resume:
+        run_id = str(int(time.time() * 1000))
+        return Path(f'qwen-comparison-{run_id}.jsonl'), run_id
+
+    run_file = resolve_run_file(args.resume, '.', 'qwen-comparison')
+    header = read_run_header(run_file) or {}
+    models = [m['model_id'] for m in Config.MODELS]
+    if header.get('models', models) != models:
+        print(f'❌ 续跑的模型列表与原运行不一致: 原运行 {", ".join(header["models"])}，本次 {", ".join(models)}')
+        print('   请用 --models 指定与原运行相同的模型列表')
+        sys.exit(1)
+    args.stream = header.get('stream', args.stream)
+    Config.COMPLETED = completed_keys(run_file, lambda r: (r['query'], r['model_id']), is_completed)
+    return run_file, header.get('run_id') or run_file.stem.replace('qwen-comparison-', '')
+
+
+def open_run_log(args, run_file: Path, run_id: str):
+    """打开运行日志，新运行先写入一条运行信息记录"""
+    Config.RUN_LOG = JsonlWriter(run_file)
+    if args.resume:
+        print(f'🔁 续跑 {run_file}，已有 {len(Config.COMPLETED)} 个结果将跳过\n')
+        return
+    Config.RUN_LOG.write({
+        'type': 'run', 'run_id': run_id, 'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'models': [m['model_id'] for m in Config.MODELS], 'queries': Config.TEST_QUERIES,
+        'stream': Config.STREAM, 'temperature': Config.TEMPERATURE, 'max_tokens': Config.MAX_TOKENS
+    })
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    start_tracing(args.trace, args.profile, name='test_model_comparison')
+    if args.models:
+        Config.MODELS = resolve_models(args.models, args.providers)
+    # 续跑时先恢复原运行的流式参数（对冲评估不写运行日志）
+    run_file, run_id = (None, None) if args.hedge else prepare_run(args)
+    Config.STREAM = args.stream
+    # 对冲评估需要真实耗时，不使用缓存
+    Config.RESPONSE_CACHE.enabled = not args.no_cache and not args.hedge
+    Config.KEY_POOL.configure(args.key_rpm, args.key_tpm, args.key_strategy)
 
     # 打印标题
     print()
@@ -251,6 +823,7 @@ def main():
 
     # 加载系统提示词
     system_prompt = load_system_prompt()
+    Config.PROMPT_HASH = prompt_hash(system_prompt)
 
     # 检查 API Key
     if not Config.API_KEY or 'your-qwen-api-key' in Config.API_KEY:
@@ -258,26 +831,37 @@ def main():
         print('   export QWEN_API_KEY=sk-your-actual-api-key')
         sys.exit(1)
 
+    if args.hedge:
+        run_hedge_mode(args, system_prompt)
+        print_key_usage()
+        return
+
+    # 运行日志：新运行以时间戳为运行ID，--resume 时继续追加到原日志
+    open_run_log(args, run_file, run_id)
+
     # 显示测试计划
-    print(f'📋 测试计划: 共 {len(Config.TEST_QUERIES)} 个问题\n')
+    print(f'📋 测试计划: 共 {len(Config.TEST_QUERIES)} 个问题')
+    print(f'📝 结果实时写入: {run_file}（中断后可用 --resume {run_id} 续跑）\n')
 
     # 运行所有测试
-    all_results = []
-    for i, query in enumerate(Config.TEST_QUERIES, 1):
-        print(f'\n{"="*80}')
-        print(f'测试进度: {i}/{len(Config.TEST_QUERIES)}')
-        print(f'{"="*80}\n')
-
-        results = run_comparison(query, system_prompt)
-        all_results.append({
-            'query': query,
-            'results': results
-        })
+    started = time.time()
+    try:
+        if args.concurrent:
+            asyncio.run(run_all_comparisons_async(Config.TEST_QUERIES, system_prompt))
+            for query in Config.TEST_QUERIES:
+                print_separator()
+                print(f'📝 测试问题: {query}')
+                print_separator()
+                print()
+                print_answers(latest_query_results(run_file, query))
+        else:
+            run_all_comparisons(Config.TEST_QUERIES, system_prompt)
+    finally:
+        Config.RUN_LOG.close()
+    wall_ms = int((time.time() - started) * 1000)
 
-        # 如果不是最后一个问题，延迟一下避免API限流
-        if i < len(Config.TEST_QUERIES):
-            print('⏳ 等待 2 秒后继续下一个测试...\n')
-            time.sleep(2)
+    # 汇总报告由运行日志流式生成（包含续跑前已有的结果，不含回答正文）
+    all_results = load_summary_results(run_file, Config.TEST_QUERIES)
 
     # 汇总报告
     print('\n' + '█' * 80)
@@ -292,9 +876,12 @@ def main():
     print_separator('-')
     print()
 
-    # 表头
-    print(f'{"问题":<30} | {"模型":<20} | {"生成时间":<12} | {"Token数":<10}')
-    print('-' * 80)
+    # 表头（流式模式额外显示首Token时间与输出速度）
+    header = f'{"问题":<30} | {"模型":<20} | {"生成时间":<12} | {"Token数":<10}'
+    if Config.STREAM:
+        header += f' | {"首Token":<10} | {"Token间隔":<10} | {"tokens/s":<8}'
+    print(header)
+    print('-' * (80 + (40 if Config.STREAM else 0)))
 
     # 数据行
     for test_idx, test_data in enumerate(all_results, 1):
@@ -305,7 +892,13 @@ def main():
                 status = '❌ 失败'
                 print(f'{query_short:<30} | {result["model"]:<20} | {status:<12} | {"N/A":<10}')
             else:
-                print(f'{query_short:<30} | {result["model"]:<20} | {result["duration_formatted"]:<12} | {result["tokens"]["total"]:<10}')
+                duration_label = result['duration_formatted'] + ('*' if result.get('cached') else '')
+                row = f'{query_short:<30} | {result["model"]:<20} | {duration_label:<12} | {result["tokens"]["total"]:<10}'
+                if 'ttft' in result:
+                    inter_token = f'{result["inter_token_ms"]:.1f}ms'
+                    row += (f' | {format_duration(result["ttft"]):<10} | {inter_token:<10}'
+                            f' | {result["tokens_per_second"]:<8.1f}')
+                print(row)
 
     print()
 
@@ -340,6 +933,28 @@ def main():
         print(f'  {model_name:<25} {format_duration(int(stats["avg_time"])):<15} '
               f'(基于{stats["count"]}个测试)')
 
+    # 流式模式：各模型平均首Token时间与输出速度
+    if Config.STREAM:
+        print()
+        print('⚡ 各模型平均首Token时间 / 输出速度')
+        print_separator('-')
+        print()
+
+        for model in Config.MODELS:
+            streamed = [
+                result
+                for test_data in all_results
+                for result in test_data['results']
+                if result.get('model') == model['name'] and 'ttft' in result
+            ]
+            if not streamed:
+                continue
+            avg_ttft = sum(r['ttft'] for r in streamed) / len(streamed)
+            avg_itl = sum(r['inter_token_ms'] for r in streamed) / len(streamed)
+            avg_tps = sum(r['tokens_per_second'] for r in streamed) / len(streamed)
+            print(f'  {model["name"]:<25} 首Token {format_duration(int(avg_ttft)):<10} '
+                  f'Token间隔 {avg_itl:>6.1f}ms  {avg_tps:>6.1f} tokens/s  (基于{len(streamed)}个测试)')
+
     print()
 
     # Token使用统计
@@ -376,24 +991,53 @@ def main():
 
     print()
 
+    # 总耗时：并发模式下应接近最慢的单次调用
+    call_durations = [
+        result['duration']
+        for test_data in all_results
+        for result in test_data['results']
+        if 'error' not in result
+    ]
+    print('⏱️  总耗时')
+    print_separator('-')
+    print()
+    print(f'  实际总耗时: {format_duration(wall_ms)}')
+    cache_note = '（汇总表中 * 表示缓存结果）' if Config.RESPONSE_CACHE.enabled else ''
+    print(f'  {Config.RESPONSE_CACHE.summary()}{cache_note}')
+    if call_durations:
+        print(f'  调用耗时合计: {format_duration(sum(call_durations))}')
+        print(f'  最慢单次调用: {format_duration(max(call_durations))}')
+    print()
+    print_key_usage()
+
     print_separator()
     print('✅ 测试完成！')
     print_separator()
     print()
 
     # 保存测试结果到文件
-    timestamp = int(time.time() * 1000)
-    output_file = f'qwen-comparison-{timestamp}.json'
+    output_file = f'qwen-comparison-{run_id}.json'
 
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=2)
+        export_results_json(run_file, Config.TEST_QUERIES, output_file)
         print(f'📄 详细测试结果已保存到: {output_file}')
         print()
     except Exception as e:
         print(f'⚠️  保存测试结果失败: {e}')
         print()
 
+    # 写入跨运行结果库，用于查询各模型耗时/Token 趋势
+    try:
+        with ResultsStore() as store:
+            stored = store.add_run(run_id, 'test_model_comparison',
+                                   rows_from_model_comparison(all_results, run_id, Config.PROMPT_HASH),
+                                   meta={'stream': Config.STREAM, 'models': [m['model_id'] for m in Config.MODELS]})
+        print(f'🗄️  已写入结果库: {stored} 条（python scripts/results_store.py trend --model qwen-plus）')
+        print()
+    except Exception as e:
+        print(f'⚠️  写入结果库失败: {e}')
+        print()
+
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,120 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+
+const { createAnalyticsRollup, createHyperLogLog, pendingRecords } = require('../server/services/analytics-rollup.js');
+
+function hllOf(values) {
+    const hll = createHyperLogLog();
+    values.forEach((value) => hll.add(value));
+    return hll;
+}
+
+// 按 scripts/analytics_rollup.py 的格式写出汇总文件
+function writeRollup(dir, { visits, interactions }) {
+    const rollupPath = path.join(dir, 'analytics-rollup.json');
+    fs.writeFileSync(rollupPath, JSON.stringify({ version: 1, hllPrecision: 12, visits, interactions }));
+    return rollupPath;
+}
+
+const visitLogs = [
+    { id: 1, ip: '58.248.223.6', province: '广东省', date: '2026-05-10T01:00:00.000Z' },
+    { id: 2, ip: '114.114.114.114', province: '江苏省', date: '2026-05-10T02:00:00.000Z' },
+    { id: 3, ip: '58.248.223.7', province: '广东省', date: '2026-05-11T01:00:00.000Z' }
+];
+
+test('hyperloglog matches the python rollup script and estimates cardinality', () => {
+    // scripts/analytics_rollup.py 中 HyperLogLog().add('1.1.1.1') 写入寄存器 3592，值为 2
+    const single = hllOf(['1.1.1.1']);
+    assert.equal(single.registers[3592], 2);
+    assert.equal(single.registers.reduce((sum, value) => sum + (value > 0), 0), 1);
+
+    const values = Array.from({ length: 50000 }, (_, i) => `10.${i >> 16}.${(i >> 8) & 255}.${i & 255}`);
+    const hll = hllOf(values);
+    assert.ok(Math.abs(hll.count() - values.length) / values.length < 0.03);
+    assert.equal(createHyperLogLog(hll.encode()).count(), hll.count());
+    assert.equal(hllOf(['a', 'b', 'a']).count(), 2);
+});
+
+test('pending records are those after the checkpoint, or null when the log was rewritten', () => {
+    assert.deepEqual(pendingRecords(visitLogs, { processed: 2, lastId: 2 }).map((log) => log.id), [3]);
+    assert.deepEqual(pendingRecords(visitLogs, { processed: 0, lastId: null }).length, 3);
+    assert.equal(pendingRecords(visitLogs, { processed: 2, lastId: 7 }), null);
+    assert.equal(pendingRecords(visitLogs.slice(0, 1), { processed: 2, lastId: 2 }), null);
+});
+
+test('province counts add records logged after the rollup checkpoint', () => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'analytics-rollup-'));
+    try {
+        const rollupPath = writeRollup(dir, {
+            visits: { checkpoint: { processed: 2, lastId: 2 }, provinces: { '广东省': 1, '江苏省': 1 } },
+            interactions: { checkpoint: { processed: 0 }, days: {} }
+        });
+        const rollup = createAnalyticsRollup({ rollupPath });
+        assert.deepEqual(rollup.provinceCounts(visitLogs), { '广东省': 2, '江苏省': 1 });
+        assert.equal(rollup.provinceCounts([{ id: 9, province: '北京市' }]), null);
+        assert.equal(createAnalyticsRollup({ rollupPath: path.join(dir, 'missing.json') }).provinceCounts(visitLogs), null);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+});
+
+test('interaction summary skips reading an unchanged event log and merges new events otherwise', () => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'analytics-rollup-'));
+    try {
+        const eventsFile = path.join(dir, 'interaction-events.json');
+        const rolledUp = [
+            { id: 1, date: '2026-05-11', createdAt: '2026-05-11T01:00:00.000Z', eventType: 'nav_click', eventLabel: 'AI资讯', target: 'news.html', ip: '1.1.1.1' }
+        ];
+        fs.writeFileSync(eventsFile, JSON.stringify(rolledUp, null, 2));
+        const stat = fs.statSync(eventsFile);
+        const rollupPath = writeRollup(dir, {
+            visits: { checkpoint: { processed: 0 }, provinces: {} },
+            interactions: {
+                checkpoint: { processed: 1, lastId: 1, size: stat.size, mtimeMs: stat.mtimeMs },
+                days: {
+                    '2026-05-11': [{
+                        eventType: 'nav_click', eventLabel: 'AI资讯', target: 'news.html', clicks: 1,
+                        uniqueVisitors: 1, lastOccurredAt: '2026-05-11T01:00:00.000Z', hll: hllOf(['1.1.1.1']).encode()
+                    }],
+                    '2026-05-09': [{
+                        eventType: 'nav_click', eventLabel: '首页', target: 'index.html', clicks: 4,
+                        uniqueVisitors: 2, lastOccurredAt: '2026-05-09T01:00:00.000Z', hll: hllOf(['1.1.1.1', '2.2.2.2']).encode()
+                    }]
+                }
+            }
+        });
+        const rollup = createAnalyticsRollup({ rollupPath });
+        const range = { from: '2026-05-10', to: '2026-05-11' };
+
+        const unchanged = rollup.interactionSummary(range, {
+            sourceFile: eventsFile,
+            loadEvents: () => assert.fail('unchanged event log should not be read')
+        });
+        assert.deepEqual(unchanged.map((item) => [item.date, item.eventLabel, item.clicks, item.uniqueVisitors]), [
+            ['2026-05-11', 'AI资讯', 1, 1]
+        ]);
+
+        const events = [
+            ...rolledUp,
+            { id: 2, date: '2026-05-11', createdAt: '2026-05-11T03:00:00.000Z', eventType: 'nav_click', eventLabel: 'AI资讯', target: 'news.html', ip: '3.3.3.3' },
+            { id: 3, date: '2026-05-11', createdAt: '2026-05-11T02:00:00.000Z', eventType: 'nav_click', eventLabel: 'AI资讯', target: 'news.html', ip: '1.1.1.1' },
+            { id: 4, date: '2026-05-10', createdAt: '2026-05-10T02:00:00.000Z', eventType: 'nav_click', eventLabel: '首页', target: 'index.html', ip: '3.3.3.3' }
+        ];
+        fs.writeFileSync(eventsFile, JSON.stringify(events, null, 2));
+        const merged = rollup.interactionSummary(range, { sourceFile: eventsFile, loadEvents: () => events });
+        assert.deepEqual(merged.map((item) => [item.date, item.eventLabel, item.clicks, item.uniqueVisitors, item.lastOccurredAt]), [
+            ['2026-05-11', 'AI资讯', 3, 2, '2026-05-11T03:00:00.000Z'],
+            ['2026-05-10', '首页', 1, 1, '2026-05-10T02:00:00.000Z']
+        ]);
+
+        assert.equal(rollup.interactionSummary(range, { sourceFile: eventsFile, loadEvents: () => events.slice(1) }), null);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+});
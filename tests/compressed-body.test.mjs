@@ -0,0 +1,67 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import { EventEmitter } from 'node:events';
+import zlib from 'node:zlib';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+const { createCompressedJsonParser, parseByteLimit } = require('../server/app.js');
+
+function runParser(parser, { encoding, body }) {
+    return new Promise((resolve) => {
+        const req = new EventEmitter();
+        req.headers = { 'content-encoding': encoding };
+
+        const res = {
+            statusCode: 200,
+            status(code) {
+                this.statusCode = code;
+                return this;
+            },
+            json(payload) {
+                resolve({ statusCode: this.statusCode, payload, req });
+                return this;
+            }
+        };
+
+        parser(req, res, (error) => resolve({ statusCode: error ? 500 : 200, req, error }));
+        req.emit('data', body);
+        req.emit('end');
+    });
+}
+
+test('byte limits accept express-style size strings', () => {
+    assert.equal(parseByteLimit('64kb'), 64 * 1024);
+    assert.equal(parseByteLimit('10mb'), 10 * 1024 * 1024);
+    assert.equal(parseByteLimit(512), 512);
+    assert.throws(() => parseByteLimit('lots'), /Invalid body limit/);
+});
+
+test('brotli-encoded JSON bodies are decoded and marked as parsed', async () => {
+    const parser = createCompressedJsonParser({ limit: '1mb' });
+    const articles = [{ title: '标题', summary: '摘要'.repeat(50) }];
+    const body = zlib.brotliCompressSync(Buffer.from(JSON.stringify({ articles })));
+
+    const result = await runParser(parser, { encoding: 'br', body });
+
+    assert.equal(result.statusCode, 200);
+    assert.equal(result.req._body, true);
+    assert.deepEqual(result.req.body, { articles });
+});
+
+test('decoded bodies larger than the limit are rejected', async () => {
+    const parser = createCompressedJsonParser({ limit: '1kb' });
+    const body = zlib.brotliCompressSync(Buffer.from(JSON.stringify({ text: 'x'.repeat(4096) })));
+
+    const result = await runParser(parser, { encoding: 'br', body });
+
+    assert.equal(result.statusCode, 413);
+});
+
+test('gzip bodies are left to express.json', async () => {
+    const parser = createCompressedJsonParser({ limit: '1mb' });
+    const result = await runParser(parser, { encoding: 'gzip', body: zlib.gzipSync('{}') });
+
+    assert.equal(result.statusCode, 200);
+    assert.equal(result.req._body, undefined);
+});
@@ -0,0 +1,85 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+
+const { createIpLocator, ipv4ToInt } = require('../server/services/ip-locator.js');
+
+// 按 scripts/ip_province_db.py 的格式拼出一个小库：[起始IP, 结束IP, 地区下标]
+function buildDatabase(ranges, locations) {
+    const header = Buffer.alloc(16);
+    const records = Buffer.alloc(ranges.length * 10);
+    ranges.forEach(([start, end, index], i) => {
+        records.writeUInt32BE(ipv4ToInt(start), i * 10);
+        records.writeUInt32BE(ipv4ToInt(end), i * 10 + 4);
+        records.writeUInt16BE(index, i * 10 + 8);
+    });
+    header.write('IPPV', 0, 'latin1');
+    header.writeUInt16BE(1, 4);
+    header.writeUInt32BE(ranges.length, 8);
+    header.writeUInt32BE(16 + records.length, 12);
+    return Buffer.concat([header, records, Buffer.from(JSON.stringify(locations))]);
+}
+
+const buffer = buildDatabase([
+    ['1.0.0.0', '1.0.0.255', 0],
+    ['58.248.0.0', '58.255.255.255', 1],
+    ['223.104.0.0', '223.104.255.255', 2]
+], [['中国', '福建省'], ['中国', '广东省'], ['中国', '北京市']]);
+
+test('ip locator finds the range containing an address, including range bounds', () => {
+    const locator = createIpLocator({ buffer });
+    assert.equal(locator.available, true);
+    assert.equal(locator.records, 3);
+    assert.deepEqual(locator.lookup('58.248.223.6'), { country: '中国', province: '广东省' });
+    assert.deepEqual(locator.lookup('1.0.0.0'), { country: '中国', province: '福建省' });
+    assert.deepEqual(locator.lookup('223.104.255.255'), { country: '中国', province: '北京市' });
+    assert.deepEqual(locator.lookup('::ffff:58.250.1.1'), { country: '中国', province: '广东省' });
+});
+
+test('ip locator returns null for gaps, IPv6 and malformed addresses', () => {
+    const locator = createIpLocator({ buffer });
+    assert.equal(locator.lookup('0.255.255.255'), null);
+    assert.equal(locator.lookup('8.8.8.8'), null);
+    assert.equal(locator.lookup('255.255.255.255'), null);
+    assert.equal(locator.lookup('2001:db8::1'), null);
+    assert.equal(locator.lookup('1.0.0.256'), null);
+});
+
+test('ip locator keeps an LRU cache of recent lookups', () => {
+    const locator = createIpLocator({ buffer, cacheSize: 2 });
+    locator.lookup('1.0.0.1');
+    locator.lookup('58.248.0.1');
+    locator.lookup('1.0.0.1');
+    locator.lookup('223.104.0.1');
+    locator.lookup('1.0.0.1');
+
+    const stats = locator.stats();
+    assert.equal(stats.lookups, 5);
+    assert.equal(stats.cacheHits, 2);
+    assert.equal(stats.cacheSize, 2);
+});
+
+test('ip locator is unavailable without a database file and rejects foreign files', () => {
+    const locator = createIpLocator({ dbPath: '/nonexistent/ip-province.db' });
+    assert.equal(locator.available, false);
+    assert.equal(locator.lookup('58.248.223.6'), null);
+    assert.throws(() => createIpLocator({ buffer: Buffer.from('not a database file') }), /不是 IP 省份库文件/);
+});
+
+test('ip locator treats a corrupt database file as unavailable instead of failing startup', () => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ip-locator-'));
+    try {
+        const dbPath = path.join(dir, 'ip-province.db');
+        fs.writeFileSync(dbPath, buffer.subarray(0, 8));
+        const locator = createIpLocator({ dbPath });
+        assert.equal(locator.available, false);
+        assert.equal(locator.lookup('58.248.223.6'), null);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+});
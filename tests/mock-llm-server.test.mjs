@@ -0,0 +1,130 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+
+const { createMockLlmServer, sampleLatency, createRandom } = require('../scripts/mock-llm-server.js');
+
+async function withServer(options, run) {
+    const server = createMockLlmServer({ latencyScale: 0, ...options });
+    await new Promise((resolve) => server.listen(0, '127.0.0.1', resolve));
+    const url = `http://127.0.0.1:${server.address().port}/v1/chat/completions`;
+    try {
+        await run(url, server);
+    } finally {
+        await new Promise((resolve) => server.close(resolve));
+    }
+}
+
+function chatRequest(body) {
+    return {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            model: 'qwen-plus',
+            messages: [
+                { role: 'system', content: '你是助手' },
+                { role: 'user', content: '你好' }
+            ],
+            ...body
+        })
+    };
+}
+
+test('mock LLM returns a chat completion with a usage block', async () => {
+    await withServer({}, async (url) => {
+        const response = await fetch(url, chatRequest({ max_tokens: 10 }));
+        assert.equal(response.status, 200);
+        const data = await response.json();
+
+        assert.equal(data.object, 'chat.completion');
+        assert.equal(data.choices[0].finish_reason, 'length');
+        assert.equal(data.usage.completion_tokens, 10);
+        assert.equal(data.usage.prompt_tokens, 14);
+        assert.equal(data.usage.total_tokens, 24);
+        assert.ok(data.choices[0].message.content.length > 0);
+    });
+});
+
+test('mock LLM streams SSE chunks, usage and [DONE]', async () => {
+    await withServer({}, async (url) => {
+        const response = await fetch(url, chatRequest({
+            max_tokens: 5,
+            stream: true,
+            stream_options: { include_usage: true }
+        }));
+        assert.equal(response.headers.get('content-type'), 'text/event-stream; charset=utf-8');
+
+        const events = (await response.text()).split('\n\n').filter(Boolean).map((line) => line.replace(/^data: /, ''));
+        assert.equal(events.at(-1), '[DONE]');
+
+        const chunks = events.slice(0, -1).map((event) => JSON.parse(event));
+        const contentChunks = chunks.filter((chunk) => chunk.choices[0]?.delta?.content);
+        assert.equal(contentChunks.length, 5);
+        assert.equal(chunks.at(-1).usage.completion_tokens, 5);
+    });
+});
+
+test('mock LLM injects 429 with Retry-After and counts it', async () => {
+    await withServer({ rateLimitRate: 1, retryAfterSeconds: 3 }, async (url, server) => {
+        const response = await fetch(url, chatRequest({}));
+        assert.equal(response.status, 429);
+        assert.equal(response.headers.get('retry-after'), '3');
+        assert.equal(server.stats.rateLimited, 1);
+    });
+});
+
+test('latency sampling is reproducible for the same seed', () => {
+    const spec = { dist: 'lognormal', median: 400, sigma: 0.5 };
+    const first = createRandom(7);
+    const second = createRandom(7);
+    const a = Array.from({ length: 5 }, () => sampleLatency(spec, first));
+    const b = Array.from({ length: 5 }, () => sampleLatency(spec, second));
+
+    assert.deepEqual(a, b);
+    assert.ok(a.every((value) => value > 0));
+});
+
+test('mock LLM reports cached prefix tokens for a repeated system prompt', async () => {
+    await withServer({ prefixCacheMinTokens: 10 }, async (url, server) => {
+        const system = '你是新闻分析助手，'.repeat(20);
+        const send = (content) => fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                model: 'qwen-plus',
+                max_tokens: 1,
+                messages: [{ role: 'system', content }, { role: 'user', content: '你好' }]
+            })
+        }).then((response) => response.json());
+
+        const cold = await send(system);
+        const warm = await send(system);
+        const extended = await send(`${system}补充说明`);
+        const other = await send(`前缀不同。${system}`);
+
+        assert.equal(cold.usage.prompt_tokens_details.cached_tokens, 0);
+        assert.equal(warm.usage.prompt_tokens_details.cached_tokens, 165);
+        assert.equal(extended.usage.prompt_tokens_details.cached_tokens, 165);
+        assert.equal(other.usage.prompt_tokens_details.cached_tokens, 0);
+        assert.equal(server.stats.cachedPromptTokens, 330);
+    });
+});
+
+test('mock LLM limits requests per API key and reports when the window frees up', async () => {
+    await withServer({ keyRpm: 2 }, async (url, server) => {
+        const send = (key) => fetch(url, {
+            ...chatRequest({ max_tokens: 1 }),
+            headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${key}` }
+        });
+
+        assert.equal((await send('sk-a')).status, 200);
+        assert.equal((await send('sk-a')).status, 200);
+        const limited = await send('sk-a');
+        assert.equal(limited.status, 429);
+        assert.ok(Number(limited.headers.get('retry-after')) >= 59);
+        assert.equal((await send('sk-b')).status, 200);
+        assert.deepEqual(server.stats.requestsByKey, { 'sk-a': 3, 'sk-b': 1 });
+    });
+});
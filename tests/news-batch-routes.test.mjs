@@ -0,0 +1,147 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+const { createNewsRouter } = require('../server/routes/news.js');
+
+function invokeRouter(router, method, url, body) {
+    return new Promise((resolve, reject) => {
+        const req = {
+            method,
+            url,
+            originalUrl: url,
+            headers: {},
+            app: {},
+            baseUrl: '',
+            path: url,
+            query: {},
+            body
+        };
+
+        const res = {
+            statusCode: 200,
+            status(code) {
+                this.statusCode = code;
+                return this;
+            },
+            json(payload) {
+                resolve({ statusCode: this.statusCode, body: payload });
+                return this;
+            }
+        };
+
+        router.handle(req, res, (error) => {
+            if (error) {
+                reject(error);
+                return;
+            }
+
+            reject(new Error(`Route not handled: ${method} ${url}`));
+        });
+    });
+}
+
+function readJson(filePath) {
+    return JSON.parse(fs.readFileSync(filePath, 'utf8'));
+}
+
+// 与 server/runtime.js 的 archiveOldNews 相同：往日新闻追加到对应归档文件，news.json 只保留今日
+function createNewsFixture(dir, newsFile, dailyArchiveDir) {
+    let nextId = 0;
+    return {
+        readData: (filePath) => readJson(filePath),
+        writeData: (filePath, data) => {
+            fs.mkdirSync(path.dirname(filePath), { recursive: true });
+            fs.writeFileSync(filePath, JSON.stringify(data, null, 2));
+            return true;
+        },
+        generateId: (prefix) => `${prefix}-${++nextId}`,
+        archiveOldNews() {
+            const today = new Date().toISOString().split('T')[0];
+            const byDate = {};
+            const todayNews = [];
+            readJson(newsFile).forEach((article) => {
+                const date = article.created_at.split('T')[0];
+                if (date === today) {
+                    todayNews.push(article);
+                } else {
+                    (byDate[date] = byDate[date] || []).push(article);
+                }
+            });
+            Object.entries(byDate).forEach(([date, articles]) => {
+                const archiveFile = path.join(dailyArchiveDir, `news-${date}.json`);
+                const existing = fs.existsSync(archiveFile) ? readJson(archiveFile) : [];
+                fs.writeFileSync(archiveFile, JSON.stringify([...existing, ...articles], null, 2));
+            });
+            fs.writeFileSync(newsFile, JSON.stringify(todayNews, null, 2));
+            return { archived: Object.keys(byDate).length, todayCount: todayNews.length };
+        },
+        authenticateToken: (req, res, next) => next(),
+        newsFile,
+        settingsFile: path.join(dir, 'settings.json'),
+        dataDir: dir,
+        dailyArchiveDir
+    };
+}
+
+test('batch import for a past date replaces that day archive without duplicating unarchived articles', async () => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'news-batch-'));
+    try {
+        const newsFile = path.join(dir, 'news.json');
+        const dailyArchiveDir = path.join(dir, 'archive', 'daily');
+        fs.mkdirSync(dailyArchiveDir, { recursive: true });
+
+        const now = Date.now();
+        const today = new Date(now).toISOString().split('T')[0];
+        const yesterday = new Date(now - 24 * 60 * 60 * 1000).toISOString().split('T')[0];
+        fs.writeFileSync(newsFile, JSON.stringify([
+            { id: 'old-1', title: '昨日旧闻', source_url: 'https://a.example/old', created_at: `${yesterday}T01:00:00.000Z` },
+            { id: 'today-1', title: '今日新闻', source_url: 'https://a.example/today', created_at: `${today}T01:00:00.000Z` }
+        ]));
+
+        const podcastCalls = [];
+        const fixture = createNewsFixture(dir, newsFile, dailyArchiveDir);
+        const router = createNewsRouter({
+            ...fixture,
+            podcastService: {
+                generateNewsPodcast: async (date) => {
+                    podcastCalls.push(date);
+                    return { status: 'queued' };
+                }
+            }
+        });
+
+        const response = await invokeRouter(router, 'POST', '/news/batch', {
+            date: yesterday,
+            podcast: false,
+            articles: [
+                { title: '补录一', summary: '摘要一', source_url: 'https://a.example/1' },
+                { title: '补录二', summary: '摘要二', source_url: 'https://a.example/2' }
+            ]
+        });
+
+        assert.equal(response.statusCode, 200);
+        assert.equal(response.body.dateCount, 2);
+        assert.equal(response.body.todayCount, 0);
+        assert.deepEqual(response.body.podcast, { date: yesterday, triggered: false });
+
+        const archiveFile = path.join(dailyArchiveDir, `news-${yesterday}.json`);
+        const archived = readJson(archiveFile);
+        assert.deepEqual(archived.map((article) => article.title), ['补录一', '补录二']);
+        assert.ok(archived.every((article) => article.created_at.startsWith(yesterday) && article.is_today === false));
+        assert.deepEqual(readJson(newsFile).map((article) => article.id), ['today-1']);
+
+        // 之后的导入再次归档时不应把昨日旧闻追加回补录后的文件
+        fixture.archiveOldNews();
+        assert.equal(readJson(archiveFile).length, 2);
+
+        await new Promise((resolve) => setImmediate(resolve));
+        assert.deepEqual(podcastCalls, []);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+});
@@ -0,0 +1,132 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+const {
+    articleKey,
+    articleContentHash,
+    buildHashIndex,
+    indexDigest,
+    applyNewsDelta,
+    applyHashDelta,
+    createHashIndexCache
+} = require('../server/services/news-delta.js');
+
+function normalize(article) {
+    return {
+        id: `new-${article.title}`,
+        title: article.title,
+        summary: article.summary,
+        source_url: article.source_url || '#',
+        created_at: '2026-03-01T08:00:00.000Z'
+    };
+}
+
+test('article key prefers source_url and falls back to title', () => {
+    assert.equal(articleKey({ source_url: 'https://a.example/1', title: 'A' }), 'https://a.example/1');
+    assert.equal(articleKey({ url: 'https://a.example/2', title: 'A' }), 'https://a.example/2');
+    assert.equal(articleKey({ source_url: '#', title: 'A' }), 'title:A');
+});
+
+test('content hash matches the Python uploader fixture', () => {
+    // 与 scripts/auto_upload_news.py 中 article_content_hash 的结果保持一致
+    assert.equal(
+        articleContentHash({ source_url: 'https://a.example/1', title: '标题', summary: '摘要' }),
+        '9ba0fe852d4fc628447966df1cf57f558df9c5a9497eeec3c91897ff00706c5f'
+    );
+    assert.equal(
+        articleContentHash({ url: 'https://a.example/1', title: '标题', summary: '摘要' }),
+        articleContentHash({ source_url: 'https://a.example/1', title: '标题', summary: '摘要' })
+    );
+});
+
+test('index digest is independent of article order', () => {
+    const first = { source_url: 'https://a.example/1', title: 'A', summary: 'a' };
+    const second = { source_url: 'https://a.example/2', title: 'B', summary: 'b' };
+
+    assert.equal(
+        indexDigest(buildHashIndex([first, second])),
+        indexDigest(buildHashIndex([second, first]))
+    );
+});
+
+test('applyNewsDelta updates in place, appends new articles and removes by key', () => {
+    const current = [
+        { id: '1', title: 'A', summary: 'a', source_url: 'https://a.example/1', created_at: '2026-03-01T01:00:00.000Z' },
+        { id: '2', title: 'B', summary: 'b', source_url: 'https://a.example/2', created_at: '2026-03-01T01:00:00.000Z' },
+        { id: '3', title: 'C', summary: 'c', source_url: 'https://a.example/3', created_at: '2026-03-01T01:00:00.000Z' }
+    ];
+
+    const result = applyNewsDelta(current, {
+        upsert: [
+            { title: 'B', summary: 'b2', source_url: 'https://a.example/2' },
+            { title: 'D', summary: 'd', source_url: 'https://a.example/4' }
+        ],
+        remove: ['https://a.example/3']
+    }, normalize);
+
+    assert.equal(result.added, 1);
+    assert.equal(result.updated, 1);
+    assert.equal(result.removed, 1);
+    assert.deepEqual(result.news.map((article) => article.id), ['1', '2', 'new-D']);
+    assert.equal(result.news[1].summary, 'b2');
+    assert.equal(result.news[1].created_at, '2026-03-01T01:00:00.000Z');
+});
+
+test('applyHashDelta matches rebuilding the index from the updated list', () => {
+    const current = [
+        { id: '1', title: 'A', summary: 'a', source_url: 'https://a.example/1' },
+        { id: '2', title: 'B', summary: 'b', source_url: 'https://a.example/2' }
+    ];
+    const delta = {
+        upsert: [
+            { title: 'B', summary: 'b2', source_url: 'https://a.example/2' },
+            { title: 'C', summary: 'c', source_url: 'https://a.example/3' }
+        ],
+        remove: ['https://a.example/1']
+    };
+
+    assert.deepEqual(
+        applyHashDelta(buildHashIndex(current), delta),
+        buildHashIndex(applyNewsDelta(current, delta, normalize).news)
+    );
+});
+
+test('hash index cache reuses hashes until the file or scope changes', () => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'news-delta-'));
+    try {
+        const newsFile = path.join(dir, 'news.json');
+        const articles = [{ title: 'A', summary: 'a', source_url: 'https://a.example/1' }];
+        fs.writeFileSync(newsFile, JSON.stringify(articles));
+
+        const cache = createHashIndexCache();
+        let loads = 0;
+        const load = () => {
+            loads += 1;
+            return JSON.parse(fs.readFileSync(newsFile, 'utf8'));
+        };
+
+        const first = cache.get(newsFile, '2026-03-01', load);
+        assert.equal(first.digest, indexDigest(buildHashIndex(articles)));
+        assert.equal(cache.get(newsFile, '2026-03-01', load), first);
+        assert.equal(loads, 1);
+
+        cache.get(newsFile, '2026-03-02', load);
+        assert.equal(loads, 2);
+
+        const updated = [...articles, { title: 'B', summary: 'b', source_url: 'https://a.example/2' }];
+        fs.writeFileSync(newsFile, JSON.stringify(updated, null, 2));
+        assert.equal(cache.get(newsFile, '2026-03-02', load).digest, indexDigest(buildHashIndex(updated)));
+        assert.equal(loads, 3);
+
+        const registered = cache.set(newsFile, '2026-03-02', buildHashIndex(updated));
+        assert.equal(cache.get(newsFile, '2026-03-02', load), registered);
+        assert.equal(loads, 3);
+    } finally {
+        fs.rmSync(dir, { recursive: true, force: true });
+    }
+});
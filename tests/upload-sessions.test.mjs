@@ -0,0 +1,66 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+
+const require = createRequire(import.meta.url);
+const { createUploadSessionStore, UploadSessionError } = require('../server/services/upload-sessions.js');
+
+function createTempStore(options = {}) {
+    const sessionsDir = fs.mkdtempSync(path.join(os.tmpdir(), 'upload-sessions-'));
+    return { sessionsDir, store: createUploadSessionStore({ sessionsDir, ...options }) };
+}
+
+test('upload session collects chunks in order and reports the next missing chunk', () => {
+    const { store } = createTempStore();
+    const session = store.createSession({ date: '2026-02-25' });
+
+    assert.equal(session.nextChunk, 0);
+    assert.equal(session.date, '2026-02-25');
+
+    store.putChunk(session.sessionId, 0, [{ title: 'a' }, { title: 'b' }]);
+    const afterGap = store.putChunk(session.sessionId, 2, [{ title: 'e' }]);
+    assert.equal(afterGap.nextChunk, 1);
+    assert.equal(afterGap.receivedChunks, 2);
+
+    assert.throws(
+        () => store.collectArticles(session.sessionId, 3),
+        (error) => error instanceof UploadSessionError && error.statusCode === 409
+    );
+
+    const resumed = store.putChunk(session.sessionId, 1, [{ title: 'c' }, { title: 'd' }]);
+    assert.equal(resumed.nextChunk, 3);
+
+    // 重复上传同一分块是幂等的
+    store.putChunk(session.sessionId, 1, [{ title: 'c' }, { title: 'd' }]);
+
+    const articles = store.collectArticles(session.sessionId, 3);
+    assert.deepEqual(articles.map((article) => article.title), ['a', 'b', 'c', 'd', 'e']);
+});
+
+test('upload session rejects unknown ids and invalid chunk payloads', () => {
+    const { store } = createTempStore();
+    const session = store.createSession();
+
+    assert.throws(() => store.describe('../../etc'), /无效的上传会话ID/);
+    assert.throws(
+        () => store.describe('00000000-0000-4000-8000-000000000000'),
+        (error) => error.statusCode === 404
+    );
+    assert.throws(() => store.putChunk(session.sessionId, -1, []), /无效的分块序号/);
+    assert.throws(() => store.putChunk(session.sessionId, 0, { title: 'x' }), /新闻数据格式错误/);
+});
+
+test('expired upload sessions are cleaned up', () => {
+    let currentTime = Date.parse('2026-03-01T00:00:00Z');
+    const { sessionsDir, store } = createTempStore({ ttlMs: 1000, now: () => currentTime });
+    const session = store.createSession();
+    store.putChunk(session.sessionId, 0, [{ title: 'a' }]);
+
+    assert.equal(store.cleanupExpired(), 0);
+    currentTime += 2000;
+    assert.equal(store.cleanupExpired(), 1);
+    assert.equal(fs.existsSync(path.join(sessionsDir, session.sessionId)), false);
+});